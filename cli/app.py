@@ -1,27 +1,12 @@
-import logging
-from random import randint
+"""Script to serve the read-only query API over stored chains, surfaces and history."""
 
-from flask import Flask, request
+from microservices.query_api.service import serve
 
-app = Flask(__name__)
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
-
-@app.route("/rolldice", methods=["GET"])
-def roll_dice():
-    player = request.args.get("player", default=None, type=str)
-    result = str(roll())
-    if player:
-        logger.warning("%s is rolling the dice: %s", player, result)
-    else:
-        logger.warning("Anonymous player is rolling the dice: %s", result)
-    return result
-
-
-def roll():
-    return randint(1, 6)
+def main():
+    """Serve chains, surfaces and snapshot history from an in-process response cache."""
+    serve()
 
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=8080)
+    main()
@@ -0,0 +1,12 @@
+"""Script to backfill the typed greek columns of stored option snapshots."""
+
+from microservices.snapshot_ingestor.service import backfill_greeks
+
+
+def main():
+    """Copy the legacy greeks JSON into delta/gamma/theta/vega, chunk by chunk."""
+    backfill_greeks()
+
+
+if __name__ == "__main__":
+    main()
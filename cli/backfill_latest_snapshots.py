@@ -0,0 +1,12 @@
+"""Script to seed the latest-snapshot-per-contract table from the snapshot history."""
+
+from microservices.snapshot_ingestor.service import backfill_latest
+
+
+def main():
+    """Copy each contract's newest stored snapshot into option_snapshot_latest."""
+    backfill_latest()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Script to backfill the moneyness and years-to-expiry columns of stored option snapshots."""
+
+from microservices.snapshot_ingestor.service import backfill_moneyness
+
+
+def main():
+    """Derive moneyness, log-moneyness and years to expiry from each row's contract."""
+    backfill_moneyness()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Script to calibrate SVI smiles for the stored option chains of the watchlist."""
+
+from microservices.analytics.service import calibrate
+
+
+def main():
+    """Fit every expiry of every active underlying and store the parameters as a new run."""
+    calibrate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Script to bulk-load spooled option snapshots into the database."""
+
+from microservices.snapshot_ingestor.service import drain
+
+
+def main():
+    """Drain the local snapshot write-ahead spool (INGEST_SPOOL_DIR) into Postgres."""
+    drain()
+
+
+if __name__ == "__main__":
+    main()
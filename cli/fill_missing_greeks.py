@@ -0,0 +1,12 @@
+"""Script to fill missing implied volatility and greeks of recent option snapshots."""
+
+from microservices.analytics.service import fill_greeks
+
+
+def main():
+    """Solve IV from the day's close and compute greeks where Polygon sent none."""
+    fill_greeks()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,40 @@
+"""AWS Lambda entry points.
+
+Each handler imports its ingestion stack on first use, so the container's init phase only
+loads ``json`` and ``logging``. The event loop, Prisma connection, HTTP pool and telemetry
+providers then live at module scope in ``microservices.shared.lambda_runtime`` and are
+reused, after a health check, by every warm invocation of the same container.
+"""
+
 import json
 import logging
 
-from cli.ingest_options import main as ingest_options_main
-from cli.ingest_snapshots import main as ingest_snapshots_main
-
 logger = logging.getLogger(__name__)
 
 
 def ping(event, context):
-    """Ping function to keep the Lambda warm."""
-    return {
-        "statusCode": 200,
-        "body": json.dumps({"message": "Lambda is warm!"}),
-    }
+    """Keep the Lambda warm by opening the snapshot ingestion resources ahead of time."""
+    try:
+        from microservices.shared.lambda_runtime import runtime
+        from microservices.snapshot_ingestor.service import warm_lambda
+
+        warm_lambda(runtime)
+    except Exception as e:
+        logger.exception("Error while pre-warming the Lambda container: %s", e)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+    return _warm_response()
 
 
 def ingest_options_handler(event, context):
     """Lambda handler to trigger the ingestion of option contracts."""
     try:
-        ingest_options_main()
+        from microservices.option_ingestor.service import run_lambda
+        from microservices.shared.lambda_runtime import runtime
+
+        if _is_warmup(event):
+            runtime.run(runtime.ensure_database())
+            return _warm_response()
+        run_lambda(runtime)
         return {
             "statusCode": 200,
             "body": json.dumps({"message": "Options ingestion completed successfully"}),
@@ -30,8 +46,13 @@ def ingest_options_handler(event, context):
 
 def ingest_option_snapshots_handler(event, context):
     """Lambda handler to trigger the ingestion of option snapshots."""
+    if _is_warmup(event):
+        return ping(event, context)
     try:
-        ingest_snapshots_main()
+        from microservices.shared.lambda_runtime import runtime
+        from microservices.snapshot_ingestor.service import run_lambda
+
+        run_lambda(runtime)
         return {
             "statusCode": 200,
             "body": json.dumps({"message": "Option snapshots ingestion completed successfully"}),
@@ -41,6 +62,35 @@ def ingest_option_snapshots_handler(event, context):
         return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
 
 
+def fan_out_ingestion_handler(event, context):
+    """Fan-out coordinator: invoke one worker per shard of ``event["job"]`` and aggregate.
+
+    ``event`` is ``{"job": "option_contracts" | "option_snapshots", "shard_count": N}``; the
+    shard count defaults to ``FANOUT_SHARD_COUNT``.
+    """
+    try:
+        from microservices.shared.fanout import coordinate
+
+        report = coordinate(event, worker=ingest_shard_handler)
+        return {"statusCode": 200 if report.ok else 500, "body": json.dumps(report.to_dict())}
+    except Exception as e:
+        logger.exception("Error during fan-out ingestion: %s", e)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+def ingest_shard_handler(event, context):
+    """Fan-out worker: ingest only the shard a coordinator assigned in ``event``."""
+    try:
+        from microservices.shared.fanout import ShardTask, run_shard
+        from microservices.shared.lambda_runtime import runtime
+
+        result = run_shard(runtime, ShardTask.from_payload(event))
+        return {"statusCode": 200, "body": json.dumps(result.to_dict())}
+    except Exception as e:
+        logger.exception("Error during shard ingestion: %s", e)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
 def migrate_expired_options_handler(event, context):
     """Lambda handler for migrating expired options. Not yet implemented."""
     try:
@@ -48,3 +98,12 @@ def migrate_expired_options_handler(event, context):
     except Exception as e:
         logger.exception("Error during expired options migration: %s", e)
         return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+def _is_warmup(event) -> bool:
+    """Scheduled keep-warm events target the ingestion function with ``{"warmup": true}``."""
+    return isinstance(event, dict) and bool(event.get("warmup"))
+
+
+def _warm_response():
+    return {"statusCode": 200, "body": json.dumps({"message": "Lambda is warm!"})}
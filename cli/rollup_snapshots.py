@@ -0,0 +1,12 @@
+"""Script to roll option snapshot history up into daily tables."""
+
+from microservices.snapshot_ingestor.service import rollup_daily
+
+
+def main():
+    """Aggregate every snapshot day through yesterday that has not been rolled up yet."""
+    rollup_daily()
+
+
+if __name__ == "__main__":
+    main()
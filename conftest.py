@@ -57,6 +57,18 @@ if PRISMA_MODELS_MODULE not in sys.modules:
     class OptionSnapshot(_BaseModel):
         pass
 
+    class IngestLease(_BaseModel):
+        pass
+
+    class SmileCalibrationRun(_BaseModel):
+        pass
+
+    class SmileFit(_BaseModel):
+        pass
+
     prisma_models.Options = Options
     prisma_models.OptionSnapshot = OptionSnapshot
+    prisma_models.IngestLease = IngestLease
+    prisma_models.SmileCalibrationRun = SmileCalibrationRun
+    prisma_models.SmileFit = SmileFit
     sys.modules[PRISMA_MODELS_MODULE] = prisma_models
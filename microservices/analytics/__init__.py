@@ -0,0 +1,46 @@
+"""NumPy analytics over stored option snapshots (install with the ``analytics`` extra)."""
+
+from microservices.analytics.backtest import (
+    BacktestResult,
+    Leg,
+    Rules,
+    SnapshotCube,
+    Strategy,
+    covered_call,
+    iron_condor,
+    load_snapshot_cube,
+    run_backtest,
+    vertical,
+)
+from microservices.analytics.black_scholes import Greeks, bs_greeks, bs_price, implied_vol
+from microservices.analytics.chains import ChainArrays, load_latest_chain
+from microservices.analytics.greek_fill import fill_missing_greeks
+from microservices.analytics.surface import SurfaceCache, VolSurface, build_surface, get_surface
+from microservices.analytics.svi import SviFit, SviParams, calibrate_chain
+
+__all__ = [
+    "BacktestResult",
+    "ChainArrays",
+    "Greeks",
+    "Leg",
+    "Rules",
+    "SnapshotCube",
+    "Strategy",
+    "SurfaceCache",
+    "SviFit",
+    "SviParams",
+    "VolSurface",
+    "bs_greeks",
+    "bs_price",
+    "build_surface",
+    "calibrate_chain",
+    "covered_call",
+    "fill_missing_greeks",
+    "get_surface",
+    "implied_vol",
+    "iron_condor",
+    "load_latest_chain",
+    "load_snapshot_cube",
+    "run_backtest",
+    "vertical",
+]
@@ -0,0 +1,556 @@
+"""Vectorized backtests of rule-based option strategies over stored snapshot history.
+
+History is loaded into a ``SnapshotCube``: the last snapshot of every contract on every New
+York trading day, as (date x contract) arrays. A strategy's legs are picked for every date
+at once, every candidate position is marked to market over the whole history at once, and
+only the accepted trades are walked in Python, so a year of a full chain takes well under a
+second.
+
+Fills happen at ``day_close`` with slippage against the trader: buys pay
+``max(close * slippage_pct, min_slippage)`` more per share, sells receive that much less.
+Positions still open at expiry are settled at intrinsic value without slippage.
+"""
+
+import os
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+import numpy as np
+
+from microservices.shared import decorator
+from microservices.shared.market_calendar import MARKET_TIME_ZONE
+
+BACKTEST_SLIPPAGE_PCT = float(os.getenv("BACKTEST_SLIPPAGE_PCT", "0.01"))
+BACKTEST_MIN_SLIPPAGE = float(os.getenv("BACKTEST_MIN_SLIPPAGE", "0.01"))
+CONTRACT_MULTIPLIER = 100
+# The last snapshot of each contract per New York trading day; expiries are stored as
+# 23:59 New York, so their New York date is the listed expiration date.
+DAILY_SNAPSHOTS_SQL = """
+SELECT DISTINCT ON (s.ticker, trade_date)
+    (s.last_updated AT TIME ZONE 'America/New_York')::date AS trade_date,
+    (o.expiration_date AT TIME ZONE 'America/New_York')::date AS expiration_date,
+    o.strike_price, o.contract_type, s.day_close, s.underlying_price,
+    s.delta, s.gamma, s.theta, s.vega
+FROM option_snapshots AS s
+JOIN options AS o ON o.ticker = s.ticker
+WHERE o.underlying_ticker = $1
+  AND s.last_updated >= $2::timestamptz
+  AND s.last_updated < $3::timestamptz
+ORDER BY s.ticker, trade_date, s.last_updated DESC
+"""
+EXIT_REASONS = ("expiry", "stop_loss", "profit_target", "exit_dte", "max_hold", "open")
+_GREEK_FIELDS = ("delta", "gamma", "theta", "vega")
+# Contract keys pack (expiry day, call flag, strike in thousandths) into one int64.
+_STRIKE_SCALE = 1000
+_KEY_STRIKE_SPAN = 10**9
+_EPOCH = date(1970, 1, 1)
+
+
+@dataclass(frozen=True, eq=False)
+class SnapshotCube:
+    """Close-of-day snapshots of one underlying's chain, one row per date.
+
+    Contracts are sorted by expiry, then puts before calls, then strike, so a (date, expiry,
+    strike, type) cell is ``close[date_index, contract_index(...)]``. Missing snapshots are
+    NaN. ``spot`` is the mean stored underlying price of each date.
+    """
+
+    underlying: str
+    dates: np.ndarray  # datetime64[D], ascending
+    spot: np.ndarray
+    expiry: np.ndarray  # datetime64[D] per contract
+    strike: np.ndarray
+    is_call: np.ndarray
+    close: np.ndarray  # (date, contract)
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    vega: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.close.shape
+
+    def contract_index(self, expiry: date, strike: float, is_call: bool) -> int:
+        """Column of one contract, or -1 when it never appears in the history."""
+        keys = _contract_keys(self.expiry, self.strike, self.is_call)
+        key = _contract_keys(
+            np.array([expiry], dtype="datetime64[D]"), np.array([strike]), np.array([is_call])
+        )[0]
+        index = int(np.searchsorted(keys, key))
+        return index if index < len(keys) and keys[index] == key else -1
+
+    @classmethod
+    def from_rows(cls, underlying: str, rows: Sequence[Mapping[str, Any]]) -> "SnapshotCube":
+        trade_day = _days(row["trade_date"] for row in rows)
+        expiry_day = _days(row["expiration_date"] for row in rows)
+        strike = _column(rows, "strike_price")
+        is_call = np.array(
+            [str(row.get("contract_type", "")).lower() == "call" for row in rows], dtype=bool
+        )
+        dates, date_of_row = np.unique(trade_day, return_inverse=True)
+        keys, contract_of_row = np.unique(
+            _contract_keys(expiry_day, strike, is_call), return_inverse=True
+        )
+        shape = (len(dates), len(keys))
+
+        def cells(name: str) -> np.ndarray:
+            values = np.full(shape, np.nan)
+            values[date_of_row, contract_of_row] = _column(rows, name)
+            return values
+
+        spot = _column(rows, "underlying_price")
+        quoted = np.isfinite(spot)
+        totals = np.bincount(date_of_row[quoted], weights=spot[quoted], minlength=len(dates))
+        counts = np.bincount(date_of_row[quoted], minlength=len(dates))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_spot = totals / counts
+        contract_expiry, contract_strike, contract_is_call = _decode_contract_keys(keys)
+        return cls(
+            underlying=underlying,
+            dates=dates.astype("datetime64[D]"),
+            spot=mean_spot,
+            expiry=contract_expiry,
+            strike=contract_strike,
+            is_call=contract_is_call,
+            close=cells("day_close"),
+            **{name: cells(name) for name in _GREEK_FIELDS},
+        )
+
+
+@dataclass(frozen=True)
+class Leg:
+    """One leg. ``quantity`` is signed (negative sells), in contracts or 100-share lots.
+
+    Option strikes are picked by the closest absolute ``delta`` or, without one, the closest
+    ``moneyness`` (strike / spot).
+    """
+
+    kind: str  # "call", "put" or "stock"
+    quantity: int
+    delta: float | None = None
+    moneyness: float | None = None
+
+    def __post_init__(self):
+        """Reject leg kinds and option legs the strike picker cannot handle."""
+        if self.kind not in {"call", "put", "stock"}:
+            raise ValueError(f"Unknown leg kind {self.kind!r}")
+        if self.kind != "stock" and self.delta is None and self.moneyness is None:
+            raise ValueError("Option legs need a target delta or moneyness")
+
+
+@dataclass(frozen=True)
+class Rules:
+    """Entry and exit rules; every option leg of a position shares one expiry.
+
+    A position opens at the close of an eligible day: one whose weekday is in
+    ``entry_weekdays`` (Monday is 0; None allows all) and whose chain quotes every leg.
+    With ``one_at_a_time`` the next position opens no earlier than the day the previous one
+    closed; otherwise one opens on every eligible day. A position closes at the first close
+    where its P&L reaches ``profit_target`` times its premium, or loses ``stop_loss`` times
+    it, where at most ``exit_dte`` days are left, or after ``max_hold_days`` calendar days.
+    Otherwise it is settled on its expiry date.
+    """
+
+    target_dte: int = 30
+    min_dte: int = 7
+    entry_weekdays: tuple[int, ...] | None = None
+    one_at_a_time: bool = True
+    profit_target: float | None = None
+    stop_loss: float | None = None
+    exit_dte: int | None = None
+    max_hold_days: int | None = None
+
+
+@dataclass(frozen=True)
+class Strategy:
+    name: str
+    legs: tuple[Leg, ...]
+    rules: Rules = field(default_factory=Rules)
+
+
+@dataclass(frozen=True)
+class Trade:
+    """One position; values are fill values of the holdings, negative for a net credit."""
+
+    entry_date: date
+    exit_date: date | None
+    expiry: date
+    strikes: tuple[float, ...]  # option legs, in leg order
+    entry_value: float
+    exit_value: float
+    pnl: float
+    exit_reason: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "entry_date": self.entry_date.isoformat(),
+            "exit_date": self.exit_date.isoformat() if self.exit_date else None,
+            "expiry": self.expiry.isoformat(),
+            "strikes": list(self.strikes),
+            "entry_value": self.entry_value,
+            "exit_value": self.exit_value,
+            "pnl": self.pnl,
+            "exit_reason": self.exit_reason,
+        }
+
+
+@dataclass(frozen=True, eq=False)
+class BacktestResult:
+    """Daily P&L curve and greek exposure at each close, in dollars and shares.
+
+    ``pnl`` is cumulative: realized trades plus open positions marked at ``day_close``.
+    Exposure counts positions open after the close: ``delta`` and ``gamma`` in shares,
+    ``theta`` in dollars per day, ``vega`` in dollars per volatility point.
+    """
+
+    strategy: str
+    underlying: str
+    dates: np.ndarray
+    pnl: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    vega: np.ndarray
+    trades: list[Trade]
+
+    @property
+    def daily_pnl(self) -> np.ndarray:
+        return np.diff(self.pnl, prepend=0.0)
+
+    @property
+    def max_drawdown(self) -> float:
+        if not len(self.pnl):
+            return 0.0
+        return float(np.max(np.maximum.accumulate(np.maximum(self.pnl, 0.0)) - self.pnl))
+
+    @property
+    def win_rate(self) -> float | None:
+        closed = [trade for trade in self.trades if trade.exit_reason != "open"]
+        if not closed:
+            return None
+        return sum(trade.pnl > 0 for trade in closed) / len(closed)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "underlying": self.underlying,
+            "dates": [str(day) for day in self.dates],
+            "pnl": self.pnl.tolist(),
+            **{name: getattr(self, name).tolist() for name in _GREEK_FIELDS},
+            "max_drawdown": self.max_drawdown,
+            "win_rate": self.win_rate,
+            "trades": [trade.to_dict() for trade in self.trades],
+        }
+
+
+def covered_call(call_delta: float = 0.30, rules: Rules | None = None) -> Strategy:
+    """100 shares with one short call, held to expiry and written again."""
+    return Strategy(
+        "covered_call",
+        (Leg("stock", 1), Leg("call", -1, delta=call_delta)),
+        rules or Rules(target_dte=30),
+    )
+
+
+def vertical(
+    kind: str = "put",
+    short_delta: float = 0.30,
+    long_delta: float = 0.15,
+    rules: Rules | None = None,
+) -> Strategy:
+    """Trade a one-lot vertical; a credit spread when the short leg has the larger delta."""
+    return Strategy(
+        f"{kind}_vertical",
+        (Leg(kind, -1, delta=short_delta), Leg(kind, 1, delta=long_delta)),
+        rules or Rules(target_dte=30, profit_target=0.5, stop_loss=2.0),
+    )
+
+
+def iron_condor(
+    short_delta: float = 0.16, wing_delta: float = 0.05, rules: Rules | None = None
+) -> Strategy:
+    """Short put and call at ``short_delta`` with long wings at ``wing_delta``."""
+    return Strategy(
+        "iron_condor",
+        (
+            Leg("put", 1, delta=wing_delta),
+            Leg("put", -1, delta=short_delta),
+            Leg("call", -1, delta=short_delta),
+            Leg("call", 1, delta=wing_delta),
+        ),
+        rules or Rules(target_dte=45, profit_target=0.5, stop_loss=2.0, exit_dte=21),
+    )
+
+
+async def load_snapshot_cube(underlying: str, start: date, end: date) -> SnapshotCube:
+    """Last snapshot of each contract of ``underlying`` per New York day in [start, end]."""
+    start_at = MARKET_TIME_ZONE.localize(datetime.combine(start, time()))
+    end_at = MARKET_TIME_ZONE.localize(datetime.combine(end + timedelta(days=1), time()))
+    rows = await decorator._get_db().query_raw(
+        DAILY_SNAPSHOTS_SQL, underlying, start_at.isoformat(), end_at.isoformat()
+    )
+    return SnapshotCube.from_rows(underlying, rows)
+
+
+def run_backtest(
+    cube: SnapshotCube,
+    strategy: Strategy,
+    slippage_pct: float = BACKTEST_SLIPPAGE_PCT,
+    min_slippage: float = BACKTEST_MIN_SLIPPAGE,
+) -> BacktestResult:
+    """Trade ``strategy`` over the cube's history and return its P&L and exposure."""
+    option_legs = [leg for leg in strategy.legs if leg.kind != "stock"]
+    if not option_legs:
+        raise ValueError("A strategy needs at least one option leg")
+    rules = strategy.rules
+    dates_count = len(cube.dates)
+    day = np.arange(dates_count)[:, None]
+    quantity = np.array([leg.quantity for leg in option_legs], dtype=np.float64)
+    stock_lots = float(sum(leg.quantity for leg in strategy.legs if leg.kind == "stock"))
+    spot = _forward_fill(cube.spot[:, None])[:, 0]
+
+    legs = _pick_legs(cube, option_legs, rules)
+    eligible = (legs >= 0).all(axis=1) & np.isfinite(cube.spot)
+    if rules.entry_weekdays is not None:
+        eligible &= np.isin(_weekday(cube.dates), rules.entry_weekdays)
+    entry = np.flatnonzero(eligible)
+    candidates = np.arange(len(entry))
+    columns, leg_columns = np.unique(legs[entry], return_inverse=True)
+    leg_columns = leg_columns.reshape(len(entry), len(option_legs))
+    price = _forward_fill(cube.close[:, columns])[:, leg_columns]  # (date, position, leg)
+    strike = cube.strike[legs[entry]]
+    is_call = cube.is_call[legs[entry]]
+    expiry = cube.expiry[legs[entry, 0]]
+
+    def holdings(option_price: np.ndarray, stock_price: np.ndarray) -> np.ndarray:
+        return CONTRACT_MULTIPLIER * (option_price @ quantity + stock_lots * stock_price)
+
+    def slipped(values: np.ndarray, side: np.ndarray | float) -> np.ndarray:
+        return values + np.sign(side) * np.maximum(values * slippage_pct, min_slippage)
+
+    entry_price = price[entry, candidates]
+    entry_value = holdings(
+        slipped(entry_price, quantity), slipped(spot[entry], stock_lots) if stock_lots else 0.0
+    )
+    premium = np.abs(CONTRACT_MULTIPLIER * (slipped(entry_price, quantity) @ quantity))
+    mark = holdings(price, spot[:, None]) - entry_value
+    exit_day, reason = _first_exits(rules, cube.dates, entry, expiry, mark, premium)
+    closed = exit_day < dates_count
+
+    last_day = np.minimum(exit_day, dates_count - 1)
+    exit_spot = spot[last_day]
+    settled = reason == EXIT_REASONS.index("expiry")
+    intrinsic = np.maximum(np.where(is_call, 1.0, -1.0) * (exit_spot[:, None] - strike), 0.0)
+    exit_price = price[last_day, candidates]
+    exit_value = np.where(
+        settled,
+        holdings(intrinsic, exit_spot),
+        holdings(
+            slipped(exit_price, -quantity),
+            slipped(exit_spot, -stock_lots) if stock_lots else exit_spot,
+        ),
+    )
+    exit_value = np.where(closed, exit_value, holdings(exit_price, exit_spot))
+    realized = exit_value - entry_value
+
+    taken = _take_positions(entry, exit_day, closed, rules.one_at_a_time)
+    open_now = (day >= entry[taken]) & (day < exit_day[taken])
+    pnl = np.where(
+        day < entry[taken], 0.0, np.where(day < exit_day[taken], mark[:, taken], realized[taken])
+    ).sum(axis=1)
+    exposure = {}
+    for name in _GREEK_FIELDS:
+        greek = np.nan_to_num(_forward_fill(getattr(cube, name)[:, columns]))[:, leg_columns]
+        position = greek[:, taken] @ quantity
+        if name == "delta":
+            position = position + stock_lots
+        exposure[name] = CONTRACT_MULTIPLIER * np.where(open_now, position, 0.0).sum(axis=1)
+
+    trades = [
+        Trade(
+            entry_date=cube.dates[entry[p]].item(),
+            exit_date=cube.dates[exit_day[p]].item() if closed[p] else None,
+            expiry=expiry[p].item(),
+            strikes=tuple(float(value) for value in strike[p]),
+            entry_value=float(entry_value[p]),
+            exit_value=float(exit_value[p]),
+            pnl=float(realized[p]),
+            exit_reason=EXIT_REASONS[reason[p]],
+        )
+        for p in taken
+    ]
+    return BacktestResult(
+        strategy=strategy.name,
+        underlying=cube.underlying,
+        dates=cube.dates,
+        pnl=pnl,
+        trades=trades,
+        **exposure,
+    )
+
+
+def _first_exits(
+    rules: Rules,
+    dates: np.ndarray,
+    entry: np.ndarray,
+    expiry: np.ndarray,
+    mark: np.ndarray,
+    premium: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Close day of every candidate (``len(dates)`` while still open) and its reason code.
+
+    When several rules fire on the same day, the earlier one in ``EXIT_REASONS`` is reported.
+    """
+    day = np.arange(len(dates))[:, None]
+    expiry_day = np.searchsorted(dates, expiry)
+    days_left = (expiry[None, :] - dates[:, None]).astype(np.int64)
+    held = (dates[:, None] - dates[entry][None, :]).astype(np.int64)
+    never = np.zeros(mark.shape, dtype=bool)
+    triggers = [
+        day == expiry_day,
+        (premium > 0) & (mark <= -rules.stop_loss * premium)
+        if rules.stop_loss is not None
+        else never,
+        (premium > 0) & (mark >= rules.profit_target * premium)
+        if rules.profit_target is not None
+        else never,
+        days_left <= rules.exit_dte if rules.exit_dte is not None else never,
+        held >= rules.max_hold_days if rules.max_hold_days is not None else never,
+    ]
+    exits = (day > entry) & (day <= expiry_day) & np.logical_or.reduce(triggers)
+    closed = exits.any(axis=0)
+    exit_day = np.where(closed, exits.argmax(axis=0), len(dates))
+    reason = np.full(len(entry), EXIT_REASONS.index("open"))
+    at_exit = (np.minimum(exit_day, len(dates) - 1), np.arange(len(entry)))
+    for code in reversed(range(len(triggers))):
+        reason[closed & triggers[code][at_exit]] = code
+    return exit_day, reason
+
+
+def _pick_legs(cube: SnapshotCube, legs: Sequence[Leg], rules: Rules) -> np.ndarray:
+    """Contract column of every leg on every date, -1 where the chain cannot fill it.
+
+    Each date takes the expiry with at least ``min_dte`` days left closest to
+    ``target_dte`` (the earlier on ties), then each leg's closest strike in it.
+    """
+    dates_count = len(cube.dates)
+    rows = np.arange(dates_count)
+    picked = np.full((dates_count, len(legs)), -1)
+    if not cube.close.size:
+        return picked
+    days_left = (cube.expiry[None, :] - cube.dates[:, None]).astype(np.int64)
+    quoted = (cube.close > 0) & (days_left >= rules.min_dte)
+    distance = np.where(quoted, np.abs(days_left - rules.target_dte), np.iinfo(np.int64).max)
+    best = distance.argmin(axis=1)
+    in_expiry = quoted & (cube.expiry[None, :] == cube.expiry[best][:, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moneyness = cube.strike[None, :] / cube.spot[:, None]
+    for index, leg in enumerate(legs):
+        if leg.delta is not None:
+            miss = np.abs(np.abs(cube.delta) - leg.delta)
+        else:
+            miss = np.abs(moneyness - leg.moneyness)
+        miss = np.where(in_expiry & (cube.is_call == (leg.kind == "call")), miss, np.inf)
+        miss[np.isnan(miss)] = np.inf
+        choice = miss.argmin(axis=1)
+        picked[:, index] = np.where(np.isfinite(miss[rows, choice]), choice, -1)
+    # Two legs landing on one contract (a chain too sparse for the deltas) is no position.
+    for first in range(len(legs)):
+        for second in range(first + 1, len(legs)):
+            same = picked[:, first] == picked[:, second]
+            picked[same, first] = -1
+    return picked
+
+
+def _take_positions(
+    entry: np.ndarray, exit_day: np.ndarray, closed: np.ndarray, one_at_a_time: bool
+) -> np.ndarray:
+    if not one_at_a_time:
+        return np.arange(len(entry))
+    taken = []
+    free_from = 0
+    for position, day in enumerate(entry):
+        if day < free_from:
+            continue
+        taken.append(position)
+        if not closed[position]:
+            break
+        free_from = exit_day[position]
+    return np.array(taken, dtype=np.int64)
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry each column's last finite value forward in time (down the rows)."""
+    if not values.size:
+        return values
+    rows = np.where(np.isfinite(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+
+def _weekday(days: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday.
+    return (days.astype(np.int64) + 3) % 7
+
+
+def _contract_keys(expiry: np.ndarray, strike: np.ndarray, is_call: np.ndarray) -> np.ndarray:
+    expiry_day = np.asarray(expiry).astype("datetime64[D]").astype(np.int64)
+    strike_units = np.rint(np.asarray(strike) * _STRIKE_SCALE).astype(np.int64)
+    return (expiry_day * 2 + np.asarray(is_call, dtype=np.int64)) * _KEY_STRIKE_SPAN + strike_units
+
+
+def _decode_contract_keys(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    expiry_and_type, strike_units = np.divmod(keys, _KEY_STRIKE_SPAN)
+    expiry_day, call_flag = np.divmod(expiry_and_type, 2)
+    return (
+        expiry_day.astype("datetime64[D]"),
+        strike_units / _STRIKE_SCALE,
+        call_flag.astype(bool),
+    )
+
+
+def _days(values) -> np.ndarray:
+    # A year of history has a few hundred distinct dates; parse each only once.
+    parsed: dict[Any, int] = {}
+    days = []
+    for value in values:
+        day = parsed.get(value)
+        if day is None:
+            day = parsed[value] = _as_date(value).toordinal() - _EPOCH.toordinal()
+        days.append(day)
+    return np.array(days, dtype=np.int64)
+
+
+def _as_date(value: date | str) -> date:
+    if isinstance(value, datetime):
+        return value.astimezone(MARKET_TIME_ZONE).date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value[:10])
+
+
+def _column(rows: Sequence[Mapping[str, Any]], name: str) -> np.ndarray:
+    return np.array(
+        [np.nan if row.get(name) is None else float(row[name]) for row in rows], dtype=np.float64
+    )
+
+
+__all__ = [
+    "BACKTEST_MIN_SLIPPAGE",
+    "BACKTEST_SLIPPAGE_PCT",
+    "DAILY_SNAPSHOTS_SQL",
+    "BacktestResult",
+    "Leg",
+    "Rules",
+    "SnapshotCube",
+    "Strategy",
+    "Trade",
+    "covered_call",
+    "iron_condor",
+    "load_snapshot_cube",
+    "run_backtest",
+    "vertical",
+]
@@ -0,0 +1,213 @@
+"""Vectorized Black-Scholes prices, implied volatilities and greeks for whole chains.
+
+Every function takes parallel arrays (one entry per contract) and never loops in Python over
+contracts. Greeks follow Polygon's conventions so filled values sit next to ingested ones:
+theta is per calendar day and vega per one volatility point.
+"""
+
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+# Continuously compounded; set it near the current T-bill yield.
+PRICING_RISK_FREE_RATE = float(os.getenv("PRICING_RISK_FREE_RATE", "0.0"))
+IV_MIN = 1e-4
+IV_MAX = float(os.getenv("PRICING_IV_MAX", "5.0"))
+IV_MAX_ITERATIONS = int(os.getenv("PRICING_IV_MAX_ITERATIONS", "64"))
+# Solved once the price error, divided by vega, puts the volatility within this much of the root.
+IV_VOL_TOLERANCE = float(os.getenv("PRICING_IV_VOL_TOLERANCE", "1e-8"))
+# Below this vega (dollars per unit of volatility) the price cannot pin the volatility down.
+IV_MIN_VEGA = float(os.getenv("PRICING_IV_MIN_VEGA", "1e-6"))
+_DAYS_PER_YEAR = 365.0
+_SQRT_2PI = np.sqrt(2 * np.pi)
+# Below this vega a Newton step overshoots; bisect instead.
+_MIN_NEWTON_VEGA = 1e-8
+# A bracket this narrow has pinned the volatility to double precision.
+_MIN_BRACKET_WIDTH = 1e-12
+# norm_cdf switches from the rational approximation to a continued fraction at 10 / sqrt(2)
+# and underflows to exactly zero past 37 standard deviations.
+_CDF_SERIES_LIMIT = 7.07106781186547
+_CDF_ZERO_LIMIT = 37.0
+# Polynomial coefficients of the rational approximation, highest degree first.
+_CDF_NUMERATOR = (
+    3.52624965998911e-02,
+    0.700383064443688,
+    6.37396220353165,
+    33.912866078383,
+    112.079291497871,
+    221.213596169931,
+    220.206867912376,
+)
+_CDF_DENOMINATOR = (
+    8.83883476483184e-02,
+    1.75566716318264,
+    16.064177579207,
+    86.7807322029461,
+    296.564248779674,
+    637.333633378831,
+    793.826512519948,
+    440.413735824752,
+)
+
+
+class Greeks(NamedTuple):
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    vega: np.ndarray
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Evaluate the standard normal CDF to double precision (Hart's algorithm, per West 2005)."""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x)
+    exponential = np.exp(-0.5 * z * z)
+    numerator = np.zeros_like(z)
+    for coefficient in _CDF_NUMERATOR:
+        numerator = numerator * z + coefficient
+    denominator = np.zeros_like(z)
+    for coefficient in _CDF_DENOMINATOR:
+        denominator = denominator * z + coefficient
+    near = exponential * numerator / denominator
+    with np.errstate(divide="ignore"):
+        continued = z + 0.65
+        for term in (4.0, 3.0, 2.0, 1.0):
+            continued = z + term / continued
+        far = exponential / continued / _SQRT_2PI
+    tail = np.where(z < _CDF_SERIES_LIMIT, near, np.where(z < _CDF_ZERO_LIMIT, far, 0.0))
+    return np.where(x > 0, 1.0 - tail, tail)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def bs_price(
+    spot: np.ndarray,
+    strike: np.ndarray,
+    years: np.ndarray,
+    vol: np.ndarray,
+    is_call: np.ndarray,
+    rate: float = PRICING_RISK_FREE_RATE,
+) -> np.ndarray:
+    d1, d2 = _d1_d2(spot, strike, years, vol, rate)
+    discounted_strike = strike * np.exp(-rate * years)
+    call = spot * norm_cdf(d1) - discounted_strike * norm_cdf(d2)
+    # Put-call parity keeps puts to a single extra subtraction.
+    return np.where(is_call, call, call - spot + discounted_strike)
+
+
+def implied_vol(
+    price: np.ndarray,
+    spot: np.ndarray,
+    strike: np.ndarray,
+    years: np.ndarray,
+    is_call: np.ndarray,
+    rate: float = PRICING_RISK_FREE_RATE,
+) -> np.ndarray:
+    """Solve Black-Scholes for volatility; NaN where the price admits no solution.
+
+    Newton steps run inside a shrinking [low, high] bracket. A step that would leave the
+    bracket, or that comes from a near-zero vega, is replaced by bisection, so every
+    contract converges even deep out of the money where Newton alone diverges. Contracts
+    whose vega at the solution is below ``IV_MIN_VEGA`` are NaN too: their price barely
+    moves with volatility, so any volatility in a wide range would reproduce it.
+    """
+    price, spot, strike, years = np.broadcast_arrays(
+        *(np.asarray(values, dtype=np.float64) for values in (price, spot, strike, years))
+    )
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+    discounted_strike = strike * np.exp(-rate * years)
+    intrinsic = np.maximum(np.where(is_call, spot - discounted_strike, discounted_strike - spot), 0)
+    upper = np.where(is_call, spot, discounted_strike)
+    solvable = (
+        np.isfinite(price)
+        & (spot > 0)
+        & (strike > 0)
+        & (years > 0)
+        & (price > intrinsic)
+        & (price < upper)
+    )
+    vol = np.full(price.shape, np.nan)
+    active = np.flatnonzero(solvable)
+    if not len(active):
+        return vol
+    target, s, k, t, calls = (values[active] for values in (price, spot, strike, years, is_call))
+    low = np.full(len(active), IV_MIN)
+    high = np.full(len(active), IV_MAX)
+    # Brenner-Subrahmanyam: exact at the money, a reasonable start elsewhere.
+    guess = np.clip(_SQRT_2PI * target / (s * np.sqrt(t)), 0.05, 2.0)
+    solved = np.full(len(active), np.nan)
+    pending = np.arange(len(active))
+
+    for _ in range(IV_MAX_ITERATIONS):
+        if not len(pending):
+            break
+        sigma = guess[pending]
+        ps, pk, pt = s[pending], k[pending], t[pending]
+        d1, d2 = _d1_d2(ps, pk, pt, sigma, rate)
+        discounted = pk * np.exp(-rate * pt)
+        call = ps * norm_cdf(d1) - discounted * norm_cdf(d2)
+        model = np.where(calls[pending], call, call - ps + discounted)
+        error = model - target[pending]
+        vega = ps * norm_pdf(d1) * np.sqrt(pt)
+        done = (np.abs(error) < IV_VOL_TOLERANCE * vega) | (
+            high[pending] - low[pending] < _MIN_BRACKET_WIDTH
+        )
+        solved[pending[done]] = np.where(vega[done] >= IV_MIN_VEGA, sigma[done], np.nan)
+
+        # Price rises with volatility, so the sign of the error moves one end of the bracket.
+        too_high = error > 0
+        high[pending] = np.where(too_high, sigma, high[pending])
+        low[pending] = np.where(too_high, low[pending], sigma)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = sigma - error / vega
+        lo, hi = low[pending], high[pending]
+        bisect = (vega < _MIN_NEWTON_VEGA) | ~(newton > lo) | ~(newton < hi)
+        guess[pending] = np.where(bisect, 0.5 * (lo + hi), newton)
+        pending = pending[~done]
+
+    vol[active] = solved
+    return vol
+
+
+def bs_greeks(
+    spot: np.ndarray,
+    strike: np.ndarray,
+    years: np.ndarray,
+    vol: np.ndarray,
+    is_call: np.ndarray,
+    rate: float = PRICING_RISK_FREE_RATE,
+) -> Greeks:
+    """Delta, gamma, theta per calendar day and vega per volatility point."""
+    d1, d2 = _d1_d2(spot, strike, years, vol, rate)
+    pdf = norm_pdf(d1)
+    sqrt_years = np.sqrt(years)
+    discounted_strike = strike * np.exp(-rate * years)
+    call_delta = norm_cdf(d1)
+    decay = -spot * pdf * vol / (2 * sqrt_years)
+    call_theta = decay - rate * discounted_strike * norm_cdf(d2)
+    put_theta = decay + rate * discounted_strike * norm_cdf(-d2)
+    return Greeks(
+        delta=np.where(is_call, call_delta, call_delta - 1.0),
+        gamma=pdf / (spot * vol * sqrt_years),
+        theta=np.where(is_call, call_theta, put_theta) / _DAYS_PER_YEAR,
+        vega=spot * pdf * sqrt_years / 100.0,
+    )
+
+
+def _d1_d2(spot, strike, years, vol, rate) -> tuple[np.ndarray, np.ndarray]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = vol * np.sqrt(years)
+        d1 = (np.log(spot / strike) + (rate + 0.5 * vol * vol) * years) / spread
+    return d1, d1 - spread
+
+
+__all__ = [
+    "Greeks",
+    "bs_greeks",
+    "bs_price",
+    "implied_vol",
+    "norm_cdf",
+]
@@ -0,0 +1,187 @@
+"""Watchlist-wide SVI calibration runs, with chains fitted in a process pool.
+
+Every run gets a ``smile_calibration_runs`` row and stores one ``smile_fits`` row per fitted
+expiry. Each expiry starts from its newest fit in an earlier finished run when there is one,
+which is what keeps repeated intraday runs cheap.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from functools import partial
+from time import perf_counter
+
+from microservices.analytics.chains import ChainArrays, as_datetime, load_latest_chain
+from microservices.analytics.svi import SviFit, SviParams, calibrate_chain
+from microservices.shared import decorator
+from microservices.shared.decorator import retry_db_call
+from microservices.shared.metrics import ROWS_WRITTEN
+from microservices.shared.util import get_current_datetime
+from prisma.models import SmileCalibrationRun, SmileFit
+
+# 0 fits chains on the event loop instead of in worker processes.
+SVI_WORKERS = max(0, int(os.getenv("SVI_WORKERS", str(os.cpu_count() or 1))))
+# fork is unsafe once the exporter and log listener threads are running.
+SVI_START_METHOD = os.getenv("SVI_START_METHOD", "forkserver")
+SVI_WRITE_MAX_ATTEMPTS = int(os.getenv("SVI_WRITE_MAX_ATTEMPTS", "5"))
+SVI_WRITE_BASE_DELAY_SECONDS = float(os.getenv("SVI_WRITE_BASE_DELAY_SECONDS", "0.5"))
+ACTIVE_UNDERLYINGS_SQL = """
+SELECT DISTINCT underlying_ticker
+FROM options
+WHERE expiration_date > $1::timestamptz
+ORDER BY underlying_ticker
+"""
+WARM_START_SQL = """
+SELECT DISTINCT ON (f.underlying_ticker, f.expiration_date)
+    f.underlying_ticker, f.expiration_date, f.a, f.b, f.rho, f.m, f.sigma
+FROM smile_fits AS f
+JOIN smile_calibration_runs AS r ON r.id = f.run_id
+WHERE r.finished_at IS NOT NULL AND f.expiration_date > $1::timestamptz
+ORDER BY f.underlying_ticker, f.expiration_date, f.run_id DESC
+"""
+logger = logging.getLogger(__name__)
+
+WarmStarts = dict[str, dict[float, SviParams]]
+
+
+@dataclass
+class CalibrationReport:
+    run_id: int
+    underlyings: int
+    fits: int = 0
+    warm_starts: int = 0
+    failed: list[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+
+async def calibrate_smiles(
+    underlyings: Sequence[str] | None = None,
+    as_of: datetime | None = None,
+    workers: int = SVI_WORKERS,
+) -> CalibrationReport:
+    """Fit and store SVI smiles for every expiry of ``underlyings`` (default: all active).
+
+    An underlying whose chain fails to load, fit or store is logged and reported in
+    ``failed``; the rest of the run carries on.
+    """
+    started = perf_counter()
+    as_of = as_of or get_current_datetime()
+    if underlyings is None:
+        underlyings = await active_underlyings(as_of)
+    warm_starts = await load_warm_starts(as_of)
+    run = await SmileCalibrationRun.prisma().create(
+        data={"as_of": as_of, "started_at": get_current_datetime()}
+    )
+    report = CalibrationReport(run_id=run.id, underlyings=len(underlyings))
+    # Load the next chains while the current ones are being fitted.
+    slots = asyncio.Semaphore(max(1, 2 * workers))
+
+    async def calibrate(underlying: str, pool: ProcessPoolExecutor | None) -> None:
+        async with slots:
+            try:
+                chain = await load_latest_chain(underlying, as_of)
+                previous = warm_starts.get(underlying)
+                if pool is None:
+                    fits = calibrate_chain(chain, previous)
+                else:
+                    fits = await asyncio.get_running_loop().run_in_executor(
+                        pool, calibrate_chain, chain, previous
+                    )
+                await _store_fits(run.id, chain, fits)
+            except Exception:
+                logger.exception("Smile calibration failed for %s", underlying)
+                report.failed.append(underlying)
+                return
+            report.fits += len(fits)
+            report.warm_starts += sum(fit.warm_start for fit in fits)
+
+    with _calibration_pool(workers) as pool:
+        await asyncio.gather(*(calibrate(underlying, pool) for underlying in underlyings))
+
+    await SmileCalibrationRun.prisma().update(
+        where={"id": run.id},
+        data={
+            "finished_at": get_current_datetime(),
+            "underlyings": len(underlyings) - len(report.failed),
+        },
+    )
+    report.duration_seconds = perf_counter() - started
+    return report
+
+
+async def active_underlyings(as_of: datetime) -> list[str]:
+    rows = await decorator._get_db().query_raw(ACTIVE_UNDERLYINGS_SQL, as_of.isoformat())
+    return [row["underlying_ticker"] for row in rows]
+
+
+async def load_warm_starts(as_of: datetime) -> WarmStarts:
+    """Newest finished fit of every unexpired expiry, by underlying and expiration."""
+    rows = await decorator._get_db().query_raw(WARM_START_SQL, as_of.isoformat())
+    warm_starts: WarmStarts = {}
+    for row in rows:
+        expiration = as_datetime(row["expiration_date"]).timestamp()
+        warm_starts.setdefault(row["underlying_ticker"], {})[expiration] = SviParams(
+            *(float(row[name]) for name in SviParams._fields)
+        )
+    return warm_starts
+
+
+@contextmanager
+def _calibration_pool(workers: int) -> Iterator[ProcessPoolExecutor | None]:
+    if workers <= 0:
+        yield None
+        return
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context(SVI_START_METHOD)
+    )
+    try:
+        yield pool
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _fit_rows(run_id: int, chain: ChainArrays, fits: list[SviFit]) -> list[dict]:
+    snapshot_time = datetime.fromtimestamp(float(chain.last_updated.max()), UTC)
+    return [
+        {
+            "run_id": run_id,
+            "underlying_ticker": chain.underlying,
+            "expiration_date": datetime.fromtimestamp(fit.expiration, UTC),
+            "snapshot_time": snapshot_time,
+            "years_to_expiry": fit.years_to_expiry,
+            **fit.params._asdict(),
+            "rmse": fit.rmse,
+            "quotes": fit.quotes,
+            "iterations": fit.iterations,
+            "warm_start": fit.warm_start,
+        }
+        for fit in fits
+    ]
+
+
+async def _store_fits(run_id: int, chain: ChainArrays, fits: list[SviFit]) -> None:
+    if not fits:
+        return
+    rows = _fit_rows(run_id, chain, fits)
+    await retry_db_call(
+        partial(SmileFit.prisma().create_many, data=rows, skip_duplicates=True),
+        what=f"{len(rows)} smile fits of {chain.underlying}",
+        table="smile_fits",
+        max_attempts=SVI_WRITE_MAX_ATTEMPTS,
+        base_delay_seconds=SVI_WRITE_BASE_DELAY_SECONDS,
+    )
+    ROWS_WRITTEN.add(len(rows), {"table": "smile_fits"})
+
+
+__all__ = [
+    "CalibrationReport",
+    "active_underlyings",
+    "calibrate_smiles",
+    "load_warm_starts",
+]
@@ -0,0 +1,206 @@
+"""Columnar NumPy views of stored option chains."""
+
+import os
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from microservices.shared import decorator
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+# Quotes older than this at the requested time are left out of a chain view.
+CHAIN_MAX_STALENESS_HOURS = float(os.getenv("CHAIN_MAX_STALENESS_HOURS", "96"))
+_CHAIN_COLUMNS = """
+    s.ticker, o.contract_type, o.strike_price, o.expiration_date, s.last_updated,
+    s.underlying_price, s.last_price, s.implied_vol, s.open_interest, s.volume,
+    s.delta, s.gamma, s.theta, s.vega"""
+# Current chains come from option_snapshot_latest: one primary-key probe per contract. It
+# answers for ``as_of`` only while no contract has a newer row, which the caller checks.
+LATEST_CHAIN_SQL = f"""
+SELECT {_CHAIN_COLUMNS}
+FROM option_snapshot_latest AS s
+JOIN options AS o ON o.ticker = s.ticker
+WHERE o.underlying_ticker = $1
+  AND o.expiration_date > $2::timestamptz
+  AND s.last_updated > $2::timestamptz - $3::interval
+"""
+# Chains as of an earlier time have to pick each contract's row out of the history.
+HISTORY_CHAIN_SQL = f"""
+SELECT DISTINCT ON (s.ticker) {_CHAIN_COLUMNS}
+FROM option_snapshots AS s
+JOIN options AS o ON o.ticker = s.ticker
+WHERE o.underlying_ticker = $1
+  AND o.expiration_date > $2::timestamptz
+  AND s.last_updated <= $2::timestamptz
+  AND s.last_updated > $2::timestamptz - $3::interval
+ORDER BY s.ticker, s.last_updated DESC
+"""
+LATEST_SNAPSHOT_TIME_SQL = """
+SELECT max(s.last_updated) AS as_of
+FROM option_snapshot_latest AS s
+JOIN options AS o ON o.ticker = s.ticker
+WHERE o.underlying_ticker = $1
+"""
+HISTORY_SNAPSHOT_TIME_SQL = """
+SELECT max(s.last_updated) AS as_of
+FROM option_snapshots AS s
+JOIN options AS o ON o.ticker = s.ticker
+WHERE o.underlying_ticker = $1 AND s.last_updated <= $2::timestamptz
+"""
+_FLOAT_COLUMNS = (
+    "strike_price",
+    "underlying_price",
+    "last_price",
+    "implied_vol",
+    "open_interest",
+    "volume",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+)
+
+
+@dataclass(frozen=True, eq=False)
+class ChainArrays:
+    """One row per contract, as parallel arrays; missing numbers are NaN."""
+
+    underlying: str
+    as_of: datetime
+    ticker: np.ndarray
+    is_call: np.ndarray
+    strike: np.ndarray
+    expiration: np.ndarray  # epoch seconds
+    last_updated: np.ndarray  # epoch seconds
+    spot: np.ndarray
+    close: np.ndarray
+    iv: np.ndarray
+    open_interest: np.ndarray
+    volume: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    vega: np.ndarray
+
+    def __len__(self) -> int:
+        """Return the number of contracts in the chain."""
+        return len(self.ticker)
+
+    @property
+    def moneyness(self) -> np.ndarray:
+        """Strike over spot, the convention the Grafana moneyness panels use."""
+        return self.strike / self.spot
+
+    @property
+    def years_to_expiry(self) -> np.ndarray:
+        return (self.expiration - self.as_of.timestamp()) / SECONDS_PER_YEAR
+
+    def otm_quote_mask(self) -> np.ndarray:
+        """Out-of-the-money quotes (puts below spot, calls at or above it) with a usable IV.
+
+        Out-of-the-money quotes are the liquid side of each strike, so smiles are built from
+        them alone.
+        """
+        moneyness = self.moneyness
+        otm = np.where(self.is_call, moneyness >= 1.0, moneyness < 1.0)
+        return (
+            otm
+            & np.isfinite(self.iv)
+            & (self.iv > 0)
+            & np.isfinite(moneyness)
+            & (self.years_to_expiry > 0)
+        )
+
+    @classmethod
+    def from_rows(
+        cls, underlying: str, as_of: datetime, rows: Sequence[Mapping[str, Any]]
+    ) -> "ChainArrays":
+        columns = {
+            name: np.array([_as_float(row.get(name)) for row in rows], dtype=np.float64)
+            for name in _FLOAT_COLUMNS
+        }
+        return cls(
+            underlying=underlying,
+            as_of=as_of,
+            ticker=np.array([row["ticker"] for row in rows], dtype=object),
+            is_call=np.array(
+                [str(row.get("contract_type", "")).lower() == "call" for row in rows], dtype=bool
+            ),
+            strike=columns["strike_price"],
+            expiration=_epoch_seconds(row["expiration_date"] for row in rows),
+            last_updated=_epoch_seconds(row["last_updated"] for row in rows),
+            spot=columns["underlying_price"],
+            close=columns["last_price"],
+            iv=columns["implied_vol"],
+            open_interest=columns["open_interest"],
+            volume=columns["volume"],
+            delta=columns["delta"],
+            gamma=columns["gamma"],
+            theta=columns["theta"],
+            vega=columns["vega"],
+        )
+
+
+async def latest_snapshot_time(underlying: str, as_of: datetime) -> datetime | None:
+    """Newest stored snapshot time for ``underlying`` at or before ``as_of``."""
+    db = decorator._get_db()
+    rows = await db.query_raw(LATEST_SNAPSHOT_TIME_SQL, underlying)
+    latest = _first_time(rows)
+    if latest is None or latest <= as_of:
+        return latest
+    return _first_time(await db.query_raw(HISTORY_SNAPSHOT_TIME_SQL, underlying, as_of.isoformat()))
+
+
+async def load_latest_chain(underlying: str, as_of: datetime) -> ChainArrays:
+    """Latest snapshot of every unexpired contract of ``underlying`` as of ``as_of``.
+
+    Reads ``option_snapshot_latest`` and falls back to the history only when some contract
+    was updated after ``as_of``.
+    """
+    db = decorator._get_db()
+    args = (underlying, as_of.isoformat(), f"{CHAIN_MAX_STALENESS_HOURS} hours")
+    rows = await db.query_raw(LATEST_CHAIN_SQL, *args)
+    cutoff = as_of.timestamp()
+    if any(as_datetime(row["last_updated"]).timestamp() > cutoff for row in rows):
+        rows = await db.query_raw(HISTORY_CHAIN_SQL, *args)
+    return ChainArrays.from_rows(underlying, as_of, rows)
+
+
+def as_datetime(value: datetime | str) -> datetime:
+    """Raw query results carry timestamps either as datetimes or as ISO strings."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _first_time(rows: list[dict]) -> datetime | None:
+    value = rows[0].get("as_of") if rows else None
+    return as_datetime(value) if value is not None else None
+
+
+def _as_float(value: Any) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def _epoch_seconds(values) -> np.ndarray:
+    # A chain has few distinct expirations and snapshot times; parse each only once.
+    parsed: dict[Any, float] = {}
+    seconds = []
+    for value in values:
+        timestamp = parsed.get(value)
+        if timestamp is None:
+            timestamp = parsed[value] = as_datetime(value).timestamp()
+        seconds.append(timestamp)
+    return np.array(seconds, dtype=np.float64)
+
+
+__all__ = [
+    "CHAIN_MAX_STALENESS_HOURS",
+    "ChainArrays",
+    "as_datetime",
+    "latest_snapshot_time",
+    "load_latest_chain",
+]
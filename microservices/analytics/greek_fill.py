@@ -0,0 +1,163 @@
+"""Post-pass that fills missing implied volatility and greeks of recent snapshots.
+
+Polygon leaves ``implied_volatility`` and ``greeks`` empty for many illiquid strikes. This
+pass re-reads recent snapshots that lack them, prices whole chunks at once with
+``microservices.analytics.black_scholes`` and writes back only the columns that are still
+null, so values Polygon did send are never overwritten.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from microservices.analytics.black_scholes import bs_greeks, implied_vol
+from microservices.analytics.chains import SECONDS_PER_YEAR, as_datetime
+from microservices.shared import decorator
+from microservices.shared.decorator import retry_db_call
+from microservices.shared.metrics import ROWS_WRITTEN
+from microservices.shared.util import get_current_datetime
+
+GREEKS_FILL_BATCH_SIZE = max(1, int(os.getenv("GREEKS_FILL_BATCH_SIZE", "20000")))
+GREEKS_FILL_LOOKBACK_HOURS = float(os.getenv("GREEKS_FILL_LOOKBACK_HOURS", "24"))
+GREEKS_FILL_MAX_ATTEMPTS = int(os.getenv("GREEKS_FILL_MAX_ATTEMPTS", "5"))
+GREEKS_FILL_BASE_DELAY_SECONDS = float(os.getenv("GREEKS_FILL_BASE_DELAY_SECONDS", "1.0"))
+# Walks the last_updated index from ``since``; rows without a close or spot cannot be priced.
+MISSING_GREEKS_SQL = """
+SELECT s.ticker, s.last_updated, s.day_close, s.underlying_price, s.implied_vol,
+       o.strike_price, o.expiration_date, o.contract_type
+FROM option_snapshots AS s
+JOIN options AS o ON o.ticker = s.ticker
+WHERE s.last_updated >= $1::timestamptz
+  AND (s.last_updated, s.ticker) > ($2::timestamptz, $3)
+  AND (s.implied_vol IS NULL OR s.delta IS NULL OR s.gamma IS NULL
+       OR s.theta IS NULL OR s.vega IS NULL)
+  AND s.day_close > 0
+  AND s.underlying_price > 0
+ORDER BY s.last_updated, s.ticker
+LIMIT $4
+"""
+_FILL_COLUMNS = """
+SET implied_vol = COALESCE(s.implied_vol, f.implied_vol),
+    delta = COALESCE(s.delta, f.delta),
+    gamma = COALESCE(s.gamma, f.gamma),
+    theta = COALESCE(s.theta, f.theta),
+    vega = COALESCE(s.vega, f.vega)
+FROM filled AS f
+WHERE s.ticker = f.ticker AND s.last_updated = f.last_updated"""
+# option_snapshot_latest gets the same values when the filled row is still a contract's newest.
+FILL_GREEKS_SQL = f"""
+WITH filled AS (
+    SELECT * FROM jsonb_to_recordset($1::jsonb) AS f(
+        ticker text, last_updated timestamptz, implied_vol double precision,
+        delta double precision, gamma double precision, theta double precision,
+        vega double precision
+    )
+),
+history AS (UPDATE option_snapshots AS s {_FILL_COLUMNS} RETURNING 1),
+latest AS (UPDATE option_snapshot_latest AS s {_FILL_COLUMNS})
+SELECT count(*) AS filled FROM history
+"""
+_FILLED_FIELDS = ("implied_vol", "delta", "gamma", "theta", "vega")
+logger = logging.getLogger(__name__)
+
+
+async def fill_missing_greeks(
+    since: datetime | None = None, batch_size: int = GREEKS_FILL_BATCH_SIZE
+) -> int:
+    """Fill null IV/greek columns of snapshots stamped at or after ``since``.
+
+    ``since`` defaults to ``GREEKS_FILL_LOOKBACK_HOURS`` ago. Returns the number of rows
+    updated; rows whose close admits no implied volatility are left as they are.
+    """
+    since = since or get_current_datetime() - timedelta(hours=GREEKS_FILL_LOOKBACK_HOURS)
+    after: tuple[str, str] = (since.isoformat(), "")
+    filled = 0
+    while True:
+        rows = await _with_retry(
+            "read",
+            decorator._get_db().query_raw,
+            MISSING_GREEKS_SQL,
+            since.isoformat(),
+            *after,
+            batch_size,
+        )
+        if not rows:
+            break
+        priced = price_missing_greeks(rows)
+        if priced:
+            result = await _with_retry(
+                "write", decorator._get_db().query_raw, FILL_GREEKS_SQL, json.dumps(priced)
+            )
+            filled += int(result[0]["filled"])
+        last = rows[-1]
+        after = (as_datetime(last["last_updated"]).isoformat(), last["ticker"])
+        logger.info("Filled IV/greeks for %s snapshot rows through %s", filled, after[0])
+        if len(rows) < batch_size:
+            break
+    ROWS_WRITTEN.add(filled, {"table": "option_snapshots"})
+    return filled
+
+
+def price_missing_greeks(rows: list[dict]) -> list[dict]:
+    """Solve IV from the day's close where it is missing, then greeks from the IV.
+
+    A stored IV is kept and only used for the greeks. Returns one update per row that
+    could be priced, with NaN results as None.
+    """
+    last_updated = np.array([as_datetime(row["last_updated"]).timestamp() for row in rows])
+    expiration = np.array([as_datetime(row["expiration_date"]).timestamp() for row in rows])
+    years = (expiration - last_updated) / SECONDS_PER_YEAR
+    spot = _column(rows, "underlying_price")
+    strike = _column(rows, "strike_price")
+    close = _column(rows, "day_close")
+    stored_iv = _column(rows, "implied_vol")
+    is_call = np.array([str(row["contract_type"]).lower() == "call" for row in rows])
+
+    iv = stored_iv.copy()
+    missing = ~(iv > 0)
+    if missing.any():
+        iv[missing] = implied_vol(
+            close[missing], spot[missing], strike[missing], years[missing], is_call[missing]
+        )
+    greeks = bs_greeks(spot, strike, years, iv, is_call)
+    columns = (iv, *greeks)
+    priced = np.isfinite(iv)
+    return [
+        {
+            "ticker": rows[index]["ticker"],
+            "last_updated": as_datetime(rows[index]["last_updated"]).isoformat(),
+            **{
+                name: (float(column[index]) if np.isfinite(column[index]) else None)
+                for name, column in zip(_FILLED_FIELDS, columns, strict=True)
+            },
+        }
+        for index in np.flatnonzero(priced)
+    ]
+
+
+def _column(rows: list[dict], name: str) -> np.ndarray:
+    return np.array(
+        [np.nan if row.get(name) is None else float(row[name]) for row in rows], dtype=np.float64
+    )
+
+
+async def _with_retry(stage: str, call, *args):
+    return await retry_db_call(
+        call,
+        *args,
+        what=f"greek fill {stage}",
+        table="option_snapshots",
+        max_attempts=GREEKS_FILL_MAX_ATTEMPTS,
+        base_delay_seconds=GREEKS_FILL_BASE_DELAY_SECONDS,
+    )
+
+
+__all__ = [
+    "FILL_GREEKS_SQL",
+    "MISSING_GREEKS_SQL",
+    "fill_missing_greeks",
+    "price_missing_greeks",
+]
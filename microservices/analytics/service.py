@@ -0,0 +1,70 @@
+"""Analytics job entrypoints."""
+
+import asyncio
+import logging
+
+from microservices.analytics.calibration import calibrate_smiles
+from microservices.analytics.greek_fill import fill_missing_greeks
+from microservices.config import get_analytics_runtime_config, load_env
+from microservices.shared import connect_db, disconnect_db
+from microservices.shared.observability import (
+    configure_service_logger,
+    initialize_metrics,
+    initialize_tracing,
+    shutdown_tracing,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _initialize_observability(service_name: str) -> None:
+    initialize_tracing(service_name)
+    initialize_metrics(service_name)
+    configure_service_logger(service_name)
+
+
+def calibrate() -> None:
+    """Run one SVI calibration over every active underlying."""
+    load_env()
+    _initialize_observability(get_analytics_runtime_config().service_name)
+
+    async def _calibration_job():
+        await connect_db()
+        try:
+            return await calibrate_smiles()
+        finally:
+            await disconnect_db()
+
+    try:
+        report = asyncio.run(_calibration_job())
+        logger.info(
+            "Calibration run %s fitted %s expiries across %s underlyings in %.2fs "
+            "(%s warm-started, %s underlyings failed)",
+            report.run_id,
+            report.fits,
+            report.underlyings - len(report.failed),
+            report.duration_seconds,
+            report.warm_starts,
+            len(report.failed),
+        )
+    finally:
+        shutdown_tracing()
+
+
+def fill_greeks() -> None:
+    """Price recent snapshots that Polygon sent without IV or greeks."""
+    load_env()
+    _initialize_observability(get_analytics_runtime_config().service_name)
+
+    async def _fill_job() -> int:
+        await connect_db()
+        try:
+            return await fill_missing_greeks()
+        finally:
+            await disconnect_db()
+
+    try:
+        filled = asyncio.run(_fill_job())
+        logger.info("Filled IV/greeks for %s snapshot rows", filled)
+    finally:
+        shutdown_tracing()
@@ -0,0 +1,169 @@
+"""Implied-volatility surfaces interpolated in memory from the latest chain snapshot.
+
+Each expiry's smile is interpolated in moneyness from out-of-the-money quotes, and tenors
+between listed expiries are interpolated linearly in total variance. Grid points outside the
+quoted moneyness or expiry range stay NaN rather than being extrapolated.
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from microservices.analytics.chains import ChainArrays, latest_snapshot_time, load_latest_chain
+from microservices.shared.util import get_current_datetime
+
+SURFACE_MONEYNESS_MIN = float(os.getenv("SURFACE_MONEYNESS_MIN", "0.7"))
+SURFACE_MONEYNESS_MAX = float(os.getenv("SURFACE_MONEYNESS_MAX", "1.3"))
+SURFACE_MONEYNESS_STEP = float(os.getenv("SURFACE_MONEYNESS_STEP", "0.05"))
+SURFACE_TENOR_DAYS = tuple(
+    float(days) for days in os.getenv("SURFACE_TENOR_DAYS", "7,14,30,60,90,180,365").split(",")
+)
+SURFACE_CACHE_SIZE = max(1, int(os.getenv("SURFACE_CACHE_SIZE", "64")))
+DAYS_PER_YEAR = 365.0
+
+
+def default_moneyness_grid() -> np.ndarray:
+    steps = round((SURFACE_MONEYNESS_MAX - SURFACE_MONEYNESS_MIN) / SURFACE_MONEYNESS_STEP)
+    return np.round(np.linspace(SURFACE_MONEYNESS_MIN, SURFACE_MONEYNESS_MAX, steps + 1), 6)
+
+
+@dataclass(frozen=True, eq=False)
+class VolSurface:
+    """IV on a (tenor x moneyness) grid; ``iv[i, j]`` is tenor ``i`` at moneyness ``j``."""
+
+    underlying: str
+    as_of: datetime
+    moneyness: np.ndarray
+    tenor_days: np.ndarray
+    iv: np.ndarray
+    quotes: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "underlying": self.underlying,
+            "as_of": self.as_of.isoformat(),
+            "moneyness": self.moneyness.tolist(),
+            "tenor_days": self.tenor_days.tolist(),
+            "iv": np.where(np.isfinite(self.iv), self.iv, None).tolist(),
+            "quotes": self.quotes,
+        }
+
+
+def build_surface(
+    chain: ChainArrays,
+    moneyness_grid: np.ndarray | None = None,
+    tenor_days: np.ndarray | None = None,
+) -> VolSurface:
+    """Interpolate the chain's implied volatilities onto a fixed grid."""
+    grid_m = default_moneyness_grid() if moneyness_grid is None else np.asarray(moneyness_grid)
+    grid_days = np.asarray(SURFACE_TENOR_DAYS if tenor_days is None else tenor_days, dtype=float)
+    surface = np.full((len(grid_days), len(grid_m)), np.nan)
+
+    usable = chain.otm_quote_mask()
+    if usable.any():
+        smiles, expiries = _expiry_smiles(
+            chain.moneyness[usable], chain.years_to_expiry[usable], chain.iv[usable], grid_m
+        )
+        surface = _interpolate_tenors(smiles, expiries, grid_days / DAYS_PER_YEAR)
+    return VolSurface(
+        underlying=chain.underlying,
+        as_of=chain.as_of,
+        moneyness=grid_m,
+        tenor_days=grid_days,
+        iv=surface,
+        quotes=int(usable.sum()),
+    )
+
+
+class SurfaceCache:
+    """LRU of built surfaces keyed by (underlying, snapshot time).
+
+    A new ingest run produces a newer snapshot time and therefore a new key, so entries
+    never need explicit invalidation.
+    """
+
+    def __init__(self, max_entries: int = SURFACE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, datetime], VolSurface] = OrderedDict()
+
+    def get(self, key: tuple[str, datetime]) -> VolSurface | None:
+        surface = self._entries.get(key)
+        if surface is not None:
+            self._entries.move_to_end(key)
+        return surface
+
+    def put(self, key: tuple[str, datetime], surface: VolSurface) -> None:
+        self._entries[key] = surface
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+surface_cache = SurfaceCache()
+
+
+async def get_surface(underlying: str, as_of: datetime | None = None) -> VolSurface | None:
+    """Return the surface of ``underlying`` at its newest snapshot (at or before ``as_of``).
+
+    Only a ``max(last_updated)`` probe reaches the database when the surface for that
+    snapshot time is already cached. Returns None when nothing is stored yet.
+    """
+    snapshot_time = await latest_snapshot_time(underlying, as_of or get_current_datetime())
+    if snapshot_time is None:
+        return None
+    key = (underlying, snapshot_time)
+    surface = surface_cache.get(key)
+    if surface is None:
+        surface = build_surface(await load_latest_chain(underlying, snapshot_time))
+        surface_cache.put(key, surface)
+    return surface
+
+
+def _expiry_smiles(
+    moneyness: np.ndarray, years: np.ndarray, iv: np.ndarray, grid_m: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-expiry IV on ``grid_m``, rows ordered by expiry; NaN outside each quoted range."""
+    expiries, expiry_index = np.unique(years, return_inverse=True)
+    order = np.lexsort((moneyness, expiry_index))
+    moneyness, iv, expiry_index = moneyness[order], iv[order], expiry_index[order]
+    bounds = np.searchsorted(expiry_index, np.arange(len(expiries) + 1))
+    smiles = np.full((len(expiries), len(grid_m)), np.nan)
+    for row, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:], strict=True)):
+        if stop - start >= 2:  # noqa: PLR2004 - a smile needs two quotes to interpolate
+            smiles[row] = np.interp(
+                grid_m, moneyness[start:stop], iv[start:stop], left=np.nan, right=np.nan
+            )
+    return smiles, expiries
+
+
+def _interpolate_tenors(smiles: np.ndarray, expiries: np.ndarray, tenors: np.ndarray) -> np.ndarray:
+    """Linear interpolation in total variance between the two bracketing expiries."""
+    if len(expiries) == 1:
+        exact = np.isclose(tenors, expiries[0])[:, None]
+        return np.where(exact, smiles[0], np.nan)
+    variance = smiles**2 * expiries[:, None]
+    upper = np.clip(np.searchsorted(expiries, tenors), 1, len(expiries) - 1)
+    lower = upper - 1
+    weight = ((tenors - expiries[lower]) / (expiries[upper] - expiries[lower]))[:, None]
+    interpolated = (1 - weight) * variance[lower] + weight * variance[upper]
+    inside = ((tenors >= expiries[0]) & (tenors <= expiries[-1]))[:, None]
+    with np.errstate(invalid="ignore"):
+        surface = np.sqrt(interpolated / tenors[:, None])
+    return np.where(inside, surface, np.nan)
+
+
+__all__ = [
+    "SurfaceCache",
+    "VolSurface",
+    "build_surface",
+    "default_moneyness_grid",
+    "get_surface",
+    "surface_cache",
+]
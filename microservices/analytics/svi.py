@@ -0,0 +1,247 @@
+"""Raw-SVI smile fits for every expiry of a chain, solved as one batch.
+
+Each expiry's total implied variance ``w = iv**2 * T`` is fitted in log-moneyness
+``k = ln(K / S)`` to ``w(k) = a + b * (rho * (k - m) + sqrt((k - m)**2 + sigma**2))``.
+All expiries of a chain are padded into one (expiry x quote) array and solved together with
+Levenberg-Marquardt, so a chain costs a few dozen batched NumPy steps instead of one
+optimizer run per expiry. ``b`` and ``sigma`` are fitted in log space and ``rho`` through
+``tanh``, which keeps every iterate a valid smile without a constrained solver.
+"""
+
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+from microservices.analytics.chains import SECONDS_PER_YEAR, ChainArrays
+
+SVI_MIN_QUOTES = max(5, int(os.getenv("SVI_MIN_QUOTES", "8")))
+SVI_MAX_ITERATIONS = max(1, int(os.getenv("SVI_MAX_ITERATIONS", "200")))
+# A step that lowers the squared error by less than this fraction ends an expiry's fit.
+SVI_TOLERANCE = float(os.getenv("SVI_TOLERANCE", "1e-9"))
+_INITIAL_DAMPING = 1e-3
+_MAX_DAMPING = 1e12
+# Bounds on the free parameters (log b, atanh rho, log sigma) that keep exp/tanh finite.
+_FREE_LOWER = np.array([-np.inf, -16.0, -6.0, -np.inf, -16.0])
+_FREE_UPPER = np.array([np.inf, 4.0, 6.0, np.inf, 3.0])
+
+
+class SviParams(NamedTuple):
+    a: float
+    b: float
+    rho: float
+    m: float
+    sigma: float
+
+
+@dataclass(frozen=True)
+class SviFit:
+    """The fitted smile of one expiry; ``rmse`` is in implied-volatility units."""
+
+    expiration: float  # epoch seconds
+    years_to_expiry: float
+    params: SviParams
+    rmse: float
+    quotes: int
+    iterations: int
+    warm_start: bool
+
+
+def svi_total_variance(k: np.ndarray, params: SviParams) -> np.ndarray:
+    a, b, rho, m, sigma = params
+    shifted = np.asarray(k) - m
+    return a + b * (rho * shifted + np.sqrt(shifted * shifted + sigma * sigma))
+
+
+def svi_implied_vol(
+    k: np.ndarray, years_to_expiry: float | np.ndarray, params: SviParams
+) -> np.ndarray:
+    """Implied volatility of the fitted smile; NaN where the fit's variance is negative."""
+    variance = svi_total_variance(k, params) / years_to_expiry
+    with np.errstate(invalid="ignore"):
+        return np.sqrt(np.where(variance >= 0, variance, np.nan))
+
+
+def calibrate_chain(
+    chain: ChainArrays, previous: Mapping[float, SviParams] | None = None
+) -> list[SviFit]:
+    """Fit every expiry of ``chain`` with at least ``SVI_MIN_QUOTES`` out-of-the-money quotes.
+
+    ``previous`` maps expirations (epoch seconds) to the parameters of an earlier run; those
+    expiries start from them instead of from a generic guess and usually converge in a
+    handful of steps.
+    """
+    usable = chain.otm_quote_mask()
+    expirations, index, counts = np.unique(
+        chain.expiration[usable], return_inverse=True, return_counts=True
+    )
+    keep = counts >= SVI_MIN_QUOTES
+    if not keep.any():
+        return []
+    years = chain.years_to_expiry[usable]
+    k, w, mask = _pad_by_expiry(
+        np.log(chain.moneyness[usable]), chain.iv[usable] ** 2 * years, index, counts
+    )
+    k, w, mask = k[keep], w[keep], mask[keep]
+    expirations = expirations[keep]
+    expiry_years = (expirations - chain.as_of.timestamp()) / SECONDS_PER_YEAR
+
+    previous = previous or {}
+    warm = np.array([expiration in previous for expiration in expirations])
+    initial = _cold_start(k, w, mask)
+    for row, expiration in enumerate(expirations):
+        if warm[row]:
+            initial[row] = previous[expiration]
+    params, iterations = fit_svi_batch(k, w, mask, initial)
+
+    years_column = expiry_years[:, None]
+    model_iv = svi_implied_vol(k, years_column, SviParams(*params.T[:, :, None]))
+    squared_error = np.where(mask, (model_iv - np.sqrt(w / years_column)) ** 2, np.nan)
+    rmse = np.sqrt(np.nanmean(squared_error, axis=1))
+    quotes = mask.sum(axis=1)
+    fits = [
+        SviFit(
+            expiration=float(expirations[row]),
+            years_to_expiry=float(expiry_years[row]),
+            params=SviParams(*params[row].tolist()),
+            rmse=float(rmse[row]),
+            quotes=int(quotes[row]),
+            iterations=int(iterations[row]),
+            warm_start=bool(warm[row]),
+        )
+        for row in range(len(expirations))
+    ]
+    return fits
+
+
+def fit_svi_batch(
+    k: np.ndarray, w: np.ndarray, mask: np.ndarray, initial: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Least-squares raw-SVI fits of each row of ``w`` against ``k``, solved together.
+
+    ``k``, ``w`` and ``mask`` are (expiry x quote) arrays where ``mask`` marks real quotes;
+    ``initial`` holds one (a, b, rho, m, sigma) row per expiry. Returns the fitted parameter
+    rows and the number of steps each expiry took.
+    """
+    weight = mask.astype(np.float64)
+    free = _to_free(np.asarray(initial, dtype=np.float64))
+    residual, jacobian = _residual_and_jacobian(free, k, w, weight)
+    cost = (residual * residual).sum(axis=1)
+    damping = np.full(len(free), _INITIAL_DAMPING)
+    iterations = np.zeros(len(free), dtype=np.int64)
+    active = np.flatnonzero(np.isfinite(cost))
+    identity = np.eye(free.shape[1])
+
+    for _ in range(SVI_MAX_ITERATIONS):
+        if not len(active):
+            break
+        jac = jacobian[active]
+        jac_t = jac.transpose(0, 2, 1)
+        normal = jac_t @ jac
+        gradient = jac_t @ residual[active][..., None]
+        diagonal = normal * identity + identity * 1e-12
+        step = np.linalg.solve(normal + damping[active, None, None] * diagonal, -gradient)
+        candidate = np.clip(free[active] + step[..., 0], _FREE_LOWER, _FREE_UPPER)
+        trial_residual, trial_jacobian = _residual_and_jacobian(
+            candidate, k[active], w[active], weight[active]
+        )
+        trial_cost = (trial_residual * trial_residual).sum(axis=1)
+        iterations[active] += 1
+
+        improved = trial_cost < cost[active]
+        accepted = active[improved]
+        gain = (cost[accepted] - trial_cost[improved]) / np.maximum(cost[accepted], 1e-300)
+        free[accepted] = candidate[improved]
+        residual[accepted] = trial_residual[improved]
+        jacobian[accepted] = trial_jacobian[improved]
+        cost[accepted] = trial_cost[improved]
+        damping[accepted] /= 3.0
+        damping[active[~improved]] *= 2.0
+
+        done = np.zeros(len(free), dtype=bool)
+        done[accepted[gain < SVI_TOLERANCE]] = True
+        done[damping > _MAX_DAMPING] = True
+        active = active[~done[active]]
+    return _from_free(free), iterations
+
+
+def _pad_by_expiry(
+    k: np.ndarray, w: np.ndarray, index: np.ndarray, counts: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    order = np.argsort(index, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    column = np.arange(len(order)) - np.repeat(starts, counts)
+    row = index[order]
+    shape = (len(counts), int(counts.max()))
+    padded_k, padded_w, mask = np.zeros(shape), np.zeros(shape), np.zeros(shape, dtype=bool)
+    padded_k[row, column] = k[order]
+    padded_w[row, column] = w[order]
+    mask[row, column] = True
+    return padded_k, padded_w, mask
+
+
+def _cold_start(k: np.ndarray, w: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Start from a symmetric smile through the lowest quoted variance, sloped like the wings."""
+    lowest = np.where(mask, w, np.inf).min(axis=1)
+    k_low = np.where(mask, k, np.inf).min(axis=1)
+    k_high = np.where(mask, k, -np.inf).max(axis=1)
+    w_low = np.take_along_axis(w, np.where(mask, k, np.inf).argmin(axis=1)[:, None], 1)[:, 0]
+    w_high = np.take_along_axis(w, np.where(mask, k, -np.inf).argmax(axis=1)[:, None], 1)[:, 0]
+    span = np.maximum(k_high - k_low, 1e-6)
+    b = np.maximum((w_low + w_high - 2 * lowest) / span, 1e-4)
+    sigma = np.full_like(b, 0.1)
+    return np.column_stack([lowest - b * sigma, b, np.zeros_like(b), np.zeros_like(b), sigma])
+
+
+def _to_free(params: np.ndarray) -> np.ndarray:
+    a, b, rho, m, sigma = params.T
+    free = np.column_stack(
+        [
+            a,
+            np.log(np.maximum(b, 1e-12)),
+            np.arctanh(np.clip(rho, -0.999, 0.999)),
+            m,
+            np.log(np.maximum(sigma, 1e-12)),
+        ]
+    )
+    return np.clip(free, _FREE_LOWER, _FREE_UPPER)
+
+
+def _from_free(free: np.ndarray) -> np.ndarray:
+    return np.column_stack(
+        [free[:, 0], np.exp(free[:, 1]), np.tanh(free[:, 2]), free[:, 3], np.exp(free[:, 4])]
+    )
+
+
+def _residual_and_jacobian(
+    free: np.ndarray, k: np.ndarray, w: np.ndarray, weight: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    a, b, rho, m, sigma = (column[:, None] for column in _from_free(free).T)
+    shifted = k - m
+    root = np.sqrt(shifted * shifted + sigma * sigma)
+    wing = rho * shifted + root
+    residual = (a + b * wing - w) * weight
+    jacobian = np.stack(
+        [
+            weight,
+            b * wing * weight,
+            b * (1 - rho * rho) * shifted * weight,
+            -b * (rho + shifted / root) * weight,
+            b * sigma * sigma / root * weight,
+        ],
+        axis=-1,
+    )
+    return residual, jacobian
+
+
+__all__ = [
+    "SVI_MIN_QUOTES",
+    "SviFit",
+    "SviParams",
+    "calibrate_chain",
+    "fit_svi_batch",
+    "svi_implied_vol",
+    "svi_total_variance",
+]
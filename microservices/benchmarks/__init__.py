@@ -0,0 +1,21 @@
+"""Micro-benchmarks for per-row ingestion hot paths."""
+
+from microservices.benchmarks.harness import (
+    BenchmarkCase,
+    BenchmarkResult,
+    compare_to_baselines,
+    load_baselines,
+    measure,
+    run_cases,
+    write_baselines,
+)
+
+__all__ = [
+    "BenchmarkCase",
+    "BenchmarkResult",
+    "compare_to_baselines",
+    "load_baselines",
+    "measure",
+    "run_cases",
+    "write_baselines",
+]
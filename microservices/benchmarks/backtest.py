@@ -0,0 +1,103 @@
+"""Backtest engine speed over a synthetic year of a full option chain.
+
+Run ``python -m microservices.benchmarks.backtest`` (needs the ``analytics`` extra) for the
+time each built-in strategy takes over one year of daily closes.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from microservices.analytics.backtest import (
+    SnapshotCube,
+    covered_call,
+    iron_condor,
+    run_backtest,
+    vertical,
+)
+from microservices.analytics.black_scholes import bs_greeks, bs_price
+
+BACKTEST_BENCH_DAYS = int(os.getenv("BENCH_BACKTEST_DAYS", "252"))
+BACKTEST_BENCH_STRIKES = int(os.getenv("BENCH_BACKTEST_STRIKES", "121"))
+BACKTEST_BENCH_REPEAT = int(os.getenv("BENCH_BACKTEST_REPEAT", "3"))
+_VOL = 0.25
+# Contracts are listed this many days before they expire.
+_LISTED_DAYS = 120
+
+
+def synthetic_cube(
+    days: int = BACKTEST_BENCH_DAYS, strikes: int = BACKTEST_BENCH_STRIKES, seed: int = 0
+) -> SnapshotCube:
+    """Weekday closes of a random-walk underlying with weekly expiries priced at flat vol.
+
+    Strikes are 1 apart around the starting price of 100; each Friday expiry is quoted for
+    ``_LISTED_DAYS`` days before it expires.
+    """
+    rng = np.random.default_rng(seed)
+    calendar = np.arange("2025-01-01", "2027-01-01", dtype="datetime64[D]")
+    weekdays = calendar[(calendar.astype(np.int64) + 3) % 7 < 5][:days]
+    returns = rng.normal(0.0, _VOL / np.sqrt(252), len(weekdays))
+    spot = 100.0 * np.exp(np.cumsum(returns))
+    fridays = calendar[(calendar.astype(np.int64) + 3) % 7 == 4]
+    expiries = fridays[(fridays > weekdays[0]) & (fridays <= weekdays[-1] + _LISTED_DAYS)]
+    strike_grid = 100.0 + np.arange(strikes) - strikes // 2
+    expiry = np.repeat(expiries, 2 * strikes)
+    is_call = np.tile(np.repeat([False, True], strikes), len(expiries))
+    strike = np.tile(strike_grid, 2 * len(expiries))
+
+    days_left = (expiry[None, :] - weekdays[:, None]).astype(np.int64)
+    listed = (days_left >= 0) & (days_left <= _LISTED_DAYS) & (strike[None, :] > 0)
+    years = np.maximum(days_left, 0.5) / 365.0
+    shape = listed.shape
+    args = (
+        np.broadcast_to(spot[:, None], shape),
+        np.broadcast_to(strike, shape),
+        years,
+        np.full(shape, _VOL),
+        np.broadcast_to(is_call, shape),
+        0.0,
+    )
+    close = np.round(bs_price(*args), 2)
+    greeks = bs_greeks(*args)
+    hidden = ~listed | (close <= 0)
+    close[hidden] = np.nan
+    return SnapshotCube(
+        underlying="SYN",
+        dates=weekdays,
+        spot=spot,
+        expiry=expiry,
+        strike=strike,
+        is_call=is_call,
+        close=close,
+        **{name: np.where(hidden, np.nan, value) for name, value in greeks._asdict().items()},
+    )
+
+
+def seconds_per_year(repeat: int = BACKTEST_BENCH_REPEAT) -> dict[str, float]:
+    """Best-of-``repeat`` wall time of each built-in strategy over ``synthetic_cube()``."""
+    cube = synthetic_cube()
+    timings = {}
+    for strategy in (covered_call(), vertical(), iron_condor()):
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            run_backtest(cube, strategy)
+            best = min(best, time.perf_counter() - start)
+        timings[strategy.name] = best
+    return timings
+
+
+def main() -> None:
+    cube = synthetic_cube()
+    dates, contracts = cube.shape
+    print(f"{dates} days x {contracts:,} contracts")  # noqa: T201
+    for name, seconds in seconds_per_year().items():
+        print(f"{name}: {seconds * 1000:,.0f} ms")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = ["seconds_per_year", "synthetic_cube"]
@@ -0,0 +1,162 @@
+"""Timing and allocation harness with stored baselines and a regression gate."""
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+BENCH_REPEAT = int(os.getenv("BENCH_REPEAT", "7"))
+BENCH_REGRESSION_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.25"))
+ALLOCATION_SAMPLE_CALLS = int(os.getenv("BENCH_ALLOCATION_SAMPLE_CALLS", "200"))
+BENCH_CONFIRM_ROUNDS = int(os.getenv("BENCH_CONFIRM_ROUNDS", "2"))
+# Absolute slack so that a single interned/cached block does not trip the allocation gate.
+ALLOCATION_SLACK_BLOCKS = 1.0
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """A named zero-argument callable exercised ``number`` times per timing round."""
+
+    name: str
+    func: Callable[[], object]
+    number: int = 2000
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Best-of-N time per call plus allocations retained and peak bytes per call."""
+
+    name: str
+    ns_per_call: float
+    blocks_per_call: float
+    peak_bytes_per_call: float
+
+
+def measure(case: BenchmarkCase, repeat: int = BENCH_REPEAT) -> BenchmarkResult:
+    case.func()
+    timings: list[float] = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter_ns()
+        for _ in range(case.number):
+            case.func()
+        timings.append((time.perf_counter_ns() - start) / case.number)
+    blocks_per_call, peak_bytes_per_call = _measure_allocations(case)
+    return BenchmarkResult(
+        name=case.name,
+        ns_per_call=min(timings),
+        blocks_per_call=blocks_per_call,
+        peak_bytes_per_call=peak_bytes_per_call,
+    )
+
+
+def _measure_allocations(case: BenchmarkCase) -> tuple[float, float]:
+    calls = max(1, min(case.number, ALLOCATION_SAMPLE_CALLS))
+    retained: list[object] = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        baseline_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(calls):
+            retained.append(case.func())
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    ignored = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    )
+    stats = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "filename")
+    blocks = sum(max(0, stat.count_diff) for stat in stats)
+    return blocks / calls, max(0, peak_bytes - baseline_bytes) / calls
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict[str, dict[str, float]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def write_baselines(results: Iterable[BenchmarkResult], path: Path = BASELINES_PATH) -> None:
+    payload = {
+        result.name: {
+            key: round(value, 2) for key, value in asdict(result).items() if key != "name"
+        }
+        for result in sorted(results, key=lambda item: item.name)
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def compare_to_baselines(
+    results: Iterable[BenchmarkResult],
+    baselines: Mapping[str, Mapping[str, float]],
+    threshold: float = BENCH_REGRESSION_THRESHOLD,
+) -> list[str]:
+    """Return one message per case that is slower or allocates more than allowed."""
+    regressions: list[str] = []
+    for result in results:
+        baseline = baselines.get(result.name)
+        if baseline is None:
+            continue
+
+        time_limit = baseline["ns_per_call"] * (1 + threshold)
+        if result.ns_per_call > time_limit:
+            regressions.append(
+                f"{result.name}: {result.ns_per_call:.0f} ns/call exceeds baseline "
+                f"{baseline['ns_per_call']:.0f} ns/call by more than {threshold:.0%}"
+            )
+
+        block_limit = baseline["blocks_per_call"] * (1 + threshold) + ALLOCATION_SLACK_BLOCKS
+        if result.blocks_per_call > block_limit:
+            regressions.append(
+                f"{result.name}: {result.blocks_per_call:.1f} blocks/call exceeds baseline "
+                f"{baseline['blocks_per_call']:.1f} blocks/call by more than {threshold:.0%}"
+            )
+    return regressions
+
+
+def run_cases(
+    cases: Iterable[BenchmarkCase],
+    baselines: Mapping[str, Mapping[str, float]],
+    threshold: float = BENCH_REGRESSION_THRESHOLD,
+    confirm_rounds: int = BENCH_CONFIRM_ROUNDS,
+) -> tuple[list[BenchmarkResult], list[str]]:
+    """Measure every case and re-measure suspected regressions before reporting them.
+
+    Timing noise on shared machines easily exceeds the threshold for a single round, so a
+    case only counts as regressed when it stays over the limit for ``confirm_rounds`` more
+    measurements; the fastest observation is kept.
+    """
+    cases_by_name = {case.name: case for case in cases}
+    results = {name: measure(case) for name, case in cases_by_name.items()}
+    for _ in range(max(0, confirm_rounds)):
+        suspects = {
+            message.split(":", 1)[0]
+            for message in compare_to_baselines(results.values(), baselines, threshold)
+        }
+        if not suspects:
+            break
+        for name in suspects:
+            retry = measure(cases_by_name[name])
+            if retry.ns_per_call < results[name].ns_per_call:
+                results[name] = retry
+    ordered = list(results.values())
+    return ordered, compare_to_baselines(ordered, baselines, threshold)
+
+
+def format_report(results: Iterable[BenchmarkResult]) -> str:
+    lines = [f"{'case':<40} {'ns/call':>12} {'blocks/call':>12} {'peak B/call':>12}"]
+    lines.extend(
+        f"{result.name:<40} {result.ns_per_call:>12.0f} {result.blocks_per_call:>12.1f} "
+        f"{result.peak_bytes_per_call:>12.0f}"
+        for result in results
+    )
+    return "\n".join(lines)
@@ -0,0 +1,132 @@
+"""Cold-start measurements for the Lambda entry points.
+
+Every measurement runs in a fresh interpreter, so module caches from the calling process
+never hide import cost. Run ``python -m microservices.benchmarks.startup`` for a report.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+STARTUP_REPEAT = int(os.getenv("BENCH_STARTUP_REPEAT", "5"))
+IMPORT_REPORT_TOP = int(os.getenv("BENCH_IMPORT_REPORT_TOP", "15"))
+# What a cold Lambda container executes before each handler can return; ``init`` is the
+# container's init phase alone, before any handler runs.
+HANDLER_STARTUP_STATEMENTS = {
+    "init": "import cli.lambda_handler",
+    "ingest_options": "import cli.lambda_handler; import cli.ingest_options",
+    "ingest_snapshots": "import cli.lambda_handler; import cli.ingest_snapshots",
+}
+_IMPORTTIME_PREFIX = "import time:"
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    """One ``-X importtime`` line: the module's own and cumulative import time."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportTiming]:
+    timings: list[ImportTiming] = []
+    for line in stderr.splitlines():
+        if not line.startswith(_IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(_IMPORTTIME_PREFIX) :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header row
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        timings.append(
+            ImportTiming(
+                module=stripped,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return timings
+
+
+def profile_imports(statement: str, env: Mapping[str, str] | None = None) -> list[ImportTiming]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=_child_env(env),
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def measure_startup_ms(
+    statement: str, repeat: int = STARTUP_REPEAT, env: Mapping[str, str] | None = None
+) -> float:
+    """Best-of-N wall time for a fresh interpreter to run ``statement``, in milliseconds."""
+    timings: list[float] = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], env=_child_env(env), check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def format_import_report(timings: Iterable[ImportTiming], top: int = IMPORT_REPORT_TOP) -> str:
+    """Slowest modules by cumulative time, then self time summed per top-level package."""
+    timings = list(timings)
+    lines = [f"{'module':<60} {'self ms':>9} {'cumul ms':>9}"]
+    lines.extend(
+        f"{timing.module:<60} {timing.self_us / 1000:>9.1f} {timing.cumulative_us / 1000:>9.1f}"
+        for timing in sorted(timings, key=lambda item: item.cumulative_us, reverse=True)[:top]
+    )
+    by_package: dict[str, int] = defaultdict(int)
+    for timing in timings:
+        by_package[timing.module.split(".", 1)[0]] += timing.self_us
+    lines.append("")
+    lines.append(f"{'package':<60} {'self ms':>9}")
+    lines.extend(
+        f"{package:<60} {self_us / 1000:>9.1f}"
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    )
+    return "\n".join(lines)
+
+
+def main(handlers: Iterable[str] | None = None) -> None:
+    interpreter_ms = measure_startup_ms("pass")
+    print(f"bare interpreter: {interpreter_ms:.1f} ms")  # noqa: T201
+    for handler in handlers or HANDLER_STARTUP_STATEMENTS:
+        statement = HANDLER_STARTUP_STATEMENTS[handler]
+        startup_ms = measure_startup_ms(statement)
+        print(  # noqa: T201
+            f"\n== {handler}: {startup_ms:.1f} ms cold start "
+            f"({startup_ms - interpreter_ms:.1f} ms over the bare interpreter)"
+        )
+        print(format_import_report(profile_imports(statement)))  # noqa: T201
+
+
+def _child_env(env: Mapping[str, str] | None) -> dict[str, str]:
+    child_env = dict(os.environ if env is None else env)
+    # Lambda never reads .env files; match that so dotenv lookups do not skew timings.
+    child_env.setdefault("AWS_LAMBDA_FUNCTION_NAME", "startup-benchmark")
+    return child_env
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or None)
+
+
+__all__ = [
+    "HANDLER_STARTUP_STATEMENTS",
+    "ImportTiming",
+    "format_import_report",
+    "measure_startup_ms",
+    "parse_importtime",
+    "profile_imports",
+]
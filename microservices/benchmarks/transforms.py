@@ -0,0 +1,77 @@
+"""Benchmark cases for the per-row transforms run on every ingested contract."""
+
+from microservices.benchmarks.harness import BenchmarkCase
+from microservices.shared.models import OptionContractSnapshot
+from microservices.shared.util import (
+    format_snapshot,
+    ns_to_datetime,
+    option_expiration_date_to_datetime,
+    parse_option_symbol,
+)
+from microservices.snapshot_ingestor.ingestor import (
+    _build_snapshot_upsert_payload,
+    _snapshot_greeks_dict,
+)
+
+SAMPLE_TICKER = "O:NVDA260918C00185000"
+SAMPLE_UNDERLYING = "NVDA"
+SAMPLE_LAST_UPDATED_NS = 1_782_158_400_000_000_000
+SAMPLE_SNAPSHOT_PAYLOAD = {
+    "break_even_price": 201.35,
+    "day": {
+        "change": 0.85,
+        "change_percent": 5.41,
+        "close": 16.35,
+        "high": 16.9,
+        "last_updated": SAMPLE_LAST_UPDATED_NS,
+        "low": 15.1,
+        "open": 15.5,
+        "previous_close": 15.5,
+        "volume": 1834,
+        "vwap": 16.02,
+    },
+    "details": {
+        "contract_type": "call",
+        "exercise_style": "american",
+        "expiration_date": "2026-09-18",
+        "shares_per_contract": 100,
+        "strike_price": 185,
+        "ticker": SAMPLE_TICKER,
+    },
+    "greeks": {"delta": 0.5634, "gamma": 0.0081, "theta": -0.0612, "vega": 0.4127},
+    "implied_volatility": 0.4821,
+    "open_interest": 12877,
+    "underlying_asset": {"price": 187.12, "ticker": SAMPLE_UNDERLYING},
+}
+
+
+def build_cases() -> list[BenchmarkCase]:
+    snapshot = OptionContractSnapshot.from_dict(SAMPLE_SNAPSHOT_PAYLOAD)
+    last_updated_dt = ns_to_datetime(SAMPLE_LAST_UPDATED_NS)
+    greeks = _snapshot_greeks_dict(snapshot)
+
+    return [
+        BenchmarkCase(
+            "build_snapshot_upsert_payload",
+            lambda: _build_snapshot_upsert_payload(
+                contract_ticker=SAMPLE_TICKER,
+                snapshot=snapshot,
+                underlying_price_override=187.12,
+                last_updated_dt=last_updated_dt,
+                curr_datetime=last_updated_dt,
+                greeks=greeks,
+                underlying_ticker=SAMPLE_UNDERLYING,
+            ),
+        ),
+        BenchmarkCase("snapshot_greeks", lambda: _snapshot_greeks_dict(snapshot)),
+        BenchmarkCase("format_snapshot", lambda: format_snapshot(SAMPLE_TICKER, snapshot)),
+        BenchmarkCase("ns_to_datetime", lambda: ns_to_datetime(SAMPLE_LAST_UPDATED_NS)),
+        BenchmarkCase(
+            "option_expiration_date_to_datetime",
+            lambda: option_expiration_date_to_datetime("2026-09-18"),
+        ),
+        BenchmarkCase(
+            "parse_option_symbol",
+            lambda: parse_option_symbol(SAMPLE_TICKER, SAMPLE_UNDERLYING),
+        ),
+    ]
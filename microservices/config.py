@@ -26,6 +26,14 @@ class RetrieverConfig:
     batch_size: int
 
 
+@dataclass(frozen=True)
+class DaemonConfig:
+    """Long-running daemon mode settings for the snapshot ingestor."""
+
+    enabled: bool
+    interval_seconds: float
+
+
 def load_env() -> None:
     """Load dotenv file into process environment when explicitly configured."""
     dotenv_path = os.getenv("DOTENV_PATH")
@@ -69,6 +77,28 @@ def get_snapshot_runtime_config() -> RuntimeConfig:
     )
 
 
+def get_analytics_runtime_config() -> RuntimeConfig:
+    """Build analytics job runtime configuration from environment variables."""
+    return RuntimeConfig(
+        service_name=os.getenv("ANALYTICS_SERVICE_NAME", "analytics"),
+    )
+
+
+def get_query_api_runtime_config() -> RuntimeConfig:
+    """Build query API runtime configuration from environment variables."""
+    return RuntimeConfig(
+        service_name=os.getenv("QUERY_API_SERVICE_NAME", "query-api"),
+    )
+
+
+def get_snapshot_daemon_config() -> DaemonConfig:
+    """Build Snapshot Ingestor daemon mode configuration from environment variables."""
+    return DaemonConfig(
+        enabled=parse_bool("SNAPSHOT_DAEMON_ENABLED", False),
+        interval_seconds=float(parse_int("SNAPSHOT_DAEMON_INTERVAL_SECONDS", 60)),
+    )
+
+
 def _option_param_from_dict(payload: dict) -> OptionIngestParams:
     symbol = payload["symbol"]
     price_range = payload.get("price_range")
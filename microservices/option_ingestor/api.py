@@ -1,18 +1,35 @@
 import asyncio
+import functools
+import json
 import logging
 import os
-from typing import TYPE_CHECKING
+import re
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, NamedTuple
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import httpx
 from polygon import RESTClient
 
 from microservices.shared.decorator import (
+    traced_row_span_async,
     traced_span_async,
     traced_span_sync,
 )
+from microservices.shared.metrics import (
+    HTTP_LATENCY,
+    RATE_LIMIT_HITS,
+    RETRIES,
+    ROWS_FETCHED,
+    record_duration,
+)
 from microservices.shared.models import OptionContractSnapshot, OptionsContract
-from microservices.shared.observability import start_span_sync
+from microservices.shared.observability import (
+    record_row_error,
+    start_batch_span,
+    start_row_span_sync,
+)
 from microservices.shared.util import parse_option_symbol
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -35,10 +52,27 @@ SNAPSHOT_FETCH_RETRY_BASE_DELAY_SECONDS = float(
 SNAPSHOT_FETCH_RATE_LIMIT_BASE_DELAY_SECONDS = float(
     os.getenv("SNAPSHOT_FETCH_RATE_LIMIT_BASE_DELAY_SECONDS", "15.0")
 )
+CHAIN_SNAPSHOT_PAGE_LIMIT = int(os.getenv("CHAIN_SNAPSHOT_PAGE_LIMIT", "250"))
+_NEXT_URL_PATTERN = re.compile(rb'"next_url"\s*:\s*("(?:[^"\\]|\\.)*")')
 STOCK_SNAPSHOT_FETCH_INTERVAL_SECONDS = float(
     os.getenv("STOCK_SNAPSHOT_FETCH_INTERVAL_SECONDS", "12.0")
 )
 logger = logging.getLogger(__name__)
+# Long-lived client installed by daemon mode so connections and TLS sessions survive across
+# ingestion cycles; one-shot runs leave it unset and open a client per fetch stage.
+_SHARED_HTTP_CLIENT: httpx.AsyncClient | None = None
+
+
+class ChainSnapshotPage(NamedTuple):
+    snapshots: list[OptionContractSnapshot]
+    # Path + query of the following page, or None on the last page.
+    next_cursor: str | None
+
+
+class RawChainSnapshotPage(NamedTuple):
+    # Undecoded response body, for decoding in a transform worker process.
+    body: bytes
+    next_cursor: str | None
 
 
 class Fetcher:
@@ -47,7 +81,7 @@ class Fetcher:
         self.api_key = os.getenv("POLYGON_API_KEY")
         if not self.api_key:
             raise ValueError("POLYGON_API_KEY environment variable is not set")
-        self.client = RESTClient(self.api_key)
+        self.client = _get_rest_client(self.api_key)
 
     @traced_span_sync(name="fetch_call_contracts", attributes={"module": "POLYGON"})
     def get_call_contracts(self) -> list[OptionsContract]:
@@ -86,9 +120,60 @@ class Fetcher:
         ):
             if isinstance(snapshot, OptionContractSnapshot):
                 snapshots.append(snapshot)
+        ROWS_FETCHED.add(len(snapshots), {"source": "option_chain"})
         return snapshots
 
-    @traced_span_async(name="fetch_daily_snapshot", attributes={"module": "POLYGON"})
+    def iter_chain_snapshot_pages(self, cursor: str | None = None) -> Iterator[ChainSnapshotPage]:
+        """Yield the option chain one Polygon page at a time, starting from ``cursor``.
+
+        Unlike ``get_chain_snapshots`` this exposes each page's ``next_url`` so callers can
+        checkpoint pagination and resume it after a failure.
+        """
+        path = cursor or f"/v3/snapshot/options/{self.asset or ''}"
+        params = {} if cursor else {"limit": CHAIN_SNAPSHOT_PAGE_LIMIT}
+        while True:
+            with record_duration(HTTP_LATENCY, {"endpoint": "option_chain"}):
+                response = self.client._get(path=path, params=params, raw=True)
+            decoded = self.client._decode(response)
+            snapshots = [
+                OptionContractSnapshot.from_dict(result) for result in decoded.get("results", [])
+            ]
+            ROWS_FETCHED.add(len(snapshots), {"source": "option_chain"})
+            next_url = decoded.get("next_url")
+            next_cursor = _url_path_and_query(next_url) if next_url else None
+            yield ChainSnapshotPage(snapshots, next_cursor)
+            if next_cursor is None:
+                return
+            path, params = next_cursor, {}
+
+    def iter_raw_chain_snapshot_pages(
+        self, cursor: str | None = None
+    ) -> Iterator[RawChainSnapshotPage]:
+        """Like ``iter_chain_snapshot_pages`` but without decoding the page bodies.
+
+        The next page URL is found with a byte scan, so pagination never waits on a full
+        JSON decode of the current page.
+        """
+        path = cursor or f"/v3/snapshot/options/{self.asset or ''}"
+        params = {} if cursor else {"limit": CHAIN_SNAPSHOT_PAGE_LIMIT}
+        while True:
+            with record_duration(HTTP_LATENCY, {"endpoint": "option_chain"}):
+                response = self.client._get(path=path, params=params, raw=True)
+            body = response.data
+            next_url = _peek_next_url(body)
+            next_cursor = _url_path_and_query(next_url) if next_url else None
+            yield RawChainSnapshotPage(body, next_cursor)
+            if next_cursor is None:
+                return
+            path, params = next_cursor, {}
+
+    @traced_row_span_async(
+        name="fetch_daily_snapshot",
+        attributes={"module": "POLYGON"},
+        row_id=lambda self, underlying_asset, option_ticker_name, *args, **kwargs: (
+            option_ticker_name
+        ),
+    )
     async def fetch_daily_snapshot_async(
         self,
         underlying_asset: str,
@@ -122,7 +207,7 @@ class Fetcher:
         }
 
         if client is None:
-            async with _build_snapshot_async_client(timeout=timeout) as request_client:
+            async with _snapshot_client(timeout=timeout) as request_client:
                 return await self._fetch_snapshot_with_client(
                     request_client=request_client,
                     request_metadata=request_metadata,
@@ -164,7 +249,7 @@ class Fetcher:
         sanitized_url = _redact_url_query_param(url, "apiKey")
 
         if client is None:
-            async with _build_snapshot_async_client(timeout=timeout) as request_client:
+            async with _snapshot_client(timeout=timeout) as request_client:
                 return await self._fetch_stock_spot_price_with_client(
                     request_client=request_client,
                     underlying_asset=underlying_asset,
@@ -199,12 +284,14 @@ class Fetcher:
 
         for attempt in range(1, max_retries + 1):
             try:
-                response = await request_client.get(url)
+                with record_duration(HTTP_LATENCY, {"endpoint": "option_snapshot"}):
+                    response = await request_client.get(url)
                 response.raise_for_status()
+                ROWS_FETCHED.add(1, {"source": "option_snapshot"})
                 logger.info(
                     f"Fetched snapshot for {underlying_asset}/{option_ticker_name} successfully."
                 )
-                with start_span_sync(
+                with start_row_span_sync(
                     "transform_snapshot_response",
                     attributes={
                         "module": "TRANSFORM",
@@ -222,11 +309,13 @@ class Fetcher:
                     return None
 
                 if _is_rate_limited_response(exc.response):
+                    RATE_LIMIT_HITS.add(1, {"endpoint": "option_snapshot"})
                     retry_after_seconds = _retry_after_seconds(exc.response)
                     delay = retry_after_seconds or (
                         SNAPSHOT_FETCH_RATE_LIMIT_BASE_DELAY_SECONDS * (2 ** (attempt - 1))
                     )
                     if attempt < max_retries:
+                        RETRIES.add(1, {"stage": "http", "endpoint": "option_snapshot"})
                         logger.warning(
                             "Polygon rate limited snapshot fetch; retrying "
                             "| underlying_asset=%s, option_ticker_name=%s, "
@@ -254,6 +343,7 @@ class Fetcher:
                         max_retries,
                         sanitized_url,
                     )
+                    record_row_error(exc, row_id=option_ticker_name)
                     return None
 
                 logger.error(
@@ -264,6 +354,7 @@ class Fetcher:
                     option_ticker_name,
                     sanitized_url,
                 )
+                record_row_error(exc, row_id=option_ticker_name)
                 return None
             except httpx.RequestError as exc:
                 if not _is_retryable_snapshot_request_error(exc) or attempt >= max_retries:
@@ -275,9 +366,11 @@ class Fetcher:
                         option_ticker_name,
                         sanitized_url,
                     )
+                    record_row_error(exc, row_id=option_ticker_name)
                     return None
 
                 delay = base_delay_seconds * (2 ** (attempt - 1))
+                RETRIES.add(1, {"stage": "http", "endpoint": "option_snapshot"})
                 logger.warning(
                     "Retrying snapshot fetch after transient request error: %s "
                     "| underlying_asset=%s, option_ticker_name=%s, "
@@ -307,7 +400,8 @@ class Fetcher:
     ) -> float | None:
         for attempt in range(1, max_retries + 1):
             try:
-                response = await request_client.get(url)
+                with record_duration(HTTP_LATENCY, {"endpoint": "stock_snapshot"}):
+                    response = await request_client.get(url)
                 response.raise_for_status()
                 price = _extract_stock_spot_price(response.json())
                 if price is None:
@@ -317,6 +411,7 @@ class Fetcher:
                         sanitized_url,
                     )
                     return None
+                ROWS_FETCHED.add(1, {"source": "stock_snapshot"})
                 logger.info(
                     "Fetched stock spot price successfully | underlying_asset=%s, price=%s",
                     underlying_asset,
@@ -333,11 +428,13 @@ class Fetcher:
                     return None
 
                 if _is_rate_limited_response(exc.response):
+                    RATE_LIMIT_HITS.add(1, {"endpoint": "stock_snapshot"})
                     retry_after_seconds = _retry_after_seconds(exc.response)
                     delay = retry_after_seconds or (
                         SNAPSHOT_FETCH_RATE_LIMIT_BASE_DELAY_SECONDS * (2 ** (attempt - 1))
                     )
                     if attempt < max_retries:
+                        RETRIES.add(1, {"stage": "http", "endpoint": "stock_snapshot"})
                         logger.warning(
                             "Polygon rate limited stock spot fetch; retrying "
                             "| underlying_asset=%s, status_code=%s, retry_after=%s, "
@@ -384,6 +481,7 @@ class Fetcher:
                     return None
 
                 delay = base_delay_seconds * (2 ** (attempt - 1))
+                RETRIES.add(1, {"stage": "http", "endpoint": "stock_snapshot"})
                 logger.warning(
                     "Retrying stock spot fetch after transient request error: %s "
                     "| underlying_asset=%s, delay=%.2fs, attempt=%s/%s, url=%s",
@@ -441,22 +539,32 @@ async def fetch_snapshots_batch(
     )
     fetch_semaphore = asyncio.Semaphore(max(1, SNAPSHOT_FETCH_CONCURRENCY))
     results: list[OptionContractSnapshot | None] = []
-    async with _build_snapshot_async_client(timeout=timeout) as client:
-        for contracts_batch in _iter_contract_batches(contracts, SNAPSHOT_FETCH_BATCH_SIZE):
-            tasks = [
-                asyncio.create_task(
-                    _fetch_snapshot_with_limit(
-                        option_fetcher,
-                        contract,
-                        *args,
-                        client=client,
-                        semaphore=fetch_semaphore,
-                        **kwargs,
+    async with _snapshot_client(timeout=timeout) as client:
+        for batch_index, contracts_batch in enumerate(
+            _iter_contract_batches(contracts, SNAPSHOT_FETCH_BATCH_SIZE), start=1
+        ):
+            with start_batch_span(
+                "fetch_snapshot_batch",
+                attributes={
+                    "module": "POLYGON",
+                    "batch.index": batch_index,
+                    "batch.size": len(contracts_batch),
+                },
+            ):
+                tasks = [
+                    asyncio.create_task(
+                        _fetch_snapshot_with_limit(
+                            option_fetcher,
+                            contract,
+                            *args,
+                            client=client,
+                            semaphore=fetch_semaphore,
+                            **kwargs,
+                        )
                     )
-                )
-                for contract in contracts_batch
-            ]
-            results.extend(await asyncio.gather(*tasks))
+                    for contract in contracts_batch
+                ]
+                results.extend(await asyncio.gather(*tasks))
     return results
 
 
@@ -465,6 +573,22 @@ async def fetch_chain_snapshots_for_underlying(underlying_asset: str) -> list[Op
     return await asyncio.to_thread(option_fetcher.get_chain_snapshots)
 
 
+async def iter_chain_snapshot_pages_for_underlying(
+    underlying_asset: str, cursor: str | None = None
+) -> AsyncIterator[ChainSnapshotPage]:
+    pages = Fetcher(underlying_asset).iter_chain_snapshot_pages(cursor)
+    while (page := await asyncio.to_thread(next, pages, None)) is not None:
+        yield page
+
+
+async def iter_raw_chain_snapshot_pages_for_underlying(
+    underlying_asset: str, cursor: str | None = None
+) -> AsyncIterator[RawChainSnapshotPage]:
+    pages = Fetcher(underlying_asset).iter_raw_chain_snapshot_pages(cursor)
+    while (page := await asyncio.to_thread(next, pages, None)) is not None:
+        yield page
+
+
 async def fetch_stock_spot_price(
     underlying_asset: str,
     *args,
@@ -495,7 +619,7 @@ async def fetch_stock_spot_prices_for_underlyings(
         pool=kwargs.get("read_timeout", SNAPSHOT_FETCH_READ_TIMEOUT),
     )
     prices: dict[str, float | None] = {}
-    async with _build_snapshot_async_client(timeout=timeout) as client:
+    async with _snapshot_client(timeout=timeout) as client:
         for index, underlying_asset in enumerate(underlying_assets):
             if index > 0 and STOCK_SNAPSHOT_FETCH_INTERVAL_SECONDS > 0:
                 await asyncio.sleep(STOCK_SNAPSHOT_FETCH_INTERVAL_SECONDS)
@@ -516,6 +640,46 @@ def _build_snapshot_async_client(timeout: httpx.Timeout) -> httpx.AsyncClient:
     return httpx.AsyncClient(timeout=timeout, limits=limits)
 
 
+def open_shared_http_client() -> httpx.AsyncClient:
+    """Install a process-wide snapshot HTTP client reused by every fetch until closed."""
+    global _SHARED_HTTP_CLIENT  # noqa: PLW0603
+    if _SHARED_HTTP_CLIENT is None or _SHARED_HTTP_CLIENT.is_closed:
+        _SHARED_HTTP_CLIENT = _build_snapshot_async_client(
+            timeout=httpx.Timeout(
+                connect=SNAPSHOT_FETCH_CONNECT_TIMEOUT,
+                read=SNAPSHOT_FETCH_READ_TIMEOUT,
+                write=SNAPSHOT_FETCH_READ_TIMEOUT,
+                pool=SNAPSHOT_FETCH_READ_TIMEOUT,
+            )
+        )
+    return _SHARED_HTTP_CLIENT
+
+
+async def close_shared_http_client() -> None:
+    global _SHARED_HTTP_CLIENT  # noqa: PLW0603
+    client = _SHARED_HTTP_CLIENT
+    _SHARED_HTTP_CLIENT = None
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def _snapshot_client(timeout: httpx.Timeout) -> AsyncIterator[httpx.AsyncClient]:
+    shared = _SHARED_HTTP_CLIENT
+    if shared is not None and not shared.is_closed:
+        yield shared
+        return
+    async with _build_snapshot_async_client(timeout=timeout) as client:
+        yield client
+
+
+@functools.cache
+def _get_rest_client(api_key: str) -> RESTClient:
+    # RESTClient owns a urllib3 pool; sharing it keeps chain/contract pagination on warm
+    # keep-alive connections instead of a fresh TLS handshake per Fetcher.
+    return RESTClient(api_key)
+
+
 async def _fetch_snapshot_with_limit(
     option_fetcher: Fetcher,
     contract: "Options",
@@ -561,6 +725,16 @@ def _redact_url_query_param(url: str, param_name: str) -> str:
     return urlunsplit((parts.scheme, parts.netloc, parts.path, sanitized_query, parts.fragment))
 
 
+def _url_path_and_query(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def _peek_next_url(body: bytes) -> str | None:
+    match = _NEXT_URL_PATTERN.search(body)
+    return json.loads(match.group(1)) if match else None
+
+
 def _is_retryable_snapshot_request_error(error: httpx.RequestError) -> bool:
     return isinstance(error, httpx.ConnectTimeout | httpx.ReadTimeout)
 
@@ -4,18 +4,44 @@ import asyncio
 import logging
 import os
 from importlib import import_module
+from time import perf_counter
 
 from microservices.option_ingestor.api import Fetcher
 from microservices.option_ingestor.retriever import OptionRetriever
+from microservices.shared.checkpoint import RunCheckpoint, batch_key
 from microservices.shared.decorator import (
     DATA_BASE_CONCURRENCY_LIMIT,
     bounded_async_sem,
     bounded_db_connection,
+    db_breaker,
+    traced_row_span_async,
     traced_span_async,
 )
 from microservices.shared.errors import is_retryable_db_error
+from microservices.shared.metrics import (
+    BATCH_SIZE,
+    DB_WRITE_LATENCY,
+    RETRIES,
+    ROWS_FETCHED,
+    ROWS_WRITTEN,
+    UNDERLYING_DURATION,
+    record_duration,
+)
 from microservices.shared.models import OptionIngestParams, OptionsContract
-from microservices.shared.observability import start_span_sync
+from microservices.shared.observability import (
+    start_batch_span,
+    start_row_span_sync,
+    start_span_sync,
+)
+from microservices.shared.progress import (
+    OUTCOME_FAILED,
+    OUTCOME_SKIPPED,
+    OUTCOME_WRITTEN,
+    record_row_outcome,
+    row_log_level,
+    track_progress,
+)
+from microservices.shared.sharding import UNSHARDED, Shard
 from microservices.shared.util import get_current_datetime, option_expiration_date_to_datetime
 from prisma.models import Options
 
@@ -38,10 +64,23 @@ class OptionIngestor:
 
     @bounded_db_connection
     @traced_span_async(name="ingest_options", attributes={"module": "ingestor"})
-    async def ingest_options(self, underlying_assets: list[OptionIngestParams]):
-        """Ingest option contracts from the API and store them in the database."""
-        for target in underlying_assets:
+    async def ingest_options(
+        self, underlying_assets: list[OptionIngestParams], shard: Shard = UNSHARDED
+    ):
+        """Ingest option contracts from the API and store them in the database.
+
+        Only targets whose underlying hashes to ``shard`` are processed.
+        """
+        checkpoint = RunCheckpoint.load(
+            shard.checkpoint_job("option_contracts"),
+            run_key=self.ingest_time.date().isoformat(),
+        )
+        for target in shard.select(underlying_assets, key=lambda t: t.underlying_asset):
             underlying_asset = target.underlying_asset
+            if checkpoint.is_underlying_done(underlying_asset):
+                logger.info("Skipping %s: completed earlier in this run", underlying_asset)
+                continue
+            started = perf_counter()
             core = Fetcher(underlying_asset)
             calls = core.get_call_contracts()
             puts = core.get_put_contracts()
@@ -56,28 +95,60 @@ class OptionIngestor:
                 },
             ):
                 contracts = calls + puts
+            ROWS_FETCHED.add(len(contracts), {"source": "option_contracts"})
             logger.info("Total contracts found for %s: %s", underlying_asset, len(contracts))
             if not contracts:
                 logger.warning("No UnExpired contracts found for %s", underlying_asset)
+                checkpoint.mark_underlying_done(underlying_asset)
                 continue
 
-            total_batches = 0
-            for total_batches, contracts_batch in enumerate(
-                _iter_contract_batches(contracts, DB_WRITE_BATCH_SIZE),
-                start=1,
+            with track_progress(logger, underlying_asset, "option_contracts", len(contracts)):
+                await self._upsert_contract_batches(underlying_asset, contracts, checkpoint)
+            checkpoint.mark_underlying_done(underlying_asset)
+            UNDERLYING_DURATION.record(
+                perf_counter() - started,
+                {"stage": "option_contracts", "underlying": underlying_asset},
+            )
+            logger.info("All contracts for %s processed successfully", underlying_asset)
+        checkpoint.clear()
+
+    async def _upsert_contract_batches(
+        self,
+        underlying_asset: str,
+        contracts: list[OptionsContract],
+        checkpoint: RunCheckpoint,
+    ) -> None:
+        for batch_index, contracts_batch in enumerate(
+            _iter_contract_batches(contracts, DB_WRITE_BATCH_SIZE),
+            start=1,
+        ):
+            key = batch_key(str(contract.ticker) for contract in contracts_batch)
+            if checkpoint.is_batch_done(underlying_asset, key):
+                for _ in contracts_batch:
+                    record_row_outcome(OUTCOME_SKIPPED)
+                continue
+            logger.info(
+                "Processing contract batch %s for %s with %s contracts",
+                batch_index,
+                underlying_asset,
+                len(contracts_batch),
+            )
+            BATCH_SIZE.record(len(contracts_batch), {"table": "options"})
+            with start_batch_span(
+                "upsert_option_contract_batch",
+                attributes={
+                    "module": "DB",
+                    "underlying_asset": underlying_asset,
+                    "batch.index": batch_index,
+                    "batch.size": len(contracts_batch),
+                },
             ):
-                logger.info(
-                    "Processing contract batch %s for %s with %s contracts",
-                    total_batches,
-                    underlying_asset,
-                    len(contracts_batch),
-                )
                 tasks = [
                     asyncio.create_task(self._upsert_option_contract(contract))
                     for contract in contracts_batch
                 ]
                 await asyncio.gather(*tasks)
-            logger.info("All contracts for %s processed successfully", underlying_asset)
+            checkpoint.mark_batch_done(underlying_asset, key)
 
     async def _retrieve_all_option_contracts(self) -> list["Options"]:
         """Retrieve all option contracts from the database."""
@@ -90,8 +161,12 @@ class OptionIngestor:
             logger.exception("Error fetching option contracts: %s", e)
             return []
 
-    @bounded_async_sem(limit=DATA_BASE_CONCURRENCY_LIMIT)
-    @traced_span_async(name="_upsert_option_contract", attributes={"module": "DB"})
+    @bounded_async_sem(limit=DATA_BASE_CONCURRENCY_LIMIT, breaker=db_breaker)
+    @traced_row_span_async(
+        name="_upsert_option_contract",
+        attributes={"module": "DB"},
+        row_id=lambda self, contract, *args, **kwargs: str(contract.ticker),
+    )
     async def _upsert_option_contract(
         self,
         contract: OptionsContract,
@@ -99,7 +174,7 @@ class OptionIngestor:
         base_delay_seconds: float = DB_RETRY_BASE_DELAY_SECONDS,
     ) -> "Options":
         """Upsert a single option contract into the database."""
-        with start_span_sync(
+        with start_row_span_sync(
             "transform_option_contract_payload",
             attributes={
                 "module": "TRANSFORM",
@@ -129,19 +204,28 @@ class OptionIngestor:
             }
         for attempt in range(1, max_retries + 1):
             try:
-                logger.info(
-                    "Upserting contract: %s, Strike: %s, Expiration: %s, Type: %s",
-                    contract.ticker,
-                    contract.strike_price,
-                    expiration_dt,
-                    contract.contract_type,
-                )
+                level = row_log_level(logger)
+                if level is not None:
+                    logger.log(
+                        level,
+                        "Upserting contract: %s, Strike: %s, Expiration: %s, Type: %s",
+                        contract.ticker,
+                        contract.strike_price,
+                        expiration_dt,
+                        contract.contract_type,
+                    )
                 options = import_module("prisma.models").Options  # type: ignore
-                return await options.prisma().upsert(
-                    where={"ticker": str(contract.ticker)},
-                    data=payload,
-                )
+                with record_duration(DB_WRITE_LATENCY, {"table": "options"}):
+                    result = await options.prisma().upsert(
+                        where={"ticker": str(contract.ticker)},
+                        data=payload,
+                    )
+                db_breaker.record_success()
+                ROWS_WRITTEN.add(1, {"table": "options"})
+                record_row_outcome(OUTCOME_WRITTEN)
+                return result
             except Exception as e:
+                db_breaker.record_failure(e)
                 logger.exception(
                     "Error upserting contract %s: %s (%s) attempt %s/%s",
                     contract.ticker,
@@ -151,15 +235,17 @@ class OptionIngestor:
                     max_retries,
                 )
                 if not is_retryable_db_error(e) or attempt >= max_retries:
+                    record_row_outcome(OUTCOME_FAILED)
                     raise
 
                 delay = base_delay_seconds * (2 ** (attempt - 1))
+                RETRIES.add(1, {"stage": "db", "table": "options"})
                 logger.warning(
                     "Retrying contract %s after transient DB error in %.2fs",
                     contract.ticker,
                     delay,
                 )
-                await asyncio.sleep(delay)
+                await db_breaker.backoff(delay)
 
         raise RuntimeError(f"Unreachable retry loop for contract {contract.ticker}")
 
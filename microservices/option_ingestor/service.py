@@ -11,12 +11,17 @@ from microservices.config import (
 )
 from microservices.option_ingestor.ingestor import OptionIngestor
 from microservices.option_ingestor.retriever import OptionRetriever
-from microservices.shared import connect_db, disconnect_db
+from microservices.shared import connect_db, disconnect_db, get_current_datetime
+from microservices.shared.lambda_runtime import WarmRuntime
+from microservices.shared.market_calendar import IGNORE_MARKET_CALENDAR, is_trading_day
 from microservices.shared.observability import (
     configure_service_logger,
+    initialize_metrics,
     initialize_tracing,
     shutdown_tracing,
 )
+from microservices.shared.progress import RunTotals, collect_run_totals
+from microservices.shared.sharding import Shard, shard_assignment
 
 
 def _configure_logging(service_name: str) -> None:
@@ -31,7 +36,9 @@ logger = logging.getLogger(__name__)
 async def _run_job(ingestor: OptionIngestor, targets) -> None:
     await connect_db()
     try:
-        await ingestor.ingest_options(underlying_assets=targets)
+        async with shard_assignment("option_contracts") as shard:
+            if shard is not None:
+                await ingestor.ingest_options(underlying_assets=targets, shard=shard)
     finally:
         await disconnect_db()
 
@@ -43,6 +50,7 @@ def run() -> None:
     retriever_config = get_retriever_config()
 
     initialize_tracing(runtime_config.service_name)
+    initialize_metrics(runtime_config.service_name)
     _configure_logging(service_name=runtime_config.service_name)
 
     retriever = OptionRetriever(
@@ -52,9 +60,61 @@ def run() -> None:
     ingestor = OptionIngestor(option_retriever=retriever)
     targets = get_option_targets_from_env()
 
+    today = get_current_datetime().date()
+    if not IGNORE_MARKET_CALENDAR and not is_trading_day(today):
+        # Listings only change around trading sessions; the next trading-day run picks them up.
+        logger.info("Skipping option contracts ingestion: %s is not a trading day", today)
+        shutdown_tracing()
+        return
+
     try:
         logger.info("-----------Starting option contracts ingestion...")
         asyncio.run(_run_job(ingestor=ingestor, targets=targets))
         logger.info("Option contracts ingestion completed successfully")
     finally:
         shutdown_tracing()
+
+
+def run_lambda(runtime: WarmRuntime, shard: Shard | None = None) -> RunTotals:
+    """Ingest option contracts on a Lambda container, keeping its loop and DB connection.
+
+    A fan-out worker passes the ``shard`` its coordinator assigned.
+    """
+    load_env()
+    service_name = get_option_runtime_config().service_name
+    retriever_config = get_retriever_config()
+
+    def initialize() -> None:
+        initialize_tracing(service_name)
+        initialize_metrics(service_name)
+        _configure_logging(service_name=service_name)
+
+    runtime.initialize_once(service_name, initialize)
+    today = get_current_datetime().date()
+    if not IGNORE_MARKET_CALENDAR and not is_trading_day(today):
+        logger.info("Skipping option contracts ingestion: %s is not a trading day", today)
+        return RunTotals()
+
+    retriever = OptionRetriever(
+        concurrency_limit=retriever_config.concurrency_limit,
+        batch_size=retriever_config.batch_size,
+    )
+    ingestor = OptionIngestor(option_retriever=retriever)
+    logger.info(
+        "-----------Starting option contracts ingestion on a %s container...",
+        "warm" if runtime.warm else "cold",
+    )
+    totals = runtime.run(_run_lambda_job(runtime, ingestor, get_option_targets_from_env(), shard))
+    logger.info("Option contracts ingestion completed successfully")
+    return totals
+
+
+async def _run_lambda_job(
+    runtime: WarmRuntime, ingestor: OptionIngestor, targets, shard: Shard | None = None
+) -> RunTotals:
+    await runtime.ensure_database()
+    with collect_run_totals() as totals:
+        async with shard_assignment("option_contracts", assigned=shard) as assigned:
+            if assigned is not None:
+                await ingestor.ingest_options(underlying_assets=targets, shard=assigned)
+    return totals
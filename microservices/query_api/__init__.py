@@ -0,0 +1,25 @@
+"""Read-only HTTP API over stored chains, surfaces and snapshot history.
+
+Builds on ``microservices.analytics``, so it needs the ``analytics`` extra.
+"""
+
+from microservices.query_api.app import BackgroundLoop, BadRequestError, QueryApi
+from microservices.query_api.cache import CachedResponse, ResponseCache
+from microservices.query_api.queries import (
+    chain_payload,
+    data_version,
+    history_payload,
+    surface_payload,
+)
+
+__all__ = [
+    "BackgroundLoop",
+    "BadRequestError",
+    "CachedResponse",
+    "QueryApi",
+    "ResponseCache",
+    "chain_payload",
+    "data_version",
+    "history_payload",
+    "surface_payload",
+]
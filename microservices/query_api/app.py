@@ -0,0 +1,264 @@
+"""WSGI app serving chains, surfaces and snapshot history out of an in-process cache.
+
+Routes (GET or HEAD, JSON bodies):
+
+- ``/chains/<underlying>[?as_of=]``: newest chain at or before ``as_of`` (default now);
+- ``/surfaces/<underlying>[?as_of=]``: the IV surface built from that chain;
+- ``/snapshots/<ticker>/history[?start=&end=&limit=]``: one contract's snapshot history.
+
+A repeated request is answered from memory while the data version, the newest stored
+snapshot time, is unchanged. That version is itself re-read at most once per
+``QUERY_API_VERSION_TTL_SECONDS``, so dashboard refreshes in between never reach Postgres.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Callable, Coroutine, Hashable, Iterable
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from typing import Any
+from urllib.parse import parse_qs
+
+from microservices.analytics.chains import as_datetime
+from microservices.query_api.cache import CachedResponse, ResponseCache
+from microservices.query_api.queries import (
+    QUERY_API_HISTORY_LIMIT,
+    chain_payload,
+    data_version,
+    history_payload,
+    surface_payload,
+)
+from microservices.shared.util import get_current_datetime
+
+QUERY_API_VERSION_TTL_SECONDS = float(os.getenv("QUERY_API_VERSION_TTL_SECONDS", "5"))
+QUERY_API_REQUEST_TIMEOUT_SECONDS = float(os.getenv("QUERY_API_REQUEST_TIMEOUT_SECONDS", "30"))
+QUERY_API_HISTORY_DAYS = float(os.getenv("QUERY_API_HISTORY_DAYS", "30"))
+# Bodies below this size go out uncompressed; gzip framing would outweigh the savings.
+QUERY_API_GZIP_MIN_BYTES = int(os.getenv("QUERY_API_GZIP_MIN_BYTES", "1024"))
+_UNDERLYING = r"(?P<underlying>[A-Za-z0-9.]+)"
+_ROUTES = (
+    (re.compile(rf"^/chains/{_UNDERLYING}$"), "chain"),
+    (re.compile(rf"^/surfaces/{_UNDERLYING}$"), "surface"),
+    (re.compile(r"^/snapshots/(?P<ticker>O:[A-Za-z0-9.]+)/history$"), "history"),
+)
+_STATUS = {
+    200: "200 OK",
+    304: "304 Not Modified",
+    400: "400 Bad Request",
+    404: "404 Not Found",
+    405: "405 Method Not Allowed",
+    500: "500 Internal Server Error",
+    504: "504 Gateway Timeout",
+}
+logger = logging.getLogger(__name__)
+Loader = Callable[[], Coroutine[Any, Any, dict[str, Any] | None]]
+
+
+class BadRequestError(ValueError):
+    """A query parameter the API cannot interpret."""
+
+
+class NotFoundError(LookupError):
+    """An unknown route, or a request for data that is not stored."""
+
+
+class BackgroundLoop:
+    """One long-lived event loop thread that runs every request's queries.
+
+    The Prisma client is bound to the loop it connected on, while WSGI servers call the app
+    from their own threads, so each request hands its coroutine to this loop and waits.
+    """
+
+    def __init__(self, timeout_seconds: float = QUERY_API_REQUEST_TIMEOUT_SECONDS):
+        self.timeout_seconds = timeout_seconds
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="query-api-loop", daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coro: Coroutine) -> Any:
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(self.timeout_seconds)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class QueryApi:
+    """The WSGI callable. ``run`` executes a coroutine to completion from a request thread."""
+
+    def __init__(
+        self,
+        run: Callable[[Coroutine], Any],
+        cache: ResponseCache | None = None,
+        version_ttl_seconds: float = QUERY_API_VERSION_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.run = run
+        self.cache = cache or ResponseCache()
+        self.version_ttl_seconds = version_ttl_seconds
+        self.clock = clock
+        self._version: tuple[float, datetime | None] | None = None
+        self._version_lock = threading.Lock()
+
+    def __call__(self, environ: dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        method = environ.get("REQUEST_METHOD", "GET")
+        if method not in {"GET", "HEAD"}:
+            return self._error(start_response, 405, f"{method} is not supported")
+        try:
+            entry, cache_status = self._lookup(environ)
+        except BadRequestError as exc:
+            return self._error(start_response, 400, str(exc))
+        except NotFoundError as exc:
+            return self._error(start_response, 404, str(exc))
+        except TimeoutError:
+            logger.warning("Query timed out: %s", environ.get("PATH_INFO"))
+            return self._error(start_response, 504, "Query timed out")
+        except Exception:
+            logger.exception("Query failed: %s", environ.get("PATH_INFO"))
+            return self._error(start_response, 500, "Query failed")
+        return self._respond(environ, start_response, entry, cache_status)
+
+    def data_version(self) -> datetime | None:
+        """Newest crawl time of any contract, re-read at most once per ``version_ttl_seconds``."""
+        with self._version_lock:
+            now = self.clock()
+            if self._version is None or now - self._version[0] >= self.version_ttl_seconds:
+                self._version = (now, self.run(data_version()))
+            return self._version[1]
+
+    def _lookup(self, environ: dict[str, Any]) -> tuple[CachedResponse, str]:
+        key, loader = _route(environ.get("PATH_INFO", ""), environ.get("QUERY_STRING", ""))
+        version = self.data_version()
+        entry = self.cache.get(key, version)
+        if entry is not None:
+            return entry, "hit"
+        payload = self.run(loader())
+        if payload is None:
+            raise NotFoundError("No snapshots stored")
+        entry = _encode(payload, version, self.clock())
+        self.cache.put(key, entry)
+        return entry, "miss"
+
+    def _respond(
+        self,
+        environ: dict[str, Any],
+        start_response: Callable,
+        entry: CachedResponse,
+        cache_status: str,
+    ) -> list[bytes]:
+        headers = [
+            ("ETag", entry.etag),
+            # Clients may keep the body but must revalidate; a match costs no query.
+            ("Cache-Control", "no-cache"),
+            ("Vary", "Accept-Encoding"),
+            ("X-Cache", cache_status),
+        ]
+        if _etag_matches(environ.get("HTTP_IF_NONE_MATCH"), entry.etag):
+            start_response(_STATUS[304], headers)
+            return []
+        body = entry.body
+        if entry.gzipped is not None and "gzip" in environ.get("HTTP_ACCEPT_ENCODING", ""):
+            body = entry.gzipped
+            headers.append(("Content-Encoding", "gzip"))
+        headers += [("Content-Type", "application/json"), ("Content-Length", str(len(body)))]
+        start_response(_STATUS[200], headers)
+        return [] if environ.get("REQUEST_METHOD") == "HEAD" else [body]
+
+    def _error(self, start_response: Callable, status: int, message: str) -> list[bytes]:
+        body = json.dumps({"error": message}).encode()
+        start_response(
+            _STATUS[status],
+            [("Content-Type", "application/json"), ("Content-Length", str(len(body)))],
+        )
+        return [body]
+
+
+def _route(path: str, query_string: str) -> tuple[Hashable, Loader]:
+    """Resolve a request to its cache key and the loader of its payload."""
+    params = {name: values[-1] for name, values in parse_qs(query_string).items()}
+    for pattern, name in _ROUTES:
+        match = pattern.match(path)
+        if match is None:
+            continue
+        if name == "history":
+            end = _datetime_param(params, "end")
+            start = _datetime_param(params, "start")
+            limit = _limit_param(params)
+            # Defaults stay out of the key: no row newer than the cached "now" exists until
+            # the version moves, and the TTL bounds the drift of the window start.
+            key = (
+                name,
+                match["ticker"],
+                start.isoformat() if start else None,
+                end.isoformat() if end else None,
+                limit,
+            )
+            end = end or get_current_datetime()
+            start = start or end - timedelta(days=QUERY_API_HISTORY_DAYS)
+            return key, partial(history_payload, match["ticker"], start, end, limit)
+        underlying = match["underlying"].upper()
+        as_of = _datetime_param(params, "as_of")
+        load = chain_payload if name == "chain" else surface_payload
+        key = (name, underlying, as_of.isoformat() if as_of else None)
+        return key, partial(load, underlying, as_of or get_current_datetime())
+    raise NotFoundError("Unknown route")
+
+
+def _encode(payload: dict[str, Any], version: Any, stored_at: float) -> CachedResponse:
+    body = json.dumps(payload, separators=(",", ":"), allow_nan=False).encode()
+    gzipped = gzip.compress(body, mtime=0) if len(body) >= QUERY_API_GZIP_MIN_BYTES else None
+    # Weak, since the gzip and identity bodies share it; equal content keeps its ETag
+    # across versions, so clients still get a 304 after an ingest run changed nothing.
+    etag = f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+    return CachedResponse(body, gzipped, etag, version, stored_at)
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _datetime_param(params: dict[str, str], name: str) -> datetime | None:
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        parsed = as_datetime(value)
+    except ValueError as exc:
+        raise BadRequestError(f"{name} must be an ISO 8601 timestamp") from exc
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=UTC)
+
+
+def _limit_param(params: dict[str, str]) -> int:
+    value = params.get("limit")
+    if value is None:
+        return QUERY_API_HISTORY_LIMIT
+    if not value.isdigit() or not 0 < int(value) <= QUERY_API_HISTORY_LIMIT:
+        raise BadRequestError(f"limit must be between 1 and {QUERY_API_HISTORY_LIMIT}")
+    return int(value)
+
+
+__all__ = [
+    "QUERY_API_VERSION_TTL_SECONDS",
+    "BackgroundLoop",
+    "BadRequestError",
+    "NotFoundError",
+    "QueryApi",
+]
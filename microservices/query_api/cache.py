@@ -0,0 +1,78 @@
+"""In-process LRU of encoded API responses, keyed by request and data version."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+QUERY_API_CACHE_SIZE = max(1, int(os.getenv("QUERY_API_CACHE_SIZE", "256")))
+QUERY_API_CACHE_TTL_SECONDS = float(os.getenv("QUERY_API_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A compact JSON body, its gzip form (None when too small to pay off) and its ETag."""
+
+    body: bytes
+    gzipped: bytes | None
+    etag: str
+    version: Any
+    stored_at: float
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses.
+
+    An entry answers only for the data version it was built at, so a new ingest run
+    invalidates every entry at once. In-place updates such as the greek fill leave the
+    version alone; ``ttl_seconds`` bounds how long those go unseen.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_API_CACHE_SIZE,
+        ttl_seconds: float = QUERY_API_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Any) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version or self.clock() - entry.stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of cached responses, including expired ones not yet evicted."""
+        return len(self._entries)
+
+
+__all__ = [
+    "QUERY_API_CACHE_SIZE",
+    "QUERY_API_CACHE_TTL_SECONDS",
+    "CachedResponse",
+    "ResponseCache",
+]
@@ -0,0 +1,131 @@
+"""Loaders behind the query API, returning compact columnar payloads.
+
+Columns are parallel lists, one entry per row; missing numbers are null and timestamps are
+epoch seconds, so a chain of a few thousand contracts stays a small, well-compressing body.
+"""
+
+import os
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from microservices.analytics.chains import as_datetime, latest_snapshot_time, load_latest_chain
+from microservices.analytics.surface import get_surface
+from microservices.shared import decorator
+
+QUERY_API_HISTORY_LIMIT = max(1, int(os.getenv("QUERY_API_HISTORY_LIMIT", "5000")))
+# Newest crawl time, the version of every cached response. It is ingest time rather than trade
+# time, so it also moves when a run only refreshes rows whose last_updated did not change.
+# The latest table holds one row per contract, which bounds the scan.
+DATA_VERSION_SQL = "SELECT max(last_crawled) AS as_of FROM option_snapshot_latest"
+SNAPSHOT_HISTORY_SQL = """
+SELECT last_updated, underlying_price, last_price, implied_vol, open_interest, volume,
+       delta, gamma, theta, vega, moneyness, years_to_expiry
+FROM option_snapshots
+WHERE ticker = $1 AND last_updated >= $2::timestamptz AND last_updated <= $3::timestamptz
+ORDER BY last_updated DESC
+LIMIT $4
+"""
+_HISTORY_COLUMNS = (
+    "underlying_price",
+    "last_price",
+    "implied_vol",
+    "open_interest",
+    "volume",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+    "moneyness",
+    "years_to_expiry",
+)
+_CHAIN_FLOAT_COLUMNS = (
+    "strike",
+    "expiration",
+    "last_updated",
+    "spot",
+    "close",
+    "iv",
+    "open_interest",
+    "volume",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+)
+
+
+async def data_version() -> datetime | None:
+    rows = await decorator._get_db().query_raw(DATA_VERSION_SQL)
+    value = rows[0].get("as_of") if rows else None
+    return as_datetime(value) if value is not None else None
+
+
+async def chain_payload(underlying: str, as_of: datetime) -> dict[str, Any] | None:
+    """Newest chain of ``underlying`` at or before ``as_of``, sorted by ticker.
+
+    OCC tickers sort by expiry, then type, then strike. None when nothing is stored.
+    """
+    snapshot_time = await latest_snapshot_time(underlying, as_of)
+    if snapshot_time is None:
+        return None
+    chain = await load_latest_chain(underlying, snapshot_time)
+    order = np.argsort(chain.ticker, kind="stable")
+    columns: dict[str, list] = {
+        "ticker": chain.ticker[order].tolist(),
+        "is_call": chain.is_call[order].tolist(),
+    }
+    for name in _CHAIN_FLOAT_COLUMNS:
+        columns[name] = _nullable(getattr(chain, name)[order])
+    return {
+        "underlying": underlying,
+        "as_of": snapshot_time.isoformat(),
+        "rows": len(chain),
+        "columns": columns,
+    }
+
+
+async def surface_payload(underlying: str, as_of: datetime) -> dict[str, Any] | None:
+    surface = await get_surface(underlying, as_of)
+    return surface.to_dict() if surface is not None else None
+
+
+async def history_payload(
+    ticker: str, start: datetime, end: datetime, limit: int = QUERY_API_HISTORY_LIMIT
+) -> dict[str, Any]:
+    """Snapshots of one contract stamped in [start, end], oldest first.
+
+    When more than ``limit`` rows match, the newest ``limit`` are returned.
+    """
+    rows = await decorator._get_db().query_raw(
+        SNAPSHOT_HISTORY_SQL, ticker, start.isoformat(), end.isoformat(), limit
+    )
+    rows.reverse()
+    columns: dict[str, list] = {
+        "last_updated": [as_datetime(row["last_updated"]).timestamp() for row in rows]
+    }
+    for name in _HISTORY_COLUMNS:
+        columns[name] = [row.get(name) for row in rows]
+    return {
+        "ticker": ticker,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "rows": len(rows),
+        "columns": columns,
+    }
+
+
+def _nullable(values: np.ndarray) -> list:
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+__all__ = [
+    "DATA_VERSION_SQL",
+    "QUERY_API_HISTORY_LIMIT",
+    "SNAPSHOT_HISTORY_SQL",
+    "chain_payload",
+    "data_version",
+    "history_payload",
+    "surface_payload",
+]
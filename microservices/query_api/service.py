@@ -0,0 +1,69 @@
+"""Query API server entrypoint."""
+
+import logging
+import os
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from microservices.config import get_query_api_runtime_config, load_env
+from microservices.query_api.app import BackgroundLoop, QueryApi
+from microservices.shared import connect_db, disconnect_db
+from microservices.shared.observability import (
+    configure_service_logger,
+    initialize_metrics,
+    initialize_tracing,
+    shutdown_tracing,
+)
+
+QUERY_API_HOST = os.getenv("QUERY_API_HOST", "127.0.0.1")
+QUERY_API_PORT = int(os.getenv("QUERY_API_PORT", "8080"))
+logger = logging.getLogger(__name__)
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _RequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):  # noqa: A002 - BaseHTTPRequestHandler signature
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_app(loop: BackgroundLoop | None = None) -> QueryApi:
+    """Connect Prisma on a background loop and return the WSGI app bound to it.
+
+    Any WSGI server can host the returned app; ``serve`` uses the standard library's.
+    """
+    loop = loop or BackgroundLoop()
+    loop.run(connect_db())
+    return QueryApi(loop.run)
+
+
+def serve() -> None:
+    """Serve the query API until interrupted."""
+    load_env()
+    service_name = get_query_api_runtime_config().service_name
+    initialize_tracing(service_name)
+    initialize_metrics(service_name)
+    configure_service_logger(service_name)
+    loop = BackgroundLoop()
+    try:
+        app = create_app(loop)
+        with make_server(
+            QUERY_API_HOST,
+            QUERY_API_PORT,
+            app,
+            server_class=_ThreadingWSGIServer,
+            handler_class=_RequestHandler,
+        ) as server:
+            logger.info("Query API listening on %s:%s", QUERY_API_HOST, QUERY_API_PORT)
+            server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Query API stopped")
+    finally:
+        loop.run(disconnect_db())
+        loop.close()
+        shutdown_tracing()
+
+
+__all__ = ["create_app", "serve"]
@@ -4,18 +4,23 @@ from microservices.shared.decorator import (
     CONCURRENCY_LIMIT,
     DATA_BASE_CONCURRENCY_LIMIT,
     OPTION_BATCH_RETRIEVAL_SIZE,
+    DbCircuitBreaker,
     bounded_async_sem,
     bounded_db_connection,
     bounded_db_connection_asyncgen,
     connect_db,
+    db_breaker,
     disconnect_db,
+    retry_db_call,
+    traced_row_span_async,
     traced_span_async,
     traced_span_asyncgen,
     traced_span_sync,
 )
-from microservices.shared.errors import OptionTickerNeverActiveError
+from microservices.shared.errors import DatabaseUnavailableError, OptionTickerNeverActiveError
 from microservices.shared.observability import (
     configure_service_logger,
+    initialize_metrics,
     initialize_tracing,
     shutdown_tracing,
 )
@@ -34,17 +39,23 @@ __all__ = [
     "CONCURRENCY_LIMIT",
     "DATA_BASE_CONCURRENCY_LIMIT",
     "OPTION_BATCH_RETRIEVAL_SIZE",
+    "DbCircuitBreaker",
     "bounded_async_sem",
     "bounded_db_connection",
     "bounded_db_connection_asyncgen",
     "connect_db",
+    "db_breaker",
     "disconnect_db",
+    "retry_db_call",
+    "traced_row_span_async",
     "traced_span_async",
     "traced_span_asyncgen",
     "traced_span_sync",
     "configure_service_logger",
+    "initialize_metrics",
     "initialize_tracing",
     "shutdown_tracing",
+    "DatabaseUnavailableError",
     "OptionTickerNeverActiveError",
     "convert_to_nyc_time",
     "convert_to_nyc_time_ns",
@@ -0,0 +1,143 @@
+"""File-backed run checkpoints so a failed ingestion job can resume where it stopped."""
+
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+CHECKPOINT_DIR = os.getenv("INGEST_CHECKPOINT_DIR", "").strip()
+logger = logging.getLogger(__name__)
+
+
+class RunCheckpoint:
+    """Completed underlyings, committed write batches and chain cursors for one job run.
+
+    State is keyed by ``run_key`` (the ingest date); a checkpoint left behind by a different
+    run key is stale and ignored. Every mutation is written through atomically, so a crash
+    loses at most the batch that was in flight. Without a checkpoint directory the object
+    tracks nothing and never touches disk.
+    """
+
+    def __init__(self, path: Path | None, job: str, run_key: str):
+        self.path = path
+        self.job = job
+        self.run_key = run_key
+        self._completed_underlyings: set[str] = set()
+        self._completed_batches: dict[str, set[str]] = {}
+        self._chain_cursors: dict[str, str] = {}
+
+    @classmethod
+    def load(cls, job: str, run_key: str, directory: str | None = None) -> "RunCheckpoint":
+        directory = CHECKPOINT_DIR if directory is None else directory
+        if not directory:
+            return cls(None, job, run_key)
+        checkpoint = cls(Path(directory) / f"{job}.json", job, run_key)
+        checkpoint._restore()
+        return checkpoint
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @property
+    def has_progress(self) -> bool:
+        """Whether an unfinished run of the same key left progress to resume."""
+        return bool(self._completed_underlyings or self._completed_batches or self._chain_cursors)
+
+    def is_underlying_done(self, underlying: str) -> bool:
+        return underlying in self._completed_underlyings
+
+    def mark_underlying_done(self, underlying: str) -> None:
+        if not self.enabled:
+            return
+        self._completed_underlyings.add(underlying)
+        self._completed_batches.pop(underlying, None)
+        self._chain_cursors.pop(underlying, None)
+        self._save()
+
+    def is_batch_done(self, underlying: str, batch_key: str) -> bool:
+        return batch_key in self._completed_batches.get(underlying, ())
+
+    def mark_batch_done(self, underlying: str, batch_key: str) -> None:
+        if not self.enabled:
+            return
+        self._completed_batches.setdefault(underlying, set()).add(batch_key)
+        self._save()
+
+    def chain_cursor(self, underlying: str) -> str | None:
+        return self._chain_cursors.get(underlying)
+
+    def set_chain_cursor(self, underlying: str, cursor: str | None) -> None:
+        if not self.enabled:
+            return
+        if cursor is None:
+            self._chain_cursors.pop(underlying, None)
+        else:
+            self._chain_cursors[underlying] = cursor
+        self._save()
+
+    def clear(self) -> None:
+        """Forget all progress once the run has completed."""
+        self._completed_underlyings.clear()
+        self._completed_batches.clear()
+        self._chain_cursors.clear()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    def _restore(self) -> None:
+        assert self.path is not None
+        try:
+            payload = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, exc)
+            return
+        if payload.get("run_key") != self.run_key:
+            logger.info(
+                "Discarding stale %s checkpoint for run %s", self.job, payload.get("run_key")
+            )
+            return
+        self._completed_underlyings = set(payload.get("completed_underlyings", []))
+        self._completed_batches = {
+            underlying: set(keys)
+            for underlying, keys in payload.get("completed_batches", {}).items()
+        }
+        self._chain_cursors = dict(payload.get("chain_cursors", {}))
+        logger.info(
+            "Resuming %s run %s: %s underlyings done, %s partially written",
+            self.job,
+            self.run_key,
+            len(self._completed_underlyings),
+            len(self._completed_batches) + len(self._chain_cursors),
+        )
+
+    def _save(self) -> None:
+        assert self.path is not None
+        payload = {
+            "job": self.job,
+            "run_key": self.run_key,
+            "completed_underlyings": sorted(self._completed_underlyings),
+            "completed_batches": {
+                underlying: sorted(keys) for underlying, keys in self._completed_batches.items()
+            },
+            "chain_cursors": self._chain_cursors,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("w") as handle:
+            json.dump(payload, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def batch_key(tickers: Iterable[str]) -> str:
+    """Identify a write batch by its contents so listing changes cannot shift batch indices."""
+    digest = hashlib.sha1("\n".join(tickers).encode(), usedforsecurity=False)
+    return digest.hexdigest()[:16]
+
+
+__all__ = ["CHECKPOINT_DIR", "RunCheckpoint", "batch_key"]
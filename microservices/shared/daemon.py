@@ -0,0 +1,70 @@
+"""Fixed-cadence job loop for long-running ingestion daemons."""
+
+import asyncio
+import contextlib
+import logging
+import signal
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def install_shutdown_signals(stop_event: asyncio.Event) -> None:
+    """Set ``stop_event`` on SIGTERM/SIGINT so the loop can finish its cycle and exit."""
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, _request_stop, stop_event, signum)
+        except (NotImplementedError, RuntimeError):
+            # Not available off the main thread or on platforms without loop signal support.
+            logger.debug("Could not install handler for %s", signum)
+
+
+def _request_stop(stop_event: asyncio.Event, signum: int) -> None:
+    logger.info("Received %s; stopping after the current cycle", signal.Signals(signum).name)
+    stop_event.set()
+
+
+async def run_periodic(
+    job: Callable[[], Awaitable[None]],
+    interval_seconds: float,
+    stop_event: asyncio.Event,
+    max_cycles: int | None = None,
+) -> int:
+    """Run ``job`` every ``interval_seconds`` until ``stop_event`` is set.
+
+    Ticks are scheduled against the loop clock from the first start, so job runtime does not
+    accumulate as drift. A cycle that overruns its slot skips the missed ticks rather than
+    running back to back. Job failures are logged and the next tick still runs. Returns the
+    number of cycles started.
+    """
+    loop = asyncio.get_running_loop()
+    interval = max(0.0, interval_seconds)
+    started_at = loop.time()
+    cycles = 0
+    tick = 0
+    while not stop_event.is_set():
+        cycles += 1
+        cycle_started = loop.time()
+        try:
+            await job()
+        except Exception:
+            logger.exception("Daemon cycle %s failed", cycles)
+        else:
+            logger.info("Daemon cycle %s finished in %.2fs", cycles, loop.time() - cycle_started)
+        if max_cycles is not None and cycles >= max_cycles:
+            break
+
+        now = loop.time()
+        elapsed_ticks = int((now - started_at) // interval) if interval else tick
+        missed = elapsed_ticks - tick
+        if missed > 0:
+            logger.warning("Daemon cycle %s overran its slot; skipping %s tick(s)", cycles, missed)
+        tick = max(tick, elapsed_ticks) + 1
+        delay = started_at + tick * interval - now
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(stop_event.wait(), timeout=max(0.0, delay))
+    return cycles
+
+
+__all__ = ["install_shutdown_signals", "run_periodic"]
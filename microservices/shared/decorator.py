@@ -2,37 +2,63 @@ import asyncio
 import functools
 import logging
 import os
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
 from importlib import import_module
+from time import monotonic, perf_counter
 
 from opentelemetry.trace import SpanKind
 
-from microservices.shared.errors import is_retryable_db_error
-from microservices.shared.observability import annotate_span_error, start_span_sync
+from microservices.shared.errors import DatabaseUnavailableError, is_retryable_db_error
+from microservices.shared.metrics import DB_BREAKER_TRANSITIONS, RETRIES
+from microservices.shared.observability import (
+    annotate_span_error,
+    current_batch_stats,
+    row_spans_enabled,
+    start_span_sync,
+)
 
 CONCURRENCY_LIMIT = int(os.getenv("INGEST_CONCURRENCY_LIMIT", "200"))
 DATA_BASE_CONCURRENCY_LIMIT = int(os.getenv("INGEST_DB_CONCURRENCY_LIMIT", "10"))
 OPTION_BATCH_RETRIEVAL_SIZE = int(os.getenv("INGEST_OPTION_BATCH_SIZE", "500"))
 DB_CONNECT_MAX_ATTEMPTS = int(os.getenv("INGEST_DB_CONNECT_MAX_ATTEMPTS", "3"))
 DB_CONNECT_BASE_DELAY_SECONDS = float(os.getenv("INGEST_DB_CONNECT_BASE_DELAY_SECONDS", "0.5"))
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("INGEST_DB_BREAKER_FAILURE_THRESHOLD", "10"))
+DB_BREAKER_WINDOW_SECONDS = float(os.getenv("INGEST_DB_BREAKER_WINDOW_SECONDS", "5"))
+DB_BREAKER_COOLDOWN_SECONDS = float(os.getenv("INGEST_DB_BREAKER_COOLDOWN_SECONDS", "1"))
+DB_BREAKER_MAX_COOLDOWN_SECONDS = float(os.getenv("INGEST_DB_BREAKER_MAX_COOLDOWN_SECONDS", "30"))
+DB_BREAKER_PROBE_TIMEOUT_SECONDS = float(os.getenv("INGEST_DB_BREAKER_PROBE_TIMEOUT_SECONDS", "5"))
+# How long the breaker waits for the database to come back before failing its paused writers.
+DB_BREAKER_MAX_OPEN_SECONDS = float(os.getenv("INGEST_DB_BREAKER_MAX_OPEN_SECONDS", "300"))
+DB_BREAKER_RELEASE_INTERVAL_SECONDS = float(
+    os.getenv("INGEST_DB_BREAKER_RELEASE_INTERVAL_SECONDS", "0.25")
+)
 _db_semaphore = asyncio.Semaphore(DATA_BASE_CONCURRENCY_LIMIT)
 logger = logging.getLogger(__name__)
 
 semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
 
-_prisma_module = import_module("prisma")
-Prisma = _prisma_module.Prisma
-db = Prisma(auto_register=True)
+# Constructed on first connect so that importing this module stays cheap on cold starts.
+db = None
 _db_connected = False
 _db_lock = asyncio.Lock()
 
 
+def _get_db():
+    global db  # noqa: PLW0603
+    if db is None:
+        db = import_module("prisma").Prisma(auto_register=True)
+    return db
+
+
 async def connect_db() -> None:
     global _db_connected  # noqa: PLW0603
     async with _db_lock:
         if not _db_connected:
             for attempt in range(1, DB_CONNECT_MAX_ATTEMPTS + 1):
                 try:
-                    await db.connect()
+                    await _get_db().connect()
                     _db_connected = True
                     _log_connection_pool_stats()
                     return
@@ -60,8 +86,273 @@ async def disconnect_db() -> None:
             _db_connected = False
 
 
+async def _reconnect_db() -> None:
+    global _db_connected  # noqa: PLW0603
+    async with _db_lock:
+        if _db_connected:
+            try:
+                await db.disconnect()
+            except Exception as exc:
+                logger.debug("Ignoring error while dropping dead database connection: %s", exc)
+            _db_connected = False
+        await _get_db().connect()
+        _db_connected = True
+
+
+async def probe_database() -> None:
+    """Run one lightweight query, reconnecting the Prisma client first if it was dropped."""
+    is_connected = getattr(_get_db(), "is_connected", None)
+    if not _db_connected or (callable(is_connected) and not is_connected()):
+        await _reconnect_db()
+    try:
+        await db.query_raw("SELECT 1")
+    except Exception as exc:
+        if not is_retryable_db_error(exc):
+            raise
+        await _reconnect_db()
+        await db.query_raw("SELECT 1")
+
+
+class _Permit:
+    """One ``bounded_async_sem`` slot that its holder can give back while it waits."""
+
+    def __init__(self, sem: asyncio.Semaphore):
+        self._sem = sem
+        self._held = False
+
+    async def acquire(self) -> None:
+        await self._sem.acquire()
+        self._held = True
+
+    def release(self) -> None:
+        if self._held:
+            self._held = False
+            self._sem.release()
+
+    async def __aenter__(self) -> "_Permit":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+_HELD_PERMIT: ContextVar[_Permit | None] = ContextVar("strategy_tester_db_permit", default=None)
+
+
+class DbCircuitBreaker:
+    """Shared breaker that pauses every database writer while the database is unreachable.
+
+    Retryable errors reported through ``record_failure`` are counted in a sliding window;
+    ``failure_threshold`` of them within ``window_seconds`` open the breaker. While open, every
+    ``acquire`` call waits, and a single background task runs ``probe`` with exponential backoff
+    instead of each writer retrying on its own. Once a probe succeeds, waiting writers are
+    released in doubling waves so the recovering pooler is not hit by the whole backlog at once.
+    A new burst of failures during release re-opens the breaker. When no probe succeeds within
+    ``max_open_seconds``, probing stops, every paused writer gets ``DatabaseUnavailableError``
+    and the breaker closes, so a sustained outage fails the job instead of hanging it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        probe: Callable[[], Awaitable[None]] = probe_database,
+        failure_threshold: int = DB_BREAKER_FAILURE_THRESHOLD,
+        window_seconds: float = DB_BREAKER_WINDOW_SECONDS,
+        cooldown_seconds: float = DB_BREAKER_COOLDOWN_SECONDS,
+        max_cooldown_seconds: float = DB_BREAKER_MAX_COOLDOWN_SECONDS,
+        probe_timeout_seconds: float = DB_BREAKER_PROBE_TIMEOUT_SECONDS,
+        release_interval_seconds: float = DB_BREAKER_RELEASE_INTERVAL_SECONDS,
+        max_open_seconds: float = DB_BREAKER_MAX_OPEN_SECONDS,
+    ):
+        self._probe = probe
+        self._failure_threshold = max(1, failure_threshold)
+        self._window_seconds = window_seconds
+        self._cooldown_seconds = cooldown_seconds
+        self._max_cooldown_seconds = max(cooldown_seconds, max_cooldown_seconds)
+        self._probe_timeout_seconds = probe_timeout_seconds
+        self._release_interval_seconds = release_interval_seconds
+        self._max_open_seconds = max_open_seconds
+        self._opened_at = 0.0
+        self._failures: deque[float] = deque()
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._recovery_task: asyncio.Task[None] | None = None
+        self.state = self.CLOSED
+
+    async def acquire(self) -> None:
+        """Return immediately while closed; otherwise wait until recovery releases this caller.
+
+        Raises ``DatabaseUnavailableError`` when the breaker gives up on recovery.
+        """
+        if self.state == self.CLOSED:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        await waiter
+
+    async def backoff(self, delay: float) -> None:
+        """Sleep ``delay`` before a retry, or wait for release if the breaker has opened.
+
+        A ``bounded_async_sem`` permit held by the caller is released for the wait.
+        """
+        permit = _HELD_PERMIT.get()
+        if permit is not None:
+            permit.release()
+        try:
+            if self.state == self.CLOSED:
+                await asyncio.sleep(delay)
+            await self.acquire()
+        finally:
+            if permit is not None:
+                await permit.acquire()
+
+    def record_success(self) -> None:
+        if self.state == self.CLOSED:
+            self._failures.clear()
+
+    def record_failure(self, error: Exception) -> None:
+        if not is_retryable_db_error(error):
+            return
+        now = monotonic()
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self._window_seconds:
+            self._failures.popleft()
+        if len(self._failures) >= self._failure_threshold and self.state != self.OPEN:
+            self._open(error)
+
+    def reset(self) -> None:
+        if self._recovery_task is not None:
+            self._recovery_task.cancel()
+            self._recovery_task = None
+        self._release(len(self._waiters))
+        self._failures.clear()
+        self.state = self.CLOSED
+
+    def _open(self, error: Exception) -> None:
+        logger.warning(
+            "Opening database circuit breaker after %s retryable errors in %.1fs: %s",
+            len(self._failures),
+            self._window_seconds,
+            error,
+        )
+        self._transition(self.OPEN)
+        self._opened_at = monotonic()
+        self._failures.clear()
+        if self._recovery_task is None:
+            self._recovery_task = asyncio.get_running_loop().create_task(self._recover())
+
+    async def _recover(self) -> None:
+        try:
+            while True:
+                await self._wait_for_healthy_probe()
+                self._transition(self.HALF_OPEN)
+                if await self._release_gradually():
+                    self._transition(self.CLOSED)
+                    self._failures.clear()
+                    return
+        except DatabaseUnavailableError as exc:
+            logger.error("%s; failing %s paused writers", exc, len(self._waiters))
+            self._fail_waiters(exc)
+            self._failures.clear()
+            self._transition(self.CLOSED)
+        finally:
+            self._recovery_task = None
+
+    async def _wait_for_healthy_probe(self) -> None:
+        delay = self._cooldown_seconds
+        deadline = self._opened_at + self._max_open_seconds
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise DatabaseUnavailableError(
+                    f"Database still unreachable after {self._max_open_seconds:.0f}s"
+                )
+            await asyncio.sleep(min(delay, remaining))
+            try:
+                await asyncio.wait_for(self._probe(), timeout=self._probe_timeout_seconds)
+            except Exception as exc:
+                logger.warning("Database probe failed; retrying in %.2fs: %s", delay, exc)
+                delay = min(delay * 2, self._max_cooldown_seconds)
+                continue
+            logger.info("Database probe succeeded; releasing %s paused writers", len(self._waiters))
+            return
+
+    async def _release_gradually(self) -> bool:
+        wave = 1
+        while self._waiters:
+            if self.state == self.OPEN:
+                return False
+            self._release(wave)
+            wave *= 2
+            await asyncio.sleep(self._release_interval_seconds)
+        return self.state != self.OPEN
+
+    def _release(self, count: int) -> None:
+        for _ in range(min(count, len(self._waiters))):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _fail_waiters(self, error: Exception) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(error)
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        DB_BREAKER_TRANSITIONS.add(1, {"state": state})
+
+
+db_breaker = DbCircuitBreaker()
+
+
+async def retry_db_call[T](
+    call: Callable[..., Awaitable[T]],
+    *args,
+    what: str,
+    table: str,
+    max_attempts: int,
+    base_delay_seconds: float,
+    breaker: DbCircuitBreaker | None = None,
+) -> T:
+    """Await ``call(*args)`` behind the DB circuit breaker, retrying transient errors.
+
+    Every attempt reports its outcome to the breaker, and retries back off exponentially
+    from ``base_delay_seconds``, waiting out an opened breaker instead. Non-retryable errors
+    and the error of the last attempt are raised.
+    """
+    breaker = breaker or db_breaker
+    await breaker.acquire()
+    for attempt in range(1, max_attempts + 1):
+        try:
+            result = await call(*args)
+            breaker.record_success()
+            return result
+        except Exception as exc:
+            breaker.record_failure(exc)
+            if not is_retryable_db_error(exc) or attempt >= max_attempts:
+                raise
+            delay = base_delay_seconds * (2 ** (attempt - 1))
+            RETRIES.add(1, {"stage": "db", "table": table})
+            logger.warning(
+                "Retrying %s after transient DB error in %.2fs (attempt %s/%s): %s",
+                what,
+                delay,
+                attempt,
+                max_attempts,
+                exc,
+            )
+            await breaker.backoff(delay)
+    raise RuntimeError(f"Unreachable retry loop for {what}")
+
+
 def bounded_db_connection(func):
     async def wrapper(*args, **kwargs):
+        await db_breaker.acquire()
         async with _db_semaphore:
             _log_connection_pool_stats()
             return await func(*args, **kwargs)
@@ -104,13 +395,21 @@ def _log_connection_pool_stats():
         logger.debug("Could not retrieve connection pool stats: %s", e)
 
 
-def bounded_async_sem(limit=CONCURRENCY_LIMIT):
+def bounded_async_sem(limit=CONCURRENCY_LIMIT, breaker: DbCircuitBreaker | None = None):
     sem = asyncio.Semaphore(limit) if limit else semaphore
 
     def wrapper(coro):
         async def inner(*args, **kwargs):
-            async with sem:
-                return await coro(*args, **kwargs)
+            if breaker is not None:
+                # Wait outside the semaphore so paused writers do not hold its permits.
+                await breaker.acquire()
+            async with _Permit(sem) as permit:
+                # Retry loops inside give the permit back while they back off.
+                token = _HELD_PERMIT.set(permit)
+                try:
+                    return await coro(*args, **kwargs)
+                finally:
+                    _HELD_PERMIT.reset(token)
 
         return inner
 
@@ -139,6 +438,43 @@ def traced_span_async(name: str, attributes: dict | None = None, kind=None):
     return decorator
 
 
+def traced_row_span_async(
+    name: str,
+    attributes: dict | None = None,
+    kind=None,
+    row_id: Callable[..., str] | None = None,
+):
+    """Trace a per-row coroutine at the configured granularity.
+
+    In row mode every call gets its own span, as with ``traced_span_async``. In batch mode
+    no span is opened; the call's latency and any raised error are folded into the
+    enclosing ``start_batch_span`` instead.
+    """
+
+    def decorator(func):
+        row_traced = traced_span_async(name, attributes=attributes, kind=kind)(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            stats = current_batch_stats()
+            target = row_traced if row_spans_enabled() else func
+            started = perf_counter()
+            try:
+                result = await target(*args, **kwargs)
+            except Exception as exc:
+                if stats is not None:
+                    stats.record(perf_counter() - started)
+                    stats.record_error(exc, row_id(*args, **kwargs) if row_id else None)
+                raise
+            if stats is not None:
+                stats.record(perf_counter() - started)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
 def traced_span_sync(name: str, attributes: dict | None = None, kind=None):
     _ = (name, attributes, kind)
 
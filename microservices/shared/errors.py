@@ -7,6 +7,10 @@ class OptionTickerNeverActiveError(Exception):
     pass
 
 
+class DatabaseUnavailableError(RuntimeError):
+    """Raised to writers paused by the DB circuit breaker once it stops waiting for recovery."""
+
+
 def is_retryable_db_error(error: Exception) -> bool:
     """Return True when the error looks like a transient database connectivity fault."""
     message = str(error)
@@ -0,0 +1,309 @@
+"""Coordinator/worker fan-out of one ingestion job across parallel invocations.
+
+A coordinator splits a job into hash shards (see ``microservices.shared.sharding``), invokes
+one worker per shard and aggregates what the workers report, so a watchlist is no longer
+bounded by what a single invocation can ingest before its timeout.
+"""
+
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable, Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from http import HTTPStatus
+from time import perf_counter
+from typing import Any, Protocol
+
+from microservices.shared.lambda_runtime import WarmRuntime
+from microservices.shared.progress import RunTotals
+from microservices.shared.sharding import Shard
+
+FANOUT_SHARD_COUNT = max(1, int(os.getenv("FANOUT_SHARD_COUNT", "8")))
+# 0 invokes every shard at once.
+FANOUT_MAX_CONCURRENCY = max(0, int(os.getenv("FANOUT_MAX_CONCURRENCY", "0")))
+FANOUT_INVOKER = os.getenv("FANOUT_INVOKER", "lambda").strip().lower()
+FANOUT_WORKER_FUNCTION = os.getenv("FANOUT_WORKER_FUNCTION", "").strip()
+FANOUT_INVOKE_TIMEOUT_SECONDS = float(os.getenv("FANOUT_INVOKE_TIMEOUT_SECONDS", "900"))
+FANOUT_LOCAL_START_METHOD = os.getenv("FANOUT_LOCAL_START_METHOD", "spawn")
+INVOKER_LAMBDA = "lambda"
+INVOKER_LOCAL = "local"
+_JOB_SERVICES = {
+    "option_contracts": "microservices.option_ingestor.service",
+    "option_snapshots": "microservices.snapshot_ingestor.service",
+}
+logger = logging.getLogger(__name__)
+
+# A Lambda-style handler: ``handler(event, context) -> {"statusCode": ..., "body": ...}``.
+Handler = Callable[[dict[str, Any], Any], dict[str, Any]]
+
+
+class FanoutError(RuntimeError):
+    """Raised when a worker invocation fails or returns an error response."""
+
+
+@dataclass(frozen=True)
+class ShardTask:
+    """The payload a coordinator sends one worker: a job and the shard it owns."""
+
+    job: str
+    shard_index: int
+    shard_count: int
+
+    def __post_init__(self):
+        """Reject unknown jobs and out-of-range shards before anything is invoked."""
+        if self.job not in _JOB_SERVICES:
+            raise ValueError(f"unknown fan-out job {self.job!r}; expected one of {_JOB_SERVICES}")
+        Shard(self.shard_index, self.shard_count)
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> "ShardTask":
+        return cls(
+            job=str(payload.get("job")),
+            shard_index=int(payload["shard_index"]),
+            shard_count=int(payload["shard_count"]),
+        )
+
+    def to_payload(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ShardResult:
+    """What one worker reported, or why its invocation failed."""
+
+    job: str
+    shard_index: int
+    shard_count: int
+    ok: bool
+    duration_seconds: float
+    underlyings: int = 0
+    written: int = 0
+    skipped: int = 0
+    failed: int = 0
+    error: str | None = None
+
+    @classmethod
+    def from_totals(cls, task: ShardTask, totals: RunTotals, duration: float) -> "ShardResult":
+        return cls(
+            job=task.job,
+            shard_index=task.shard_index,
+            shard_count=task.shard_count,
+            ok=True,
+            duration_seconds=round(duration, 3),
+            **asdict(totals),
+        )
+
+    @classmethod
+    def failure(cls, task: ShardTask, error: Exception, duration: float) -> "ShardResult":
+        return cls(
+            job=task.job,
+            shard_index=task.shard_index,
+            shard_count=task.shard_count,
+            ok=False,
+            duration_seconds=round(duration, 3),
+            error=f"{type(error).__name__}: {error}",
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class FanoutReport:
+    """Per-shard results of one fan-out plus their row totals."""
+
+    job: str
+    shards: list[ShardResult]
+    duration_seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return all(shard.ok for shard in self.shards)
+
+    @property
+    def failed_shards(self) -> list[int]:
+        return [shard.shard_index for shard in self.shards if not shard.ok]
+
+    def totals(self) -> RunTotals:
+        totals = RunTotals()
+        for shard in self.shards:
+            totals.merge(RunTotals(shard.underlyings, shard.written, shard.skipped, shard.failed))
+        return totals
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job": self.job,
+            "ok": self.ok,
+            "shard_count": len(self.shards),
+            "failed_shards": self.failed_shards,
+            "duration_seconds": round(self.duration_seconds, 3),
+            **asdict(self.totals()),
+            "shards": [shard.to_dict() for shard in self.shards],
+        }
+
+
+class Invoker(Protocol):
+    """Runs the worker handler for one payload and returns its response."""
+
+    def invoke(self, payload: dict[str, Any]) -> dict[str, Any]: ...
+
+    def close(self) -> None: ...
+
+
+class LambdaInvoker:
+    """Synchronous ``RequestResponse`` invocations of the deployed worker function."""
+
+    def __init__(self, function_name: str, max_concurrency: int, client: Any = None):
+        if client is None:
+            # boto3 ships with the Lambda Python runtime; local fan-out never needs it.
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "lambda",
+                config=Config(
+                    read_timeout=FANOUT_INVOKE_TIMEOUT_SECONDS,
+                    max_pool_connections=max(10, max_concurrency),
+                    # A retried invoke would run the shard twice; failures are reported instead.
+                    retries={"total_max_attempts": 1},
+                ),
+            )
+        self.function_name = function_name
+        self._client = client
+
+    def invoke(self, payload: dict[str, Any]) -> dict[str, Any]:
+        response = self._client.invoke(
+            FunctionName=self.function_name,
+            InvocationType="RequestResponse",
+            Payload=json.dumps(payload).encode(),
+        )
+        body = json.loads(response["Payload"].read() or b"null")
+        if response.get("FunctionError"):
+            message = body.get("errorMessage", body) if isinstance(body, dict) else body
+            raise FanoutError(f"{self.function_name} failed: {message}")
+        return body
+
+    def close(self) -> None:
+        pass
+
+
+class LocalProcessInvoker:
+    """Offline stand-in for Lambda: the worker handler runs in a local process pool.
+
+    Like Lambda containers, each pool process imports the handler cold on its first shard
+    and stays warm for the shards it picks up afterwards.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        max_workers: int,
+        start_method: str = FANOUT_LOCAL_START_METHOD,
+    ):
+        self._handler = handler
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context(start_method)
+        )
+
+    def invoke(self, payload: dict[str, Any]) -> dict[str, Any]:
+        return self._pool.submit(self._handler, payload, None).result()
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+
+def plan_shards(job: str, shard_count: int) -> list[ShardTask]:
+    return [ShardTask(job, index, shard_count) for index in range(max(1, shard_count))]
+
+
+def fan_out(
+    tasks: list[ShardTask], invoker: Invoker, max_concurrency: int = FANOUT_MAX_CONCURRENCY
+) -> FanoutReport:
+    """Invoke every task, at most ``max_concurrency`` at a time, and collect the results.
+
+    A failed shard is recorded in the report rather than raised, so the other shards still
+    run and the report names exactly which shards to re-run.
+    """
+    if not tasks:
+        raise ValueError("fan_out needs at least one shard task")
+    started = perf_counter()
+    workers = min(len(tasks), max_concurrency or len(tasks))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fanout") as pool:
+        shards = list(pool.map(lambda task: _invoke_shard(invoker, task), tasks))
+    return FanoutReport(tasks[0].job, shards, perf_counter() - started)
+
+
+def build_invoker(worker: Handler, max_concurrency: int) -> Invoker:
+    if FANOUT_INVOKER == INVOKER_LOCAL:
+        return LocalProcessInvoker(worker, max_workers=max_concurrency)
+    if FANOUT_INVOKER == INVOKER_LAMBDA:
+        if not FANOUT_WORKER_FUNCTION:
+            raise ValueError("FANOUT_WORKER_FUNCTION must name the worker Lambda function")
+        return LambdaInvoker(FANOUT_WORKER_FUNCTION, max_concurrency)
+    raise ValueError(f"FANOUT_INVOKER must be {INVOKER_LAMBDA!r} or {INVOKER_LOCAL!r}")
+
+
+def coordinate(event: Mapping[str, Any], worker: Handler) -> FanoutReport:
+    """Fan ``event["job"]`` out over ``event["shard_count"]`` (or ``FANOUT_SHARD_COUNT``)."""
+    tasks = plan_shards(str(event.get("job")), int(event.get("shard_count") or FANOUT_SHARD_COUNT))
+    max_concurrency = min(len(tasks), FANOUT_MAX_CONCURRENCY or len(tasks))
+    invoker = build_invoker(worker, max_concurrency)
+    try:
+        report = fan_out(tasks, invoker, max_concurrency)
+    finally:
+        invoker.close()
+    totals = report.totals()
+    logger.info(
+        "Fan-out of %s over %s shards finished in %.1fs: %s underlyings "
+        "(written=%s, skipped=%s, failed=%s), failed shards %s",
+        report.job,
+        len(report.shards),
+        report.duration_seconds,
+        totals.underlyings,
+        totals.written,
+        totals.skipped,
+        totals.failed,
+        report.failed_shards or "none",
+    )
+    return report
+
+
+def run_shard(runtime: WarmRuntime, task: ShardTask) -> ShardResult:
+    """Worker side: ingest only ``task``'s shard with the job's Lambda entry point."""
+    service = importlib.import_module(_JOB_SERVICES[task.job])
+    started = perf_counter()
+    totals = service.run_lambda(runtime, Shard(task.shard_index, task.shard_count))
+    return ShardResult.from_totals(task, totals, perf_counter() - started)
+
+
+def _invoke_shard(invoker: Invoker, task: ShardTask) -> ShardResult:
+    started = perf_counter()
+    try:
+        response = invoker.invoke(task.to_payload())
+        body = json.loads(response["body"])
+        if response.get("statusCode") != HTTPStatus.OK:
+            raise FanoutError(body.get("error", body))
+        return ShardResult(**body)
+    except Exception as exc:
+        logger.exception("Shard %s/%s of %s failed", task.shard_index, task.shard_count, task.job)
+        return ShardResult.failure(task, exc, perf_counter() - started)
+
+
+__all__ = [
+    "FANOUT_SHARD_COUNT",
+    "FanoutError",
+    "FanoutReport",
+    "Invoker",
+    "LambdaInvoker",
+    "LocalProcessInvoker",
+    "ShardResult",
+    "ShardTask",
+    "build_invoker",
+    "coordinate",
+    "fan_out",
+    "plan_shards",
+    "run_shard",
+]
@@ -0,0 +1,75 @@
+"""Event loop, Prisma connection and telemetry kept alive across warm Lambda invocations."""
+
+import asyncio
+import logging
+import os
+from collections.abc import Callable, Coroutine
+from typing import Any, TypeVar
+
+from microservices.shared import decorator
+from microservices.shared.decorator import connect_db, probe_database
+from microservices.shared.errors import is_retryable_db_error
+from microservices.shared.observability import flush_telemetry
+
+WARM_HEALTH_CHECK_TIMEOUT_SECONDS = float(
+    os.getenv("LAMBDA_WARM_HEALTH_CHECK_TIMEOUT_SECONDS", "5")
+)
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+
+class WarmRuntime:
+    """Per-container resources that outlive a single invocation.
+
+    ``asyncio.run`` would close the loop, and with it the Prisma engine connection and any
+    pooled HTTP connections bound to that loop, at the end of every invocation. The runtime
+    keeps one loop for the container's lifetime and only flushes telemetry between
+    invocations, since the container may be frozen at any point after a handler returns.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._initialized: set[str] = set()
+        self.invocations = 0
+
+    @property
+    def warm(self) -> bool:
+        return self.invocations > 0
+
+    def initialize_once(self, key: str, initialize: Callable[[], None]) -> None:
+        if key not in self._initialized:
+            initialize()
+            self._initialized.add(key)
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+        try:
+            return self._loop.run_until_complete(coro)
+        finally:
+            self.invocations += 1
+            flush_telemetry()
+
+    async def ensure_database(self) -> None:
+        """Connect on a cold container; on a warm one check the kept connection first.
+
+        A frozen container can come back with a connection the pooler has already dropped,
+        so a reused connection must answer a ``SELECT 1`` before any writer runs.
+        """
+        if not decorator._db_connected:
+            await connect_db()
+            return
+        try:
+            await asyncio.wait_for(probe_database(), WARM_HEALTH_CHECK_TIMEOUT_SECONDS)
+        except Exception as exc:
+            if not isinstance(exc, TimeoutError) and not is_retryable_db_error(exc):
+                raise
+            logger.warning("Warm database connection failed its health check: %s", exc)
+            await decorator._reconnect_db()
+
+
+runtime = WarmRuntime()
+
+
+__all__ = ["WarmRuntime", "runtime"]
@@ -0,0 +1,173 @@
+"""Offline US equity/options exchange calendar (NYSE holiday and early-close rules)."""
+
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import pytz
+
+MARKET_TIME_ZONE = pytz.timezone("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+IGNORE_MARKET_CALENDAR = os.getenv("INGEST_IGNORE_MARKET_CALENDAR", "false").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+_MAX_LOOKBACK_DAYS = 14
+
+
+@dataclass(frozen=True)
+class MarketSession:
+    """One regular trading session, with timezone-aware open and close times."""
+
+    day: date
+    open: datetime
+    close: datetime
+    early_close: bool
+
+
+def market_holidays(year: int) -> dict[date, str]:
+    """Full-day exchange closures for ``year`` using the standing NYSE rules.
+
+    Fixed-date holidays falling on a Sunday are observed the following Monday and on a
+    Saturday the preceding Friday, except New Year's Day, which is not moved into December.
+    Ad-hoc closures (national days of mourning, weather) are not modelled.
+    """
+    return dict(_market_holidays(year))
+
+
+@lru_cache(maxsize=16)
+def _market_holidays(year: int) -> tuple[tuple[date, str], ...]:
+    holidays: dict[date, str] = {}
+    new_year = date(year, 1, 1)
+    if new_year.weekday() == 6:
+        holidays[new_year + timedelta(days=1)] = "New Year's Day"
+    elif new_year.weekday() != 5:
+        holidays[new_year] = "New Year's Day"
+    if year >= 1998:
+        holidays[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    holidays[_easter_sunday(year) - timedelta(days=2)] = "Good Friday"
+    holidays[_last_weekday(year, 5, 0)] = "Memorial Day"
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth"
+    holidays[_observed(date(year, 7, 4))] = "Independence Day"
+    holidays[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    holidays[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    holidays[_observed(date(year, 12, 25))] = "Christmas Day"
+    return tuple(sorted(holidays.items()))
+
+
+def early_close_days(year: int) -> set[date]:
+    """Sessions that close at 13:00 ET: July 3, the day after Thanksgiving and Christmas Eve."""
+    days = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+    july_3 = date(year, 7, 3)
+    if july_3.weekday() < 4:
+        days.add(july_3)
+    christmas_eve = date(year, 12, 24)
+    if christmas_eve.weekday() < 4:
+        days.add(christmas_eve)
+    return days
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in market_holidays(day.year)
+
+
+def session_for(day: date) -> MarketSession | None:
+    """Return the regular session for ``day``, or None when the market is closed all day."""
+    if not is_trading_day(day):
+        return None
+    early = day in early_close_days(day.year)
+    close = EARLY_CLOSE if early else REGULAR_CLOSE
+    return MarketSession(
+        day=day,
+        open=MARKET_TIME_ZONE.localize(datetime.combine(day, REGULAR_OPEN)),
+        close=MARKET_TIME_ZONE.localize(datetime.combine(day, close)),
+        early_close=early,
+    )
+
+
+def is_market_open(at: datetime) -> bool:
+    session = session_for(_market_date(at))
+    return session is not None and session.open <= at < session.close
+
+
+def previous_session_close(at: datetime) -> datetime:
+    """Return the most recent session close at or before ``at``."""
+    day = _market_date(at)
+    for _ in range(_MAX_LOOKBACK_DAYS):
+        session = session_for(day)
+        if session is not None and session.close <= at:
+            return session.close
+        day -= timedelta(days=1)
+    raise ValueError(f"No trading session found in the {_MAX_LOOKBACK_DAYS} days before {at}")
+
+
+def next_session_open(at: datetime) -> datetime:
+    """Return the first session open strictly after ``at``."""
+    day = _market_date(at)
+    for _ in range(_MAX_LOOKBACK_DAYS):
+        session = session_for(day)
+        if session is not None and session.open > at:
+            return session.open
+        day += timedelta(days=1)
+    raise ValueError(f"No trading session found in the {_MAX_LOOKBACK_DAYS} days after {at}")
+
+
+def _market_date(at: datetime) -> date:
+    if at.tzinfo is None:
+        raise ValueError("market calendar lookups require a timezone-aware datetime")
+    return at.astimezone(MARKET_TIME_ZONE).date()
+
+
+def _observed(holiday: date) -> date:
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter_sunday(year: int) -> date:
+    # Anonymous Gregorian algorithm (Meeus/Jones/Butcher).
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+__all__ = [
+    "IGNORE_MARKET_CALENDAR",
+    "MARKET_TIME_ZONE",
+    "MarketSession",
+    "early_close_days",
+    "is_market_open",
+    "is_trading_day",
+    "market_holidays",
+    "next_session_open",
+    "previous_session_close",
+    "session_for",
+]
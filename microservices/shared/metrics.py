@@ -0,0 +1,106 @@
+"""OpenTelemetry metric instruments for ingestion throughput and latency.
+
+Instruments are created against the global meter at import time. Until
+``initialize_metrics`` installs a real provider they are no-op proxies, so call sites can
+record unconditionally.
+"""
+
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from time import perf_counter
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Histogram
+
+_METER_NAME = "strategy-tester"
+
+_meter = metrics.get_meter(_METER_NAME)
+
+ROWS_FETCHED = _meter.create_counter(
+    "ingest.rows.fetched",
+    unit="{row}",
+    description="Rows fetched from Polygon, by source.",
+)
+ROWS_WRITTEN = _meter.create_counter(
+    "ingest.rows.written",
+    unit="{row}",
+    description="Rows successfully written to the database, by table.",
+)
+RETRIES = _meter.create_counter(
+    "ingest.retries",
+    unit="{retry}",
+    description="Retries scheduled after transient HTTP or database errors.",
+)
+RATE_LIMIT_HITS = _meter.create_counter(
+    "ingest.rate_limit.hits",
+    unit="{response}",
+    description="HTTP 429 responses returned by Polygon.",
+)
+SKIPS = _meter.create_counter(
+    "ingest.rows.skipped",
+    unit="{row}",
+    description="Rows not written, by reason.",
+)
+HTTP_LATENCY = _meter.create_histogram(
+    "ingest.http.duration",
+    unit="s",
+    description="Polygon request latency, by endpoint.",
+)
+DB_WRITE_LATENCY = _meter.create_histogram(
+    "ingest.db.write.duration",
+    unit="s",
+    description="Database write latency per statement, by table.",
+)
+BATCH_SIZE = _meter.create_histogram(
+    "ingest.batch.size",
+    unit="{row}",
+    description="Rows submitted per write batch, by table.",
+)
+UNDERLYING_DURATION = _meter.create_histogram(
+    "ingest.underlying.duration",
+    unit="s",
+    description="Wall-clock time spent ingesting one underlying, by stage.",
+)
+TRACE_SPANS_DROPPED = _meter.create_counter(
+    "ingest.trace.spans.dropped",
+    unit="{span}",
+    description="Spans discarded by the tail sampling processor.",
+)
+SPOOL_ROWS = _meter.create_counter(
+    "ingest.spool.rows",
+    unit="{row}",
+    description="Rows appended to or drained from the local write-ahead spool, by op.",
+)
+DB_BREAKER_TRANSITIONS = _meter.create_counter(
+    "ingest.db.breaker.transitions",
+    unit="{transition}",
+    description="Database circuit breaker state changes, by new state.",
+)
+
+
+@contextmanager
+def record_duration(
+    histogram: Histogram, attributes: Mapping[str, str] | None = None
+) -> Iterator[None]:
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        histogram.record(perf_counter() - start, attributes=attributes)
+
+
+__all__ = [
+    "BATCH_SIZE",
+    "DB_BREAKER_TRANSITIONS",
+    "DB_WRITE_LATENCY",
+    "HTTP_LATENCY",
+    "RATE_LIMIT_HITS",
+    "RETRIES",
+    "ROWS_FETCHED",
+    "ROWS_WRITTEN",
+    "SKIPS",
+    "SPOOL_ROWS",
+    "TRACE_SPANS_DROPPED",
+    "UNDERLYING_DURATION",
+    "record_duration",
+]
@@ -3,26 +3,96 @@
 import logging
 import os
 from collections.abc import Iterator, Mapping
-from contextlib import AbstractContextManager, contextmanager
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 from threading import Lock
 from urllib.parse import parse_qsl
 
-from opentelemetry import trace
+from opentelemetry import metrics, trace
+from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import Span, SpanLimits, TracerProvider
+from opentelemetry.sdk.trace import Span, SpanLimits, SpanProcessor, TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.trace import SpanKind
 
+from microservices.shared.sampling import TAIL_SAMPLING_ENABLED, TailSamplingSpanProcessor
+
 _TRACE_LOCK = Lock()
 _TRACE_READY = False
+_METRICS_READY = False
 _TRACER_NAME = "strategy-tester"
 _SERVICE_NAME: ContextVar[str] = ContextVar("strategy_tester_service_name", default="-")
+LOG_MODE_FULL = "full"
+LOG_MODE_SAMPLED = "sampled"
+# "sampled" demotes per-row ingest lines to sampled DEBUG, relies on per-underlying progress
+# summaries and moves handler I/O onto a background QueueListener thread.
+INGEST_LOG_MODE = os.getenv("INGEST_LOG_MODE", LOG_MODE_FULL).strip().lower()
+_LOG_LISTENER: QueueListener | None = None
+TRACE_GRANULARITY_BATCH = "batch"
+TRACE_GRANULARITY_ROW = "row"
+# "batch" opens one span per write/fetch batch with aggregated row stats; "row" additionally
+# keeps the per-row spans for debugging.
+TRACE_GRANULARITY = os.getenv("INGEST_TRACE_GRANULARITY", TRACE_GRANULARITY_BATCH).strip().lower()
+
+
+class BatchSpanStats:
+    """Aggregated per-row outcome recorded on a batch span instead of one span per row."""
+
+    def __init__(self, span: trace.Span):
+        self.span = span
+        self.row_count = 0
+        self.error_count = 0
+        self.latency_min_ms: float | None = None
+        self.latency_max_ms: float | None = None
+
+    def record(self, latency_seconds: float) -> None:
+        self.record_rows(1, latency_seconds)
+
+    def record_rows(self, rows: int, latency_seconds: float) -> None:
+        """Count ``rows`` handled by one bulk write that took ``latency_seconds``."""
+        latency_ms = latency_seconds * 1000
+        self.row_count += rows
+        if self.latency_min_ms is None or latency_ms < self.latency_min_ms:
+            self.latency_min_ms = latency_ms
+        if self.latency_max_ms is None or latency_ms > self.latency_max_ms:
+            self.latency_max_ms = latency_ms
+
+    def record_error(self, exc: BaseException, row_id: str | None = None) -> None:
+        self.error_count += 1
+        self.span.add_event(
+            "row.error",
+            attributes={
+                "row.id": row_id or "-",
+                "error.type": type(exc).__name__,
+                "error.message": str(exc).strip() or "-",
+            },
+        )
+
+    def finish(self) -> None:
+        self.span.set_attribute("batch.row_count", self.row_count)
+        self.span.set_attribute("batch.error_count", self.error_count)
+        if self.latency_min_ms is not None and self.latency_max_ms is not None:
+            self.span.set_attribute("batch.latency_min_ms", round(self.latency_min_ms, 3))
+            self.span.set_attribute("batch.latency_max_ms", round(self.latency_max_ms, 3))
+        if self.error_count:
+            self.span.set_attribute("error", True)
+
+
+_CURRENT_BATCH: ContextVar[BatchSpanStats | None] = ContextVar(
+    "strategy_tester_batch_span", default=None
+)
 
 
 class TraceContextFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
+        if hasattr(record, "trace_id"):
+            # Already stamped on the producing thread before crossing the log queue.
+            return True
         record.service_name = _SERVICE_NAME.get()
         span_context = trace.get_current_span().get_span_context()
         if span_context.is_valid:
@@ -44,24 +114,35 @@ def configure_service_logger(service_name: str) -> logging.Logger:
         ),
     )
     _install_trace_filter()
+    if sampled_logging_enabled():
+        _install_queue_handler()
     return logging.getLogger(service_name)
 
 
+def sampled_logging_enabled() -> bool:
+    return INGEST_LOG_MODE == LOG_MODE_SAMPLED
+
+
+def stop_log_listener() -> None:
+    """Drain queued log records and restore the handlers owned by the background listener."""
+    global _LOG_LISTENER  # noqa: PLW0603
+    listener = _LOG_LISTENER
+    if listener is None:
+        return
+    listener.stop()
+    root = logging.getLogger()
+    root.handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+    root.handlers.extend(listener.handlers)
+    _LOG_LISTENER = None
+
+
 def initialize_tracing(service_name: str) -> None:
     global _TRACE_READY
     with _TRACE_LOCK:
         if _TRACE_READY:
             return
-        resource_attributes: dict[str, str] = {"service.name": service_name}
-        deployment_environment = os.getenv("DD_ENV", "").strip()
-        service_version = os.getenv("DD_VERSION", "").strip()
-        if deployment_environment:
-            resource_attributes["deployment.environment"] = deployment_environment
-        if service_version:
-            resource_attributes["service.version"] = service_version
-        resource = Resource.create(resource_attributes)
         provider = TracerProvider(
-            resource=resource,
+            resource=_build_resource(service_name),
             span_limits=SpanLimits(
                 max_attributes=int(os.getenv("OTEL_SPAN_ATTRIBUTE_COUNT_LIMIT", "32")),
                 max_events=int(os.getenv("OTEL_SPAN_EVENT_COUNT_LIMIT", "8")),
@@ -77,15 +158,40 @@ def initialize_tracing(service_name: str) -> None:
         _TRACE_READY = True
 
 
-def shutdown_tracing() -> None:
-    provider = trace.get_tracer_provider()
-    force_flush = getattr(provider, "force_flush", None)
-    if callable(force_flush):
-        force_flush()
+def initialize_metrics(service_name: str) -> None:
+    """Install an OTLP meter provider so ingestion counters and histograms get exported.
 
-    shutdown = getattr(provider, "shutdown", None)
-    if callable(shutdown):
-        shutdown()
+    Without an OTLP endpoint no provider is installed and every instrument stays a no-op.
+    """
+    global _METRICS_READY
+    with _TRACE_LOCK:
+        if _METRICS_READY:
+            return
+        exporter = _build_otlp_metric_exporter()
+        if exporter is not None:
+            provider = MeterProvider(
+                resource=_build_resource(service_name),
+                metric_readers=[_build_metric_reader(exporter)],
+            )
+            metrics.set_meter_provider(provider)
+        _METRICS_READY = True
+
+
+def flush_telemetry() -> None:
+    """Export buffered spans and metrics while keeping the providers usable afterwards."""
+    for provider in (trace.get_tracer_provider(), metrics.get_meter_provider()):
+        force_flush = getattr(provider, "force_flush", None)
+        if callable(force_flush):
+            force_flush()
+
+
+def shutdown_tracing() -> None:
+    flush_telemetry()
+    for provider in (trace.get_tracer_provider(), metrics.get_meter_provider()):
+        shutdown = getattr(provider, "shutdown", None)
+        if callable(shutdown):
+            shutdown()
+    stop_log_listener()
 
 
 def start_span(
@@ -114,6 +220,62 @@ def start_span_sync(
         yield span
 
 
+def row_spans_enabled() -> bool:
+    return TRACE_GRANULARITY == TRACE_GRANULARITY_ROW
+
+
+def start_row_span_sync(
+    name: str,
+    *,
+    kind: SpanKind = SpanKind.INTERNAL,
+    attributes: Mapping[str, object] | None = None,
+) -> AbstractContextManager[trace.Span]:
+    """Open a per-row span only when per-row tracing is enabled."""
+    if not row_spans_enabled():
+        return nullcontext(trace.INVALID_SPAN)
+    return start_span_sync(name, kind=kind, attributes=attributes)
+
+
+@contextmanager
+def start_batch_span(
+    name: str,
+    *,
+    kind: SpanKind = SpanKind.INTERNAL,
+    attributes: Mapping[str, object] | None = None,
+) -> Iterator[BatchSpanStats]:
+    """Open one span for a batch and collect row outcomes from tasks created inside it."""
+    with start_span(name, kind=kind, attributes=attributes) as span:
+        stats = BatchSpanStats(span)
+        token = _CURRENT_BATCH.set(stats)
+        try:
+            yield stats
+        finally:
+            _CURRENT_BATCH.reset(token)
+            stats.finish()
+
+
+def current_batch_stats() -> BatchSpanStats | None:
+    return _CURRENT_BATCH.get()
+
+
+def record_batch_rows(rows: int, latency_seconds: float) -> None:
+    """Fold a bulk write of ``rows`` rows into the enclosing batch span, if there is one."""
+    stats = _CURRENT_BATCH.get()
+    if stats is not None and rows:
+        stats.record_rows(rows, latency_seconds)
+
+
+def record_row_error(exc: BaseException, row_id: str | None = None) -> None:
+    """Attach a handled per-row failure to the row span or, in batch mode, the batch span."""
+    if row_spans_enabled():
+        current_span = trace.get_current_span()
+        if isinstance(current_span, Span):
+            annotate_span_error(current_span, exc)
+    stats = _CURRENT_BATCH.get()
+    if stats is not None:
+        stats.record_error(exc, row_id)
+
+
 def _install_trace_filter() -> None:
     root = logging.getLogger()
     for handler in root.handlers:
@@ -121,6 +283,20 @@ def _install_trace_filter() -> None:
             handler.addFilter(TraceContextFilter())
 
 
+def _install_queue_handler() -> None:
+    global _LOG_LISTENER  # noqa: PLW0603
+    if _LOG_LISTENER is not None:
+        return
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+    log_queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(TraceContextFilter())
+    _LOG_LISTENER = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [queue_handler]
+    _LOG_LISTENER.start()
+
+
 def annotate_span_error(span: Span, exc: BaseException) -> None:
     span.set_attribute("error", True)
     span.set_attribute("error.type", type(exc).__name__)
@@ -129,13 +305,30 @@ def annotate_span_error(span: Span, exc: BaseException) -> None:
         span.set_attribute("error.message", message)
 
 
-def _build_otlp_exporter() -> OTLPSpanExporter | None:
+def _build_resource(service_name: str) -> Resource:
+    resource_attributes: dict[str, str] = {"service.name": service_name}
+    deployment_environment = os.getenv("DD_ENV", "").strip()
+    service_version = os.getenv("DD_VERSION", "").strip()
+    if deployment_environment:
+        resource_attributes["deployment.environment"] = deployment_environment
+    if service_version:
+        resource_attributes["service.version"] = service_version
+    return Resource.create(resource_attributes)
+
+
+def _otlp_protocol_supported() -> bool:
     protocol = os.getenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf").strip()
     if protocol and protocol != "http/protobuf":
         logging.getLogger(__name__).warning(
             "Unsupported OTEL protocol=%s for strategy-tester; expected http/protobuf",
             protocol,
         )
+        return False
+    return True
+
+
+def _build_otlp_exporter() -> OTLPSpanExporter | None:
+    if not _otlp_protocol_supported():
         return None
 
     endpoint = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "").strip()
@@ -152,14 +345,54 @@ def _build_otlp_exporter() -> OTLPSpanExporter | None:
     )
 
 
-def _build_span_processor(exporter: OTLPSpanExporter) -> BatchSpanProcessor:
-    return BatchSpanProcessor(
+def _build_otlp_metric_exporter() -> OTLPMetricExporter | None:
+    if not _otlp_protocol_supported():
+        return None
+
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_METRICS_ENDPOINT", "").strip()
+    if not endpoint:
+        endpoint = _metrics_endpoint_from_base(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", ""))
+    if not endpoint:
+        return None
+
+    timeout = float(os.getenv("OTEL_EXPORTER_OTLP_TIMEOUT", "10"))
+    return OTLPMetricExporter(
+        endpoint=endpoint,
+        headers=_parse_headers(os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "")) or None,
+        timeout=timeout,
+    )
+
+
+def _metrics_endpoint_from_base(raw_endpoint: str) -> str:
+    endpoint = raw_endpoint.strip().rstrip("/")
+    if not endpoint:
+        return ""
+    if endpoint.endswith("/v1/traces"):
+        return endpoint.removesuffix("/v1/traces") + "/v1/metrics"
+    if endpoint.endswith("/v1/metrics"):
+        return endpoint
+    return endpoint + "/v1/metrics"
+
+
+def _build_metric_reader(exporter: OTLPMetricExporter) -> PeriodicExportingMetricReader:
+    return PeriodicExportingMetricReader(
+        exporter,
+        export_interval_millis=int(os.getenv("OTEL_METRIC_EXPORT_INTERVAL", "15000")),
+        export_timeout_millis=int(os.getenv("OTEL_METRIC_EXPORT_TIMEOUT", "5000")),
+    )
+
+
+def _build_span_processor(exporter: OTLPSpanExporter) -> SpanProcessor:
+    processor = BatchSpanProcessor(
         exporter,
         max_queue_size=int(os.getenv("OTEL_BSP_MAX_QUEUE_SIZE", "2048")),
         max_export_batch_size=int(os.getenv("OTEL_BSP_MAX_EXPORT_BATCH_SIZE", "128")),
         schedule_delay_millis=int(os.getenv("OTEL_BSP_SCHEDULE_DELAY", "2000")),
         export_timeout_millis=int(os.getenv("OTEL_BSP_EXPORT_TIMEOUT", "5000")),
     )
+    if TAIL_SAMPLING_ENABLED:
+        return TailSamplingSpanProcessor(processor)
+    return processor
 
 
 def _parse_headers(raw_headers: str) -> dict[str, str]:
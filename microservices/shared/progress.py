@@ -0,0 +1,158 @@
+"""Per-underlying progress summaries and sampled per-row ingest logging."""
+
+import logging
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from itertools import count
+from time import monotonic
+
+from microservices.shared.observability import sampled_logging_enabled
+
+ROW_LOG_SAMPLE_EVERY = max(1, int(os.getenv("INGEST_ROW_LOG_SAMPLE_EVERY", "100")))
+PROGRESS_LOG_EVERY_ROWS = max(1, int(os.getenv("INGEST_PROGRESS_LOG_EVERY_ROWS", "500")))
+PROGRESS_LOG_INTERVAL_SECONDS = float(os.getenv("INGEST_PROGRESS_LOG_INTERVAL_SECONDS", "10"))
+OUTCOME_WRITTEN = "written"
+OUTCOME_SKIPPED = "skipped"
+OUTCOME_FAILED = "failed"
+
+_row_counter = count()
+
+
+class IngestProgress:
+    """Row outcome counters for one underlying, summarised periodically at INFO."""
+
+    def __init__(self, logger: logging.Logger, underlying: str, stage: str, total: int):
+        self.logger = logger
+        self.underlying = underlying
+        self.stage = stage
+        self.total = total
+        self.outcomes = {OUTCOME_WRITTEN: 0, OUTCOME_SKIPPED: 0, OUTCOME_FAILED: 0}
+        self._started = monotonic()
+        self._last_summary_at = self._started
+        self._rows_since_summary = 0
+
+    @property
+    def processed(self) -> int:
+        return sum(self.outcomes.values())
+
+    def record(self, outcome: str, rows: int = 1) -> None:
+        self.outcomes[outcome] += rows
+        self._rows_since_summary += rows
+        now = monotonic()
+        if (
+            self._rows_since_summary >= PROGRESS_LOG_EVERY_ROWS
+            or now - self._last_summary_at >= PROGRESS_LOG_INTERVAL_SECONDS
+        ):
+            self.log_summary(now)
+
+    def log_summary(self, now: float | None = None) -> None:
+        now = monotonic() if now is None else now
+        self._last_summary_at = now
+        self._rows_since_summary = 0
+        self.logger.info(
+            "Progress %s for %s: %s/%s rows (written=%s, skipped=%s, failed=%s) in %.1fs",
+            self.stage,
+            self.underlying,
+            self.processed,
+            self.total,
+            self.outcomes[OUTCOME_WRITTEN],
+            self.outcomes[OUTCOME_SKIPPED],
+            self.outcomes[OUTCOME_FAILED],
+            now - self._started,
+        )
+
+
+@dataclass
+class RunTotals:
+    """Row outcomes summed over every underlying finished during one run."""
+
+    underlyings: int = 0
+    written: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+    def add(self, progress: IngestProgress) -> None:
+        self.underlyings += 1
+        self.written += progress.outcomes[OUTCOME_WRITTEN]
+        self.skipped += progress.outcomes[OUTCOME_SKIPPED]
+        self.failed += progress.outcomes[OUTCOME_FAILED]
+
+    def merge(self, other: "RunTotals") -> None:
+        self.underlyings += other.underlyings
+        self.written += other.written
+        self.skipped += other.skipped
+        self.failed += other.failed
+
+
+_CURRENT_PROGRESS: ContextVar[IngestProgress | None] = ContextVar(
+    "strategy_tester_ingest_progress", default=None
+)
+_RUN_TOTALS: ContextVar[RunTotals | None] = ContextVar(
+    "strategy_tester_ingest_run_totals", default=None
+)
+
+
+@contextmanager
+def track_progress(
+    logger: logging.Logger, underlying: str, stage: str, total: int
+) -> Iterator[IngestProgress]:
+    """Collect row outcomes from tasks created inside the block and log a final summary."""
+    progress = IngestProgress(logger, underlying, stage, total)
+    token = _CURRENT_PROGRESS.set(progress)
+    try:
+        yield progress
+    finally:
+        _CURRENT_PROGRESS.reset(token)
+        progress.log_summary()
+        totals = _RUN_TOTALS.get()
+        if totals is not None:
+            totals.add(progress)
+
+
+@contextmanager
+def collect_run_totals() -> Iterator[RunTotals]:
+    """Sum the outcomes of every ``track_progress`` block that finishes inside this one."""
+    totals = RunTotals()
+    token = _RUN_TOTALS.set(totals)
+    try:
+        yield totals
+    finally:
+        _RUN_TOTALS.reset(token)
+
+
+def record_row_outcome(outcome: str, rows: int = 1) -> None:
+    progress = _CURRENT_PROGRESS.get()
+    if progress is not None and rows:
+        progress.record(outcome, rows)
+
+
+def row_log_level(logger: logging.Logger) -> int | None:
+    """Return the level a per-row line should be logged at, or None to skip it.
+
+    Callers check this before building the message so that skipped rows pay no formatting
+    cost. In full mode every row logs at INFO; in sampled mode one row in
+    ``ROW_LOG_SAMPLE_EVERY`` logs at DEBUG.
+    """
+    if not sampled_logging_enabled():
+        return logging.INFO
+    if not logger.isEnabledFor(logging.DEBUG):
+        return None
+    if next(_row_counter) % ROW_LOG_SAMPLE_EVERY:
+        return None
+    return logging.DEBUG
+
+
+__all__ = [
+    "OUTCOME_FAILED",
+    "OUTCOME_SKIPPED",
+    "OUTCOME_WRITTEN",
+    "IngestProgress",
+    "RunTotals",
+    "collect_run_totals",
+    "record_row_outcome",
+    "row_log_level",
+    "track_progress",
+]
@@ -0,0 +1,143 @@
+"""Tail-based span sampling that only exports slow, failed or baseline-sampled traces."""
+
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+from microservices.shared.metrics import TRACE_SPANS_DROPPED
+
+TAIL_SAMPLING_ENABLED = os.getenv("OTEL_TAIL_SAMPLING_ENABLED", "false").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+TAIL_SAMPLING_LATENCY_MS = float(os.getenv("OTEL_TAIL_SAMPLING_LATENCY_MS", "5000"))
+TAIL_SAMPLING_BASELINE_RATE = float(os.getenv("OTEL_TAIL_SAMPLING_BASELINE_RATE", "0.01"))
+TAIL_SAMPLING_MAX_TRACES = int(os.getenv("OTEL_TAIL_SAMPLING_MAX_TRACES", "1000"))
+TAIL_SAMPLING_MAX_SPANS_PER_TRACE = int(os.getenv("OTEL_TAIL_SAMPLING_MAX_SPANS_PER_TRACE", "2048"))
+_TRACE_ID_LOWER_64_BITS = (1 << 64) - 1
+logger = logging.getLogger(__name__)
+
+
+class _TraceBuffer:
+    __slots__ = ("keep", "spans")
+
+    def __init__(self) -> None:
+        self.spans: list[ReadableSpan] = []
+        self.keep = False
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """Buffer spans per trace and forward a trace to ``delegate`` only when it is worth keeping.
+
+    A trace is kept when any span is marked as an error, when its local root span lasts longer
+    than ``latency_threshold_ms``, or when its trace id falls inside ``baseline_rate``. Once a
+    trace is known to be kept (an error span ended) its buffered and later spans are forwarded
+    straight away, so long-lived job traces do not hold failures in memory until the job ends.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        latency_threshold_ms: float = TAIL_SAMPLING_LATENCY_MS,
+        baseline_rate: float = TAIL_SAMPLING_BASELINE_RATE,
+        max_traces: int = TAIL_SAMPLING_MAX_TRACES,
+        max_spans_per_trace: int = TAIL_SAMPLING_MAX_SPANS_PER_TRACE,
+    ):
+        self._delegate = delegate
+        self._latency_threshold_ns = int(latency_threshold_ms * 1_000_000)
+        self._baseline_bound = int(max(0.0, min(1.0, baseline_rate)) * _TRACE_ID_LOWER_64_BITS)
+        self._max_traces = max(1, max_traces)
+        self._max_spans_per_trace = max(1, max_spans_per_trace)
+        self._traces: OrderedDict[int, _TraceBuffer] = OrderedDict()
+        self._lock = Lock()
+        self.dropped_span_count = 0
+
+    def on_start(self, span: Span, parent_context: Context | None = None) -> None:
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        forward: list[ReadableSpan] = []
+        dropped = 0
+        is_root = _is_local_root(span)
+        with self._lock:
+            buffer = self._traces.get(trace_id)
+            if buffer is None:
+                buffer = self._traces[trace_id] = _TraceBuffer()
+                dropped += self._evict_overflow()
+
+            if buffer.keep:
+                forward.append(span)
+            elif _is_error(span):
+                buffer.keep = True
+                forward.extend(buffer.spans)
+                forward.append(span)
+                buffer.spans.clear()
+            elif is_root or len(buffer.spans) < self._max_spans_per_trace:
+                buffer.spans.append(span)
+            else:
+                dropped += 1
+
+            if is_root:
+                self._traces.pop(trace_id, None)
+                if not buffer.keep:
+                    if self._should_keep(span):
+                        forward.extend(buffer.spans)
+                    else:
+                        dropped += len(buffer.spans)
+                buffer.spans.clear()
+            self.dropped_span_count += dropped
+
+        if dropped:
+            TRACE_SPANS_DROPPED.add(dropped)
+        for finished in forward:
+            self._delegate.on_end(finished)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            incomplete = sum(len(buffer.spans) for buffer in self._traces.values())
+            self._traces.clear()
+            self.dropped_span_count += incomplete
+        if incomplete:
+            TRACE_SPANS_DROPPED.add(incomplete)
+        logger.info("Tail sampling dropped %s spans during this run", self.dropped_span_count)
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
+
+    def _should_keep(self, root: ReadableSpan) -> bool:
+        if (
+            root.start_time is not None
+            and root.end_time is not None
+            and root.end_time - root.start_time >= self._latency_threshold_ns
+        ):
+            return True
+        return (root.context.trace_id & _TRACE_ID_LOWER_64_BITS) < self._baseline_bound
+
+    def _evict_overflow(self) -> int:
+        dropped = 0
+        while len(self._traces) > self._max_traces:
+            _, evicted = self._traces.popitem(last=False)
+            dropped += len(evicted.spans)
+        return dropped
+
+
+def _is_error(span: ReadableSpan) -> bool:
+    if span.status is not None and span.status.status_code is StatusCode.ERROR:
+        return True
+    return bool(span.attributes and span.attributes.get("error"))
+
+
+def _is_local_root(span: ReadableSpan) -> bool:
+    return span.parent is None or span.parent.is_remote
+
+
+__all__ = ["TAIL_SAMPLING_ENABLED", "TailSamplingSpanProcessor"]
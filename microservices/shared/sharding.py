@@ -0,0 +1,243 @@
+"""Deterministic hash sharding of ingest targets across replicas, with leased shard slots."""
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Protocol, TypeVar
+
+from microservices.shared.util import get_current_datetime
+from prisma.errors import UniqueViolationError
+from prisma.models import IngestLease
+
+SHARD_COUNT = max(1, int(os.getenv("SHARD_COUNT", "1")))
+SHARD_INDEX = os.getenv("SHARD_INDEX", "").strip()
+SHARD_LEASE_TTL_SECONDS = float(os.getenv("INGEST_SHARD_LEASE_TTL_SECONDS", "300"))
+WORKER_ID = os.getenv("INGEST_WORKER_ID", "").strip() or f"{socket.gethostname()}-{os.getpid()}"
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+
+def shard_of(key: str, shard_count: int) -> int:
+    """Map ``key`` to a shard in ``[0, shard_count)``, identically in every process."""
+    digest = hashlib.sha1(key.encode(), usedforsecurity=False).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+@dataclass(frozen=True)
+class Shard:
+    """The slice of targets one replica owns: keys hashing to ``index`` out of ``count``."""
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        """Reject an index outside ``[0, count)``."""
+        if not 0 <= self.index < self.count:
+            raise ValueError(f"shard index {self.index} is outside [0, {self.count})")
+
+    def owns(self, key: str) -> bool:
+        return self.count == 1 or shard_of(key, self.count) == self.index
+
+    def select(self, items: Iterable[T], key: Callable[[T], str]) -> list[T]:
+        return [item for item in items if self.owns(key(item))]
+
+    def checkpoint_job(self, job: str) -> str:
+        """Per-shard checkpoint name so replicas sharing a volume never clobber each other."""
+        return job if self.count == 1 else f"{job}-shard{self.index}of{self.count}"
+
+
+UNSHARDED = Shard(0, 1)
+
+
+class LeaseTable(Protocol):
+    """Storage for ``ingest_leases`` rows; each method must be atomic on its own."""
+
+    async def insert(self, job: str, shard: int, owner: str, expires_at: datetime) -> bool: ...
+
+    async def take_over(
+        self, job: str, shard: int, owner: str, now: datetime, expires_at: datetime
+    ) -> bool:
+        """Reassign the lease when it has expired or is already held by ``owner``."""
+        ...
+
+    async def renew(self, job: str, shard: int, owner: str, expires_at: datetime) -> bool: ...
+
+    async def release(self, job: str, shard: int, owner: str) -> None: ...
+
+
+class PrismaLeaseTable:
+    """``ingest_leases`` in Postgres; the conditional UPDATE re-checks expiry under row lock."""
+
+    async def insert(self, job: str, shard: int, owner: str, expires_at: datetime) -> bool:
+        try:
+            await IngestLease.prisma().create(
+                data={"job": job, "shard": shard, "owner": owner, "expires_at": expires_at}
+            )
+        except UniqueViolationError:
+            return False
+        return True
+
+    async def take_over(
+        self, job: str, shard: int, owner: str, now: datetime, expires_at: datetime
+    ) -> bool:
+        updated = await IngestLease.prisma().update_many(
+            where={
+                "job": job,
+                "shard": shard,
+                "OR": [{"expires_at": {"lt": now}}, {"owner": owner}],
+            },
+            data={"owner": owner, "expires_at": expires_at},
+        )
+        return updated == 1
+
+    async def renew(self, job: str, shard: int, owner: str, expires_at: datetime) -> bool:
+        updated = await IngestLease.prisma().update_many(
+            where={"job": job, "shard": shard, "owner": owner},
+            data={"expires_at": expires_at},
+        )
+        return updated == 1
+
+    async def release(self, job: str, shard: int, owner: str) -> None:
+        await IngestLease.prisma().delete_many(where={"job": job, "shard": shard, "owner": owner})
+
+
+async def claim_shard_lease(
+    table: LeaseTable,
+    job: str,
+    shard_count: int,
+    owner: str,
+    ttl_seconds: float,
+    now: datetime,
+) -> Shard | None:
+    """Claim the first free or expired shard slot for ``job``; None when all are held.
+
+    Workers start probing at a slot derived from their own id so concurrent starters mostly
+    try different rows first.
+    """
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    first = shard_of(owner, shard_count)
+    for offset in range(shard_count):
+        index = (first + offset) % shard_count
+        if await table.insert(job, index, owner, expires_at) or await table.take_over(
+            job, index, owner, now, expires_at
+        ):
+            return Shard(index, shard_count)
+    return None
+
+
+class ShardLeaseLostError(RuntimeError):
+    """Raised into a shard's work once its lease is lost or can no longer be renewed."""
+
+
+@asynccontextmanager
+async def shard_assignment(
+    job: str,
+    table: LeaseTable | None = None,
+    assigned: Shard | None = None,
+    release: bool = False,
+) -> AsyncIterator[Shard | None]:
+    """Yield the shard this replica should ingest, or None when no shard slot is free.
+
+    A shard ``assigned`` by a fan-out coordinator is used as is. ``SHARD_COUNT=1`` (the
+    default) owns everything. A fixed ``SHARD_INDEX`` suits stateful sets with stable
+    ordinals. Otherwise a slot is leased from ``ingest_leases`` and renewed in the background
+    every third of the TTL, so a crashed replica's shard is taken over by the next worker
+    once its lease expires. If the lease is lost or about to lapse unrenewed, the body is
+    cancelled and ``ShardLeaseLostError`` raised, so two workers never ingest one shard.
+
+    A slot whose body finished stays leased until it expires, so a replica starting later in
+    the same cycle picks a shard nobody has ingested yet. Pass ``release`` to free it on a
+    clean exit instead (daemons holding a slot for their whole life); a failed body always
+    frees it for the next worker.
+    """
+    if assigned is not None:
+        yield assigned
+        return
+    if SHARD_COUNT == 1:
+        yield UNSHARDED
+        return
+    if SHARD_INDEX:
+        yield Shard(int(SHARD_INDEX), SHARD_COUNT)
+        return
+    table = table or PrismaLeaseTable()
+    shard = await claim_shard_lease(
+        table, job, SHARD_COUNT, WORKER_ID, SHARD_LEASE_TTL_SECONDS, get_current_datetime()
+    )
+    if shard is None:
+        logger.warning("All %s %s shard leases are held; nothing to ingest", SHARD_COUNT, job)
+        yield None
+        return
+    logger.info("Leased %s shard %s/%s as %s", job, shard.index, shard.count, WORKER_ID)
+    owner = asyncio.current_task()
+    holding = True
+
+    def cancel_owner(renewer: asyncio.Task) -> None:
+        if holding and not renewer.cancelled() and owner is not None:
+            owner.cancel()
+
+    renewer = asyncio.create_task(_renew_until_lost(table, job, shard.index))
+    renewer.add_done_callback(cancel_owner)
+    finished = False
+    try:
+        yield shard
+        finished = True
+    except asyncio.CancelledError:
+        if not renewer.done() or renewer.cancelled() or owner is None:
+            raise
+        owner.uncancel()
+        raise ShardLeaseLostError(f"Lost the {job} shard {shard.index} lease") from None
+    finally:
+        holding = False
+        renewer.cancel()
+        await asyncio.gather(renewer, return_exceptions=True)
+        if release or not finished:
+            await _release(table, job, shard.index)
+
+
+async def _renew_until_lost(table: LeaseTable, job: str, index: int) -> None:
+    """Renew every third of the TTL; return once the lease is lost or lapses unrenewed."""
+    interval = SHARD_LEASE_TTL_SECONDS / 3
+    expires_at = get_current_datetime() + timedelta(seconds=SHARD_LEASE_TTL_SECONDS)
+    while True:
+        await asyncio.sleep(interval)
+        renewal = get_current_datetime() + timedelta(seconds=SHARD_LEASE_TTL_SECONDS)
+        try:
+            renewed = await table.renew(job, index, WORKER_ID, renewal)
+        except Exception:
+            logger.exception("Failed to renew %s shard %s lease", job, index)
+            if get_current_datetime() + timedelta(seconds=interval) < expires_at:
+                continue
+            logger.error("%s shard %s lease lapses before the next renewal", job, index)
+            return
+        if not renewed:
+            logger.error("Lost %s shard %s lease to another worker", job, index)
+            return
+        expires_at = renewal
+
+
+async def _release(table: LeaseTable, job: str, index: int) -> None:
+    try:
+        await table.release(job, index, WORKER_ID)
+    except Exception:
+        # The lease then simply expires; never mask the error that ended the shard's work.
+        logger.exception("Failed to release %s shard %s lease", job, index)
+
+
+__all__ = [
+    "SHARD_COUNT",
+    "SHARD_INDEX",
+    "UNSHARDED",
+    "LeaseTable",
+    "PrismaLeaseTable",
+    "Shard",
+    "ShardLeaseLostError",
+    "claim_shard_lease",
+    "shard_assignment",
+    "shard_of",
+]
@@ -0,0 +1,124 @@
+"""Append-only JSONL spool segments used as a local write-ahead log for ingested rows."""
+
+import json
+import logging
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from time import monotonic, time_ns
+from typing import IO, Any
+
+SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", "").strip()
+SPOOL_FSYNC_EVERY_ROWS = max(1, int(os.getenv("INGEST_SPOOL_FSYNC_EVERY_ROWS", "500")))
+SPOOL_FSYNC_INTERVAL_SECONDS = float(os.getenv("INGEST_SPOOL_FSYNC_INTERVAL_SECONDS", "1.0"))
+_OPEN_SUFFIX = ".open"
+_SEALED_SUFFIX = ".jsonl"
+logger = logging.getLogger(__name__)
+
+
+class SpoolWriter:
+    """Append rows to an ``.open`` segment and seal it to ``.jsonl`` for the drainer.
+
+    Writes are buffered and fsynced once ``fsync_every_rows`` rows or ``fsync_interval``
+    seconds have accumulated, or when ``sync`` is called. Segments left open by a writer that
+    is no longer running are sealed when the next writer opens the same directory; any torn
+    trailing line is skipped when the segment is read.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str,
+        fsync_every_rows: int = SPOOL_FSYNC_EVERY_ROWS,
+        fsync_interval: float = SPOOL_FSYNC_INTERVAL_SECONDS,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self._fsync_every_rows = max(1, fsync_every_rows)
+        self._fsync_interval = fsync_interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _seal_orphaned_segments(self.directory, prefix)
+        self.path = self.directory / f"{prefix}-{time_ns()}-{os.getpid()}{_OPEN_SUFFIX}"
+        self._handle: IO[str] | None = self.path.open("a", encoding="utf-8")
+        self._unsynced_rows = 0
+        self._last_sync = monotonic()
+        self.rows_written = 0
+
+    def append_rows(self, rows: list[dict[str, Any]]) -> None:
+        if self._handle is None:
+            raise RuntimeError(f"spool segment {self.path} is already sealed")
+        if not rows:
+            return
+        self._handle.write("".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows))
+        self._unsynced_rows += len(rows)
+        self.rows_written += len(rows)
+        if (
+            self._unsynced_rows >= self._fsync_every_rows
+            or monotonic() - self._last_sync >= self._fsync_interval
+        ):
+            self.sync()
+
+    def sync(self) -> None:
+        if self._handle is None or not self._unsynced_rows:
+            return
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._unsynced_rows = 0
+        self._last_sync = monotonic()
+
+    def seal(self) -> Path | None:
+        """Fsync, close and publish the segment; empty segments are removed instead."""
+        if self._handle is None:
+            return None
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        self._handle = None
+        if not self.rows_written:
+            self.path.unlink(missing_ok=True)
+            return None
+        sealed = self.path.with_suffix(_SEALED_SUFFIX)
+        os.replace(self.path, sealed)
+        return sealed
+
+
+def sealed_segments(directory: Path, prefix: str) -> list[Path]:
+    """Return sealed segments oldest first."""
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f"{prefix}-*{_SEALED_SUFFIX}"))
+
+
+def read_segment(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open(encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning("Skipping torn spool line %s:%s", path.name, line_number)
+
+
+def _seal_orphaned_segments(directory: Path, prefix: str) -> None:
+    for orphan in directory.glob(f"{prefix}-*{_OPEN_SUFFIX}"):
+        if _writer_alive(orphan):
+            continue
+        logger.warning("Sealing spool segment left open by a previous writer: %s", orphan.name)
+        os.replace(orphan, orphan.with_suffix(_SEALED_SUFFIX))
+
+
+def _writer_alive(segment: Path) -> bool:
+    pid_text = segment.name.removesuffix(_OPEN_SUFFIX).rsplit("-", 1)[-1]
+    if not pid_text.isdigit() or int(pid_text) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid_text), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+__all__ = ["SPOOL_DIR", "SpoolWriter", "read_segment", "sealed_segments"]
@@ -2,13 +2,15 @@ import os
 from datetime import datetime
 
 import pytz
-from dotenv import load_dotenv
 from polygon import RESTClient
 
 from microservices.shared.models import OptionContractSnapshot
 from microservices.shared.models.option_models import OptionSymbol
 
 if not os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    # Lambda configures its environment directly; skip the .env lookup there.
+    from dotenv import load_dotenv
+
     load_dotenv()
 
 DEFAULT_TIME_ZONE = "America/New_York"
@@ -0,0 +1,191 @@
+"""Chunked backfills of snapshot data added after rows were already stored.
+
+``backfill_greek_columns`` copies the legacy ``greeks`` JSON into the typed greek columns;
+``backfill_contract_terms`` derives moneyness and years to expiry from the joined contract;
+``backfill_latest_snapshots`` seeds ``option_snapshot_latest`` from the history. All share
+the ``GREEKS_BACKFILL_*`` batch, pause and retry settings.
+"""
+
+import asyncio
+import logging
+import os
+
+from microservices.shared import decorator
+from microservices.shared.decorator import retry_db_call
+from microservices.snapshot_ingestor.spool import LATEST_ROW_IS_OLDER
+from microservices.snapshot_ingestor.transform import SNAPSHOT_ROW_FIELDS
+
+GREEKS_BACKFILL_BATCH_SIZE = max(1, int(os.getenv("GREEKS_BACKFILL_BATCH_SIZE", "5000")))
+GREEKS_BACKFILL_PAUSE_SECONDS = float(os.getenv("GREEKS_BACKFILL_PAUSE_SECONDS", "0.1"))
+GREEKS_BACKFILL_MAX_ATTEMPTS = int(os.getenv("GREEKS_BACKFILL_MAX_ATTEMPTS", "5"))
+GREEKS_BACKFILL_BASE_DELAY_SECONDS = float(os.getenv("GREEKS_BACKFILL_BASE_DELAY_SECONDS", "1.0"))
+# Each chunk is one statement, so it commits on its own and holds its row locks only briefly.
+# Chunks walk the primary key, so every row is read once however many of them lack greeks,
+# and rows whose columns are already set (new writes, earlier runs) are left untouched.
+BACKFILL_GREEKS_SQL = """
+WITH chunk AS (
+    SELECT ticker, last_updated
+    FROM option_snapshots
+    WHERE (ticker, last_updated) > ($1, $2::timestamptz)
+    ORDER BY ticker, last_updated
+    LIMIT $3
+),
+updated AS (
+    UPDATE option_snapshots AS s
+    SET delta = (s.greeks ->> 'delta')::double precision,
+        gamma = (s.greeks ->> 'gamma')::double precision,
+        theta = (s.greeks ->> 'theta')::double precision,
+        vega = (s.greeks ->> 'vega')::double precision
+    FROM chunk
+    WHERE s.ticker = chunk.ticker
+      AND s.last_updated = chunk.last_updated
+      AND s.greeks IS NOT NULL
+      AND s.delta IS NULL AND s.gamma IS NULL AND s.theta IS NULL AND s.vega IS NULL
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM updated) AS updated, chunk_end.ticker, chunk_end.last_updated
+FROM (
+    SELECT ticker, last_updated FROM chunk ORDER BY ticker DESC, last_updated DESC LIMIT 1
+) AS chunk_end
+"""
+BACKFILL_CONTRACT_TERMS_SQL = """
+WITH chunk AS (
+    SELECT ticker, last_updated
+    FROM option_snapshots
+    WHERE (ticker, last_updated) > ($1, $2::timestamptz)
+    ORDER BY ticker, last_updated
+    LIMIT $3
+),
+updated AS (
+    UPDATE option_snapshots AS s
+    SET moneyness = CASE WHEN s.underlying_price > 0
+                         THEN o.strike_price / s.underlying_price END,
+        log_moneyness = CASE WHEN s.underlying_price > 0 AND o.strike_price > 0
+                             THEN ln(o.strike_price / s.underlying_price) END,
+        years_to_expiry = extract(epoch FROM o.expiration_date - s.last_updated) / 31536000.0
+    FROM chunk
+    JOIN options AS o ON o.ticker = chunk.ticker
+    WHERE s.ticker = chunk.ticker
+      AND s.last_updated = chunk.last_updated
+      AND s.years_to_expiry IS NULL
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM updated) AS updated, chunk_end.ticker, chunk_end.last_updated
+FROM (
+    SELECT ticker, last_updated FROM chunk ORDER BY ticker DESC, last_updated DESC LIMIT 1
+) AS chunk_end
+"""
+_LATEST_COLUMNS = ", ".join(SNAPSHOT_ROW_FIELDS)
+_HISTORY_COLUMNS = ", ".join(f"s.{field}" for field in SNAPSHOT_ROW_FIELDS)
+_LATEST_UPDATES = ", ".join(f"{field} = EXCLUDED.{field}" for field in SNAPSHOT_ROW_FIELDS[1:])
+# A ticker's history can span consecutive chunks; the same guard as ingestion keeps the newest
+# row whichever chunk reaches it.
+BACKFILL_LATEST_SQL = f"""
+WITH chunk AS (
+    SELECT ticker, last_updated
+    FROM option_snapshots
+    WHERE (ticker, last_updated) > ($1, $2::timestamptz)
+    ORDER BY ticker, last_updated
+    LIMIT $3
+),
+updated AS (
+    INSERT INTO option_snapshot_latest ({_LATEST_COLUMNS})
+    SELECT DISTINCT ON (s.ticker) {_HISTORY_COLUMNS}
+    FROM option_snapshots AS s
+    JOIN chunk ON s.ticker = chunk.ticker AND s.last_updated = chunk.last_updated
+    ORDER BY s.ticker, s.last_updated DESC
+    ON CONFLICT (ticker) DO UPDATE SET {_LATEST_UPDATES}
+    WHERE {LATEST_ROW_IS_OLDER}
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM updated) AS updated, chunk_end.ticker, chunk_end.last_updated
+FROM (
+    SELECT ticker, last_updated FROM chunk ORDER BY ticker DESC, last_updated DESC LIMIT 1
+) AS chunk_end
+"""
+_START_KEY = ("", "-infinity")
+logger = logging.getLogger(__name__)
+
+
+async def backfill_greek_columns(
+    batch_size: int = GREEKS_BACKFILL_BATCH_SIZE,
+    pause_seconds: float = GREEKS_BACKFILL_PAUSE_SECONDS,
+) -> int:
+    """Copy ``greeks`` JSON into ``delta``/``gamma``/``theta``/``vega`` chunk by chunk.
+
+    Safe to run while ingestion is writing and safe to re-run after an interruption.
+    Returns the number of rows updated.
+    """
+    return await _backfill("greek columns", BACKFILL_GREEKS_SQL, batch_size, pause_seconds)
+
+
+async def backfill_contract_terms(
+    batch_size: int = GREEKS_BACKFILL_BATCH_SIZE,
+    pause_seconds: float = GREEKS_BACKFILL_PAUSE_SECONDS,
+) -> int:
+    """Fill ``moneyness``/``log_moneyness``/``years_to_expiry`` of rows stored without them.
+
+    Uses the strike and expiry stored on ``options``, which match what ingestion parses from
+    the symbol. Same restart and concurrency guarantees as ``backfill_greek_columns``.
+    """
+    return await _backfill("contract terms", BACKFILL_CONTRACT_TERMS_SQL, batch_size, pause_seconds)
+
+
+async def backfill_latest_snapshots(
+    batch_size: int = GREEKS_BACKFILL_BATCH_SIZE,
+    pause_seconds: float = GREEKS_BACKFILL_PAUSE_SECONDS,
+) -> int:
+    """Seed ``option_snapshot_latest`` with each contract's newest history row.
+
+    A row is only replaced by a newer one, so ingestion can keep writing meanwhile.
+    """
+    return await _backfill("latest snapshots", BACKFILL_LATEST_SQL, batch_size, pause_seconds)
+
+
+async def _backfill(columns: str, sql: str, batch_size: int, pause_seconds: float) -> int:
+    after = _START_KEY
+    chunks = 0
+    total = 0
+    while True:
+        rows = await _backfill_chunk(columns, sql, after, batch_size)
+        if not rows:
+            break
+        last = rows[0]
+        after = (last["ticker"], last["last_updated"])
+        chunks += 1
+        total += int(last["updated"])
+        logger.info(
+            "Backfilled %s for %s rows through (%s, %s) in %s chunks",
+            columns,
+            total,
+            *after,
+            chunks,
+        )
+        if pause_seconds:
+            await asyncio.sleep(pause_seconds)
+    return total
+
+
+async def _backfill_chunk(
+    columns: str, sql: str, after: tuple[str, str], batch_size: int
+) -> list[dict]:
+    return await retry_db_call(
+        decorator._get_db().query_raw,
+        sql,
+        *after,
+        batch_size,
+        what=f"{columns} backfill chunk after ({after[0]}, {after[1]})",
+        table="option_snapshots",
+        max_attempts=GREEKS_BACKFILL_MAX_ATTEMPTS,
+        base_delay_seconds=GREEKS_BACKFILL_BASE_DELAY_SECONDS,
+    )
+
+
+__all__ = [
+    "BACKFILL_CONTRACT_TERMS_SQL",
+    "BACKFILL_GREEKS_SQL",
+    "BACKFILL_LATEST_SQL",
+    "backfill_contract_terms",
+    "backfill_greek_columns",
+    "backfill_latest_snapshots",
+]
@@ -4,30 +4,88 @@ import asyncio
 import logging
 import os
 import traceback
-from collections import defaultdict
+from collections import defaultdict, deque
+from datetime import datetime
+from time import perf_counter
 
 import httpx
 
 from microservices.option_ingestor.api import (
-    fetch_chain_snapshots_for_underlying,
     fetch_stock_spot_prices_for_underlyings,
+    iter_chain_snapshot_pages_for_underlying,
+    iter_raw_chain_snapshot_pages_for_underlying,
 )
 from microservices.option_ingestor.ingestor import OptionIngestor
+from microservices.shared import decorator
+from microservices.shared.checkpoint import RunCheckpoint
 from microservices.shared.decorator import (
     DATA_BASE_CONCURRENCY_LIMIT,
     bounded_async_sem,
     bounded_db_connection,
+    db_breaker,
+    traced_row_span_async,
     traced_span_async,
 )
 from microservices.shared.errors import OptionTickerNeverActiveError, is_retryable_db_error
+from microservices.shared.metrics import (
+    BATCH_SIZE,
+    DB_WRITE_LATENCY,
+    RETRIES,
+    ROWS_FETCHED,
+    ROWS_WRITTEN,
+    SKIPS,
+    SPOOL_ROWS,
+    UNDERLYING_DURATION,
+    record_duration,
+)
 from microservices.shared.models import OptionContractSnapshot
-from microservices.shared.observability import start_span_sync
+from microservices.shared.observability import (
+    record_batch_rows,
+    record_row_error,
+    start_batch_span,
+    start_row_span_sync,
+)
+from microservices.shared.progress import (
+    OUTCOME_FAILED,
+    OUTCOME_SKIPPED,
+    OUTCOME_WRITTEN,
+    record_row_outcome,
+    row_log_level,
+    track_progress,
+)
+from microservices.shared.sharding import UNSHARDED, Shard
+from microservices.shared.spool import SpoolWriter
 from microservices.shared.util import format_snapshot, ns_to_datetime
-from prisma import Json
+from microservices.snapshot_ingestor.spool import (
+    CHANGE_ONLY_WRITES,
+    encode_snapshot_row,
+    open_snapshot_spool,
+    spool_enabled,
+    upsert_latest_snapshots,
+    write_snapshot_rows,
+)
+from microservices.snapshot_ingestor.transform import (
+    TRANSFORM_WORKERS,
+    _build_snapshot_upsert_payload,
+    _snapshot_greeks_dict,
+    _snapshot_last_updated_raw,
+    get_transform_pool,
+    snapshot_row_to_dict,
+    transform_chain_page,
+    transform_pool_enabled,
+)
 from prisma.errors import UniqueViolationError
 from prisma.models import OptionSnapshot
 
 logger = logging.getLogger(__name__)
+# The latest table moves last_crawled on every crawl, even when nothing traded since.
+LATEST_CRAWL_BY_UNDERLYING_SQL = """
+SELECT o.underlying_ticker, max(l.last_crawled) AS last_crawled
+FROM option_snapshot_latest AS l
+JOIN options AS o ON o.ticker = l.ticker
+WHERE o.expiration_date >= $1::timestamptz
+GROUP BY o.underlying_ticker
+"""
 DB_RETRY_MAX_ATTEMPTS = int(os.getenv("INGEST_DB_RETRY_MAX_ATTEMPTS", "3"))
 DB_RETRY_BASE_DELAY_SECONDS = float(os.getenv("INGEST_DB_RETRY_BASE_DELAY_SECONDS", "0.5"))
 
@@ -37,8 +95,8 @@ class OptionSnapshotsIngestor(OptionIngestor):
 
     @bounded_db_connection
     @traced_span_async(name="ingest_option_snapshots", attributes={"module": "ingestor"})
-    async def ingest_option_snapshots(self):
-        """Ingest option snapshots for all active contracts."""
+    async def ingest_option_snapshots(self, shard: Shard = UNSHARDED):
+        """Ingest option snapshots for the active contracts of underlyings in ``shard``."""
         try:
             active_contracts = await self.option_retriever.retrieve_active()
             if not active_contracts:
@@ -48,58 +106,33 @@ class OptionSnapshotsIngestor(OptionIngestor):
             active_contracts_by_underlying: dict[str, dict[str, str]] = defaultdict(dict)
             total_contracts = len(active_contracts)
             for contract in active_contracts:
-                if contract.underlying_ticker and contract.ticker:
+                if (
+                    contract.underlying_ticker
+                    and contract.ticker
+                    and shard.owns(contract.underlying_ticker)
+                ):
                     active_contracts_by_underlying[contract.underlying_ticker][contract.ticker] = (
                         contract.ticker
                     )
 
+            checkpoint = self.load_checkpoint(shard)
+            pending_underlyings = {
+                underlying: tickers
+                for underlying, tickers in active_contracts_by_underlying.items()
+                if not checkpoint.is_underlying_done(underlying)
+            }
             stock_spot_prices = await fetch_stock_spot_prices_for_underlyings(
-                sorted(active_contracts_by_underlying.keys())
+                sorted(pending_underlyings.keys())
             )
 
-            for underlying_ticker, active_tickers in active_contracts_by_underlying.items():
-                stock_spot_price = stock_spot_prices.get(underlying_ticker)
-                if stock_spot_price is None:
-                    logger.warning(
-                        "No stock spot price available for %s; falling back to option snapshot payload",
-                        underlying_ticker,
-                    )
-                else:
-                    logger.info(
-                        "Using stock spot price for %s: %s",
-                        underlying_ticker,
-                        stock_spot_price,
-                    )
-                logger.info(
-                    "Fetching paginated chain snapshots for %s (%s active contracts)",
-                    underlying_ticker,
-                    len(active_tickers),
-                )
-                snapshots = await fetch_chain_snapshots_for_underlying(underlying_ticker)
-                valid_contract_snapshots = [
-                    (snapshot.details.ticker, snapshot)
-                    for snapshot in snapshots
-                    if snapshot is not None
-                    and snapshot.details is not None
-                    and snapshot.details.ticker in active_tickers
-                ]
-                logger.info(
-                    "Fetched %s/%s snapshots successfully for %s",
-                    len(valid_contract_snapshots),
-                    len(active_tickers),
+            for underlying_ticker, active_tickers in pending_underlyings.items():
+                await self._ingest_underlying(
                     underlying_ticker,
+                    active_tickers,
+                    stock_spot_prices.get(underlying_ticker),
+                    checkpoint,
                 )
-                tasks = [
-                    asyncio.create_task(
-                        self._upsert_option_snapshot(
-                            contract_ticker,
-                            snapshot,
-                            underlying_price_override=stock_spot_price,
-                        )
-                    )
-                    for contract_ticker, snapshot in valid_contract_snapshots
-                ]
-                await asyncio.gather(*tasks)
+            checkpoint.clear()
             logger.info(
                 f"All option snapshots processed successfully. "
                 f"Total contracts processed: {total_contracts}"
@@ -121,29 +154,320 @@ class OptionSnapshotsIngestor(OptionIngestor):
             )
             raise
 
-    @bounded_async_sem(limit=DATA_BASE_CONCURRENCY_LIMIT)
-    @traced_span_async(name="_upsert_option_snapshot", attributes={"module": "DB"})
+    async def _ingest_underlying(
+        self,
+        underlying_ticker: str,
+        active_tickers: dict[str, str],
+        stock_spot_price: float | None,
+        checkpoint: RunCheckpoint,
+    ) -> None:
+        """Ingest the chain of one underlying, resuming from its checkpointed cursor."""
+        started = perf_counter()
+        if stock_spot_price is None:
+            logger.warning(
+                "No stock spot price available for %s; falling back to option snapshot payload",
+                underlying_ticker,
+            )
+        else:
+            logger.info("Using stock spot price for %s: %s", underlying_ticker, stock_spot_price)
+        cursor = checkpoint.chain_cursor(underlying_ticker)
+        logger.info(
+            "Fetching paginated chain snapshots for %s (%s active contracts%s)",
+            underlying_ticker,
+            len(active_tickers),
+            ", resuming from checkpoint" if cursor else "",
+        )
+        spool = open_snapshot_spool() if spool_enabled() else None
+        try:
+            with (
+                track_progress(logger, underlying_ticker, "option_snapshots", len(active_tickers)),
+                start_batch_span(
+                    "upsert_option_snapshot_batch",
+                    attributes={"module": "DB", "underlying_asset": underlying_ticker},
+                ),
+            ):
+                ingest_chain = (
+                    self._ingest_chain_in_transform_pool
+                    if transform_pool_enabled()
+                    else self._ingest_chain_inline
+                )
+                fetched, written = await ingest_chain(
+                    underlying_ticker, cursor, active_tickers, stock_spot_price, spool, checkpoint
+                )
+        finally:
+            # Seal even on failure so rows fetched so far still reach the drainer.
+            if spool is not None:
+                spool.seal()
+        logger.info(
+            "Fetched %s chain snapshots for %s; %s/%s active contracts matched",
+            fetched,
+            underlying_ticker,
+            written,
+            len(active_tickers),
+        )
+        checkpoint.mark_underlying_done(underlying_ticker)
+        UNDERLYING_DURATION.record(
+            perf_counter() - started,
+            {"stage": "option_snapshots", "underlying": underlying_ticker},
+        )
+
+    async def _ingest_chain_inline(
+        self,
+        underlying_ticker: str,
+        cursor: str | None,
+        active_tickers: dict[str, str],
+        stock_spot_price: float | None,
+        spool: SpoolWriter | None,
+        checkpoint: RunCheckpoint,
+    ) -> tuple[int, int]:
+        """Decode, build and write pages on the event loop. Returns (fetched, written)."""
+        fetched = 0
+        written = 0
+        async for page in iter_chain_snapshot_pages_for_underlying(underlying_ticker, cursor):
+            fetched += len(page.snapshots)
+            if spool is None:
+                written += await self._upsert_chain_page(
+                    underlying_ticker, page.snapshots, active_tickers, stock_spot_price
+                )
+            else:
+                written += self._spool_chain_page(
+                    spool, underlying_ticker, page.snapshots, active_tickers, stock_spot_price
+                )
+                if checkpoint.enabled:
+                    spool.sync()
+            # Only advance the cursor once the page's writes have settled.
+            checkpoint.set_chain_cursor(underlying_ticker, page.next_cursor)
+        return fetched, written
+
+    async def _upsert_chain_page(
+        self,
+        underlying_ticker: str,
+        snapshots: list[OptionContractSnapshot],
+        active_tickers: dict[str, str],
+        stock_spot_price: float | None,
+    ) -> int:
+        if CHANGE_ONLY_WRITES:
+            # Unchanged rows are only detected against option_snapshot_latest in bulk.
+            rows = self._chain_page_rows(
+                underlying_ticker, snapshots, active_tickers, stock_spot_price
+            )
+            if not rows:
+                return 0
+            BATCH_SIZE.record(len(rows), {"table": "option_snapshots"})
+            _, unchanged = await write_snapshot_rows(rows)
+            record_row_outcome(OUTCOME_WRITTEN, len(rows) - unchanged)
+            record_row_outcome(OUTCOME_SKIPPED, unchanged)
+            return len(rows) - unchanged
+        valid_contract_snapshots = _active_contract_snapshots(snapshots, active_tickers)
+        BATCH_SIZE.record(len(valid_contract_snapshots), {"table": "option_snapshots"})
+        stored: list[dict] = []
+        tasks = [
+            asyncio.create_task(
+                self._upsert_option_snapshot(
+                    contract_ticker,
+                    snapshot,
+                    underlying_price_override=stock_spot_price,
+                    underlying_ticker=underlying_ticker,
+                    stored=stored,
+                )
+            )
+            for contract_ticker, snapshot in valid_contract_snapshots
+        ]
+        await asyncio.gather(*tasks)
+        # One latest upsert per page instead of a second statement per contract.
+        if stored:
+            await upsert_latest_snapshots(
+                stored, DB_RETRY_MAX_ATTEMPTS, DB_RETRY_BASE_DELAY_SECONDS
+            )
+        return len(valid_contract_snapshots)
+
+    async def _ingest_chain_in_transform_pool(
+        self,
+        underlying_ticker: str,
+        cursor: str | None,
+        active_tickers: dict[str, str],
+        stock_spot_price: float | None,
+        spool: SpoolWriter | None,
+        checkpoint: RunCheckpoint,
+    ) -> tuple[int, int]:
+        """Decode and build pages in worker processes, keeping only I/O on the event loop.
+
+        Up to one page per worker is in flight while the next is downloaded. Pages settle in
+        fetch order so the checkpoint cursor never skips past an unwritten page. Rows are
+        bulk-upserted like the spool drainer, which stores the same data as the per-row path.
+        Returns (fetched, written) row counts.
+        """
+        loop = asyncio.get_running_loop()
+        pool = get_transform_pool()
+        in_flight: deque[tuple[asyncio.Future, str | None]] = deque()
+        fetched = 0
+        written = 0
+        try:
+            async for raw_page in iter_raw_chain_snapshot_pages_for_underlying(
+                underlying_ticker, cursor
+            ):
+                future = loop.run_in_executor(
+                    pool,
+                    transform_chain_page,
+                    raw_page.body,
+                    underlying_ticker,
+                    stock_spot_price,
+                    self.ingest_time,
+                )
+                in_flight.append((future, raw_page.next_cursor))
+                if len(in_flight) > TRANSFORM_WORKERS:
+                    page_fetched, page_written = await self._write_transformed_page(
+                        underlying_ticker, *in_flight.popleft(), active_tickers, spool, checkpoint
+                    )
+                    fetched += page_fetched
+                    written += page_written
+            while in_flight:
+                page_fetched, page_written = await self._write_transformed_page(
+                    underlying_ticker, *in_flight.popleft(), active_tickers, spool, checkpoint
+                )
+                fetched += page_fetched
+                written += page_written
+        finally:
+            for future, _ in in_flight:
+                future.cancel()
+        return fetched, written
+
+    async def _write_transformed_page(
+        self,
+        underlying_ticker: str,
+        future: asyncio.Future,
+        next_cursor: str | None,
+        active_tickers: dict[str, str],
+        spool: SpoolWriter | None,
+        checkpoint: RunCheckpoint,
+    ) -> tuple[int, int]:
+        page = await future
+        ROWS_FETCHED.add(page.fetched, {"source": "option_chain"})
+        rows = [row for row in page.rows if row[0] in active_tickers]
+        never_active = sum(1 for ticker in page.never_active if ticker in active_tickers)
+        SKIPS.add(page.fetched - len(rows) - never_active, {"reason": "inactive_contract"})
+        SKIPS.add(never_active, {"reason": "never_active"})
+        record_row_outcome(OUTCOME_SKIPPED, never_active)
+        unchanged = 0
+        if spool is not None:
+            started = perf_counter()
+            spool.append_rows([encode_snapshot_row(snapshot_row_to_dict(row)) for row in rows])
+            if checkpoint.enabled:
+                spool.sync()
+            record_batch_rows(len(rows), perf_counter() - started)
+            SPOOL_ROWS.add(len(rows), {"op": "appended"})
+        elif rows:
+            BATCH_SIZE.record(len(rows), {"table": "option_snapshots"})
+            _, unchanged = await write_snapshot_rows([snapshot_row_to_dict(row) for row in rows])
+        record_row_outcome(OUTCOME_WRITTEN, len(rows) - unchanged)
+        record_row_outcome(OUTCOME_SKIPPED, unchanged)
+        checkpoint.set_chain_cursor(underlying_ticker, next_cursor)
+        return page.fetched, len(rows) - unchanged
+
+    def _spool_chain_page(
+        self,
+        spool: SpoolWriter,
+        underlying_ticker: str,
+        snapshots: list[OptionContractSnapshot],
+        active_tickers: dict[str, str],
+        stock_spot_price: float | None,
+    ) -> int:
+        """Append ready-to-write rows to the local spool instead of writing to the database."""
+        rows = self._chain_page_rows(underlying_ticker, snapshots, active_tickers, stock_spot_price)
+        started = perf_counter()
+        spool.append_rows([encode_snapshot_row(row) for row in rows])
+        record_batch_rows(len(rows), perf_counter() - started)
+        SPOOL_ROWS.add(len(rows), {"op": "appended"})
+        record_row_outcome(OUTCOME_WRITTEN, len(rows))
+        return len(rows)
+
+    def _chain_page_rows(
+        self,
+        underlying_ticker: str,
+        snapshots: list[OptionContractSnapshot],
+        active_tickers: dict[str, str],
+        stock_spot_price: float | None,
+    ) -> list[dict]:
+        """Build the ``create`` payload of every traded active contract on a page.
+
+        Contracts that never traded are recorded as skipped; callers record the rest once
+        their outcome is known.
+        """
+        rows = []
+        for contract_ticker, snapshot in _active_contract_snapshots(snapshots, active_tickers):
+            last_updated_raw = _snapshot_last_updated_raw(snapshot)
+            if not last_updated_raw:
+                SKIPS.add(1, {"reason": "never_active"})
+                record_row_outcome(OUTCOME_SKIPPED)
+                continue
+            payload = _build_snapshot_upsert_payload(
+                contract_ticker=contract_ticker,
+                snapshot=snapshot,
+                underlying_price_override=stock_spot_price,
+                last_updated_dt=ns_to_datetime(last_updated_raw),
+                curr_datetime=self.ingest_time,
+                greeks=_snapshot_greeks_dict(snapshot),
+                underlying_ticker=underlying_ticker,
+            )
+            rows.append(payload["create"])
+        return rows
+
+    def load_checkpoint(self, shard: Shard = UNSHARDED) -> RunCheckpoint:
+        """Return this run's checkpoint for ``shard``, restored from disk when one is left."""
+        return RunCheckpoint.load(
+            shard.checkpoint_job("option_snapshots"),
+            run_key=self.ingest_time.date().isoformat(),
+        )
+
+    @bounded_db_connection
+    async def latest_crawls(self, shard: Shard = UNSHARDED) -> dict[str, datetime]:
+        """Return the newest ``last_crawled`` of each stored underlying in ``shard``."""
+        rows = await decorator._get_db().query_raw(
+            LATEST_CRAWL_BY_UNDERLYING_SQL, self.ingest_time.isoformat()
+        )
+        crawls = {}
+        for row in rows:
+            if row["last_crawled"] is None or not shard.owns(row["underlying_ticker"]):
+                continue
+            crawled = row["last_crawled"]
+            if isinstance(crawled, str):
+                crawled = datetime.fromisoformat(crawled.replace("Z", "+00:00"))
+            crawls[row["underlying_ticker"]] = crawled
+        return crawls
+
+    @bounded_async_sem(limit=DATA_BASE_CONCURRENCY_LIMIT, breaker=db_breaker)
+    @traced_row_span_async(
+        name="_upsert_option_snapshot",
+        attributes={"module": "DB"},
+        row_id=lambda self, contract_ticker, *args, **kwargs: contract_ticker,
+    )
     async def _upsert_option_snapshot(
         self,
         contract_ticker: str,
         snapshot: OptionContractSnapshot,
         underlying_price_override: float | None = None,
+        underlying_ticker: str | None = None,
+        stored: list[dict] | None = None,
         max_retries: int = DB_RETRY_MAX_ATTEMPTS,
         base_delay_seconds: float = DB_RETRY_BASE_DELAY_SECONDS,
     ) -> "OptionSnapshot | None":
-        """Upsert a single option snapshot into the database."""
+        """Upsert a single option snapshot into the database.
+
+        The ``create`` payload of a stored row is appended to ``stored``, so the caller can
+        move the page's ``option_snapshot_latest`` rows in one statement.
+        """
         last_updated_raw = _snapshot_last_updated_raw(snapshot)
         last_updated_dt = ns_to_datetime(last_updated_raw) if last_updated_raw else None
         curr_datetime = self.ingest_time
         attempt = 0
-        with start_span_sync(
+        with start_row_span_sync(
             "transform_snapshot_payload",
             attributes={
                 "module": "TRANSFORM",
                 "option_ticker_name": contract_ticker,
             },
         ):
-            greeks = _snapshot_greeks_json(snapshot)
+            greeks = _snapshot_greeks_dict(snapshot)
 
         while attempt < max_retries:
             try:
@@ -156,23 +480,36 @@ class OptionSnapshotsIngestor(OptionIngestor):
                     last_updated_dt=last_updated_dt,
                     curr_datetime=curr_datetime,
                     greeks=greeks,
+                    underlying_ticker=underlying_ticker,
                 )
-                result = await OptionSnapshot.prisma().upsert(
-                    where={
-                        "ticker_last_updated": {
-                            "ticker": contract_ticker,
-                            "last_updated": last_updated_dt,
-                        }
-                    },
-                    data=payload,
-                )
-                logger.info(
-                    f"{curr_datetime} Inserted snapshot for {contract_ticker}: "
-                    f"OI={snapshot.open_interest}"
-                )
-                logger.info(format_snapshot(contract_ticker, snapshot))
+                with record_duration(DB_WRITE_LATENCY, {"table": "option_snapshots"}):
+                    result = await OptionSnapshot.prisma().upsert(
+                        where={
+                            "ticker_last_updated": {
+                                "ticker": contract_ticker,
+                                "last_updated": last_updated_dt,
+                            }
+                        },
+                        data=payload,
+                    )
+                db_breaker.record_success()
+                if stored is not None:
+                    stored.append(payload["create"])
+                ROWS_WRITTEN.add(1, {"table": "option_snapshots"})
+                record_row_outcome(OUTCOME_WRITTEN)
+                level = row_log_level(logger)
+                if level is not None:
+                    logger.log(
+                        level,
+                        "%s Inserted snapshot for %s: OI=%s",
+                        curr_datetime,
+                        contract_ticker,
+                        snapshot.open_interest,
+                    )
+                    logger.log(level, "%s", format_snapshot(contract_ticker, snapshot))
                 return result
             except Exception as e:
+                db_breaker.record_failure(e)
                 should_retry = _handle_snapshot_upsert_error(
                     error=e,
                     context={
@@ -186,75 +523,34 @@ class OptionSnapshotsIngestor(OptionIngestor):
                 if should_retry:
                     delay = base_delay_seconds * (2**attempt)
                     attempt += 1
+                    RETRIES.add(1, {"stage": "db", "table": "option_snapshots"})
                     logger.warning(
                         "Retrying snapshot upsert for %s after transient DB error in %.2fs",
                         contract_ticker,
                         delay,
                     )
-                    await asyncio.sleep(delay)
+                    await db_breaker.backoff(delay)
                     continue
+                if isinstance(e, UniqueViolationError | OptionTickerNeverActiveError):
+                    record_row_outcome(OUTCOME_SKIPPED)
+                else:
+                    record_row_outcome(OUTCOME_FAILED)
+                    record_row_error(e, row_id=contract_ticker)
                 return None
 
 
-def _snapshot_last_updated_raw(snapshot: OptionContractSnapshot):
-    if snapshot.day is None:
-        return None
-    return snapshot.day.last_updated
-
-
-def _snapshot_greeks_json(snapshot: OptionContractSnapshot):
-    if not snapshot.greeks:
-        return None
-    greeks_dict = {
-        "delta": snapshot.greeks.delta if snapshot.greeks.delta is not None else None,
-        "gamma": snapshot.greeks.gamma if snapshot.greeks.gamma is not None else None,
-        "theta": snapshot.greeks.theta if snapshot.greeks.theta is not None else None,
-        "vega": snapshot.greeks.vega if snapshot.greeks.vega is not None else None,
-    }
-    return Json(greeks_dict)
-
-
-def _build_snapshot_upsert_payload(
-    contract_ticker: str,
-    snapshot: OptionContractSnapshot,
-    underlying_price_override: float | None,
-    last_updated_dt,
-    curr_datetime,
-    greeks,
-) -> dict:
-    open_interest = int(snapshot.open_interest) if snapshot.open_interest is not None else None
-    volume = (
-        int(snapshot.day.volume)
-        if snapshot.day is not None and snapshot.day.volume is not None
-        else None
-    )
-    last_price = snapshot.day.close if snapshot.day is not None else None
-    day_open = snapshot.day.open if snapshot.day is not None else None
-    day_close = snapshot.day.close if snapshot.day is not None else None
-    day_change = snapshot.day.change_percent if snapshot.day is not None else None
-    underlying_price = underlying_price_override
-    if underlying_price is None and snapshot.underlying_asset is not None:
-        underlying_price = snapshot.underlying_asset.price
-    base_payload = {
-        "open_interest": open_interest,
-        "volume": volume,
-        "implied_vol": snapshot.implied_volatility,
-        "greeks": greeks if greeks is not None else None,
-        "last_price": last_price,
-        "underlying_price": underlying_price,
-        "last_updated": last_updated_dt,
-        "last_crawled": curr_datetime,
-        "day_open": day_open,
-        "day_close": day_close,
-        "day_change": day_change,
-    }
-    return {
-        "create": {
-            "ticker": contract_ticker,
-            **base_payload,
-        },
-        "update": base_payload,
-    }
+def _active_contract_snapshots(
+    snapshots: list[OptionContractSnapshot], active_tickers: dict[str, str]
+) -> list[tuple[str, OptionContractSnapshot]]:
+    valid_contract_snapshots = [
+        (snapshot.details.ticker, snapshot)
+        for snapshot in snapshots
+        if snapshot is not None
+        and snapshot.details is not None
+        and snapshot.details.ticker in active_tickers
+    ]
+    SKIPS.add(len(snapshots) - len(valid_contract_snapshots), {"reason": "inactive_contract"})
+    return valid_contract_snapshots
 
 
 def _handle_snapshot_upsert_error(
@@ -269,10 +565,18 @@ def _handle_snapshot_upsert_error(
     next_attempt = attempt + 1
 
     if isinstance(error, UniqueViolationError):
-        logger.info("%s at %s has no new update on snapshot", contract_ticker, last_updated_dt)
+        SKIPS.add(1, {"reason": "no_update"})
+        level = row_log_level(logger)
+        if level is not None:
+            logger.log(
+                level, "%s at %s has no new update on snapshot", contract_ticker, last_updated_dt
+            )
         return False
     if isinstance(error, OptionTickerNeverActiveError):
-        logger.info("%s is not active", contract_ticker)
+        SKIPS.add(1, {"reason": "never_active"})
+        level = row_log_level(logger)
+        if level is not None:
+            logger.log(level, "%s is not active", contract_ticker)
         return False
     if is_retryable_db_error(error):
         logger.warning(
@@ -282,13 +586,17 @@ def _handle_snapshot_upsert_error(
             next_attempt,
             max_retries,
         )
-        return next_attempt < max_retries
+        if next_attempt < max_retries:
+            return True
+        SKIPS.add(1, {"reason": "write_failed"})
+        return False
 
     logger.error(
         f"{curr_datetime} Error inserting option snapshot for "
         f"{contract_ticker}: {error} (attempt {next_attempt}/{max_retries})"
     )
 
+    SKIPS.add(1, {"reason": "write_failed"})
     logger.error(traceback.format_exc())
     logger.error("Failed to insert snapshot for %s after %s attempts", contract_ticker, max_retries)
     return False
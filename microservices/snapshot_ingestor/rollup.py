@@ -0,0 +1,194 @@
+"""Incremental daily rollups of option snapshot history.
+
+Each New York calendar day is aggregated once into ``option_daily_rollups`` (one row per
+contract) and then ``underlying_daily_rollups`` (one row per underlying, built from the
+contract rows). A run only reads the ``last_updated`` range of the days it rolls up: every
+day after the newest rolled-up one through yesterday, plus ``ROLLUP_REFRESH_DAYS`` already
+rolled days so late-arriving rows are picked up. Rolling a day again replaces its rows.
+"""
+
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+
+from microservices.shared import decorator
+from microservices.shared.decorator import retry_db_call
+from microservices.shared.market_calendar import MARKET_TIME_ZONE
+from microservices.shared.metrics import ROWS_WRITTEN
+from microservices.shared.util import get_current_datetime
+
+ROLLUP_REFRESH_DAYS = max(0, int(os.getenv("ROLLUP_REFRESH_DAYS", "1")))
+ROLLUP_MAX_ATTEMPTS = int(os.getenv("ROLLUP_MAX_ATTEMPTS", "5"))
+ROLLUP_BASE_DELAY_SECONDS = float(os.getenv("ROLLUP_BASE_DELAY_SECONDS", "1.0"))
+ROLLUP_WATERMARK_SQL = "SELECT max(trade_date) AS trade_date FROM underlying_daily_rollups"
+FIRST_SNAPSHOT_SQL = "SELECT min(last_updated) AS last_updated FROM option_snapshots"
+# ``volume`` is Polygon's cumulative day volume at snapshot time, so the day's total is its
+# maximum; open interest is fixed for the day. Open and close values skip null snapshots.
+ROLLUP_CONTRACTS_SQL = """
+INSERT INTO option_daily_rollups (
+    ticker, trade_date, underlying_ticker, contract_type, snapshots, open_iv, close_iv,
+    max_open_interest, volume, close_price, close_underlying_price,
+    avg_delta, avg_gamma, avg_theta, avg_vega, first_updated, last_updated
+)
+SELECT
+    s.ticker,
+    $1::date,
+    o.underlying_ticker,
+    lower(o.contract_type),
+    count(*),
+    (array_agg(s.implied_vol ORDER BY s.last_updated)
+        FILTER (WHERE s.implied_vol IS NOT NULL))[1],
+    (array_agg(s.implied_vol ORDER BY s.last_updated DESC)
+        FILTER (WHERE s.implied_vol IS NOT NULL))[1],
+    max(s.open_interest),
+    max(s.volume),
+    (array_agg(s.last_price ORDER BY s.last_updated DESC)
+        FILTER (WHERE s.last_price IS NOT NULL))[1],
+    (array_agg(s.underlying_price ORDER BY s.last_updated DESC)
+        FILTER (WHERE s.underlying_price IS NOT NULL))[1],
+    avg(s.delta),
+    avg(s.gamma),
+    avg(s.theta),
+    avg(s.vega),
+    min(s.last_updated),
+    max(s.last_updated)
+FROM option_snapshots AS s
+JOIN options AS o ON o.ticker = s.ticker
+WHERE s.last_updated >= $2::timestamptz AND s.last_updated < $3::timestamptz
+GROUP BY s.ticker, o.underlying_ticker, o.contract_type
+ON CONFLICT (ticker, trade_date) DO UPDATE SET
+    snapshots = EXCLUDED.snapshots,
+    open_iv = EXCLUDED.open_iv,
+    close_iv = EXCLUDED.close_iv,
+    max_open_interest = EXCLUDED.max_open_interest,
+    volume = EXCLUDED.volume,
+    close_price = EXCLUDED.close_price,
+    close_underlying_price = EXCLUDED.close_underlying_price,
+    avg_delta = EXCLUDED.avg_delta,
+    avg_gamma = EXCLUDED.avg_gamma,
+    avg_theta = EXCLUDED.avg_theta,
+    avg_vega = EXCLUDED.avg_vega,
+    first_updated = EXCLUDED.first_updated,
+    last_updated = EXCLUDED.last_updated
+"""
+ROLLUP_UNDERLYINGS_SQL = """
+INSERT INTO underlying_daily_rollups (
+    underlying_ticker, trade_date, contracts, call_volume, put_volume,
+    call_open_interest, put_open_interest, avg_open_iv, avg_close_iv
+)
+SELECT
+    underlying_ticker,
+    trade_date,
+    count(*),
+    coalesce(sum(volume) FILTER (WHERE contract_type = 'call'), 0),
+    coalesce(sum(volume) FILTER (WHERE contract_type = 'put'), 0),
+    coalesce(sum(max_open_interest) FILTER (WHERE contract_type = 'call'), 0),
+    coalesce(sum(max_open_interest) FILTER (WHERE contract_type = 'put'), 0),
+    avg(open_iv),
+    avg(close_iv)
+FROM option_daily_rollups
+WHERE trade_date = $1::date
+GROUP BY underlying_ticker, trade_date
+ON CONFLICT (underlying_ticker, trade_date) DO UPDATE SET
+    contracts = EXCLUDED.contracts,
+    call_volume = EXCLUDED.call_volume,
+    put_volume = EXCLUDED.put_volume,
+    call_open_interest = EXCLUDED.call_open_interest,
+    put_open_interest = EXCLUDED.put_open_interest,
+    avg_open_iv = EXCLUDED.avg_open_iv,
+    avg_close_iv = EXCLUDED.avg_close_iv
+"""
+logger = logging.getLogger(__name__)
+
+
+async def rollup_snapshots(
+    start: date | None = None,
+    end: date | None = None,
+    refresh_days: int = ROLLUP_REFRESH_DAYS,
+) -> int:
+    """Roll up every day from ``start`` through ``end`` (default: the pending days).
+
+    ``end`` defaults to yesterday in New York; today's snapshots are still coming in.
+    Returns the number of contract-day rows written.
+    """
+    end = end or _market_date(get_current_datetime()) - timedelta(days=1)
+    start = start or await _first_pending_day(refresh_days)
+    if start is None or start > end:
+        logger.info("No snapshot days pending rollup")
+        return 0
+    written = 0
+    day = start
+    while day <= end:
+        written += await rollup_day(day)
+        day += timedelta(days=1)
+    return written
+
+
+async def rollup_day(day: date) -> int:
+    """Replace the contract and underlying rollups of one New York calendar day."""
+    day_start = MARKET_TIME_ZONE.localize(datetime.combine(day, time()))
+    day_end = MARKET_TIME_ZONE.localize(datetime.combine(day + timedelta(days=1), time()))
+    db = decorator._get_db()
+    contracts = await _with_retry(
+        day,
+        db.execute_raw,
+        ROLLUP_CONTRACTS_SQL,
+        day.isoformat(),
+        day_start.isoformat(),
+        day_end.isoformat(),
+    )
+    underlyings = await _with_retry(day, db.execute_raw, ROLLUP_UNDERLYINGS_SQL, day.isoformat())
+    ROWS_WRITTEN.add(contracts, {"table": "option_daily_rollups"})
+    ROWS_WRITTEN.add(underlyings, {"table": "underlying_daily_rollups"})
+    logger.info(
+        "Rolled up %s: %s contracts across %s underlyings", day.isoformat(), contracts, underlyings
+    )
+    return contracts
+
+
+async def _first_pending_day(refresh_days: int) -> date | None:
+    db = decorator._get_db()
+    rows = await db.query_raw(ROLLUP_WATERMARK_SQL)
+    watermark = rows[0].get("trade_date") if rows else None
+    if watermark is not None:
+        return _as_date(watermark) + timedelta(days=1) - timedelta(days=refresh_days)
+    # First run: start at the oldest stored snapshot.
+    rows = await db.query_raw(FIRST_SNAPSHOT_SQL)
+    first = rows[0].get("last_updated") if rows else None
+    if first is None:
+        return None
+    if isinstance(first, str):
+        first = datetime.fromisoformat(first.replace("Z", "+00:00"))
+    return _market_date(first)
+
+
+def _market_date(at: datetime) -> date:
+    return at.astimezone(MARKET_TIME_ZONE).date()
+
+
+def _as_date(value: date | str) -> date:
+    """Raw query results carry dates either as dates or as ISO strings."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value[:10])
+
+
+async def _with_retry(day: date, call, *args):
+    return await retry_db_call(
+        call,
+        *args,
+        what=f"rollup of {day.isoformat()}",
+        table="option_daily_rollups",
+        max_attempts=ROLLUP_MAX_ATTEMPTS,
+        base_delay_seconds=ROLLUP_BASE_DELAY_SECONDS,
+    )
+
+
+__all__ = [
+    "ROLLUP_CONTRACTS_SQL",
+    "ROLLUP_UNDERLYINGS_SQL",
+    "rollup_day",
+    "rollup_snapshots",
+]
@@ -2,16 +2,44 @@
 
 import asyncio
 import logging
+import os
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
 
-from microservices.config import get_retriever_config, get_snapshot_runtime_config, load_env
+from microservices.config import (
+    get_retriever_config,
+    get_snapshot_daemon_config,
+    get_snapshot_runtime_config,
+    load_env,
+)
+from microservices.option_ingestor.api import close_shared_http_client, open_shared_http_client
 from microservices.option_ingestor.retriever import OptionRetriever
 from microservices.shared import connect_db, disconnect_db
+from microservices.shared.daemon import install_shutdown_signals, run_periodic
+from microservices.shared.lambda_runtime import WarmRuntime
+from microservices.shared.market_calendar import (
+    IGNORE_MARKET_CALENDAR,
+    is_market_open,
+    previous_session_close,
+)
 from microservices.shared.observability import (
     configure_service_logger,
+    initialize_metrics,
     initialize_tracing,
     shutdown_tracing,
 )
+from microservices.shared.progress import RunTotals, collect_run_totals
+from microservices.shared.sharding import UNSHARDED, Shard, shard_assignment
+from microservices.shared.util import get_current_datetime
+from microservices.snapshot_ingestor.backfill import (
+    backfill_contract_terms,
+    backfill_greek_columns,
+    backfill_latest_snapshots,
+)
 from microservices.snapshot_ingestor.ingestor import OptionSnapshotsIngestor
+from microservices.snapshot_ingestor.rollup import rollup_snapshots
+from microservices.snapshot_ingestor.spool import drain_snapshot_spool, spool_enabled
+from microservices.snapshot_ingestor.transform import shutdown_transform_pool
 
 
 def _configure_logging(service_name: str) -> None:
@@ -21,29 +49,139 @@ def _configure_logging(service_name: str) -> None:
 
 
 logger = logging.getLogger(__name__)
+# Chains crawled this close to the last session close already reflect that session.
+SNAPSHOT_FRESHNESS_TOLERANCE = timedelta(
+    minutes=float(os.getenv("SNAPSHOT_FRESHNESS_TOLERANCE_MINUTES", "15"))
+)
 
 
 async def _run_job(ingestor: OptionSnapshotsIngestor) -> None:
     await connect_db()
     try:
-        await ingestor.ingest_option_snapshots()
+        async with shard_assignment("option_snapshots") as shard:
+            if shard is not None:
+                await _ingest_unless_fresh(ingestor, shard)
     finally:
         await disconnect_db()
 
 
+async def _ingest_unless_fresh(ingestor: OptionSnapshotsIngestor, shard: Shard = UNSHARDED) -> None:
+    try:
+        if await _closed_market_run_is_noop(ingestor, get_current_datetime(), shard):
+            return
+        await ingestor.ingest_option_snapshots(shard=shard)
+    finally:
+        if spool_enabled():
+            await _drain_spool()
+
+
+async def _drain_spool() -> None:
+    """Flush spooled rows; on failure they stay on disk for the next drain."""
+    try:
+        drained = await drain_snapshot_spool()
+    except Exception:
+        logger.exception("Spool drain failed; spooled snapshots will be retried on the next run")
+    else:
+        logger.info("Drained %s spooled snapshot rows", drained)
+
+
+async def _closed_market_run_is_noop(
+    ingestor: OptionSnapshotsIngestor, now: datetime, shard: Shard = UNSHARDED
+) -> bool:
+    """Return True when the market is closed and ``shard`` already has the last session.
+
+    Outside trading hours chains cannot change after the closing snapshot has been captured,
+    so one DB probe replaces re-downloading every chain. Every underlying of the shard must
+    have been crawled since the close, so a run that failed halfway, or another shard that
+    finished first, never hides the underlyings still missing. A pending checkpoint always
+    resumes.
+    """
+    if IGNORE_MARKET_CALENDAR or is_market_open(now):
+        return False
+    if ingestor.load_checkpoint(shard).has_progress:
+        logger.info("Market closed; resuming the unfinished run from its checkpoint")
+        return False
+    last_close = previous_session_close(now)
+    crawls = await ingestor.latest_crawls(shard)
+    stale = sorted(
+        underlying
+        for underlying, crawled in crawls.items()
+        if crawled < last_close - SNAPSHOT_FRESHNESS_TOLERANCE
+    )
+    if not crawls:
+        logger.info("Market closed; no stored snapshots for this shard yet, ingesting")
+        return False
+    if stale:
+        logger.info(
+            "Market closed; %s underlyings not crawled since session close %s (%s), ingesting",
+            len(stale),
+            last_close,
+            ", ".join(stale[:5]),
+        )
+        return False
+    logger.info(
+        "Market closed and all %s underlyings were crawled since session close %s; skipping run",
+        len(crawls),
+        last_close,
+    )
+    return True
+
+
+async def _run_daemon(retriever: OptionRetriever, interval_seconds: float) -> None:
+    """Keep the DB connection and HTTP pool open and ingest on a fixed cadence.
+
+    The shard (leased when ``SHARD_INDEX`` is unset) is held for the daemon's whole life.
+    """
+    stop_event = asyncio.Event()
+    install_shutdown_signals(stop_event)
+
+    await connect_db()
+    open_shared_http_client()
+    try:
+        async with shard_assignment("option_snapshots", release=True) as shard:
+            if shard is None:
+                return
+
+            async def cycle() -> None:
+                # A fresh ingestor re-stamps ingest_time; the connections it uses stay warm.
+                await _ingest_unless_fresh(
+                    OptionSnapshotsIngestor(option_retriever=retriever), shard
+                )
+
+            await run_periodic(cycle, interval_seconds, stop_event)
+    finally:
+        await close_shared_http_client()
+        await disconnect_db()
+
+
 def run() -> None:
     """Run option snapshot ingestion as an isolated service."""
     load_env()
     runtime_config = get_snapshot_runtime_config()
     retriever_config = get_retriever_config()
+    daemon_config = get_snapshot_daemon_config()
 
     initialize_tracing(runtime_config.service_name)
+    initialize_metrics(runtime_config.service_name)
     _configure_logging(service_name=runtime_config.service_name)
 
     retriever = OptionRetriever(
         concurrency_limit=retriever_config.concurrency_limit,
         batch_size=retriever_config.batch_size,
     )
+    if daemon_config.enabled:
+        try:
+            logger.info(
+                "-----------Starting option snapshots daemon (every %ss)...",
+                daemon_config.interval_seconds,
+            )
+            asyncio.run(_run_daemon(retriever, daemon_config.interval_seconds))
+            logger.info("Option snapshots daemon stopped")
+        finally:
+            shutdown_transform_pool()
+            shutdown_tracing()
+        return
+
     ingestor = OptionSnapshotsIngestor(option_retriever=retriever)
 
     try:
@@ -54,5 +192,143 @@ def run() -> None:
         raise
     else:
         logger.info("Option snapshots ingestion completed successfully")
+    finally:
+        shutdown_transform_pool()
+        shutdown_tracing()
+
+
+def warm_lambda(runtime: WarmRuntime) -> None:
+    """Open telemetry, the DB connection and the HTTP pool without ingesting anything."""
+    _initialize_lambda(runtime)
+    runtime.run(_prewarm(runtime))
+
+
+def run_lambda(runtime: WarmRuntime, shard: Shard | None = None) -> RunTotals:
+    """Ingest once on a Lambda container, reusing what earlier invocations left open.
+
+    Unlike ``run`` nothing is torn down afterwards: the loop, DB connection, HTTP pool and
+    telemetry providers stay up for the next warm invocation. A fan-out worker passes the
+    ``shard`` its coordinator assigned; otherwise the usual shard assignment applies.
+    """
+    _initialize_lambda(runtime)
+    retriever_config = get_retriever_config()
+    retriever = OptionRetriever(
+        concurrency_limit=retriever_config.concurrency_limit,
+        batch_size=retriever_config.batch_size,
+    )
+    ingestor = OptionSnapshotsIngestor(option_retriever=retriever)
+    logger.info(
+        "-----------Starting option snapshots ingestion on a %s container...",
+        "warm" if runtime.warm else "cold",
+    )
+    totals = runtime.run(_run_lambda_job(runtime, ingestor, shard))
+    logger.info("Option snapshots ingestion completed successfully")
+    return totals
+
+
+async def _run_lambda_job(
+    runtime: WarmRuntime, ingestor: OptionSnapshotsIngestor, shard: Shard | None = None
+) -> RunTotals:
+    await _prewarm(runtime)
+    with collect_run_totals() as totals:
+        async with shard_assignment("option_snapshots", assigned=shard) as assigned:
+            if assigned is not None:
+                await _ingest_unless_fresh(ingestor, assigned)
+    return totals
+
+
+async def _prewarm(runtime: WarmRuntime) -> None:
+    await runtime.ensure_database()
+    open_shared_http_client()
+
+
+def _initialize_lambda(runtime: WarmRuntime) -> None:
+    load_env()
+    service_name = get_snapshot_runtime_config().service_name
+
+    def initialize() -> None:
+        initialize_tracing(service_name)
+        initialize_metrics(service_name)
+        _configure_logging(service_name=service_name)
+
+    runtime.initialize_once(service_name, initialize)
+
+
+def drain() -> None:
+    """Bulk-load any spooled snapshot rows without fetching new data."""
+    load_env()
+    runtime_config = get_snapshot_runtime_config()
+    initialize_tracing(runtime_config.service_name)
+    initialize_metrics(runtime_config.service_name)
+    _configure_logging(service_name=runtime_config.service_name)
+
+    async def _drain_job() -> int:
+        await connect_db()
+        try:
+            return await drain_snapshot_spool()
+        finally:
+            await disconnect_db()
+
+    try:
+        drained = asyncio.run(_drain_job())
+        logger.info("Drained %s spooled snapshot rows", drained)
+    finally:
+        shutdown_tracing()
+
+
+def backfill_greeks() -> None:
+    """Copy legacy ``greeks`` JSON into the typed greek columns of stored snapshots."""
+    _run_backfill(backfill_greek_columns, "greek columns")
+
+
+def backfill_moneyness() -> None:
+    """Derive moneyness and years-to-expiry columns of snapshots stored before they existed."""
+    _run_backfill(backfill_contract_terms, "moneyness columns")
+
+
+def backfill_latest() -> None:
+    """Seed ``option_snapshot_latest`` with each contract's newest stored snapshot."""
+    _run_backfill(backfill_latest_snapshots, "latest snapshots")
+
+
+def rollup_daily() -> None:
+    """Aggregate snapshot days not yet rolled up into the daily rollup tables."""
+    load_env()
+    runtime_config = get_snapshot_runtime_config()
+    initialize_tracing(runtime_config.service_name)
+    initialize_metrics(runtime_config.service_name)
+    _configure_logging(service_name=runtime_config.service_name)
+
+    async def _rollup_job() -> int:
+        await connect_db()
+        try:
+            return await rollup_snapshots()
+        finally:
+            await disconnect_db()
+
+    try:
+        written = asyncio.run(_rollup_job())
+        logger.info("Rolled up %s contract days", written)
+    finally:
+        shutdown_tracing()
+
+
+def _run_backfill(backfill: Callable[[], Awaitable[int]], what: str) -> None:
+    load_env()
+    runtime_config = get_snapshot_runtime_config()
+    initialize_tracing(runtime_config.service_name)
+    initialize_metrics(runtime_config.service_name)
+    _configure_logging(service_name=runtime_config.service_name)
+
+    async def _backfill_job() -> int:
+        await connect_db()
+        try:
+            return await backfill()
+        finally:
+            await disconnect_db()
+
+    try:
+        updated = asyncio.run(_backfill_job())
+        logger.info("Backfilled %s for %s snapshot rows", what, updated)
     finally:
         shutdown_tracing()
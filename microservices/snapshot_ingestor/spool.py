@@ -0,0 +1,293 @@
+"""Spooled option snapshot rows and the drainer that bulk-loads them into Postgres."""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+from microservices.shared import decorator
+from microservices.shared.decorator import retry_db_call
+from microservices.shared.metrics import (
+    BATCH_SIZE,
+    DB_WRITE_LATENCY,
+    ROWS_WRITTEN,
+    SKIPS,
+    SPOOL_ROWS,
+    record_duration,
+)
+from microservices.shared.observability import record_batch_rows
+from microservices.shared.spool import SPOOL_DIR, SpoolWriter, read_segment, sealed_segments
+from microservices.snapshot_ingestor.transform import (
+    CONTRACT_TERM_FIELDS,
+    GREEK_FIELDS,
+    SNAPSHOT_ROW_FIELDS,
+    content_hash,
+)
+
+SPOOL_PREFIX = "option_snapshots"
+SPOOL_DRAIN_BATCH_SIZE = max(1, int(os.getenv("INGEST_SPOOL_DRAIN_BATCH_SIZE", "500")))
+SPOOL_DRAIN_MAX_ATTEMPTS = int(os.getenv("INGEST_SPOOL_DRAIN_MAX_ATTEMPTS", "5"))
+SPOOL_DRAIN_BASE_DELAY_SECONDS = float(os.getenv("INGEST_SPOOL_DRAIN_BASE_DELAY_SECONDS", "1.0"))
+# Skip history rows whose content hash matches the contract's latest row and only move that
+# row's last_crawled forward.
+CHANGE_ONLY_WRITES = os.getenv("INGEST_CHANGE_ONLY_WRITES", "false").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+_DATETIME_FIELDS = ("last_updated", "last_crawled")
+_COLUMN_TYPES = {"ticker": "text", "open_interest": "integer", "content_hash": "bigint"} | (
+    dict.fromkeys(_DATETIME_FIELDS, "timestamptz")
+)
+_COLUMNS = ", ".join(SNAPSHOT_ROW_FIELDS)
+_RECORD_COLUMNS = ", ".join(
+    f"{field} {_COLUMN_TYPES.get(field, 'double precision')}" for field in SNAPSHOT_ROW_FIELDS
+)
+_RECORDSET = f"jsonb_to_recordset($1::jsonb) AS r({_RECORD_COLUMNS})"
+_EXCLUDED_UPDATES = ", ".join(
+    f"{field} = EXCLUDED.{field}" for field in SNAPSHOT_ROW_FIELDS if field != "ticker"
+)
+
+
+# A re-crawl of the same trade refreshes spot, IV, OI and greeks in place, so the crawl time
+# breaks ties: a re-drained segment or a late page for an older key never moves a row back.
+LATEST_ROW_IS_OLDER = (
+    "(option_snapshot_latest.last_updated, option_snapshot_latest.last_crawled)"
+    " < (EXCLUDED.last_updated, EXCLUDED.last_crawled)"
+)
+
+
+def _upsert_latest_sql(source: str) -> str:
+    return f"""
+INSERT INTO option_snapshot_latest ({_COLUMNS})
+SELECT DISTINCT ON (ticker) {_COLUMNS}
+FROM {source}
+ORDER BY ticker, last_updated DESC, last_crawled DESC
+ON CONFLICT (ticker) DO UPDATE SET {_EXCLUDED_UPDATES}
+WHERE {LATEST_ROW_IS_OLDER}
+"""
+
+
+UPSERT_LATEST_SNAPSHOTS_SQL = _upsert_latest_sql(_RECORDSET)
+# Incoming rows, one per (ticker, last_updated) key, so no statement updates a row twice.
+_INCOMING_ROWS = f"""
+SELECT DISTINCT ON (ticker, last_updated) {_COLUMNS}
+FROM {_RECORDSET}
+ORDER BY ticker, last_updated, last_crawled DESC
+"""
+
+
+def _write_history_sql(source: str) -> str:
+    # Same write as the per-row upsert: a later crawl of a stored (ticker, last_updated) key
+    # refreshes the row in place, while re-drained or older crawls leave it alone.
+    # ``xmax = 0`` tells fresh inserts from refreshes.
+    return f"""
+INSERT INTO option_snapshots ({_COLUMNS})
+SELECT {_COLUMNS} FROM {source}
+ON CONFLICT (ticker, last_updated) DO UPDATE SET {_EXCLUDED_UPDATES}
+WHERE option_snapshots.last_crawled < EXCLUDED.last_crawled
+RETURNING xmax = 0 AS created
+"""
+
+
+# History upsert and latest upsert in one statement, so both tables commit together.
+WRITE_SNAPSHOT_ROWS_SQL = f"""
+WITH incoming AS ({_INCOMING_ROWS}),
+written AS ({_write_history_sql("incoming")}),
+latest AS ({_upsert_latest_sql("incoming")})
+SELECT (SELECT count(*) FROM written WHERE created) AS inserted,
+    (SELECT count(*) FROM written WHERE NOT created) AS refreshed,
+    0 AS unchanged
+"""
+# The change-only variant compares each row with its contract's latest row (null hashes
+# never match). Changed rows are written as above, including a new quote for a stored key
+# such as the overnight open interest update.
+_CHANGED_ROWS = """
+SELECT r.*
+FROM incoming AS r
+LEFT JOIN option_snapshot_latest AS l ON l.ticker = r.ticker
+WHERE l.content_hash IS DISTINCT FROM r.content_hash
+"""
+# Unchanged rows only move last_crawled forward, to the newest crawl of their contract. A
+# contract with a changed row in the batch is left to the latest upsert, so no statement
+# updates the same latest row twice.
+_UNCHANGED_CRAWLS = """
+SELECT r.ticker, max(r.last_crawled) AS last_crawled
+FROM incoming AS r
+JOIN option_snapshot_latest AS l ON l.ticker = r.ticker AND l.content_hash = r.content_hash
+WHERE NOT EXISTS (SELECT 1 FROM changed AS c WHERE c.ticker = r.ticker)
+GROUP BY r.ticker
+"""
+_TOUCH_LATEST_SQL = """
+UPDATE option_snapshot_latest AS l
+SET last_crawled = u.last_crawled
+FROM unchanged AS u
+WHERE l.ticker = u.ticker AND l.last_crawled < u.last_crawled
+"""
+WRITE_CHANGED_SNAPSHOT_ROWS_SQL = f"""
+WITH incoming AS ({_INCOMING_ROWS}),
+changed AS ({_CHANGED_ROWS}),
+unchanged AS ({_UNCHANGED_CRAWLS}),
+written AS ({_write_history_sql("changed")}),
+latest AS ({_upsert_latest_sql("changed")}),
+touched AS ({_TOUCH_LATEST_SQL})
+SELECT (SELECT count(*) FROM written WHERE created) AS inserted,
+    (SELECT count(*) FROM written WHERE NOT created) AS refreshed,
+    (SELECT count(*) FROM incoming) - (SELECT count(*) FROM changed) AS unchanged
+"""
+logger = logging.getLogger(__name__)
+
+
+def spool_enabled() -> bool:
+    return bool(SPOOL_DIR)
+
+
+def open_snapshot_spool() -> SpoolWriter:
+    return SpoolWriter(Path(SPOOL_DIR), SPOOL_PREFIX)
+
+
+def encode_snapshot_row(row: dict[str, Any]) -> dict[str, Any]:
+    """Make a snapshot ``create`` payload JSON-safe for the spool."""
+    encoded = dict(row)
+    for field in _DATETIME_FIELDS:
+        value = encoded.get(field)
+        if isinstance(value, datetime):
+            encoded[field] = value.isoformat()
+    return encoded
+
+
+def decode_snapshot_row(row: dict[str, Any]) -> dict[str, Any]:
+    decoded = dict(row)
+    for field in _DATETIME_FIELDS:
+        value = decoded.get(field)
+        if isinstance(value, str):
+            decoded[field] = datetime.fromisoformat(value)
+    # Segments spooled before the greek columns existed carry one ``greeks`` object.
+    legacy_greeks = decoded.pop("greeks", None) or {}
+    for field in GREEK_FIELDS:
+        decoded.setdefault(field, legacy_greeks.get(field))
+    # Older segments predate the contract-term columns; the backfill fills those rows.
+    for field in CONTRACT_TERM_FIELDS:
+        decoded.setdefault(field, None)
+    if "content_hash" not in decoded:
+        decoded["content_hash"] = content_hash(decoded)
+    return decoded
+
+
+async def write_snapshot_rows(
+    rows: list[dict[str, Any]],
+    max_attempts: int = SPOOL_DRAIN_MAX_ATTEMPTS,
+    base_delay_seconds: float = SPOOL_DRAIN_BASE_DELAY_SECONDS,
+    change_only: bool = CHANGE_ONLY_WRITES,
+) -> tuple[int, int]:
+    """Bulk-upsert decoded snapshot rows, retrying transient DB errors with backoff.
+
+    The same statement upserts ``option_snapshot_latest``. Like the per-row path, a later
+    crawl of a stored (ticker, last_updated) key refreshes that row; a row already stored
+    from the same or a later crawl is left alone, which makes re-draining a partially loaded
+    segment idempotent. With ``change_only``, rows whose content matches the contract's
+    latest row are skipped. Returns the number of history rows inserted or refreshed and
+    the number of rows skipped as unchanged.
+    """
+    sql = WRITE_CHANGED_SNAPSHOT_ROWS_SQL if change_only else WRITE_SNAPSHOT_ROWS_SQL
+    payload = json.dumps([encode_snapshot_row(row) for row in rows])
+
+    async def write() -> list[dict[str, Any]]:
+        with record_duration(DB_WRITE_LATENCY, {"table": "option_snapshots"}):
+            return await decorator._get_db().query_raw(sql, payload)
+
+    started = perf_counter()
+    result = await retry_db_call(
+        write,
+        what=f"spooled snapshot batch of {len(rows)} rows",
+        table="option_snapshots",
+        max_attempts=max_attempts,
+        base_delay_seconds=base_delay_seconds,
+    )
+    record_batch_rows(len(rows), perf_counter() - started)
+    written = int(result[0]["inserted"]) + int(result[0]["refreshed"])
+    unchanged = int(result[0]["unchanged"])
+    ROWS_WRITTEN.add(written, {"table": "option_snapshots"})
+    if unchanged:
+        SKIPS.add(unchanged, {"reason": "unchanged"})
+    return written, unchanged
+
+
+async def upsert_latest_snapshots(
+    rows: list[dict[str, Any]],
+    max_attempts: int = SPOOL_DRAIN_MAX_ATTEMPTS,
+    base_delay_seconds: float = SPOOL_DRAIN_BASE_DELAY_SECONDS,
+) -> None:
+    """Move each contract's ``option_snapshot_latest`` row to its newest row in ``rows``.
+
+    A re-crawl of the stored ``last_updated`` counts as newer when its ``last_crawled`` is.
+    For the per-row upsert path, which sends a page's stored rows in one statement; bulk
+    writes upsert the latest rows in ``write_snapshot_rows`` instead.
+    """
+    await retry_db_call(
+        decorator._get_db().execute_raw,
+        UPSERT_LATEST_SNAPSHOTS_SQL,
+        json.dumps([encode_snapshot_row(row) for row in rows]),
+        what=f"latest snapshots of {len(rows)} contracts",
+        table="option_snapshot_latest",
+        max_attempts=max_attempts,
+        base_delay_seconds=base_delay_seconds,
+    )
+
+
+async def drain_snapshot_spool(
+    directory: Path | None = None, batch_size: int = SPOOL_DRAIN_BATCH_SIZE
+) -> int:
+    """Load every sealed snapshot segment into the database, deleting each once stored.
+
+    A segment that cannot be loaded is left in place for the next drain and the error is
+    raised. Returns the number of spooled rows processed.
+    """
+    if directory is None and not SPOOL_DIR:
+        return 0
+    spool_dir = directory or Path(SPOOL_DIR)
+    drained = 0
+    for segment in sealed_segments(spool_dir, SPOOL_PREFIX):
+        batch: list[dict[str, Any]] = []
+        for row in read_segment(segment):
+            batch.append(decode_snapshot_row(row))
+            if len(batch) >= batch_size:
+                drained += await _drain_batch(batch)
+                batch = []
+        if batch:
+            drained += await _drain_batch(batch)
+        segment.unlink()
+        logger.info("Drained spool segment %s", segment.name)
+    return drained
+
+
+async def _drain_batch(batch: list[dict[str, Any]]) -> int:
+    BATCH_SIZE.record(len(batch), {"table": "option_snapshots"})
+    written, unchanged = await write_snapshot_rows(
+        batch, SPOOL_DRAIN_MAX_ATTEMPTS, SPOOL_DRAIN_BASE_DELAY_SECONDS
+    )
+    SPOOL_ROWS.add(len(batch), {"op": "drained"})
+    if written + unchanged < len(batch):
+        logger.debug("Skipped %s already stored spooled rows", len(batch) - written - unchanged)
+    return len(batch)
+
+
+__all__ = [
+    "CHANGE_ONLY_WRITES",
+    "LATEST_ROW_IS_OLDER",
+    "SPOOL_PREFIX",
+    "UPSERT_LATEST_SNAPSHOTS_SQL",
+    "WRITE_CHANGED_SNAPSHOT_ROWS_SQL",
+    "WRITE_SNAPSHOT_ROWS_SQL",
+    "decode_snapshot_row",
+    "drain_snapshot_spool",
+    "encode_snapshot_row",
+    "open_snapshot_spool",
+    "spool_enabled",
+    "upsert_latest_snapshots",
+    "write_snapshot_rows",
+]
@@ -0,0 +1,260 @@
+"""Snapshot row building, optionally run for whole chain pages in a process pool."""
+
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from microservices.shared.models import OptionContractSnapshot
+from microservices.shared.util import (
+    ns_to_datetime,
+    option_expiration_date_to_datetime,
+    parse_option_symbol,
+)
+
+TRANSFORM_WORKERS = max(0, int(os.getenv("INGEST_TRANSFORM_WORKERS", "0")))
+# fork is unsafe once the exporter and log listener threads are running.
+TRANSFORM_START_METHOD = os.getenv("INGEST_TRANSFORM_START_METHOD", "forkserver")
+# Column order of the row tuples returned by transform workers.
+SNAPSHOT_ROW_FIELDS = (
+    "ticker",
+    "open_interest",
+    "volume",
+    "implied_vol",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+    "last_price",
+    "underlying_price",
+    "last_updated",
+    "last_crawled",
+    "day_open",
+    "day_close",
+    "day_change",
+    "moneyness",
+    "log_moneyness",
+    "years_to_expiry",
+    "content_hash",
+)
+# The quote itself. Spot, the moneyness columns derived from it and the timestamps move on
+# every crawl and would make every row look changed.
+CONTENT_HASH_FIELDS = (
+    "open_interest",
+    "volume",
+    "implied_vol",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+    "last_price",
+    "day_open",
+    "day_close",
+    "day_change",
+)
+_CONTENT_HASH_STRUCT = struct.Struct(f"<{len(CONTENT_HASH_FIELDS)}dH")
+GREEK_FIELDS = ("delta", "gamma", "theta", "vega")
+CONTRACT_TERM_FIELDS = ("moneyness", "log_moneyness", "years_to_expiry")
+_NO_GREEKS = dict.fromkeys(GREEK_FIELDS)
+_NO_CONTRACT_TERMS = dict.fromkeys(CONTRACT_TERM_FIELDS)
+_SECONDS_PER_YEAR = 365.0 * 24 * 3600
+_TRANSFORM_POOL: ProcessPoolExecutor | None = None
+
+
+class TransformedChainPage(NamedTuple):
+    rows: list[tuple]
+    fetched: int
+    # Contracts on the page with no trade yet (no ``day.last_updated``).
+    never_active: list[str]
+
+
+def transform_chain_page(
+    body: bytes,
+    underlying_ticker: str,
+    underlying_price_override: float | None,
+    crawled_at: datetime,
+) -> TransformedChainPage:
+    """Decode one raw chain page and build a picklable row tuple per traded contract.
+
+    Runs in a transform worker, so it must stay free of DB, tracing and metric side effects.
+    """
+    results = json.loads(body).get("results") or []
+    rows: list[tuple] = []
+    never_active: list[str] = []
+    for result in results:
+        snapshot = OptionContractSnapshot.from_dict(result)
+        if snapshot.details is None or not snapshot.details.ticker:
+            continue
+        last_updated_raw = _snapshot_last_updated_raw(snapshot)
+        if not last_updated_raw:
+            never_active.append(snapshot.details.ticker)
+            continue
+        create = _build_snapshot_upsert_payload(
+            contract_ticker=snapshot.details.ticker,
+            snapshot=snapshot,
+            underlying_price_override=underlying_price_override,
+            last_updated_dt=ns_to_datetime(last_updated_raw),
+            curr_datetime=crawled_at,
+            greeks=_snapshot_greeks_dict(snapshot),
+            underlying_ticker=underlying_ticker,
+        )["create"]
+        rows.append(tuple(create[field] for field in SNAPSHOT_ROW_FIELDS))
+    return TransformedChainPage(rows, len(results), never_active)
+
+
+def snapshot_row_to_dict(row: tuple) -> dict[str, Any]:
+    """Row tuple to a ``create`` payload, which is also the spool and bulk-write format."""
+    return dict(zip(SNAPSHOT_ROW_FIELDS, row, strict=True))
+
+
+def transform_pool_enabled() -> bool:
+    return TRANSFORM_WORKERS > 0
+
+
+def get_transform_pool() -> ProcessPoolExecutor:
+    """Return the process pool, started on first use and kept warm across runs."""
+    global _TRANSFORM_POOL  # noqa: PLW0603
+    if _TRANSFORM_POOL is None:
+        _TRANSFORM_POOL = ProcessPoolExecutor(
+            max_workers=TRANSFORM_WORKERS,
+            mp_context=multiprocessing.get_context(TRANSFORM_START_METHOD),
+        )
+    return _TRANSFORM_POOL
+
+
+def shutdown_transform_pool() -> None:
+    global _TRANSFORM_POOL  # noqa: PLW0603
+    if _TRANSFORM_POOL is not None:
+        _TRANSFORM_POOL.shutdown(cancel_futures=True)
+        _TRANSFORM_POOL = None
+
+
+def _snapshot_last_updated_raw(snapshot: OptionContractSnapshot):
+    if snapshot.day is None:
+        return None
+    return snapshot.day.last_updated
+
+
+def _snapshot_greeks_dict(snapshot: OptionContractSnapshot) -> dict[str, float | None]:
+    """Return the greek columns of a snapshot row; all None when Polygon sent no greeks."""
+    return {field: getattr(snapshot.greeks, field, None) for field in GREEK_FIELDS}
+
+
+def content_hash(row: dict[str, Any]) -> int:
+    """Stable signed 64-bit hash of a row's ``CONTENT_HASH_FIELDS``, for change detection."""
+    values = [row.get(field) for field in CONTENT_HASH_FIELDS]
+    # Packed doubles plus a bitmask of the null fields; far cheaper than hashing a repr.
+    nulls = 0
+    for index, value in enumerate(values):
+        if value is None:
+            nulls |= 1 << index
+            values[index] = 0.0
+    digest = hashlib.blake2b(_CONTENT_HASH_STRUCT.pack(*values, nulls), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _contract_terms(
+    contract_ticker: str,
+    underlying_ticker: str | None,
+    underlying_price: float | None,
+    last_updated_dt: datetime,
+) -> dict[str, float | None]:
+    """Strike over spot, its log and years from ``last_updated`` to the expiry close.
+
+    The strike and expiry come from the OCC symbol. Columns that cannot be derived (an
+    adjusted symbol that does not start with the underlying, no spot) are None.
+    """
+    if not underlying_ticker:
+        return _NO_CONTRACT_TERMS
+    try:
+        symbol = parse_option_symbol(contract_ticker, underlying_ticker)
+    except (ValueError, IndexError):
+        return _NO_CONTRACT_TERMS
+    expires_at = _expiration_timestamp(symbol.expiration)
+    years_to_expiry = (expires_at - last_updated_dt.timestamp()) / _SECONDS_PER_YEAR
+    if not underlying_price or underlying_price <= 0 or symbol.strike <= 0:
+        return {"moneyness": None, "log_moneyness": None, "years_to_expiry": years_to_expiry}
+    moneyness = symbol.strike / underlying_price
+    return {
+        "moneyness": moneyness,
+        "log_moneyness": math.log(moneyness),
+        "years_to_expiry": years_to_expiry,
+    }
+
+
+@lru_cache(maxsize=4096)
+def _expiration_timestamp(expiration: datetime) -> float:
+    # Same 23:59 New York close that ``options.expiration_date`` stores. Localizing is slow
+    # and a chain only has a few dozen distinct expiries, so each is computed once.
+    return option_expiration_date_to_datetime(expiration.date().isoformat()).timestamp()
+
+
+def _build_snapshot_upsert_payload(
+    contract_ticker: str,
+    snapshot: OptionContractSnapshot,
+    underlying_price_override: float | None,
+    last_updated_dt,
+    curr_datetime,
+    greeks: dict[str, float | None] | None,
+    underlying_ticker: str | None = None,
+) -> dict:
+    open_interest = int(snapshot.open_interest) if snapshot.open_interest is not None else None
+    volume = (
+        int(snapshot.day.volume)
+        if snapshot.day is not None and snapshot.day.volume is not None
+        else None
+    )
+    last_price = snapshot.day.close if snapshot.day is not None else None
+    day_open = snapshot.day.open if snapshot.day is not None else None
+    day_close = snapshot.day.close if snapshot.day is not None else None
+    day_change = snapshot.day.change_percent if snapshot.day is not None else None
+    greeks = greeks or _NO_GREEKS
+    underlying_price = underlying_price_override
+    if underlying_price is None and snapshot.underlying_asset is not None:
+        underlying_price = snapshot.underlying_asset.price
+    base_payload = {
+        "open_interest": open_interest,
+        "volume": volume,
+        "implied_vol": snapshot.implied_volatility,
+        "delta": greeks["delta"],
+        "gamma": greeks["gamma"],
+        "theta": greeks["theta"],
+        "vega": greeks["vega"],
+        "last_price": last_price,
+        "underlying_price": underlying_price,
+        "last_updated": last_updated_dt,
+        "last_crawled": curr_datetime,
+        "day_open": day_open,
+        "day_close": day_close,
+        "day_change": day_change,
+        **_contract_terms(contract_ticker, underlying_ticker, underlying_price, last_updated_dt),
+    }
+    base_payload["content_hash"] = content_hash(base_payload)
+    return {
+        "create": {
+            "ticker": contract_ticker,
+            **base_payload,
+        },
+        "update": base_payload,
+    }
+
+
+__all__ = [
+    "CONTENT_HASH_FIELDS",
+    "CONTRACT_TERM_FIELDS",
+    "GREEK_FIELDS",
+    "SNAPSHOT_ROW_FIELDS",
+    "TransformedChainPage",
+    "content_hash",
+    "get_transform_pool",
+    "shutdown_transform_pool",
+    "snapshot_row_to_dict",
+    "transform_chain_page",
+    "transform_pool_enabled",
+]
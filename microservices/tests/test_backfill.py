@@ -0,0 +1,38 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from microservices.shared import decorator
+from microservices.snapshot_ingestor.backfill import BACKFILL_GREEKS_SQL, backfill_greek_columns
+from prisma.errors import ClientNotConnectedError
+
+EXPECTED_UPDATED_ROWS = 4
+
+
+@pytest.mark.asyncio
+async def test_backfill_walks_primary_key_chunks_until_exhausted(monkeypatch):
+    db = MagicMock()
+    db.query_raw = AsyncMock(
+        side_effect=[
+            [{"updated": 3, "ticker": "O:A", "last_updated": "2026-10-16T20:00:00+00:00"}],
+            ClientNotConnectedError("dropped"),
+            [{"updated": 1, "ticker": "O:B", "last_updated": "2026-10-17T20:00:00+00:00"}],
+            [],
+        ]
+    )
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.backfill.GREEKS_BACKFILL_BASE_DELAY_SECONDS", 0
+    )
+
+    updated = await backfill_greek_columns(batch_size=2, pause_seconds=0)
+
+    assert updated == EXPECTED_UPDATED_ROWS
+    keys = [call.args[1:] for call in db.query_raw.await_args_list]
+    assert keys == [
+        ("", "-infinity", 2),
+        ("O:A", "2026-10-16T20:00:00+00:00", 2),
+        ("O:A", "2026-10-16T20:00:00+00:00", 2),
+        ("O:B", "2026-10-17T20:00:00+00:00", 2),
+    ]
+    assert db.query_raw.await_args.args[0] == BACKFILL_GREEKS_SQL
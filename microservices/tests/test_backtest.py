@@ -0,0 +1,112 @@
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from microservices.analytics.backtest import (
+    DAILY_SNAPSHOTS_SQL,
+    Rules,
+    SnapshotCube,
+    covered_call,
+    iron_condor,
+    load_snapshot_cube,
+    run_backtest,
+    vertical,
+)
+from microservices.benchmarks.backtest import synthetic_cube
+from microservices.shared import decorator
+
+
+def _row(trade_date, strike, contract_type, close, spot=100.0, delta=None):
+    return {
+        "trade_date": trade_date,
+        "expiration_date": "2026-02-06",
+        "strike_price": strike,
+        "contract_type": contract_type,
+        "day_close": close,
+        "underlying_price": spot,
+        "delta": delta,
+    }
+
+
+@pytest.mark.asyncio
+async def test_load_snapshot_cube_indexes_daily_rows_by_date_and_contract(monkeypatch):
+    rows = [
+        _row("2026-01-06", 95.0, "call", 6.0, spot=101.0),
+        _row("2026-01-05", 95.0, "call", 5.5),
+        _row("2026-01-05", 95.0, "put", 0.5, spot=99.0),
+        _row("2026-01-05", 90.0, "put", 0.2),
+    ]
+    db = MagicMock()
+    db.query_raw = AsyncMock(return_value=rows)
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+
+    cube = await load_snapshot_cube("TST", date(2026, 1, 5), date(2026, 1, 6))
+
+    assert db.query_raw.await_args.args == (
+        DAILY_SNAPSHOTS_SQL,
+        "TST",
+        "2026-01-05T00:00:00-05:00",
+        "2026-01-07T00:00:00-05:00",
+    )
+    assert cube.shape == (2, 3)
+    assert cube.strike.tolist() == [90.0, 95.0, 95.0]
+    assert cube.is_call.tolist() == [False, False, True]
+    assert cube.spot.tolist() == [pytest.approx(299 / 3), 101.0]
+    call = cube.contract_index(date(2026, 2, 6), 95.0, True)
+    assert cube.close[:, call].tolist() == [5.5, 6.0]
+    assert np.isnan(cube.close[1, cube.contract_index(date(2026, 2, 6), 90.0, False)])
+    assert cube.contract_index(date(2026, 2, 6), 100.0, True) == -1
+
+
+def test_vertical_fills_with_slippage_and_takes_profit_at_target():
+    # Short the 95 put (delta -0.30), buy the 90 put (delta -0.15); Monday entries only.
+    closes = np.array([[1.00, 2.00], [0.80, 1.50], [0.50, 1.00], [0.40, 0.80]])
+    cube = SnapshotCube(
+        underlying="TST",
+        dates=np.arange("2026-01-05", "2026-01-09", dtype="datetime64[D]"),
+        spot=np.full(4, 100.0),
+        expiry=np.full(2, np.datetime64("2026-02-06")),
+        strike=np.array([90.0, 95.0]),
+        is_call=np.zeros(2, dtype=bool),
+        close=closes,
+        delta=np.tile([-0.15, -0.30], (4, 1)),
+        gamma=np.zeros((4, 2)),
+        theta=np.zeros((4, 2)),
+        vega=np.zeros((4, 2)),
+    )
+    strategy = vertical(rules=Rules(profit_target=0.5, entry_weekdays=(0,)))
+
+    result = run_backtest(cube, strategy, slippage_pct=0.0, min_slippage=0.05)
+
+    (trade,) = result.trades
+    assert trade.strikes == (95.0, 90.0)
+    assert trade.entry_value == pytest.approx(-90.0)  # sold at 1.95, bought at 1.05
+    assert (trade.exit_reason, trade.exit_date) == ("profit_target", date(2026, 1, 8))
+    assert trade.exit_value == pytest.approx(-50.0)  # bought back at 0.85, sold at 0.35
+    np.testing.assert_allclose(result.pnl, [-10.0, 20.0, 40.0, 40.0])
+    np.testing.assert_allclose(result.delta, [15.0, 15.0, 15.0, 0.0])
+    assert result.max_drawdown == pytest.approx(10.0)
+
+
+def test_strategies_trade_one_position_at_a_time_over_a_synthetic_chain():
+    cube = synthetic_cube(days=120, strikes=61, seed=4)
+
+    for strategy in (covered_call(), vertical(kind="call"), iron_condor()):
+        result = run_backtest(cube, strategy)
+
+        assert len(result.trades) > 1
+        assert np.isfinite(result.pnl).all()
+        for earlier, later in zip(result.trades, result.trades[1:], strict=False):
+            assert earlier.exit_date is not None and later.entry_date >= earlier.exit_date
+        closed = [trade for trade in result.trades if trade.exit_reason != "open"]
+        still_open = result.pnl[-1] - sum(trade.pnl for trade in closed)
+        assert still_open == pytest.approx(sum(t.pnl for t in result.trades if t not in closed))
+
+    condor = run_backtest(cube, iron_condor())
+    assert all(list(trade.strikes) == sorted(trade.strikes) for trade in condor.trades)
+    for trade in run_backtest(cube, covered_call()).trades:
+        if trade.exit_reason == "expiry":
+            spot = cube.spot[np.searchsorted(cube.dates, np.datetime64(trade.exit_date))]
+            assert trade.exit_value == pytest.approx(100 * min(spot, trade.strikes[0]))
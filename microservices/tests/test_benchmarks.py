@@ -0,0 +1,89 @@
+import logging
+import os
+from unittest.mock import patch
+
+import pytest
+
+from microservices.benchmarks import (
+    BenchmarkCase,
+    BenchmarkResult,
+    compare_to_baselines,
+    load_baselines,
+    measure,
+    run_cases,
+    write_baselines,
+)
+from microservices.benchmarks.harness import format_report
+
+EXPECTED_REGRESSIONS = 2
+FASTEST_NS_PER_CALL = 90.0
+
+logger = logging.getLogger(__name__)
+
+
+def test_compare_to_baselines_flags_time_and_allocation_regressions():
+    baselines = {
+        "fast": {"ns_per_call": 100.0, "blocks_per_call": 2.0, "peak_bytes_per_call": 64.0},
+        "slow": {"ns_per_call": 100.0, "blocks_per_call": 2.0, "peak_bytes_per_call": 64.0},
+    }
+    results = [
+        BenchmarkResult("fast", ns_per_call=110.0, blocks_per_call=2.0, peak_bytes_per_call=64.0),
+        BenchmarkResult("slow", ns_per_call=150.0, blocks_per_call=6.0, peak_bytes_per_call=64.0),
+        BenchmarkResult("new", ns_per_call=999.0, blocks_per_call=9.0, peak_bytes_per_call=64.0),
+    ]
+
+    regressions = compare_to_baselines(results, baselines, threshold=0.2)
+
+    assert len(regressions) == EXPECTED_REGRESSIONS
+    assert all(message.startswith("slow:") for message in regressions)
+
+
+def test_measure_counts_retained_allocations():
+    result = measure(BenchmarkCase("list_alloc", lambda: [object()], number=50), repeat=1)
+
+    assert result.ns_per_call > 0
+    assert result.blocks_per_call >= 1
+
+
+def test_run_cases_keeps_fastest_confirmation_round():
+    timings = iter([500.0, FASTEST_NS_PER_CALL])
+
+    def fake_measure(case):
+        return BenchmarkResult(case.name, next(timings), 1.0, 8.0)
+
+    baselines = {"case": {"ns_per_call": 100.0, "blocks_per_call": 1.0}}
+    case = BenchmarkCase("case", lambda: None)
+
+    with patch("microservices.benchmarks.harness.measure", side_effect=fake_measure):
+        results, regressions = run_cases([case], baselines, threshold=0.2, confirm_rounds=2)
+
+    assert regressions == []
+    assert results[0].ns_per_call == FASTEST_NS_PER_CALL
+
+
+def test_write_and_load_baselines_round_trip(tmp_path):
+    path = tmp_path / "baselines.json"
+    write_baselines([BenchmarkResult("case", 12.345, 1.0, 8.0)], path=path)
+
+    assert load_baselines(path) == {
+        "case": {"ns_per_call": 12.35, "blocks_per_call": 1.0, "peak_bytes_per_call": 8.0}
+    }
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="micro-benchmarks run only with RUN_BENCHMARKS=1 (make bench)",
+)
+def test_hot_transforms_within_baseline():
+    from microservices.benchmarks.transforms import build_cases
+
+    if os.getenv("BENCH_UPDATE_BASELINE"):
+        results = [measure(case) for case in build_cases()]
+        logger.info("Hot transform benchmarks:\n%s", format_report(results))
+        write_baselines(results)
+        return
+
+    results, regressions = run_cases(build_cases(), load_baselines())
+    report = format_report(results)
+    logger.info("Hot transform benchmarks:\n%s", report)
+    assert not regressions, "\n".join([*regressions, "", report])
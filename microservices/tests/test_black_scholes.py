@@ -0,0 +1,142 @@
+import json
+import math
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from microservices.analytics.black_scholes import bs_greeks, bs_price, implied_vol, norm_cdf
+from microservices.analytics.greek_fill import (
+    FILL_GREEKS_SQL,
+    fill_missing_greeks,
+    price_missing_greeks,
+)
+from microservices.benchmarks.pricing import synthetic_chain
+from microservices.shared import decorator
+
+LAST_UPDATED = datetime(2026, 10, 16, 20, 0, tzinfo=UTC)
+# A cent of price per vol point.
+MIN_WELL_CONDITIONED_VEGA = 1e-3
+EXPECTED_WELL_CONDITIONED_SHARE = 0.9
+QUOTED_IV = 0.35
+
+
+def test_norm_cdf_matches_erfc_to_double_precision():
+    x = np.linspace(-38.0, 38.0, 20001)
+    expected = np.array([0.5 * math.erfc(-value / math.sqrt(2)) for value in x])
+
+    np.testing.assert_allclose(norm_cdf(x), expected, rtol=1e-8, atol=1e-16)
+
+
+def test_implied_vol_round_trips_prices_across_a_chain():
+    chain = synthetic_chain(5000, seed=3)
+    vol = np.random.default_rng(3).uniform(0.08, 1.5, 5000)
+    price = bs_price(chain["spot"], chain["strike"], chain["years"], vol, chain["is_call"], 0.04)
+
+    solved = implied_vol(
+        price, chain["spot"], chain["strike"], chain["years"], chain["is_call"], 0.04
+    )
+
+    vega = bs_greeks(chain["spot"], chain["strike"], chain["years"], vol, chain["is_call"]).vega
+    well_conditioned = vega > MIN_WELL_CONDITIONED_VEGA
+    assert well_conditioned.mean() > EXPECTED_WELL_CONDITIONED_SHARE
+    np.testing.assert_allclose(solved[well_conditioned], vol[well_conditioned], atol=1e-5)
+
+
+def test_implied_vol_never_returns_an_unpinned_volatility_for_low_vega_contracts():
+    chain = synthetic_chain(20000, seed=5)
+    vol = np.random.default_rng(5).uniform(0.08, 1.5, 20000)
+    price = bs_price(chain["spot"], chain["strike"], chain["years"], vol, chain["is_call"], 0.04)
+
+    solved = implied_vol(
+        price, chain["spot"], chain["strike"], chain["years"], chain["is_call"], 0.04
+    )
+
+    finite = np.isfinite(solved)
+    np.testing.assert_allclose(solved[finite], vol[finite], atol=1e-6)
+    # A price of a few millionths of a cent still pins the vol; one of 1e-100 dollars does not.
+    spot, strike = np.full(2, 100.0), np.array([130.0, 160.0])
+    years, is_call = np.array([10 / 365, 2 / 365]), np.array([True, True])
+    price = bs_price(spot, strike, years, np.full(2, 0.3), is_call, 0.0)
+
+    solved = implied_vol(price, spot, strike, years, is_call, 0.0)
+
+    assert solved[0] == pytest.approx(0.3, abs=1e-6)
+    assert np.isnan(solved[1])
+
+
+def test_implied_vol_is_nan_for_prices_outside_no_arbitrage_bounds():
+    price = np.array([4.0, 0.5, 120.0, np.nan])
+    spot = np.full(4, 100.0)
+    strike = np.array([95.0, 100.0, 100.0, 100.0])
+
+    solved = implied_vol(price, spot, strike, np.full(4, 0.5), np.array([True] * 4), 0.0)
+
+    assert np.isnan(solved[0])  # below intrinsic
+    assert np.isfinite(solved[1])
+    assert np.isnan(solved[2:]).all()  # above the spot, missing
+
+
+def test_greeks_match_finite_differences_in_polygon_units():
+    spot, strike, years, vol = 100.0, 105.0, 0.25, 0.3
+    for is_call in (True, False):
+
+        def price(s=spot, t=years, v=vol, call=is_call):
+            return float(bs_price(s, strike, t, v, call, 0.04))
+
+        greeks = bs_greeks(spot, strike, years, vol, is_call, 0.04)
+
+        assert greeks.delta == pytest.approx((price(s=100.01) - price(s=99.99)) / 0.02, rel=1e-5)
+        gamma = (price(s=100.01) - 2 * price() + price(s=99.99)) / 0.01**2
+        assert greeks.gamma == pytest.approx(gamma, rel=1e-3)
+        assert greeks.theta == pytest.approx(price(t=years - 1 / 365) - price(), rel=1e-2)
+        assert greeks.vega == pytest.approx(price(v=vol + 0.01) - price(), rel=1e-2)
+
+
+def _missing_row(ticker, contract_type, close, implied_vol=None):
+    return {
+        "ticker": ticker,
+        "last_updated": LAST_UPDATED.isoformat(),
+        "day_close": close,
+        "underlying_price": 100.0,
+        "implied_vol": implied_vol,
+        "strike_price": 110.0,
+        "expiration_date": (LAST_UPDATED + timedelta(days=73)).isoformat(),
+        "contract_type": contract_type,
+    }
+
+
+def test_price_missing_greeks_solves_iv_only_where_absent():
+    years = 73 / 365
+    close = float(bs_price(100.0, 110.0, years, 0.4, True))
+    rows = [
+        _missing_row("O:A", "call", close),
+        _missing_row("O:B", "put", 20.0, implied_vol=QUOTED_IV),
+        _missing_row("O:C", "call", 500.0),  # above the spot: no IV exists
+    ]
+
+    priced = price_missing_greeks(rows)
+
+    assert [row["ticker"] for row in priced] == ["O:A", "O:B"]
+    assert priced[0]["implied_vol"] == pytest.approx(0.4, abs=1e-6)
+    assert priced[1]["implied_vol"] == QUOTED_IV
+    expected = bs_greeks(100.0, 110.0, years, QUOTED_IV, False)
+    assert priced[1]["delta"] == pytest.approx(float(expected.delta))
+
+
+@pytest.mark.asyncio
+async def test_fill_missing_greeks_walks_chunks_and_writes_only_priced_rows(monkeypatch):
+    close = float(bs_price(100.0, 110.0, 73 / 365, 0.4, True))
+    first = [_missing_row("O:A", "call", close), _missing_row("O:B", "call", 500.0)]
+    db = MagicMock()
+    db.query_raw = AsyncMock(side_effect=[first, [{"filled": 1}], []])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+
+    filled = await fill_missing_greeks(since=LAST_UPDATED - timedelta(hours=1), batch_size=2)
+
+    assert filled == 1
+    _, write, next_read = db.query_raw.await_args_list
+    assert write.args[0] == FILL_GREEKS_SQL
+    assert [row["ticker"] for row in json.loads(write.args[1])] == ["O:A"]
+    assert next_read.args[2:] == (LAST_UPDATED.isoformat(), "O:B", 2)
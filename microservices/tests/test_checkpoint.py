@@ -0,0 +1,138 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from microservices.option_ingestor import api as option_api
+from microservices.option_ingestor.ingestor import OptionIngestor
+from microservices.shared.checkpoint import RunCheckpoint, batch_key
+from microservices.shared.models import OptionIngestParams
+from microservices.snapshot_ingestor.ingestor import OptionSnapshotsIngestor
+
+
+def _retriever():
+    mock = MagicMock()
+    mock.with_ingest_time.return_value = mock
+    return mock
+
+
+def test_checkpoint_round_trip_and_clear(tmp_path):
+    checkpoint = RunCheckpoint.load("job", run_key="2026-10-19", directory=str(tmp_path))
+    checkpoint.mark_batch_done("AAPL", "abc")
+    checkpoint.set_chain_cursor("NVDA", "/v3/snapshot/options/NVDA?cursor=xyz")
+    checkpoint.mark_underlying_done("MSFT")
+
+    restored = RunCheckpoint.load("job", run_key="2026-10-19", directory=str(tmp_path))
+
+    assert restored.is_batch_done("AAPL", "abc")
+    assert restored.chain_cursor("NVDA") == "/v3/snapshot/options/NVDA?cursor=xyz"
+    assert restored.is_underlying_done("MSFT")
+
+    restored.clear()
+    assert not (tmp_path / "job.json").exists()
+
+
+def test_checkpoint_ignores_other_runs_and_is_inert_without_directory(tmp_path):
+    RunCheckpoint.load("job", run_key="2026-10-16", directory=str(tmp_path)).mark_underlying_done(
+        "AAPL"
+    )
+
+    assert not RunCheckpoint.load(
+        "job", run_key="2026-10-19", directory=str(tmp_path)
+    ).is_underlying_done("AAPL")
+
+    disabled = RunCheckpoint.load("job", run_key="2026-10-19", directory="")
+    disabled.mark_underlying_done("AAPL")
+    assert not disabled.enabled
+    assert not disabled.is_underlying_done("AAPL")
+
+
+def test_iter_chain_snapshot_pages_resumes_from_cursor():
+    fetcher = option_api.Fetcher("NBIS")
+    responses = iter(
+        [
+            {
+                "results": [{"details": {"ticker": "O:NBIS2"}}],
+                "next_url": "https://api.polygon.io/v3/snapshot/options/NBIS?cursor=p3",
+            },
+            {"results": [{"details": {"ticker": "O:NBIS3"}}]},
+        ]
+    )
+    client = MagicMock()
+    client._get.side_effect = lambda **kwargs: next(responses)
+    client._decode.side_effect = lambda response: response
+    fetcher.client = client
+
+    pages = list(fetcher.iter_chain_snapshot_pages("/v3/snapshot/options/NBIS?cursor=p2"))
+
+    assert [page.next_cursor for page in pages] == ["/v3/snapshot/options/NBIS?cursor=p3", None]
+    assert [page.snapshots[0].details.ticker for page in pages] == ["O:NBIS2", "O:NBIS3"]
+    assert client._get.call_args_list[0].kwargs["path"] == "/v3/snapshot/options/NBIS?cursor=p2"
+    assert client._get.call_args_list[0].kwargs["params"] == {}
+
+
+@pytest.mark.asyncio
+async def test_ingest_options_resumes_after_failed_batch(monkeypatch, tmp_path):
+    contracts = [MagicMock(ticker=f"O:TST{index}") for index in range(4)]
+    monkeypatch.setattr("microservices.option_ingestor.ingestor.DB_WRITE_BATCH_SIZE", 2)
+    monkeypatch.setattr("microservices.shared.checkpoint.CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        "microservices.option_ingestor.ingestor.Fetcher",
+        lambda asset: MagicMock(
+            get_call_contracts=lambda: contracts[:2], get_put_contracts=lambda: contracts[2:]
+        ),
+    )
+    ingestor = OptionIngestor(option_retriever=_retriever())
+    written: list[str] = []
+
+    async def flaky_upsert(contract):
+        if contract.ticker == "O:TST3" and "O:TST3" not in written:
+            written.append("O:TST3")
+            raise RuntimeError("db down")
+        written.append(contract.ticker)
+
+    ingestor._upsert_option_contract = flaky_upsert
+    target = OptionIngestParams("TST", None, (2026, 2026))
+
+    with pytest.raises(RuntimeError, match="db down"):
+        await ingestor.ingest_options([target])
+    checkpoint = RunCheckpoint.load("option_contracts", ingestor.ingest_time.date().isoformat())
+    assert checkpoint.is_batch_done("TST", batch_key(["O:TST0", "O:TST1"]))
+
+    written.clear()
+    written.append("O:TST3")
+    await ingestor.ingest_options([target])
+
+    assert written == ["O:TST3", "O:TST2", "O:TST3"]
+    assert not (tmp_path / "option_contracts.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_ingest_option_snapshots_resumes_chain_from_saved_cursor(monkeypatch, tmp_path):
+    monkeypatch.setattr("microservices.shared.checkpoint.CHECKPOINT_DIR", str(tmp_path))
+    retriever = _retriever()
+    retriever.retrieve_active = AsyncMock(
+        return_value=[MagicMock(ticker="O:TST1", underlying_ticker="TST")]
+    )
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.fetch_stock_spot_prices_for_underlyings",
+        AsyncMock(return_value={"TST": 10.0}),
+    )
+    cursors_requested: list[str | None] = []
+
+    async def pages(underlying_asset, cursor=None):
+        cursors_requested.append(cursor)
+        if cursor is None:
+            yield option_api.ChainSnapshotPage([], "/v3/snapshot/options/TST?cursor=p2")
+            raise RuntimeError("pagination died")
+        yield option_api.ChainSnapshotPage([], None)
+
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.iter_chain_snapshot_pages_for_underlying", pages
+    )
+    ingestor = OptionSnapshotsIngestor(option_retriever=retriever)
+
+    with pytest.raises(RuntimeError, match="pagination died"):
+        await ingestor.ingest_option_snapshots()
+    await ingestor.ingest_option_snapshots()
+
+    assert cursors_requested == [None, "/v3/snapshot/options/TST?cursor=p2"]
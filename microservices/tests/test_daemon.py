@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from microservices.shared.daemon import run_periodic
+
+EXPECTED_CYCLES = 4
+EXPECTED_STARTS = 2
+
+
+@pytest.mark.asyncio
+async def test_run_periodic_keeps_fixed_cadence_despite_job_runtime():
+    loop = asyncio.get_running_loop()
+    starts: list[float] = []
+
+    async def job():
+        starts.append(loop.time())
+        await asyncio.sleep(0.03)
+
+    cycles = await run_periodic(job, 0.05, asyncio.Event(), max_cycles=EXPECTED_CYCLES)
+
+    assert cycles == EXPECTED_CYCLES
+    offsets = [start - starts[0] for start in starts]
+    for index, offset in enumerate(offsets):
+        assert offset == pytest.approx(index * 0.05, abs=0.02)
+
+
+@pytest.mark.asyncio
+async def test_run_periodic_skips_missed_ticks_and_survives_failures():
+    loop = asyncio.get_running_loop()
+    starts: list[float] = []
+
+    async def job():
+        starts.append(loop.time())
+        if len(starts) == 1:
+            await asyncio.sleep(0.12)
+            raise RuntimeError("boom")
+
+    await run_periodic(job, 0.05, asyncio.Event(), max_cycles=EXPECTED_STARTS)
+
+    assert len(starts) == EXPECTED_STARTS
+    assert starts[1] - starts[0] == pytest.approx(0.15, abs=0.03)
+
+
+@pytest.mark.asyncio
+async def test_run_periodic_stops_promptly_when_stop_event_is_set():
+    stop_event = asyncio.Event()
+    calls = 0
+
+    async def job():
+        nonlocal calls
+        calls += 1
+        asyncio.get_running_loop().call_later(0.01, stop_event.set)
+
+    cycles = await asyncio.wait_for(run_periodic(job, 60, stop_event), timeout=1)
+
+    assert cycles == 1
+    assert calls == 1
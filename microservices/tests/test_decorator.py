@@ -1,5 +1,6 @@
 import asyncio
-from unittest.mock import AsyncMock, patch
+from contextlib import nullcontext
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -10,11 +11,20 @@ from microservices.shared.decorator import (
     bounded_db_connection_asyncgen,
     connect_db,
     disconnect_db,
+    traced_row_span_async,
     traced_span_asyncgen,
 )
+from microservices.shared.errors import DatabaseUnavailableError
+from microservices.shared.observability import BatchSpanStats, start_batch_span
+from prisma.errors import ClientNotConnectedError
 
 EXPECTED_MAX_CONCURRENCY = 2
 EXPECTED_RETRY_CONNECT_CALLS = 2
+EXPECTED_BULK_ROWS = 500
+EXPECTED_BATCH_ROWS = 3
+EXPECTED_PROBE_CALLS = 2
+EXPECTED_RETRY_ATTEMPTS = 3
+RETRIED_RESULT = 7
 
 
 class _MockPrisma:
@@ -128,3 +138,207 @@ async def test_asyncgen_decorators_allow_early_close_without_error():
 
     assert yielded == [1]
     assert closed is True
+
+
+@pytest.mark.asyncio
+async def test_traced_row_span_async_aggregates_into_batch_span(monkeypatch):
+    monkeypatch.setattr("microservices.shared.observability.TRACE_GRANULARITY", "batch")
+    row_span = MagicMock(return_value=nullcontext())
+    monkeypatch.setattr("microservices.shared.decorator.start_span_sync", row_span)
+
+    @traced_row_span_async(name="row", row_id=lambda ticker: ticker)
+    async def write_row(ticker):
+        await asyncio.sleep(0)
+        if ticker == "BAD":
+            raise RuntimeError("boom")
+        return ticker
+
+    with start_batch_span("batch") as stats:
+        results = await asyncio.gather(
+            *(asyncio.create_task(write_row(ticker)) for ticker in ["A", "B", "BAD"]),
+            return_exceptions=True,
+        )
+
+    assert results[:2] == ["A", "B"]
+    assert isinstance(results[2], RuntimeError)
+    assert stats.row_count == EXPECTED_BATCH_ROWS
+    assert stats.error_count == 1
+    assert stats.latency_min_ms is not None
+    assert stats.latency_max_ms >= stats.latency_min_ms
+    row_span.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_traced_row_span_async_keeps_per_row_spans_in_row_mode(monkeypatch):
+    monkeypatch.setattr("microservices.shared.observability.TRACE_GRANULARITY", "row")
+    row_span = MagicMock(return_value=nullcontext(MagicMock()))
+    monkeypatch.setattr("microservices.shared.decorator.start_span_sync", row_span)
+
+    @traced_row_span_async(name="row")
+    async def write_row():
+        return "ok"
+
+    assert await write_row() == "ok"
+    row_span.assert_called_once()
+
+
+def test_batch_span_stats_sets_aggregated_attributes():
+    span = MagicMock()
+    stats = BatchSpanStats(span)
+    stats.record(0.002)
+    stats.record(0.010)
+    stats.record_rows(EXPECTED_BULK_ROWS, 0.005)
+    stats.record_error(RuntimeError("boom"), row_id="O:TST1")
+
+    stats.finish()
+
+    span.set_attribute.assert_any_call("batch.row_count", 2 + EXPECTED_BULK_ROWS)
+    span.set_attribute.assert_any_call("batch.error_count", 1)
+    span.set_attribute.assert_any_call("batch.latency_min_ms", 2.0)
+    span.set_attribute.assert_any_call("batch.latency_max_ms", 10.0)
+    span.set_attribute.assert_any_call("error", True)
+    span.add_event.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_db_circuit_breaker_pauses_writers_until_probe_succeeds():
+    probe_calls = 0
+
+    async def probe():
+        nonlocal probe_calls
+        probe_calls += 1
+        if probe_calls < EXPECTED_PROBE_CALLS:
+            raise ClientNotConnectedError("still down")
+
+    breaker = decorator.DbCircuitBreaker(
+        probe=probe,
+        failure_threshold=3,
+        window_seconds=10,
+        cooldown_seconds=0.01,
+        release_interval_seconds=0.01,
+    )
+    for _ in range(3):
+        breaker.record_failure(ClientNotConnectedError("P1001"))
+    assert breaker.state == breaker.OPEN
+
+    released: list[int] = []
+
+    async def writer(index):
+        await breaker.acquire()
+        released.append(index)
+
+    writers = [asyncio.create_task(writer(index)) for index in range(5)]
+    await asyncio.sleep(0)
+    assert released == []
+
+    await asyncio.wait_for(asyncio.gather(*writers), timeout=1)
+
+    assert probe_calls == EXPECTED_PROBE_CALLS
+    assert sorted(released) == list(range(5))
+    await asyncio.sleep(0.05)
+    assert breaker.state == breaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_db_circuit_breaker_fails_paused_writers_after_max_open_duration():
+    probe = AsyncMock(side_effect=ClientNotConnectedError("still down"))
+    breaker = decorator.DbCircuitBreaker(
+        probe=probe, failure_threshold=1, cooldown_seconds=0.01, max_open_seconds=0.1
+    )
+    breaker.record_failure(ClientNotConnectedError("P1001"))
+
+    with pytest.raises(DatabaseUnavailableError):
+        await asyncio.wait_for(breaker.acquire(), timeout=1)
+
+    assert breaker.state == breaker.CLOSED
+    probes = probe.await_count
+    await asyncio.sleep(0.05)
+    assert probe.await_count == probes
+    await asyncio.wait_for(breaker.acquire(), timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_db_circuit_breaker_ignores_non_retryable_errors_and_isolated_failures():
+    breaker = decorator.DbCircuitBreaker(probe=AsyncMock(), failure_threshold=2, window_seconds=10)
+
+    breaker.record_failure(ValueError("bad payload"))
+    breaker.record_failure(ValueError("bad payload"))
+    breaker.record_failure(ClientNotConnectedError())
+    breaker.record_success()
+    breaker.record_failure(ClientNotConnectedError())
+
+    assert breaker.state == breaker.CLOSED
+    await asyncio.wait_for(breaker.acquire(), timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_bounded_async_sem_waits_on_open_breaker():
+    breaker = decorator.DbCircuitBreaker(probe=AsyncMock(), failure_threshold=1)
+    breaker.record_failure(ClientNotConnectedError())
+    calls = 0
+
+    @decorator.bounded_async_sem(limit=1, breaker=breaker)
+    async def write():
+        nonlocal calls
+        calls += 1
+
+    task = asyncio.create_task(write())
+    await asyncio.sleep(0.01)
+    assert calls == 0
+
+    breaker.reset()
+    await asyncio.wait_for(task, timeout=1)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_db_call_retries_transient_errors_and_reports_to_breaker():
+    breaker = decorator.DbCircuitBreaker(probe=AsyncMock(), failure_threshold=10)
+    call = AsyncMock(
+        side_effect=[ClientNotConnectedError(), ClientNotConnectedError(), RETRIED_RESULT]
+    )
+
+    result = await decorator.retry_db_call(
+        call,
+        "SELECT 1",
+        what="test write",
+        table="option_snapshots",
+        max_attempts=EXPECTED_RETRY_ATTEMPTS,
+        base_delay_seconds=0,
+        breaker=breaker,
+    )
+
+    assert result == RETRIED_RESULT
+    assert call.await_count == EXPECTED_RETRY_ATTEMPTS
+    call.assert_awaited_with("SELECT 1")
+    assert breaker.state == breaker.CLOSED
+    assert not breaker._failures
+
+    failing = AsyncMock(side_effect=ValueError("bad payload"))
+    with pytest.raises(ValueError):
+        await decorator.retry_db_call(
+            failing,
+            what="test write",
+            table="option_snapshots",
+            max_attempts=3,
+            base_delay_seconds=0,
+            breaker=breaker,
+        )
+    assert failing.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_bounded_async_sem_frees_its_permit_while_a_retry_backs_off():
+    breaker = decorator.DbCircuitBreaker(probe=AsyncMock(), failure_threshold=10)
+    events = []
+
+    @decorator.bounded_async_sem(limit=1, breaker=breaker)
+    async def write(name, retries):
+        for _ in range(retries):
+            events.append(f"{name} backs off")
+            await breaker.backoff(0.05)
+        events.append(f"{name} writes")
+
+    await asyncio.wait_for(asyncio.gather(write("first", 1), write("second", 0)), timeout=1)
+
+    assert events == ["first backs off", "second writes", "first writes"]
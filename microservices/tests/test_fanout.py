@@ -0,0 +1,141 @@
+import io
+import json
+from http import HTTPStatus
+from unittest.mock import MagicMock
+
+import pytest
+
+from cli import lambda_handler
+from microservices.shared import fanout
+from microservices.shared.fanout import (
+    FanoutError,
+    LambdaInvoker,
+    LocalProcessInvoker,
+    ShardTask,
+    fan_out,
+    plan_shards,
+)
+from microservices.shared.progress import RunTotals, collect_run_totals, track_progress
+from microservices.shared.sharding import Shard, shard_assignment
+
+WATCHLIST = [f"SYM{i}" for i in range(40)]
+FAILED_SHARD = 2
+FANOUT_SHARDS = 4
+HANDLER_SHARDS = 3
+WRITTEN_PER_SHARD = 10
+
+
+def fake_worker(event, context):
+    """Stands in for ``ingest_shard_handler``: one written row per owned underlying."""
+    task = ShardTask.from_payload(event)
+    if task.shard_index == FAILED_SHARD:
+        raise RuntimeError("worker crashed")
+    owned = Shard(task.shard_index, task.shard_count).select(WATCHLIST, key=str)
+    body = {
+        "job": task.job,
+        "shard_index": task.shard_index,
+        "shard_count": task.shard_count,
+        "ok": True,
+        "duration_seconds": 0.0,
+        "underlyings": len(owned),
+        "written": len(owned),
+    }
+    return {"statusCode": HTTPStatus.OK, "body": json.dumps(body)}
+
+
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded:DeprecationWarning")
+def test_fan_out_over_local_processes_aggregates_shards_and_reports_failures():
+    tasks = plan_shards("option_snapshots", FANOUT_SHARDS)
+    invoker = LocalProcessInvoker(fake_worker, max_workers=4, start_method="fork")
+    try:
+        report = fan_out(tasks, invoker, max_concurrency=4)
+    finally:
+        invoker.close()
+
+    assert not report.ok and report.failed_shards == [FAILED_SHARD]
+    assert "worker crashed" in report.shards[FAILED_SHARD].error
+    owned_by_healthy = sum(
+        len(Shard(i, FANOUT_SHARDS).select(WATCHLIST, key=str))
+        for i in range(FANOUT_SHARDS)
+        if i != FAILED_SHARD
+    )
+    assert report.totals().written == owned_by_healthy
+    body = report.to_dict()
+    assert body["shard_count"] == FANOUT_SHARDS and body["underlyings"] == owned_by_healthy
+
+
+def test_lambda_invoker_decodes_worker_response_and_raises_on_function_error():
+    client = MagicMock()
+    client.invoke.return_value = {
+        "Payload": io.BytesIO(json.dumps({"statusCode": HTTPStatus.OK, "body": "{}"}).encode())
+    }
+    invoker = LambdaInvoker("ingest-shard", max_concurrency=4, client=client)
+
+    assert invoker.invoke({"job": "option_contracts"})["statusCode"] == HTTPStatus.OK
+    assert json.loads(client.invoke.call_args.kwargs["Payload"]) == {"job": "option_contracts"}
+
+    client.invoke.return_value = {
+        "FunctionError": "Unhandled",
+        "Payload": io.BytesIO(b'{"errorMessage": "Task timed out after 900.00 seconds"}'),
+    }
+    with pytest.raises(FanoutError, match="timed out"):
+        invoker.invoke({"job": "option_contracts"})
+
+
+def test_shard_task_rejects_unknown_jobs_and_out_of_range_shards():
+    with pytest.raises(ValueError, match="unknown fan-out job"):
+        ShardTask("stocks", 0, 2)
+    with pytest.raises(ValueError, match="outside"):
+        ShardTask.from_payload({"job": "option_contracts", "shard_index": 3, "shard_count": 2})
+
+
+def test_collect_run_totals_sums_every_progress_block():
+    with collect_run_totals() as totals:
+        for underlying in ("AAPL", "NVDA"):
+            with track_progress(MagicMock(), underlying, "option_snapshots", 3) as progress:
+                progress.record("written", 2)
+                progress.record("failed")
+
+    assert totals == RunTotals(underlyings=2, written=4, skipped=0, failed=2)
+
+
+@pytest.mark.asyncio
+async def test_assigned_shard_bypasses_leasing():
+    table = MagicMock()
+
+    async with shard_assignment("option_snapshots", table=table, assigned=Shard(1, 3)) as shard:
+        assert shard == Shard(1, 3)
+
+    assert not table.method_calls
+
+
+def test_shard_handler_runs_the_assigned_shard_and_coordinator_aggregates(monkeypatch):
+    run_lambda = MagicMock(return_value=RunTotals(underlyings=2, written=WRITTEN_PER_SHARD))
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.run_lambda", run_lambda)
+
+    response = lambda_handler.ingest_shard_handler(
+        {"job": "option_snapshots", "shard_index": 1, "shard_count": HANDLER_SHARDS}, None
+    )
+
+    assert response["statusCode"] == HTTPStatus.OK
+    assert json.loads(response["body"])["written"] == WRITTEN_PER_SHARD
+    assert run_lambda.call_args.args[1] == Shard(1, HANDLER_SHARDS)
+
+    class InProcessInvoker:
+        def invoke(self, payload):
+            return lambda_handler.ingest_shard_handler(payload, None)
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(fanout, "build_invoker", lambda worker, max_concurrency: InProcessInvoker())
+    response = lambda_handler.fan_out_ingestion_handler(
+        {"job": "option_snapshots", "shard_count": HANDLER_SHARDS}, None
+    )
+
+    body = json.loads(response["body"])
+    assert response["statusCode"] == HTTPStatus.OK
+    assert body["written"] == HANDLER_SHARDS * WRITTEN_PER_SHARD and body["failed_shards"] == []
+    assert sorted(call.args[1].index for call in run_lambda.call_args_list[1:]) == list(
+        range(HANDLER_SHARDS)
+    )
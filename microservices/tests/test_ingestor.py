@@ -1,14 +1,17 @@
 import asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 
 from microservices.option_ingestor import api as option_api
 from microservices.option_ingestor.ingestor import OptionIngestor
+from microservices.shared import decorator
 from microservices.shared.errors import OptionTickerNeverActiveError
 from microservices.shared.models import OptionIngestParams, OptionsContract
+from microservices.shared.sharding import Shard, shard_of
 from microservices.snapshot_ingestor.ingestor import (
+    LATEST_CRAWL_BY_UNDERLYING_SQL,
     OptionSnapshotsIngestor,
     _build_snapshot_upsert_payload,
 )
@@ -73,25 +76,41 @@ async def test_ingest_option_snapshots_uses_paginated_chain_results(
     snapshot_extra = MagicMock()
     snapshot_extra.details = MagicMock(ticker="O:OTHER")
 
+    async def fake_pages(underlying_asset, cursor=None):
+        assert underlying_asset == "TST"
+        yield option_api.ChainSnapshotPage([snapshot_a, snapshot_extra], "/next?cursor=abc")
+        yield option_api.ChainSnapshotPage([snapshot_b], None)
+
     monkeypatch.setattr(
-        "microservices.snapshot_ingestor.ingestor.fetch_chain_snapshots_for_underlying",
-        AsyncMock(return_value=[snapshot_a, snapshot_b, snapshot_extra]),
+        "microservices.snapshot_ingestor.ingestor.iter_chain_snapshot_pages_for_underlying",
+        fake_pages,
     )
     monkeypatch.setattr(
         "microservices.snapshot_ingestor.ingestor.fetch_stock_spot_prices_for_underlyings",
         AsyncMock(return_value={"TST": 123.45}),
     )
-    snapshots_ingestor._upsert_option_snapshot = AsyncMock()
+
+    async def upsert(contract_ticker, snapshot, stored, **kwargs):
+        stored.append({"ticker": contract_ticker})
+
+    snapshots_ingestor._upsert_option_snapshot = AsyncMock(side_effect=upsert)
+    latest = AsyncMock()
+    monkeypatch.setattr("microservices.snapshot_ingestor.ingestor.upsert_latest_snapshots", latest)
 
     await snapshots_ingestor.ingest_option_snapshots()
 
     assert snapshots_ingestor._upsert_option_snapshot.await_count == 2
     snapshots_ingestor._upsert_option_snapshot.assert_any_await(
-        "O:TST1", snapshot_a, underlying_price_override=123.45
+        "O:TST1", snapshot_a, underlying_price_override=123.45, underlying_ticker="TST", stored=ANY
     )
     snapshots_ingestor._upsert_option_snapshot.assert_any_await(
-        "O:TST2", snapshot_b, underlying_price_override=123.45
+        "O:TST2", snapshot_b, underlying_price_override=123.45, underlying_ticker="TST", stored=ANY
     )
+    # One latest upsert per page, with the rows that page stored.
+    assert [call.args[0] for call in latest.await_args_list] == [
+        [{"ticker": "O:TST1"}],
+        [{"ticker": "O:TST2"}],
+    ]
 
 
 @pytest.mark.asyncio
@@ -606,10 +625,13 @@ async def test_upsert_option_snapshot_retries_client_not_connected(snapshots_ing
         mock_prisma.return_value.upsert = AsyncMock(
             side_effect=[ClientNotConnectedError("not connected"), "mocked"]
         )
-        result = await snapshots_ingestor._upsert_option_snapshot("TST", snapshot)
+        stored = []
+        result = await snapshots_ingestor._upsert_option_snapshot("TST", snapshot, stored=stored)
         assert result == "mocked"
         assert mock_prisma.return_value.upsert.await_count == EXPECTED_RETRY_UPSERT_CALLS
         mock_sleep.assert_awaited_once()
+        data = mock_prisma.return_value.upsert.await_args.kwargs["data"]
+        assert stored == [data["create"]]
 
 
 def test_build_snapshot_upsert_payload_includes_underlying_price():
@@ -663,3 +685,23 @@ def test_option_ingestor_requires_retriever():
 def test_option_snapshots_ingestor_requires_retriever():
     with pytest.raises(ValueError):
         OptionSnapshotsIngestor(option_retriever=None)
+
+
+@pytest.mark.asyncio
+async def test_latest_crawls_keeps_only_the_shards_underlyings(monkeypatch, snapshots_ingestor):
+    underlyings = ["AAA", "BBB", "CCC", "DDD"]
+    shard = Shard(shard_of("AAA", 2), 2)
+    db = MagicMock()
+    db.query_raw = AsyncMock(
+        return_value=[
+            {"underlying_ticker": underlying, "last_crawled": "2026-10-16T20:05:00Z"}
+            for underlying in underlyings
+        ]
+    )
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+
+    crawls = await snapshots_ingestor.latest_crawls(shard)
+
+    assert db.query_raw.await_args.args[0] == LATEST_CRAWL_BY_UNDERLYING_SQL
+    assert sorted(crawls) == [underlying for underlying in underlyings if shard.owns(underlying)]
+    assert crawls["AAA"].isoformat() == "2026-10-16T20:05:00+00:00"
@@ -0,0 +1,126 @@
+import asyncio
+import json
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from cli import lambda_handler
+from microservices.shared import decorator
+from microservices.shared.lambda_runtime import WarmRuntime
+from microservices.snapshot_ingestor import service as snapshot_service
+
+EXPECTED_INVOCATIONS = 2
+
+
+@pytest.fixture
+def db_calls(monkeypatch):
+    monkeypatch.setattr(decorator, "_db_connected", False)
+    calls = {"connect": 0, "probe": 0, "reconnect": 0}
+
+    async def connect():
+        calls["connect"] += 1
+        decorator._db_connected = True
+
+    async def probe():
+        calls["probe"] += 1
+
+    async def reconnect():
+        calls["reconnect"] += 1
+
+    monkeypatch.setattr("microservices.shared.lambda_runtime.connect_db", connect)
+    monkeypatch.setattr("microservices.shared.lambda_runtime.probe_database", probe)
+    monkeypatch.setattr(decorator, "_reconnect_db", reconnect)
+    return calls
+
+
+def test_warm_runtime_keeps_one_event_loop_across_invocations(monkeypatch):
+    flush = MagicMock()
+    monkeypatch.setattr("microservices.shared.lambda_runtime.flush_telemetry", flush)
+    runtime = WarmRuntime()
+    lock = asyncio.Lock()
+
+    async def invocation():
+        async with lock:
+            return asyncio.get_running_loop()
+
+    first = runtime.run(invocation())
+    second = runtime.run(invocation())
+
+    assert first is second and not first.is_closed()
+    assert runtime.warm and runtime.invocations == EXPECTED_INVOCATIONS
+    assert flush.call_count == EXPECTED_INVOCATIONS
+
+
+def test_ensure_database_health_checks_reused_connection(db_calls, monkeypatch):
+    monkeypatch.setattr("microservices.shared.lambda_runtime.flush_telemetry", MagicMock())
+    runtime = WarmRuntime()
+
+    runtime.run(runtime.ensure_database())
+    runtime.run(runtime.ensure_database())
+
+    assert db_calls == {"connect": 1, "probe": 1, "reconnect": 0}
+
+
+def test_ensure_database_reconnects_when_health_check_hangs(db_calls, monkeypatch):
+    monkeypatch.setattr("microservices.shared.lambda_runtime.flush_telemetry", MagicMock())
+    monkeypatch.setattr(
+        "microservices.shared.lambda_runtime.WARM_HEALTH_CHECK_TIMEOUT_SECONDS", 0.01
+    )
+    decorator._db_connected = True
+
+    async def hung_probe():
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr("microservices.shared.lambda_runtime.probe_database", hung_probe)
+    runtime = WarmRuntime()
+
+    runtime.run(runtime.ensure_database())
+
+    assert db_calls["reconnect"] == 1
+
+
+def test_snapshot_run_lambda_reuses_connections_on_warm_invocations(db_calls, monkeypatch):
+    for name in ("initialize_tracing", "initialize_metrics", "_configure_logging"):
+        monkeypatch.setattr(f"microservices.snapshot_ingestor.service.{name}", MagicMock())
+    monkeypatch.setattr("microservices.shared.lambda_runtime.flush_telemetry", MagicMock())
+    shutdown = MagicMock()
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.shutdown_tracing", shutdown)
+    disconnect = AsyncMock()
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.disconnect_db", disconnect)
+    open_http = MagicMock()
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.service.open_shared_http_client", open_http
+    )
+    ingest = AsyncMock()
+    monkeypatch.setattr("microservices.snapshot_ingestor.service._ingest_unless_fresh", ingest)
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.OptionRetriever", MagicMock())
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.service.OptionSnapshotsIngestor", MagicMock()
+    )
+    runtime = WarmRuntime()
+
+    snapshot_service.run_lambda(runtime)
+    snapshot_service.run_lambda(runtime)
+
+    assert db_calls == {"connect": 1, "probe": 1, "reconnect": 0}
+    assert ingest.await_count == EXPECTED_INVOCATIONS
+    assert open_http.call_count == EXPECTED_INVOCATIONS
+    snapshot_service.initialize_tracing.assert_called_once()
+    shutdown.assert_not_called()
+    disconnect.assert_not_awaited()
+
+
+def test_ping_prewarms_and_warmup_events_skip_ingestion(monkeypatch):
+    warm = MagicMock()
+    run = MagicMock()
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.warm_lambda", warm)
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.run_lambda", run)
+
+    ping = lambda_handler.ping({}, None)
+    warmup = lambda_handler.ingest_option_snapshots_handler({"warmup": True}, None)
+
+    assert ping["statusCode"] == warmup["statusCode"] == HTTPStatus.OK
+    assert json.loads(warmup["body"]) == {"message": "Lambda is warm!"}
+    assert warm.call_count == EXPECTED_INVOCATIONS
+    run.assert_not_called()
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+from microservices.shared.market_calendar import (
+    early_close_days,
+    is_market_open,
+    is_trading_day,
+    market_holidays,
+    next_session_open,
+    previous_session_close,
+    session_for,
+)
+
+EASTERN = pytz.timezone("America/New_York")
+
+
+def test_market_holidays_match_published_2025_schedule():
+    assert sorted(market_holidays(2025)) == [
+        date(2025, 1, 1),
+        date(2025, 1, 20),
+        date(2025, 2, 17),
+        date(2025, 4, 18),
+        date(2025, 5, 26),
+        date(2025, 6, 19),
+        date(2025, 7, 4),
+        date(2025, 9, 1),
+        date(2025, 11, 27),
+        date(2025, 12, 25),
+    ]
+
+
+def test_weekend_holidays_are_observed_on_adjacent_weekdays():
+    assert date(2026, 7, 3) in market_holidays(2026)
+    assert date(2022, 12, 26) in market_holidays(2022)
+    # New Year's Day on a Saturday is not observed on the preceding Friday.
+    assert date(2021, 12, 31) not in market_holidays(2021)
+    assert date(2022, 1, 1) not in market_holidays(2022)
+
+
+def test_early_close_sessions_end_at_one_pm():
+    assert early_close_days(2024) == {date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)}
+
+    session = session_for(date(2024, 11, 29))
+
+    assert session is not None
+    assert session.early_close
+    assert session.close == EASTERN.localize(datetime(2024, 11, 29, 13, 0))
+
+
+@pytest.mark.parametrize(
+    ("at", "expected"),
+    [
+        (datetime(2026, 10, 19, 9, 29), False),
+        (datetime(2026, 10, 19, 9, 30), True),
+        (datetime(2026, 10, 19, 15, 59), True),
+        (datetime(2026, 10, 19, 16, 0), False),
+        (datetime(2026, 10, 17, 12, 0), False),
+        (datetime(2026, 12, 24, 14, 0), False),
+    ],
+)
+def test_is_market_open(at, expected):
+    assert is_market_open(EASTERN.localize(at)) is expected
+
+
+def test_previous_close_and_next_open_span_holiday_weekend():
+    # Saturday after Thanksgiving week: Friday was a half day.
+    saturday = EASTERN.localize(datetime(2026, 11, 28, 10, 0))
+
+    assert previous_session_close(saturday) == EASTERN.localize(datetime(2026, 11, 27, 13, 0))
+    assert next_session_open(saturday) == EASTERN.localize(datetime(2026, 11, 30, 9, 30))
+    assert not is_trading_day(date(2026, 11, 26))
+
+
+def test_calendar_rejects_naive_datetimes():
+    with pytest.raises(ValueError, match="timezone-aware"):
+        is_market_open(datetime(2026, 10, 19, 10, 0))
@@ -1,12 +1,17 @@
 from opentelemetry import trace
 
 from microservices.shared.observability import (
+    _build_metric_reader,
     _build_otlp_exporter,
+    _build_otlp_metric_exporter,
     _build_span_processor,
     _parse_headers,
     initialize_tracing,
 )
 
+EXPECTED_METRIC_EXPORT_INTERVAL_MS = 15000
+EXPECTED_METRIC_EXPORT_TIMEOUT_MS = 5000
+
 
 def test_build_otlp_exporter_uses_trace_specific_endpoint(monkeypatch):
     monkeypatch.setenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf")
@@ -70,3 +75,42 @@ def test_build_span_processor_uses_repo_defaults(monkeypatch):
     assert batch_processor._max_export_batch_size == 128
     assert batch_processor._schedule_delay_millis == 2000
     assert batch_processor._export_timeout_millis == 5000
+
+
+def test_build_otlp_metric_exporter_derives_endpoint_from_trace_endpoint(monkeypatch):
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf")
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_METRICS_ENDPOINT", raising=False)
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", "https://example.com/otlp/v1/traces")
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_HEADERS", "Authorization=Basic abc123")
+
+    exporter = _build_otlp_metric_exporter()
+
+    assert exporter is not None
+    assert exporter._endpoint == "https://example.com/otlp/v1/metrics"
+    assert exporter._headers["Authorization"] == "Basic abc123"
+
+
+def test_build_otlp_metric_exporter_prefers_metrics_endpoint(monkeypatch):
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf")
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_METRICS_ENDPOINT", "https://metrics.example.com/push")
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", "https://example.com/otlp")
+
+    exporter = _build_otlp_metric_exporter()
+
+    assert exporter is not None
+    assert exporter._endpoint == "https://metrics.example.com/push"
+
+
+def test_build_metric_reader_uses_repo_defaults(monkeypatch):
+    monkeypatch.delenv("OTEL_METRIC_EXPORT_INTERVAL", raising=False)
+    monkeypatch.delenv("OTEL_METRIC_EXPORT_TIMEOUT", raising=False)
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_METRICS_ENDPOINT", raising=False)
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", "https://example.com")
+
+    reader = _build_metric_reader(_build_otlp_metric_exporter())
+
+    try:
+        assert reader._export_interval_millis == EXPECTED_METRIC_EXPORT_INTERVAL_MS
+        assert reader._export_timeout_millis == EXPECTED_METRIC_EXPORT_TIMEOUT_MS
+    finally:
+        reader.shutdown()
@@ -0,0 +1,71 @@
+import logging
+from logging.handlers import QueueHandler
+
+from microservices.shared import observability, progress
+from microservices.shared.progress import (
+    OUTCOME_FAILED,
+    OUTCOME_SKIPPED,
+    OUTCOME_WRITTEN,
+    record_row_outcome,
+    row_log_level,
+    track_progress,
+)
+
+SAMPLE_EVERY = 10
+EXPECTED_SUMMARIES = 2
+
+
+def test_row_log_level_is_info_in_full_mode(monkeypatch):
+    monkeypatch.setattr(observability, "INGEST_LOG_MODE", observability.LOG_MODE_FULL)
+
+    assert row_log_level(logging.getLogger("progress-test")) == logging.INFO
+
+
+def test_row_log_level_samples_debug_lines_in_sampled_mode(monkeypatch):
+    monkeypatch.setattr(observability, "INGEST_LOG_MODE", observability.LOG_MODE_SAMPLED)
+    monkeypatch.setattr(progress, "ROW_LOG_SAMPLE_EVERY", SAMPLE_EVERY)
+    test_logger = logging.getLogger("progress-test-sampled")
+    test_logger.setLevel(logging.DEBUG)
+
+    levels = [row_log_level(test_logger) for _ in range(100)]
+
+    assert levels.count(logging.DEBUG) == 100 // SAMPLE_EVERY
+    assert set(levels) == {logging.DEBUG, None}
+
+    test_logger.setLevel(logging.INFO)
+    assert row_log_level(test_logger) is None
+
+
+def test_track_progress_logs_periodic_and_final_summaries(monkeypatch, caplog):
+    monkeypatch.setattr(progress, "PROGRESS_LOG_EVERY_ROWS", 2)
+    monkeypatch.setattr(progress, "PROGRESS_LOG_INTERVAL_SECONDS", 3600.0)
+    test_logger = logging.getLogger("progress-test-summary")
+
+    with caplog.at_level(logging.INFO, logger="progress-test-summary"):
+        with track_progress(test_logger, "AAPL", "option_snapshots", 3) as tracked:
+            record_row_outcome(OUTCOME_WRITTEN)
+            record_row_outcome(OUTCOME_SKIPPED)
+            record_row_outcome(OUTCOME_FAILED)
+        record_row_outcome(OUTCOME_WRITTEN)
+
+    assert tracked.outcomes == {OUTCOME_WRITTEN: 1, OUTCOME_SKIPPED: 1, OUTCOME_FAILED: 1}
+    summaries = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Progress")]
+    assert len(summaries) == EXPECTED_SUMMARIES
+    assert "3/3 rows (written=1, skipped=1, failed=1)" in summaries[-1]
+
+
+def test_queue_handler_install_and_stop_restores_handlers():
+    root = logging.getLogger()
+    original_handlers = list(root.handlers)
+    stream_handler = logging.StreamHandler()
+    root.handlers = [stream_handler]
+    try:
+        observability._install_queue_handler()
+        assert len(root.handlers) == 1
+        assert isinstance(root.handlers[0], QueueHandler)
+
+        observability.stop_log_listener()
+        assert root.handlers == [stream_handler]
+    finally:
+        observability.stop_log_listener()
+        root.handlers = original_handlers
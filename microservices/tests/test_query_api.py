@@ -0,0 +1,170 @@
+import asyncio
+import gzip
+import json
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+
+from microservices.analytics.chains import LATEST_CHAIN_SQL, LATEST_SNAPSHOT_TIME_SQL
+from microservices.query_api import app as app_module
+from microservices.query_api.app import QueryApi
+from microservices.query_api.cache import ResponseCache
+from microservices.query_api.queries import DATA_VERSION_SQL, SNAPSHOT_HISTORY_SQL
+from microservices.shared import decorator
+
+AS_OF = datetime(2026, 10, 16, 20, 0, tzinfo=UTC)
+NO_IV_STRIKE = 100_000
+EXPECTED_CHAIN_ROWS = 82
+EXPECTED_ROWS_WITHOUT_IV = 2
+EXPECTED_CHAIN_LOADS = 2
+EXPECTED_HISTORY_LIMIT = 10
+
+
+def _chain_rows():
+    expiration = (AS_OF + timedelta(days=30)).isoformat()
+    return [
+        {
+            "ticker": f"O:TST261115{side}{strike:08d}",
+            "contract_type": "call" if side == "C" else "put",
+            "strike_price": strike / 1000,
+            "expiration_date": expiration,
+            "last_updated": AS_OF.isoformat(),
+            "underlying_price": 100.0,
+            "implied_vol": None if strike == NO_IV_STRIKE else 0.25,
+        }
+        for side in ("P", "C")
+        for strike in range(80_000, 121_000, 1_000)
+    ]
+
+
+def _db(versions, history=()):
+    versions = iter(versions)
+
+    async def query_raw(sql, *args):
+        if sql == DATA_VERSION_SQL:
+            return [{"as_of": next(versions).isoformat()}]
+        if sql == LATEST_SNAPSHOT_TIME_SQL:
+            return [{"as_of": AS_OF.isoformat()}]
+        if sql == LATEST_CHAIN_SQL:
+            return _chain_rows()
+        if sql == SNAPSHOT_HISTORY_SQL:
+            return [dict(row) for row in history]
+        raise AssertionError(sql)
+
+    db = MagicMock()
+    db.query_raw = AsyncMock(side_effect=query_raw)
+    return db
+
+
+def _get(app, path, query="", **headers):
+    environ = {"PATH_INFO": path, "QUERY_STRING": query}
+    environ.update({f"HTTP_{name.upper()}": value for name, value in headers.items()})
+    setup_testing_defaults(environ)
+    response = {}
+
+    def start_response(status, response_headers):
+        response["status"] = int(status.split()[0])
+        response["headers"] = dict(response_headers)
+
+    response["body"] = b"".join(app(environ, start_response))
+    return response
+
+
+def _sql_calls(db, sql):
+    return sum(1 for call in db.query_raw.await_args_list if call.args[0] == sql)
+
+
+def test_repeated_chain_loads_are_served_from_memory_with_etags(monkeypatch):
+    db = _db([AS_OF])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    app = QueryApi(asyncio.run, version_ttl_seconds=60)
+
+    first = _get(app, "/chains/tst")
+    queries = db.query_raw.await_count
+    again = _get(app, "/chains/TST", accept_encoding="gzip")
+    revalidated = _get(app, "/chains/TST", if_none_match=first["headers"]["ETag"])
+
+    assert first["status"] == HTTPStatus.OK and first["headers"]["X-Cache"] == "miss"
+    chain = json.loads(first["body"])
+    assert chain["rows"] == EXPECTED_CHAIN_ROWS
+    assert chain["columns"]["ticker"] == sorted(chain["columns"]["ticker"])
+    assert chain["columns"]["iv"].count(None) == EXPECTED_ROWS_WITHOUT_IV
+    assert again["headers"]["X-Cache"] == "hit"
+    assert again["headers"]["Content-Encoding"] == "gzip"
+    assert gzip.decompress(again["body"]) == first["body"]
+    assert revalidated["status"] == HTTPStatus.NOT_MODIFIED and revalidated["body"] == b""
+    assert db.query_raw.await_count == queries
+
+
+def test_data_version_moves_when_a_run_only_refreshes_a_quote():
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE option_snapshot_latest (ticker, last_updated, last_crawled)")
+    db.execute(
+        "INSERT INTO option_snapshot_latest VALUES ('O:A', '2026-10-16T19:00', '2026-10-16T19:01')"
+    )
+    before = db.execute(DATA_VERSION_SQL).fetchone()
+
+    db.execute("UPDATE option_snapshot_latest SET last_crawled = '2026-10-16T19:02'")
+
+    assert db.execute(DATA_VERSION_SQL).fetchone() != before
+
+
+def test_a_new_data_version_invalidates_cached_responses(monkeypatch):
+    db = _db([AS_OF, AS_OF, AS_OF + timedelta(minutes=1)])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    app = QueryApi(asyncio.run, cache=ResponseCache(ttl_seconds=60), version_ttl_seconds=0)
+
+    first = _get(app, "/chains/TST")
+    same_version = _get(app, "/chains/TST")
+    new_version = _get(app, "/chains/TST", if_none_match=first["headers"]["ETag"])
+
+    assert same_version["headers"]["X-Cache"] == "hit"
+    assert new_version["headers"]["X-Cache"] == "miss"
+    assert _sql_calls(db, LATEST_CHAIN_SQL) == EXPECTED_CHAIN_LOADS
+    # The reloaded chain is unchanged, so the client's copy is still valid.
+    assert new_version["status"] == HTTPStatus.NOT_MODIFIED
+
+
+def test_history_is_columnar_oldest_first_and_validates_parameters(monkeypatch):
+    newest_first = [
+        {"last_updated": (AS_OF - timedelta(minutes=minutes)).isoformat(), "implied_vol": iv}
+        for minutes, iv in ((0, 0.3), (15, None))
+    ]
+    db = _db([AS_OF], history=newest_first)
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    monkeypatch.setattr(app_module, "QUERY_API_GZIP_MIN_BYTES", 10**6)
+    app = QueryApi(asyncio.run)
+
+    response = _get(
+        app, "/snapshots/O:TST261115C00100000/history", "start=2026-10-16T00:00:00&limit=10"
+    )
+
+    assert "Content-Encoding" not in response["headers"]
+    history = json.loads(response["body"])
+    assert history["start"] == "2026-10-16T00:00:00+00:00"
+    assert history["columns"]["implied_vol"] == [None, 0.3]
+    assert history["columns"]["last_updated"] == [
+        (AS_OF - timedelta(minutes=15)).timestamp(),
+        AS_OF.timestamp(),
+    ]
+    (call,) = [c for c in db.query_raw.await_args_list if c.args[0] == SNAPSHOT_HISTORY_SQL]
+    assert call.args[1] == "O:TST261115C00100000" and call.args[4] == EXPECTED_HISTORY_LIMIT
+    assert _get(app, "/snapshots/O:TST/history", "limit=0")["status"] == HTTPStatus.BAD_REQUEST
+    assert _get(app, "/chains/TST", "as_of=yesterday")["status"] == HTTPStatus.BAD_REQUEST
+    assert _get(app, "/options")["status"] == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize("method", ["POST", "DELETE"])
+def test_only_reads_are_allowed(method):
+    app = QueryApi(asyncio.run)
+    environ = {"PATH_INFO": "/chains/TST", "REQUEST_METHOD": method}
+    setup_testing_defaults(environ)
+    statuses = []
+
+    app(environ, lambda status, headers: statuses.append(status))
+
+    assert statuses == ["405 Method Not Allowed"]
@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+
+from microservices.shared import decorator
+from microservices.snapshot_ingestor import rollup
+from microservices.snapshot_ingestor.rollup import (
+    ROLLUP_CONTRACTS_SQL,
+    ROLLUP_UNDERLYINGS_SQL,
+    rollup_snapshots,
+)
+
+NOW = pytz.timezone("America/New_York").localize(datetime(2026, 10, 19, 9, 0))
+ROWS_PER_STATEMENT = 3
+EXPECTED_REFRESH_ROWS = 9
+
+
+def _db(query_results):
+    db = MagicMock()
+    db.query_raw = AsyncMock(side_effect=query_results)
+    db.execute_raw = AsyncMock(return_value=ROWS_PER_STATEMENT)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_rollup_covers_days_after_watermark_plus_refresh_through_yesterday(monkeypatch):
+    db = _db([[{"trade_date": "2026-10-16"}]])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    monkeypatch.setattr(rollup, "get_current_datetime", lambda: NOW)
+
+    written = await rollup_snapshots(refresh_days=1)
+
+    contract_calls = [
+        call.args[1:]
+        for call in db.execute_raw.await_args_list
+        if call.args[0] == ROLLUP_CONTRACTS_SQL
+    ]
+    assert contract_calls == [
+        ("2026-10-16", "2026-10-16T00:00:00-04:00", "2026-10-17T00:00:00-04:00"),
+        ("2026-10-17", "2026-10-17T00:00:00-04:00", "2026-10-18T00:00:00-04:00"),
+        ("2026-10-18", "2026-10-18T00:00:00-04:00", "2026-10-19T00:00:00-04:00"),
+    ]
+    underlying_days = [
+        call.args[1]
+        for call in db.execute_raw.await_args_list
+        if call.args[0] == ROLLUP_UNDERLYINGS_SQL
+    ]
+    assert underlying_days == ["2026-10-16", "2026-10-17", "2026-10-18"]
+    assert written == EXPECTED_REFRESH_ROWS
+
+
+@pytest.mark.asyncio
+async def test_first_rollup_starts_at_the_oldest_snapshot_and_stops_when_caught_up(monkeypatch):
+    first_snapshot = datetime(2026, 10, 19, 2, 0, tzinfo=pytz.UTC)  # still 10-18 in New York
+    db = _db([[{"trade_date": None}], [{"last_updated": first_snapshot.isoformat()}]])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    monkeypatch.setattr(rollup, "get_current_datetime", lambda: NOW)
+
+    assert await rollup_snapshots() == ROWS_PER_STATEMENT
+    assert db.execute_raw.await_args_list[0].args[1] == date(2026, 10, 18).isoformat()
+
+    db = _db([[{"trade_date": "2026-10-18"}]])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    assert await rollup_snapshots(refresh_days=0) == 0
+    db.execute_raw.assert_not_awaited()
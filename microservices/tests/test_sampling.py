@@ -0,0 +1,78 @@
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from microservices.shared.sampling import TailSamplingSpanProcessor
+
+EXPECTED_DROPPED_SPANS = 2
+
+
+def _build_tracer(**kwargs):
+    exporter = InMemorySpanExporter()
+    processor = TailSamplingSpanProcessor(
+        SimpleSpanProcessor(exporter),
+        **{"latency_threshold_ms": 60_000, "baseline_rate": 0.0, **kwargs},
+    )
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test"), exporter, processor
+
+
+def test_fast_successful_trace_is_dropped_and_counted():
+    tracer, exporter, processor = _build_tracer()
+
+    with (
+        tracer.start_as_current_span("root"),
+        tracer.start_as_current_span("child"),
+    ):
+        pass
+
+    assert exporter.get_finished_spans() == ()
+    assert processor.dropped_span_count == EXPECTED_DROPPED_SPANS
+
+
+def test_trace_with_error_span_is_exported_in_full():
+    tracer, exporter, processor = _build_tracer()
+
+    with tracer.start_as_current_span("root"):
+        with tracer.start_as_current_span("ok-child"):
+            pass
+        with tracer.start_as_current_span("failed-child") as span:
+            span.set_attribute("error", True)
+        with tracer.start_as_current_span("late-child"):
+            pass
+
+    names = sorted(span.name for span in exporter.get_finished_spans())
+    assert names == ["failed-child", "late-child", "ok-child", "root"]
+    assert processor.dropped_span_count == 0
+
+
+def test_slow_trace_is_exported():
+    tracer, exporter, _ = _build_tracer(latency_threshold_ms=0)
+
+    with tracer.start_as_current_span("root"):
+        pass
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["root"]
+
+
+def test_baseline_rate_keeps_sampled_traces():
+    tracer, exporter, _ = _build_tracer(baseline_rate=1.0)
+
+    with tracer.start_as_current_span("root"):
+        pass
+
+    assert len(exporter.get_finished_spans()) == 1
+
+
+def test_spans_over_per_trace_cap_are_dropped():
+    tracer, exporter, processor = _build_tracer(baseline_rate=1.0, max_spans_per_trace=2)
+
+    with tracer.start_as_current_span("root"):
+        for index in range(3):
+            with tracer.start_as_current_span(f"child-{index}"):
+                pass
+
+    names = sorted(span.name for span in exporter.get_finished_spans())
+    assert names == ["child-0", "child-1", "root"]
+    assert processor.dropped_span_count == 1
@@ -1,12 +1,26 @@
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+import pytz
 
 from microservices.option_ingestor.service import _run_job as run_option_job
 from microservices.option_ingestor.service import run as run_option_service
+from microservices.shared.sharding import UNSHARDED, Shard
+from microservices.snapshot_ingestor.service import _closed_market_run_is_noop
+from microservices.snapshot_ingestor.service import _run_daemon as run_snapshot_daemon
 from microservices.snapshot_ingestor.service import _run_job as run_snapshot_job
 from microservices.snapshot_ingestor.service import run as run_snapshot_service
 
+EASTERN = pytz.timezone("America/New_York")
+EXPECTED_DAEMON_CYCLES = 3
+
+
+@pytest.fixture(autouse=True)
+def _market_open(monkeypatch):
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.is_market_open", lambda now: True)
+    monkeypatch.setattr("microservices.option_ingestor.service.is_trading_day", lambda day: True)
+
 
 @pytest.mark.asyncio
 async def test_option_run_job_uses_job_scoped_db_lifecycle(monkeypatch):
@@ -22,7 +36,7 @@ async def test_option_run_job_uses_job_scoped_db_lifecycle(monkeypatch):
     await run_option_job(ingestor=ingestor, targets=targets)
 
     connect.assert_awaited_once()
-    ingestor.ingest_options.assert_awaited_once_with(underlying_assets=targets)
+    ingestor.ingest_options.assert_awaited_once_with(underlying_assets=targets, shard=UNSHARDED)
     disconnect.assert_awaited_once()
 
 
@@ -56,7 +70,7 @@ async def test_snapshot_run_job_uses_job_scoped_db_lifecycle(monkeypatch):
     await run_snapshot_job(ingestor=ingestor)
 
     connect.assert_awaited_once()
-    ingestor.ingest_option_snapshots.assert_awaited_once_with()
+    ingestor.ingest_option_snapshots.assert_awaited_once_with(shard=UNSHARDED)
     disconnect.assert_awaited_once()
 
 
@@ -100,9 +114,14 @@ def test_option_service_flushes_tracing_on_exit(monkeypatch):
         lambda: [],
     )
     monkeypatch.setattr("microservices.option_ingestor.service.initialize_tracing", initialize)
+    monkeypatch.setattr("microservices.option_ingestor.service.initialize_metrics", MagicMock())
     monkeypatch.setattr("microservices.option_ingestor.service.shutdown_tracing", shutdown)
-    monkeypatch.setattr("microservices.option_ingestor.service._configure_logging", configure_logger)
-    monkeypatch.setattr("microservices.option_ingestor.service.OptionRetriever", lambda **kwargs: retriever)
+    monkeypatch.setattr(
+        "microservices.option_ingestor.service._configure_logging", configure_logger
+    )
+    monkeypatch.setattr(
+        "microservices.option_ingestor.service.OptionRetriever", lambda **kwargs: retriever
+    )
     monkeypatch.setattr(
         "microservices.option_ingestor.service.OptionIngestor",
         lambda option_retriever: ingestor,
@@ -139,6 +158,7 @@ def test_snapshot_service_flushes_tracing_on_exit(monkeypatch):
         "microservices.snapshot_ingestor.service.initialize_tracing",
         initialize,
     )
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.initialize_metrics", MagicMock())
     monkeypatch.setattr("microservices.snapshot_ingestor.service.shutdown_tracing", shutdown)
     monkeypatch.setattr(
         "microservices.snapshot_ingestor.service._configure_logging",
@@ -160,3 +180,115 @@ def test_snapshot_service_flushes_tracing_on_exit(monkeypatch):
     initialize.assert_called_once_with("snapshot-ingestor")
     async_run.assert_called_once()
     shutdown.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_daemon_reuses_connections_across_cycles(monkeypatch):
+    connect = AsyncMock()
+    disconnect = AsyncMock()
+    open_client = MagicMock()
+    close_client = AsyncMock()
+    ingest = AsyncMock()
+
+    async def fake_run_periodic(job, interval_seconds, stop_event):
+        for _ in range(EXPECTED_DAEMON_CYCLES):
+            await job()
+        return EXPECTED_DAEMON_CYCLES
+
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.connect_db", connect)
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.disconnect_db", disconnect)
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.service.open_shared_http_client", open_client
+    )
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.service.close_shared_http_client", close_client
+    )
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.run_periodic", fake_run_periodic)
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.service.OptionSnapshotsIngestor",
+        lambda option_retriever: MagicMock(ingest_option_snapshots=ingest),
+    )
+
+    await run_snapshot_daemon(retriever=MagicMock(), interval_seconds=60)
+
+    connect.assert_awaited_once()
+    open_client.assert_called_once()
+    assert ingest.await_count == EXPECTED_DAEMON_CYCLES
+    close_client.assert_awaited_once()
+    disconnect.assert_awaited_once()
+
+
+def _closed_market_ingestor(crawls, has_progress=False):
+    ingestor = MagicMock()
+    ingestor.load_checkpoint.return_value = MagicMock(has_progress=has_progress)
+    ingestor.latest_crawls = AsyncMock(
+        return_value={
+            underlying: EASTERN.localize(datetime(2026, 10, 16, *at))
+            for underlying, at in crawls.items()
+        }
+    )
+    return ingestor
+
+
+@pytest.mark.asyncio
+async def test_closed_market_run_skips_when_last_session_is_stored(monkeypatch):
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.is_market_open", lambda now: False)
+    saturday = EASTERN.localize(datetime(2026, 10, 17, 11, 0))
+    ingestor = _closed_market_ingestor({"AAA": (15, 59), "BBB": (16, 5)})
+
+    assert await _closed_market_run_is_noop(ingestor, saturday) is True
+
+
+@pytest.mark.asyncio
+async def test_closed_market_run_ingests_when_close_is_missing(monkeypatch):
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.is_market_open", lambda now: False)
+    saturday = EASTERN.localize(datetime(2026, 10, 17, 11, 0))
+    # BBB was never reached by a run that failed halfway.
+    ingestor = _closed_market_ingestor({"AAA": (16, 5), "BBB": (12, 0)})
+
+    assert await _closed_market_run_is_noop(ingestor, saturday) is False
+
+
+@pytest.mark.asyncio
+async def test_closed_market_run_probes_its_own_shard_and_resumes_checkpoints(monkeypatch):
+    monkeypatch.setattr("microservices.snapshot_ingestor.service.is_market_open", lambda now: False)
+    saturday = EASTERN.localize(datetime(2026, 10, 17, 11, 0))
+    shard = Shard(1, 2)
+    ingestor = _closed_market_ingestor({"AAA": (16, 5)})
+    pending = _closed_market_ingestor({"AAA": (16, 5)}, has_progress=True)
+
+    assert await _closed_market_run_is_noop(ingestor, saturday, shard) is True
+    ingestor.latest_crawls.assert_awaited_once_with(shard)
+    ingestor.load_checkpoint.assert_called_once_with(shard)
+    assert await _closed_market_run_is_noop(pending, saturday, shard) is False
+    pending.latest_crawls.assert_not_awaited()
+
+
+def test_option_service_skips_non_trading_days(monkeypatch):
+    async_run = MagicMock()
+    shutdown = MagicMock()
+    monkeypatch.setattr("microservices.option_ingestor.service.is_trading_day", lambda day: False)
+    monkeypatch.setattr("microservices.option_ingestor.service.load_env", MagicMock())
+    monkeypatch.setattr(
+        "microservices.option_ingestor.service.get_option_runtime_config",
+        lambda: MagicMock(service_name="option-ingestor"),
+    )
+    monkeypatch.setattr(
+        "microservices.option_ingestor.service.get_retriever_config",
+        lambda: MagicMock(concurrency_limit=1, batch_size=1),
+    )
+    monkeypatch.setattr(
+        "microservices.option_ingestor.service.get_option_targets_from_env", lambda: []
+    )
+    monkeypatch.setattr("microservices.option_ingestor.service.initialize_tracing", MagicMock())
+    monkeypatch.setattr("microservices.option_ingestor.service.initialize_metrics", MagicMock())
+    monkeypatch.setattr("microservices.option_ingestor.service.shutdown_tracing", shutdown)
+    monkeypatch.setattr("microservices.option_ingestor.service._configure_logging", MagicMock())
+    monkeypatch.setattr("microservices.option_ingestor.service.OptionRetriever", MagicMock())
+    monkeypatch.setattr("microservices.option_ingestor.service.OptionIngestor", MagicMock())
+    monkeypatch.setattr("microservices.option_ingestor.service.asyncio.run", async_run)
+
+    run_option_service()
+
+    async_run.assert_not_called()
+    shutdown.assert_called_once()
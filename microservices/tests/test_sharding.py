@@ -0,0 +1,220 @@
+import asyncio
+import multiprocessing
+import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+
+from microservices.option_ingestor import api as option_api
+from microservices.shared import sharding
+from microservices.shared.models import OptionIngestParams
+from microservices.shared.sharding import Shard, claim_shard_lease, shard_assignment, shard_of
+from microservices.snapshot_ingestor.ingestor import OptionSnapshotsIngestor
+
+NOW = pytz.timezone("America/New_York").localize(datetime(2026, 10, 19, 10, 0))
+SYMBOLS = [f"SYM{i}" for i in range(40)]
+LEASED_SHARDS = 4
+ASSIGNED_SHARDS = 2
+
+
+class SqliteLeaseTable:
+    """``ingest_leases`` stand-in with the same atomic insert/conditional-update semantics."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_leases ("
+            "job TEXT, shard INTEGER, owner TEXT, expires_at TEXT, PRIMARY KEY (job, shard))"
+        )
+
+    async def insert(self, job, shard, owner, expires_at):
+        try:
+            self._conn.execute(
+                "INSERT INTO ingest_leases VALUES (?, ?, ?, ?)",
+                (job, shard, owner, expires_at.isoformat()),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    async def take_over(self, job, shard, owner, now, expires_at):
+        cursor = self._conn.execute(
+            "UPDATE ingest_leases SET owner = ?, expires_at = ? "
+            "WHERE job = ? AND shard = ? AND (expires_at < ? OR owner = ?)",
+            (owner, expires_at.isoformat(), job, shard, now.isoformat(), owner),
+        )
+        return cursor.rowcount == 1
+
+    async def renew(self, job, shard, owner, expires_at):
+        cursor = self._conn.execute(
+            "UPDATE ingest_leases SET expires_at = ? WHERE job = ? AND shard = ? AND owner = ?",
+            (expires_at.isoformat(), job, shard, owner),
+        )
+        return cursor.rowcount == 1
+
+    async def release(self, job, shard, owner):
+        self._conn.execute(
+            "DELETE FROM ingest_leases WHERE job = ? AND shard = ? AND owner = ?",
+            (job, shard, owner),
+        )
+
+    def release_all(self, job):
+        self._conn.execute("DELETE FROM ingest_leases WHERE job = ?", (job,))
+
+
+def _claim_worker(path, owner, start, results):
+    start.wait()
+    shard = asyncio.run(
+        claim_shard_lease(SqliteLeaseTable(path), "option_snapshots", LEASED_SHARDS, owner, 60, NOW)
+    )
+    results.put((owner, None if shard is None else shard.select(SYMBOLS, key=str)))
+
+
+def test_shards_partition_targets_deterministically():
+    shards = [Shard(index, 3) for index in range(3)]
+    selected = [shard.select(SYMBOLS, key=str) for shard in shards]
+
+    assert sorted(sum(selected, [])) == sorted(SYMBOLS)
+    assert all(selected)
+    assert shard_of("NVDA", 3) == shard_of("NVDA", 3)
+    assert Shard(0, 1).select(SYMBOLS, key=str) == SYMBOLS
+    assert Shard(1, 3).checkpoint_job("option_contracts") == "option_contracts-shard1of3"
+    with pytest.raises(ValueError):
+        Shard(3, 3)
+
+
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded:DeprecationWarning")
+def test_concurrent_workers_lease_distinct_shards(tmp_path):
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        pytest.skip("fork start method is unavailable")
+    path = str(tmp_path / "leases.db")
+    SqliteLeaseTable(path)
+    start = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(target=_claim_worker, args=(path, f"worker-{i}", start, results))
+        for i in range(LEASED_SHARDS + 1)
+    ]
+    for worker in workers:
+        worker.start()
+    start.set()
+    claimed = dict(results.get(timeout=30) for _ in workers)
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assigned = [symbols for symbols in claimed.values() if symbols is not None]
+    assert len(assigned) == LEASED_SHARDS
+    assert sorted(sum(assigned, [])) == sorted(SYMBOLS)
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_taken_over_by_another_worker(tmp_path):
+    table = SqliteLeaseTable(str(tmp_path / "leases.db"))
+
+    crashed = await claim_shard_lease(table, "option_contracts", 1, "crashed", 60, NOW)
+    blocked = await claim_shard_lease(table, "option_contracts", 1, "standby", 60, NOW)
+    later = NOW + timedelta(seconds=61)
+    recovered = await claim_shard_lease(table, "option_contracts", 1, "standby", 60, later)
+
+    assert crashed == Shard(0, 1)
+    assert blocked is None
+    assert recovered == Shard(0, 1)
+    assert not await table.renew("option_contracts", 0, "crashed", later)
+
+
+@pytest.mark.asyncio
+async def test_shard_assignment_keeps_finished_slots_and_frees_failed_ones(tmp_path, monkeypatch):
+    table = SqliteLeaseTable(str(tmp_path / "leases.db"))
+    monkeypatch.setattr(sharding, "SHARD_COUNT", ASSIGNED_SHARDS)
+    monkeypatch.setattr(sharding, "SHARD_INDEX", "")
+    monkeypatch.setattr(sharding, "WORKER_ID", "pod-a")
+
+    async with shard_assignment("option_snapshots", table) as finished:
+        assert finished is not None and finished.count == ASSIGNED_SHARDS
+        assert not await table.insert("option_snapshots", finished.index, "pod-b", NOW)
+    # A replica starting later in the same run must not re-ingest the finished shard.
+    assert not await table.insert("option_snapshots", finished.index, "pod-b", NOW)
+
+    monkeypatch.setattr(sharding, "WORKER_ID", "pod-b")
+    with pytest.raises(RuntimeError):
+        async with shard_assignment("option_snapshots", table) as failed:
+            raise RuntimeError("ingest failed")
+    assert failed.index != finished.index
+    assert await table.insert("option_snapshots", failed.index, "pod-c", NOW)
+
+    table.release_all("option_snapshots")
+    async with shard_assignment("option_snapshots", table, release=True) as daemon:
+        pass
+    assert await table.insert("option_snapshots", daemon.index, "pod-c", NOW)
+
+
+@pytest.mark.asyncio
+async def test_losing_the_lease_cancels_the_shards_work(tmp_path, monkeypatch):
+    table = SqliteLeaseTable(str(tmp_path / "leases.db"))
+    monkeypatch.setattr(sharding, "SHARD_COUNT", ASSIGNED_SHARDS)
+    monkeypatch.setattr(sharding, "SHARD_INDEX", "")
+    monkeypatch.setattr(sharding, "WORKER_ID", "pod-a")
+    monkeypatch.setattr(sharding, "SHARD_LEASE_TTL_SECONDS", 0.03)
+    reached_end = False
+
+    with pytest.raises(sharding.ShardLeaseLostError):
+        async with shard_assignment("option_snapshots", table) as shard:
+            # Another worker takes the slot over, e.g. after this one stalled past the TTL.
+            table.release_all("option_snapshots")
+            await table.insert("option_snapshots", shard.index, "pod-b", NOW)
+            await asyncio.sleep(1)
+            reached_end = True
+
+    assert not reached_end
+    assert not await table.renew("option_snapshots", shard.index, "pod-a", NOW)
+    assert await table.renew("option_snapshots", shard.index, "pod-b", NOW)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_ingestor_only_processes_owned_underlyings(monkeypatch):
+    owned, foreign = _split_by_shard(["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "META"])
+    contracts = [
+        MagicMock(underlying_ticker=underlying, ticker=f"O:{underlying}")
+        for underlying in [owned, foreign]
+    ]
+    retriever = MagicMock()
+    retriever.with_ingest_time.return_value = retriever
+    retriever.retrieve_active = AsyncMock(return_value=contracts)
+    spot_prices = AsyncMock(return_value={})
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.fetch_stock_spot_prices_for_underlyings",
+        spot_prices,
+    )
+
+    async def no_pages(underlying, cursor=None):
+        yield option_api.ChainSnapshotPage([], None)
+
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.iter_chain_snapshot_pages_for_underlying",
+        no_pages,
+    )
+
+    ingestor = OptionSnapshotsIngestor(option_retriever=retriever)
+    await ingestor.ingest_option_snapshots(shard=Shard(shard_of(owned, 2), 2))
+
+    spot_prices.assert_awaited_once_with([owned])
+
+
+def _split_by_shard(symbols):
+    by_shard = {}
+    for symbol in symbols:
+        by_shard.setdefault(shard_of(symbol, 2), symbol)
+    return by_shard[0], by_shard[1]
+
+
+def test_option_targets_split_across_shards():
+    targets = [OptionIngestParams(symbol, None, (2026, 2026)) for symbol in SYMBOLS]
+    first = Shard(0, 2).select(targets, key=lambda t: t.underlying_asset)
+    second = Shard(1, 2).select(targets, key=lambda t: t.underlying_asset)
+
+    assert {t.underlying_asset for t in first}.isdisjoint(t.underlying_asset for t in second)
+    assert len(first) + len(second) == len(targets)
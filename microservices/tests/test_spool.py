@@ -0,0 +1,267 @@
+import json
+import sqlite3
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytz
+
+from microservices.option_ingestor import api as option_api
+from microservices.shared import decorator
+from microservices.shared.observability import start_batch_span
+from microservices.shared.progress import collect_run_totals
+from microservices.shared.spool import SpoolWriter, read_segment, sealed_segments
+from microservices.snapshot_ingestor import spool as snapshot_spool
+from microservices.snapshot_ingestor.ingestor import OptionSnapshotsIngestor
+from microservices.snapshot_ingestor.transform import content_hash
+from prisma.errors import ClientNotConnectedError
+
+EXPECTED_CHANGED_ROWS = 1
+EXPECTED_UNCHANGED_ROWS = 2
+FIRST_SPOT = 100.0
+RECRAWL_SPOT = 101.0
+OPEN_INTEREST = 7
+DELTA = 0.5
+
+
+def test_spool_writer_seals_segment_and_reader_skips_torn_lines(tmp_path):
+    writer = SpoolWriter(tmp_path, "rows", fsync_every_rows=2)
+    writer.append_rows([{"id": 1}, {"id": 2}, {"id": 3}])
+    sealed = writer.seal()
+
+    assert sealed is not None
+    assert sealed_segments(tmp_path, "rows") == [sealed]
+    with sealed.open("a") as handle:
+        handle.write('{"id": 4')
+    assert [row["id"] for row in read_segment(sealed)] == [1, 2, 3]
+
+
+def test_spool_writer_seals_segments_orphaned_by_dead_writers(tmp_path):
+    orphan = tmp_path / f"rows-1-{2**22 + 7}.open"
+    orphan.write_text('{"id": 1}\n')
+    empty = SpoolWriter(tmp_path, "rows")
+
+    assert empty.seal() is None
+    assert [path.name for path in sealed_segments(tmp_path, "rows")] == [
+        orphan.with_suffix(".jsonl").name
+    ]
+
+
+def test_decode_spreads_legacy_greeks_object_into_columns():
+    row = snapshot_spool.decode_snapshot_row(
+        {"ticker": "O:TST1", "greeks": {"delta": 0.4, "vega": 0.2}, "last_updated": None}
+    )
+
+    assert "greeks" not in row
+    assert (row["delta"], row["gamma"], row["theta"], row["vega"]) == (0.4, None, None, 0.2)
+    assert (row["moneyness"], row["log_moneyness"], row["years_to_expiry"]) == (None,) * 3
+    assert row["content_hash"] == content_hash(row)
+
+
+def test_same_key_recrawl_refreshes_latest_row_but_never_moves_it_back():
+    # SQLite evaluates the same row-value comparison as Postgres.
+    db = sqlite3.connect(":memory:")
+    db.execute(
+        "CREATE TABLE option_snapshot_latest "
+        "(ticker TEXT PRIMARY KEY, last_updated TEXT, last_crawled TEXT, underlying_price REAL)"
+    )
+    upsert = (
+        "INSERT INTO option_snapshot_latest VALUES (?, ?, ?, ?) ON CONFLICT (ticker) DO UPDATE "
+        "SET last_updated = EXCLUDED.last_updated, last_crawled = EXCLUDED.last_crawled, "
+        f"underlying_price = EXCLUDED.underlying_price WHERE {snapshot_spool.LATEST_ROW_IS_OLDER}"
+    )
+
+    def write(last_updated, last_crawled, spot):
+        db.execute(upsert, ("O:TST1", last_updated, last_crawled, spot))
+        return db.execute("SELECT underlying_price FROM option_snapshot_latest").fetchone()[0]
+
+    assert write("2026-10-16T15:00", "2026-10-16T15:01", FIRST_SPOT) == FIRST_SPOT
+    # No new trade, but the re-crawl carries a new spot.
+    assert write("2026-10-16T15:00", "2026-10-16T15:16", RECRAWL_SPOT) == RECRAWL_SPOT
+    # A re-drained copy of the first crawl and a late page for an older trade lose.
+    assert write("2026-10-16T15:00", "2026-10-16T15:01", FIRST_SPOT) == RECRAWL_SPOT
+    assert write("2026-10-16T14:00", "2026-10-16T15:31", 99.0) == RECRAWL_SPOT
+
+
+def test_change_only_touch_never_updates_a_latest_row_the_upsert_moves():
+    # SQLite runs the CTE-prefixed UPDATE ... FROM the change-only statement is built from.
+    db = sqlite3.connect(":memory:")
+    db.execute(
+        "CREATE TABLE option_snapshot_latest "
+        "(ticker TEXT PRIMARY KEY, last_updated TEXT, last_crawled TEXT, content_hash INTEGER)"
+    )
+    db.execute("CREATE TABLE staged AS SELECT * FROM option_snapshot_latest WHERE 0")
+    db.executemany(
+        "INSERT INTO option_snapshot_latest VALUES (?, ?, ?, 1)",
+        [
+            ("O:A", "2026-10-16T14:00", "2026-10-16T14:01"),
+            ("O:B", "2026-10-16T14:00", "2026-10-16T14:01"),
+        ],
+    )
+    # A drain covering two daemon cycles: O:A changed in one and not in the other, while O:B
+    # is unchanged in both.
+    db.executemany(
+        "INSERT INTO staged VALUES (?, ?, ?, ?)",
+        [
+            ("O:A", "2026-10-16T14:00", "2026-10-16T15:01", 1),
+            ("O:A", "2026-10-16T15:00", "2026-10-16T15:16", 2),
+            ("O:B", "2026-10-16T14:00", "2026-10-16T15:16", 1),
+            ("O:B", "2026-10-16T14:00", "2026-10-16T15:01", 1),
+        ],
+    )
+    ctes = (
+        "WITH incoming AS (SELECT * FROM staged), "
+        f"changed AS ({snapshot_spool._CHANGED_ROWS}), "
+        f"unchanged AS ({snapshot_spool._UNCHANGED_CRAWLS}) "
+    )
+
+    changed = db.execute(ctes + "SELECT ticker, last_updated FROM changed").fetchall()
+    db.execute(ctes + snapshot_spool._TOUCH_LATEST_SQL)
+
+    assert changed == [("O:A", "2026-10-16T15:00")]
+    # O:A is left to the latest upsert; O:B moves to its newest crawl.
+    assert db.execute(
+        "SELECT ticker, last_crawled FROM option_snapshot_latest ORDER BY ticker"
+    ).fetchall() == [("O:A", "2026-10-16T14:01"), ("O:B", "2026-10-16T15:16")]
+
+
+@pytest.mark.asyncio
+async def test_change_only_writes_count_refreshed_and_unchanged_rows(monkeypatch):
+    db = MagicMock()
+    db.query_raw = AsyncMock(return_value=[{"inserted": 1, "refreshed": 1, "unchanged": 2}])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    skips = MagicMock()
+    written = MagicMock()
+    monkeypatch.setattr(snapshot_spool, "SKIPS", skips)
+    monkeypatch.setattr(snapshot_spool, "ROWS_WRITTEN", written)
+    rows = [{"ticker": f"O:TST{index}", "content_hash": index} for index in range(4)]
+
+    # A new quote under a stored (ticker, last_updated) key counts as written.
+    with start_batch_span("upsert_option_snapshot_batch") as stats:
+        assert await snapshot_spool.write_snapshot_rows(rows, change_only=True) == (2, 2)
+
+    assert stats.row_count == len(rows)
+    assert stats.latency_max_ms is not None
+
+    assert db.query_raw.await_args.args[0] == snapshot_spool.WRITE_CHANGED_SNAPSHOT_ROWS_SQL
+    skips.add.assert_called_once_with(2, {"reason": "unchanged"})
+    written.add.assert_called_once_with(2, {"table": "option_snapshots"})
+
+
+@pytest.mark.asyncio
+async def test_spool_mode_defers_writes_to_drainer(monkeypatch, tmp_path):
+    monkeypatch.setattr("microservices.snapshot_ingestor.spool.SPOOL_DIR", str(tmp_path))
+    retriever = MagicMock()
+    retriever.with_ingest_time.return_value = retriever
+    retriever.retrieve_active = AsyncMock(
+        return_value=[MagicMock(ticker="O:TST1", underlying_ticker="TST")]
+    )
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.fetch_stock_spot_prices_for_underlyings",
+        AsyncMock(return_value={"TST": 10.0}),
+    )
+    last_updated_ns = 1_760_000_000_000_000_000
+    snapshot = option_api.OptionContractSnapshot.from_dict(
+        {
+            "details": {"ticker": "O:TST1"},
+            "day": {"last_updated": last_updated_ns, "close": 1.5, "volume": 3},
+            "greeks": {"delta": DELTA},
+            "open_interest": OPEN_INTEREST,
+        }
+    )
+
+    async def pages(underlying_asset, cursor=None):
+        yield option_api.ChainSnapshotPage([snapshot], None)
+
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.iter_chain_snapshot_pages_for_underlying", pages
+    )
+    ingestor = OptionSnapshotsIngestor(option_retriever=retriever)
+
+    db = MagicMock()
+    db.query_raw = AsyncMock(
+        side_effect=[
+            ClientNotConnectedError("down"),
+            [{"inserted": 1, "refreshed": 0, "unchanged": 0}],
+        ]
+    )
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+
+    with patch("prisma.models.OptionSnapshot.prisma") as mock_prisma:
+        await ingestor.ingest_option_snapshots()
+        mock_prisma.return_value.upsert.assert_not_called()
+        assert len(sealed_segments(tmp_path, snapshot_spool.SPOOL_PREFIX)) == 1
+
+        monkeypatch.setattr(
+            "microservices.snapshot_ingestor.spool.SPOOL_DRAIN_BASE_DELAY_SECONDS", 0
+        )
+        drained = await snapshot_spool.drain_snapshot_spool()
+
+    assert drained == 1
+    assert sealed_segments(tmp_path, snapshot_spool.SPOOL_PREFIX) == []
+    sql, payload = db.query_raw.await_args.args
+    assert sql == snapshot_spool.WRITE_SNAPSHOT_ROWS_SQL
+    rows = json.loads(payload)
+    assert rows[0]["ticker"] == "O:TST1"
+    assert rows[0]["open_interest"] == OPEN_INTEREST
+    assert rows[0]["delta"] == DELTA and rows[0]["gamma"] is None
+    assert "greeks" not in rows[0]
+    last_updated = datetime.fromisoformat(rows[0]["last_updated"])
+    assert last_updated == datetime.fromtimestamp(last_updated_ns / 1e9, tz=pytz.UTC)
+
+
+@pytest.mark.asyncio
+async def test_change_only_mode_counts_unchanged_rows_as_skipped(monkeypatch):
+    retriever = MagicMock()
+    retriever.with_ingest_time.return_value = retriever
+    retriever.retrieve_active = AsyncMock(
+        return_value=[
+            MagicMock(ticker=f"O:TST{index}", underlying_ticker="TST") for index in range(3)
+        ]
+    )
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.fetch_stock_spot_prices_for_underlyings",
+        AsyncMock(return_value={"TST": 10.0}),
+    )
+    snapshots = [
+        option_api.OptionContractSnapshot.from_dict(
+            {
+                "details": {"ticker": f"O:TST{index}"},
+                "day": {"last_updated": 1_760_000_000_000_000_000, "close": 1.5},
+            }
+        )
+        for index in range(3)
+    ]
+
+    async def pages(underlying_asset, cursor=None):
+        yield option_api.ChainSnapshotPage(snapshots, None)
+
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.iter_chain_snapshot_pages_for_underlying", pages
+    )
+    monkeypatch.setattr("microservices.snapshot_ingestor.ingestor.CHANGE_ONLY_WRITES", True)
+    write = AsyncMock(return_value=(EXPECTED_CHANGED_ROWS, EXPECTED_UNCHANGED_ROWS))
+    monkeypatch.setattr("microservices.snapshot_ingestor.ingestor.write_snapshot_rows", write)
+
+    with collect_run_totals() as totals:
+        await OptionSnapshotsIngestor(option_retriever=retriever).ingest_option_snapshots()
+
+    assert len(write.await_args.args[0]) == EXPECTED_CHANGED_ROWS + EXPECTED_UNCHANGED_ROWS
+    assert (totals.written, totals.skipped) == (EXPECTED_CHANGED_ROWS, EXPECTED_UNCHANGED_ROWS)
+
+
+@pytest.mark.asyncio
+async def test_drain_keeps_segment_when_database_stays_down(monkeypatch, tmp_path):
+    writer = SpoolWriter(tmp_path, snapshot_spool.SPOOL_PREFIX)
+    writer.append_rows([{"ticker": "O:TST1", "last_updated": "2026-10-16T15:59:00+00:00"}])
+    writer.seal()
+    monkeypatch.setattr("microservices.snapshot_ingestor.spool.SPOOL_DRAIN_MAX_ATTEMPTS", 1)
+
+    db = MagicMock()
+    db.query_raw = AsyncMock(side_effect=ClientNotConnectedError())
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+
+    with pytest.raises(ClientNotConnectedError):
+        await snapshot_spool.drain_snapshot_spool(tmp_path)
+
+    assert len(sealed_segments(tmp_path, snapshot_spool.SPOOL_PREFIX)) == 1
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+
+from microservices.benchmarks.startup import (
+    HANDLER_STARTUP_STATEMENTS,
+    format_import_report,
+    measure_startup_ms,
+    parse_importtime,
+    profile_imports,
+)
+
+logger = logging.getLogger(__name__)
+# Budget for importing the Lambda handler module itself.
+MAX_HANDLER_IMPORT_US = 50_000
+HEAVY_PACKAGES = {"prisma", "polygon", "opentelemetry", "pytz", "httpx", "microservices"}
+SAMPLE_IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _weakref
+import time:      2500 |       2620 |   polygon.rest.base
+import time:       300 |       2920 | polygon
+"""
+
+
+def test_parse_importtime_reads_self_cumulative_and_depth():
+    timings = parse_importtime(SAMPLE_IMPORTTIME)
+
+    assert [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings] == [
+        ("_weakref", 120, 120, 2),
+        ("polygon.rest.base", 2500, 2620, 1),
+        ("polygon", 300, 2920, 0),
+    ]
+    report = format_import_report(timings, top=2)
+    assert report.splitlines()[1].startswith("polygon ")
+    assert "polygon" in report.split("\n\n")[1]
+
+
+def test_lambda_init_phase_imports_no_ingestion_stack():
+    statement = (
+        HANDLER_STARTUP_STATEMENTS["init"]
+        + "; import json, sys; print(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", statement], capture_output=True, text=True, check=True
+    )
+
+    assert HEAVY_PACKAGES.isdisjoint(json.loads(completed.stdout))
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="startup benchmarks run only with RUN_BENCHMARKS=1 (make bench-startup)",
+)
+def test_lambda_init_cold_start_report():
+    statement = HANDLER_STARTUP_STATEMENTS["init"]
+    startup_ms = measure_startup_ms(statement)
+    interpreter_ms = measure_startup_ms("pass")
+    logger.info(
+        "Lambda init phase %.1f ms (bare interpreter %.1f ms)\n%s",
+        startup_ms,
+        interpreter_ms,
+        format_import_report(profile_imports(statement)),
+    )
+    handler_import = next(t for t in profile_imports(statement) if t.module == "cli.lambda_handler")
+    assert handler_import.cumulative_us < MAX_HANDLER_IMPORT_US
@@ -0,0 +1,131 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from microservices.analytics import surface as surface_module
+from microservices.analytics.chains import (
+    HISTORY_CHAIN_SQL,
+    HISTORY_SNAPSHOT_TIME_SQL,
+    LATEST_CHAIN_SQL,
+    LATEST_SNAPSHOT_TIME_SQL,
+    ChainArrays,
+)
+from microservices.analytics.surface import SurfaceCache, build_surface, get_surface
+from microservices.shared import decorator
+
+AS_OF = datetime(2026, 10, 16, 20, 0, tzinfo=UTC)
+SPOT = 100.0
+EXPECTED_SURFACE_QUERIES = 5
+
+
+def _rows(days_to_expiry, iv_of_strike, strikes=range(60, 141, 5)):
+    expiration = AS_OF + timedelta(days=days_to_expiry)
+    rows = []
+    for strike in strikes:
+        for contract_type in ("call", "put"):
+            rows.append(
+                {
+                    "ticker": f"O:TST{days_to_expiry}{contract_type[0]}{strike}",
+                    "contract_type": contract_type,
+                    "strike_price": strike,
+                    "expiration_date": expiration.isoformat(),
+                    "last_updated": AS_OF,
+                    "underlying_price": SPOT,
+                    "implied_vol": iv_of_strike(strike),
+                }
+            )
+    return rows
+
+
+def test_build_surface_interpolates_smiles_and_total_variance_between_expiries():
+    rows = _rows(30, lambda strike: 0.2) + _rows(90, lambda strike: 0.3)
+    chain = ChainArrays.from_rows("TST", AS_OF, rows)
+
+    surface = build_surface(chain, moneyness_grid=[0.5, 0.8, 1.0, 1.2], tenor_days=[7, 30, 60, 90])
+
+    assert surface.quotes == len(rows) // 2
+    assert np.isnan(surface.iv[0]).all()  # shorter than the first listed expiry
+    assert np.isnan(surface.iv[:, 0]).all()  # below the lowest quoted strike
+    np.testing.assert_allclose(surface.iv[1, 1:], 0.2)
+    np.testing.assert_allclose(surface.iv[3, 1:], 0.3)
+    expected_60d = np.sqrt((0.2**2 * 30 + 0.3**2 * 90) / 2 / 60)
+    np.testing.assert_allclose(surface.iv[2, 1:], expected_60d)
+
+
+def test_build_surface_uses_out_of_the_money_wings_and_skips_missing_iv():
+    def skew(strike):
+        return 0.25 - 0.001 * (strike - SPOT)
+
+    rows = _rows(30, skew)
+    for row in rows:
+        in_the_money = (row["contract_type"] == "call") == (row["strike_price"] < SPOT)
+        if in_the_money:
+            row["implied_vol"] = 5.0  # would distort the smile if used
+    rows[0]["implied_vol"] = None
+    chain = ChainArrays.from_rows("TST", AS_OF, rows)
+
+    surface = build_surface(chain, moneyness_grid=[0.75, 1.0, 1.25], tenor_days=[30])
+
+    np.testing.assert_allclose(surface.iv[0], [skew(75), skew(100), skew(125)])
+    assert surface.to_dict()["iv"][0][0] == pytest.approx(skew(75))
+
+
+def test_surface_cache_evicts_least_recently_used():
+    cache = SurfaceCache(max_entries=2)
+    first, second, third = MagicMock(), MagicMock(), MagicMock()
+    cache.put(("A", AS_OF), first)
+    cache.put(("B", AS_OF), second)
+    assert cache.get(("A", AS_OF)) is first
+
+    cache.put(("C", AS_OF), third)
+
+    assert cache.get(("B", AS_OF)) is None
+    assert cache.get(("A", AS_OF)) is first
+
+
+@pytest.mark.asyncio
+async def test_get_surface_rebuilds_only_when_a_newer_snapshot_exists(monkeypatch):
+    newer = AS_OF + timedelta(minutes=15)
+    db = MagicMock()
+    db.query_raw = AsyncMock(
+        side_effect=[
+            [{"as_of": AS_OF.isoformat()}],
+            _rows(30, lambda strike: 0.2),
+            [{"as_of": AS_OF.isoformat()}],
+            [{"as_of": newer.isoformat()}],
+            _rows(30, lambda strike: 0.25),
+        ]
+    )
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    monkeypatch.setattr(surface_module, "surface_cache", SurfaceCache())
+
+    first = await get_surface("TST", AS_OF + timedelta(hours=1))
+    cached = await get_surface("TST", AS_OF + timedelta(hours=1))
+    rebuilt = await get_surface("TST", AS_OF + timedelta(hours=1))
+
+    assert cached is first
+    assert rebuilt.as_of == newer and rebuilt is not first
+    assert db.query_raw.await_count == EXPECTED_SURFACE_QUERIES
+
+
+@pytest.mark.asyncio
+async def test_get_surface_before_the_newest_snapshot_reads_the_history(monkeypatch):
+    newer = AS_OF + timedelta(hours=1)
+    history = _rows(30, lambda strike: 0.2)
+    results = {
+        LATEST_SNAPSHOT_TIME_SQL: [{"as_of": newer}],
+        HISTORY_SNAPSHOT_TIME_SQL: [{"as_of": AS_OF}],
+        LATEST_CHAIN_SQL: [row | {"last_updated": newer} for row in history],
+        HISTORY_CHAIN_SQL: history,
+    }
+    db = MagicMock()
+    db.query_raw = AsyncMock(side_effect=lambda sql, *args: results[sql])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    monkeypatch.setattr(surface_module, "surface_cache", SurfaceCache())
+
+    surface = await get_surface("TST", AS_OF + timedelta(minutes=30))
+
+    assert surface.as_of == AS_OF
+    assert [call.args[0] for call in db.query_raw.await_args_list] == list(results)
@@ -0,0 +1,118 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from microservices.analytics.calibration import (
+    ACTIVE_UNDERLYINGS_SQL,
+    WARM_START_SQL,
+    calibrate_smiles,
+)
+from microservices.analytics.chains import LATEST_CHAIN_SQL, ChainArrays
+from microservices.analytics.svi import SviParams, calibrate_chain, svi_total_variance
+from microservices.shared import decorator
+
+AS_OF = datetime(2026, 10, 16, 20, 0, tzinfo=UTC)
+SPOT = 100.0
+EXPIRY_DAYS = (7, 30, 90, 365)
+# Above the injected quote noise of 0.001.
+EXPECTED_MAX_RMSE = 0.002
+EXPECTED_RUN_ID = 12
+
+
+def _true_params(days):
+    years = days / 365
+    return SviParams(a=0.02 * years, b=0.1 * np.sqrt(years) + 0.02, rho=-0.6, m=0.02, sigma=0.15)
+
+
+def _chain_rows(underlying="TST", noise=0.0):
+    rng = np.random.default_rng(7)
+    rows = []
+    for days in EXPIRY_DAYS:
+        years = days / 365
+        expiration = AS_OF + timedelta(days=days)
+        for strike in np.arange(60.0, 150.0, 2.5):
+            variance = svi_total_variance(np.log(strike / SPOT), _true_params(days))
+            iv = float(np.sqrt(variance / years)) + rng.normal(0, noise)
+            for contract_type in ("call", "put"):
+                rows.append(
+                    {
+                        "ticker": f"O:{underlying}{days}{contract_type[0]}{strike}",
+                        "contract_type": contract_type,
+                        "strike_price": strike,
+                        "expiration_date": expiration.isoformat(),
+                        "last_updated": AS_OF.isoformat(),
+                        "underlying_price": SPOT,
+                        "implied_vol": iv,
+                    }
+                )
+    return rows
+
+
+def test_calibrate_chain_recovers_each_expirys_smile():
+    chain = ChainArrays.from_rows("TST", AS_OF, _chain_rows(noise=0.001))
+
+    fits = calibrate_chain(chain)
+
+    assert [round(fit.years_to_expiry * 365) for fit in fits] == list(EXPIRY_DAYS)
+    for fit, days in zip(fits, EXPIRY_DAYS, strict=True):
+        assert fit.rmse < EXPECTED_MAX_RMSE
+        assert not fit.warm_start
+        k = np.log(np.array([0.8, 1.0, 1.2]))
+        np.testing.assert_allclose(
+            svi_total_variance(k, fit.params), svi_total_variance(k, _true_params(days)), rtol=0.05
+        )
+
+
+def test_calibrate_chain_warm_start_converges_in_fewer_steps():
+    chain = ChainArrays.from_rows("TST", AS_OF, _chain_rows())
+    cold = calibrate_chain(chain)
+
+    warm = calibrate_chain(chain, {fit.expiration: fit.params for fit in cold})
+
+    assert all(fit.warm_start for fit in warm)
+    assert sum(fit.iterations for fit in warm) < sum(fit.iterations for fit in cold)
+    for before, after in zip(cold, warm, strict=True):
+        np.testing.assert_allclose(after.params, before.params, atol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_calibrate_smiles_stores_fits_per_run_and_reports_failures(monkeypatch):
+    first_expiry = AS_OF + timedelta(days=EXPIRY_DAYS[0])
+    previous = _true_params(EXPIRY_DAYS[0])._asdict()
+
+    async def query_raw(sql, *args):
+        if sql == ACTIVE_UNDERLYINGS_SQL:
+            return [{"underlying_ticker": "AAA"}, {"underlying_ticker": "BBB"}]
+        if sql == WARM_START_SQL:
+            return [
+                {"underlying_ticker": "AAA", "expiration_date": first_expiry.isoformat()} | previous
+            ]
+        if sql == LATEST_CHAIN_SQL and args[0] == "AAA":
+            return _chain_rows("AAA")
+        raise RuntimeError("chain query failed")
+
+    db = MagicMock()
+    db.query_raw = AsyncMock(side_effect=query_raw)
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+    runs, fits = MagicMock(), MagicMock()
+    runs.create = AsyncMock(return_value=MagicMock(id=EXPECTED_RUN_ID))
+    runs.update = AsyncMock()
+    fits.create_many = AsyncMock()
+
+    with (
+        patch("microservices.analytics.calibration.SmileCalibrationRun.prisma", return_value=runs),
+        patch("microservices.analytics.calibration.SmileFit.prisma", return_value=fits),
+    ):
+        report = await calibrate_smiles(as_of=AS_OF, workers=1)
+
+    assert report.run_id == EXPECTED_RUN_ID
+    assert report.failed == ["BBB"]
+    assert report.fits == len(EXPIRY_DAYS)
+    assert report.warm_starts == 1
+    stored = fits.create_many.await_args.kwargs["data"]
+    assert {row["run_id"] for row in stored} == {12}
+    assert [row["warm_start"] for row in stored] == [True, False, False, False]
+    assert stored[0]["expiration_date"] == first_expiry
+    assert runs.update.await_args.kwargs["data"]["underlyings"] == 1
@@ -0,0 +1,160 @@
+import json
+import math
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytz
+
+from microservices.option_ingestor import api as option_api
+from microservices.shared import decorator
+from microservices.snapshot_ingestor import transform
+from microservices.snapshot_ingestor.ingestor import OptionSnapshotsIngestor
+
+LAST_UPDATED_NS = 1_760_000_000_000_000_000
+CRAWLED_AT = pytz.timezone("America/New_York").localize(datetime(2026, 10, 19, 10, 0))
+SPOT = 10.0
+EXPECTED_FETCHED = 3
+# Strike 12.5 over the 10.0 spot.
+EXPECTED_MONEYNESS = 1.25
+
+
+def _result(ticker, traded=True, greeks=True):
+    result = {"details": {"ticker": ticker}, "open_interest": 7}
+    if traded:
+        result["day"] = {"last_updated": LAST_UPDATED_NS, "close": 1.5, "volume": 3}
+    if greeks:
+        result["greeks"] = {"delta": 0.5, "gamma": 0.1, "theta": -0.2, "vega": 0.3}
+    return result
+
+
+def _page(results, next_url=None):
+    payload = {"results": results, "status": "OK"}
+    if next_url:
+        payload["next_url"] = next_url
+    return json.dumps(payload).encode()
+
+
+def test_transform_chain_page_builds_row_tuples():
+    body = _page([_result("O:A"), _result("O:B", traded=False), _result("O:C", greeks=False)])
+
+    page = transform.transform_chain_page(body, "TST", SPOT, CRAWLED_AT)
+
+    assert page.fetched == EXPECTED_FETCHED
+    assert page.never_active == ["O:B"]
+    rows = [transform.snapshot_row_to_dict(row) for row in page.rows]
+    assert [row["ticker"] for row in rows] == ["O:A", "O:C"]
+    assert rows[0]["underlying_price"] == SPOT
+    assert rows[0]["last_crawled"] == CRAWLED_AT
+    assert (rows[0]["delta"], rows[0]["vega"]) == (0.5, 0.3)
+    create_a, create_c = rows
+    assert "greeks" not in create_a
+    assert [create_c[field] for field in transform.GREEK_FIELDS] == [None] * 4
+
+
+def test_transform_chain_page_derives_contract_terms_from_the_symbol():
+    body = _page([_result("O:TST251017C00012500"), _result("O:TSTX251017P00012500")])
+
+    with_spot, without_spot = (
+        transform.transform_chain_page(body, "TST", spot, CRAWLED_AT) for spot in (SPOT, None)
+    )
+
+    row, adjusted = (transform.snapshot_row_to_dict(row) for row in with_spot.rows)
+    expiry_close = datetime(2025, 10, 18, 3, 59, tzinfo=UTC)  # 23:59 in New York
+    years = (expiry_close.timestamp() - LAST_UPDATED_NS / 1e9) / (365 * 24 * 3600)
+    assert row["moneyness"] == EXPECTED_MONEYNESS
+    assert row["log_moneyness"] == math.log(EXPECTED_MONEYNESS)
+    assert row["years_to_expiry"] == years
+    assert [adjusted[field] for field in transform.CONTRACT_TERM_FIELDS] == [None] * 3
+    no_spot = transform.snapshot_row_to_dict(without_spot.rows[0])
+    assert (no_spot["moneyness"], no_spot["years_to_expiry"]) == (None, years)
+
+
+def test_content_hash_ignores_spot_and_timestamps_but_not_the_quote():
+    moved = _result("O:A")
+    moved["day"] = {**moved["day"], "last_updated": LAST_UPDATED_NS + 60_000_000_000}
+    traded = _result("O:A")
+    traded["day"] = {**traded["day"], "volume": 4}
+    later = CRAWLED_AT.replace(hour=11)
+
+    hashes = [
+        transform.snapshot_row_to_dict(
+            transform.transform_chain_page(_page([result]), "TST", spot, crawled_at).rows[0]
+        )["content_hash"]
+        for result, spot, crawled_at in (
+            (_result("O:A"), 10.0, CRAWLED_AT),
+            (moved, 11.0, later),
+            (traded, 10.0, CRAWLED_AT),
+        )
+    ]
+
+    assert hashes[0] == hashes[1] != hashes[2]
+    assert -(2**63) <= hashes[0] < 2**63
+
+
+def test_raw_chain_pages_follow_next_url_without_decoding():
+    client = MagicMock()
+    client._get.side_effect = [
+        MagicMock(data=_page([], "https://api.polygon.io/v3/snapshot/options/TST?cursor=p2")),
+        MagicMock(data=_page([])),
+    ]
+    client._decode.side_effect = AssertionError("raw pages must not be decoded")
+    fetcher = option_api.Fetcher.__new__(option_api.Fetcher)
+    fetcher.asset = "TST"
+    fetcher.client = client
+
+    pages = list(fetcher.iter_raw_chain_snapshot_pages())
+
+    assert [page.next_cursor for page in pages] == ["/v3/snapshot/options/TST?cursor=p2", None]
+    assert client._get.call_args_list[1].kwargs["path"] == "/v3/snapshot/options/TST?cursor=p2"
+    assert option_api._peek_next_url(b'{"next_url":"https:\\/\\/x\\/y"}') == "https://x/y"
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded:DeprecationWarning")
+async def test_transform_pool_bulk_writes_active_rows_in_page_order(monkeypatch):
+    monkeypatch.setattr(transform, "TRANSFORM_WORKERS", 2)
+    monkeypatch.setattr(transform, "TRANSFORM_START_METHOD", "fork")
+    monkeypatch.setattr("microservices.snapshot_ingestor.ingestor.TRANSFORM_WORKERS", 2)
+    retriever = MagicMock()
+    retriever.with_ingest_time.return_value = retriever
+    retriever.retrieve_active = AsyncMock(
+        return_value=[
+            MagicMock(ticker=ticker, underlying_ticker="TST") for ticker in ("O:1", "O:2", "O:4")
+        ]
+    )
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.fetch_stock_spot_prices_for_underlyings",
+        AsyncMock(return_value={"TST": 10.0}),
+    )
+    bodies = [
+        option_api.RawChainSnapshotPage(_page([_result("O:1"), _result("O:9")]), "/p2"),
+        option_api.RawChainSnapshotPage(_page([_result("O:2", traded=False)]), "/p3"),
+        option_api.RawChainSnapshotPage(_page([_result("O:4")]), None),
+    ]
+
+    async def raw_pages(underlying_asset, cursor=None):
+        for body in bodies:
+            yield body
+
+    monkeypatch.setattr(
+        "microservices.snapshot_ingestor.ingestor.iter_raw_chain_snapshot_pages_for_underlying",
+        raw_pages,
+    )
+    ingestor = OptionSnapshotsIngestor(option_retriever=retriever)
+
+    db = MagicMock()
+    db.query_raw = AsyncMock(return_value=[{"inserted": 1, "refreshed": 0, "unchanged": 0}])
+    monkeypatch.setattr(decorator, "_get_db", lambda: db)
+
+    try:
+        with patch("prisma.models.OptionSnapshot.prisma") as mock_prisma:
+            await ingestor.ingest_option_snapshots()
+    finally:
+        transform.shutdown_transform_pool()
+
+    batches = [
+        [row["ticker"] for row in json.loads(call.args[1])] for call in db.query_raw.await_args_list
+    ]
+    assert batches == [["O:1"], ["O:4"]]
+    mock_prisma.return_value.upsert.assert_not_called()